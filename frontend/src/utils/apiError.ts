@@ -46,6 +46,8 @@ export const ERROR_I18N: Record<string, string> = {
   TRANSCRIPTION_AUDIO_NOT_FOUND: 'errors.transcriptionAudioNotFound',
   TRANSCRIPTION_BATCH_TOO_MANY_FILES: 'errors.transcriptionBatchTooManyFiles',
   TRANSCRIPTION_BATCH_NO_FILES: 'errors.transcriptionBatchNoFiles',
+  TRANSCRIPTION_EXPORT_BUSY: 'errors.transcriptionExportBusy',
+  TRANSCRIPTION_VERSION_CONFLICT: 'errors.transcriptionVersionConflict',
   // Subscriptions
   SUBSCRIPTION_ALREADY_ACTIVE: 'errors.subscriptionAlreadyActive',
   SUBSCRIPTION_NOT_ACTIVE: 'errors.subscriptionNotActive',
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+速率限制 benchmark：舊版（每請求 insert + count_documents）vs 計數器版
+
+對同一個 MongoDB 各跑 N 次「check_rate_limit → record_request」（登入失敗的典型路徑），
+印出每次呼叫的平均 / p95 延遲、跑完後 collection 的文件數。另外模擬爆量：同一 key
+超限後連打，比較開 / 不開本地 token bucket 時實際打到 Mongo 的次數。
+
+測試資料寫在獨立的暫存 DB，跑完即刪，不碰正式資料。
+
+使用方法：
+    python scripts/bench_rate_limit.py [--iterations 2000] [--keys 50] [--burst 500]
+
+環境變數：
+    MONGODB_URL: 預設 mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.database.repositories.rate_limit_repo import RateLimitRepository
+from src.utils.time_utils import get_utc_timestamp
+
+WINDOW = 900
+MAX_REQUESTS = 5
+
+
+class LegacyRateLimit:
+    """舊版實作（對照組）：每請求一筆文件，檢查時 count_documents。"""
+
+    def __init__(self, db):
+        self.collection = db.rate_limits_legacy
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("type", 1), ("key", 1)])
+
+    async def check_rate_limit(self, limit_type, key, max_requests, window_seconds):
+        count = await self.collection.count_documents({
+            "type": limit_type, "key": key,
+            "created_at": {"$gte": get_utc_timestamp() - window_seconds},
+        })
+        return count < max_requests, max(0, max_requests - count)
+
+    async def record_request(self, limit_type, key, ttl_seconds=3600):
+        now = get_utc_timestamp()
+        await self.collection.insert_one({
+            "type": limit_type, "key": key, "created_at": now, "expires_at": now + ttl_seconds,
+        })
+
+
+class CountingCollection:
+    """包一層計數打到 Mongo 的 aggregate 次數（量本地 bucket 擋掉多少）。"""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.aggregates = 0
+
+    def aggregate(self, *args, **kwargs):
+        self.aggregates += 1
+        return self._inner.aggregate(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+async def _steady(repo, iterations: int, keys: int) -> list:
+    latencies = []
+    for i in range(iterations):
+        key = f"10.0.0.{i % keys}"
+        t0 = time.perf_counter()
+        allowed, _ = await repo.check_rate_limit("login_ip", key, 10**9, WINDOW)
+        if allowed:
+            await repo.record_request("login_ip", key, ttl_seconds=WINDOW)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+async def _burst(repo, burst: int) -> int:
+    """同一 key 打到超限後再連打 burst 次，回傳被拒絕的次數。"""
+    denied = 0
+    for _ in range(MAX_REQUESTS + burst):
+        allowed, _ = await repo.check_rate_limit("login_email", "burst@x.com", MAX_REQUESTS, WINDOW)
+        if allowed:
+            await repo.record_request("login_email", "burst@x.com", ttl_seconds=WINDOW)
+        else:
+            denied += 1
+    return denied
+
+
+def _report(name: str, latencies: list, docs: int) -> None:
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{name:<28} avg {statistics.mean(latencies):7.3f} ms   p95 {p95:7.3f} ms   docs {docs}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="速率限制 benchmark（舊版 vs 計數器版）")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[f"bench_rate_limit_{uuid.uuid4().hex[:8]}"]
+    try:
+        legacy = LegacyRateLimit(db)
+        counter = RateLimitRepository(db, local_bucket=False)
+        await legacy.ensure_indexes()
+        await counter.ensure_indexes()
+
+        print(f"steady：{args.iterations} 次 check+record，{args.keys} 個 key")
+        _report("legacy (insert+count)", await _steady(legacy, args.iterations, args.keys),
+                await legacy.collection.count_documents({}))
+        _report("counter ($inc slots)", await _steady(counter, args.iterations, args.keys),
+                await counter.collection.count_documents({}))
+
+        print(f"\nburst：同一 key 超限後再連打 {args.burst} 次")
+        for local_bucket in (False, True):
+            await db.rate_limits.delete_many({"type": "login_email"})
+            repo = RateLimitRepository(db, local_bucket=local_bucket)
+            repo.collection = CountingCollection(repo.collection)
+            t0 = time.perf_counter()
+            denied = await _burst(repo, args.burst)
+            elapsed = (time.perf_counter() - t0) * 1000
+            label = "counter + local bucket" if local_bucket else "counter"
+            print(f"{label:<28} denied {denied:5d}   mongo counts {repo.collection.aggregates:5d}   {elapsed:8.1f} ms")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
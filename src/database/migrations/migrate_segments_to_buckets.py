@@ -0,0 +1,77 @@
+"""把舊的內嵌 segments 陣列遷移成分桶儲存（segment_buckets）。
+
+舊格式：`segments` collection 每個任務一份文件，整個 segments 陣列內嵌其中。
+新格式：`segments` 只留 header，陣列拆到 `segment_buckets`（見 segment_repo.py）。
+
+讀取端兩種格式都認得，所以不必停機：可以先部署新版、再慢慢跑這支遷移。
+冪等：已是分桶格式的文件會被略過；中途中斷重跑即可。
+
+使用方式:
+    python -m src.database.migrations.migrate_segments_to_buckets            # 實際遷移
+    python -m src.database.migrations.migrate_segments_to_buckets --dry-run  # 只統計
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+# 必須在 import config_loader 之前載入 .env（DEPLOY_ENV 在模組層級讀取）
+load_dotenv()
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from src.database.repositories.segment_repo import BUCKET_STORAGE, SegmentRepository
+from src.utils.config_loader import get_parameter
+
+MONGODB_URL = get_parameter(
+    "/transcriber/mongodb-url", fallback_env="MONGODB_URL", default="mongodb://localhost:27017"
+)
+DB_NAME = os.getenv("MONGODB_DB_NAME", "whisper_transcriber")
+
+LEGACY_QUERY = {"storage": {"$ne": BUCKET_STORAGE}, "segments": {"$exists": True}}
+
+
+async def migrate(dry_run: bool = False):
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[DB_NAME]
+    repo = SegmentRepository(db)
+
+    pending = await db.segments.count_documents(LEGACY_QUERY)
+    if pending == 0:
+        print("✅ 沒有需要遷移的 segments（皆已是分桶格式）")
+        client.close()
+        return
+
+    print(f"共 {pending} 個任務的 segments 仍是內嵌格式")
+    if dry_run:
+        print("（dry-run：不寫入）")
+        client.close()
+        return
+
+    await repo.create_indexes()
+    migrated = failed = 0
+    # 只取 _id，逐筆由 repo 讀整份再轉——避免 cursor 一次帶著所有大陣列
+    async for doc in db.segments.find(LEGACY_QUERY, {"_id": 1}):
+        try:
+            await repo.migrate_embedded(doc["_id"])
+            migrated += 1
+        except Exception as e:
+            failed += 1
+            print(f"  ❌ {doc['_id']}: {e}")
+        if migrated and migrated % 100 == 0:
+            print(f"  ... 已遷移 {migrated}/{pending}")
+
+    print(f"✅ 已遷移 {migrated} 個任務，失敗 {failed} 個")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="segments 內嵌陣列 → segment_buckets")
+    parser.add_argument("--dry-run", action="store_true", help="只統計待遷移數量，不寫入")
+    args = parser.parse_args()
+    asyncio.run(migrate(dry_run=args.dry_run))
@@ -0,0 +1,309 @@
+"""後台統計預聚合（analytics_rollups）資料存取層。
+
+`AdminAnalytics.full_report` / `monthly_cost` / `revenue` 原本每次請求都對 tasks /
+summary_logs / orders 跑十幾條全表 aggregation，資料越多 dashboard 越慢、且全壓在
+primary 上。改成事件發生時就把增量 $inc 進預聚合桶，報表只讀桶。
+
+文件形狀（長格式，一個 (metric, period, key) 一筆）：
+    {
+        _id: "<metric>:<period>:<key>",
+        metric: "tasks_daily" | "punct_cost_monthly" | "user_tasks" | ...,
+        period: "2026-10-17"（日桶）| "2026-10"（月桶）| "all"（全期間）,
+        key: 模型名 / user_id / 訂單類型 / None,
+        count, tokens, prompt, completion, total, amount,
+        duration_sum, duration_min, duration_max,   # 依 metric 只用到其中幾個
+        updated_at,
+    }
+長格式而不是「一天一份、欄位名 = 模型名」：模型名含 "."（gemini-2.5-flash），
+當欄位路徑會被 $inc 拆成巢狀。
+
+分桶與原本 aggregation 一致：任務 / 摘要依 created_at 以 UTC+8 分日、分月；
+營收依 paid_at 以 UTC 分月（同原 `$dateToString` 無 timezone）。
+
+寫入來源（皆 best-effort，失敗只記 log，由對帳修正）：
+- 任務建立（intake）       → record_task_created
+- 任務完成（orchestrator） → record_task_completed_sync（worker 無 motor）
+- 摘要生成記錄（summary）   → record_summary_logged
+- 訂單結算（claim_paid 贏家）→ record_payment_settled
+
+漂移（帳號刪除、退款改狀態、寫入失敗、對帳期間的增量）由
+AdminAnalytics.reconcile_rollups 定期以原始 aggregation 重算覆寫。
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+from ...utils.logger import get_logger
+from ...utils.time_utils import get_utc_timestamp
+
+log = get_logger(__name__)
+
+TZ_UTC8 = timezone(timedelta(hours=8))
+
+ALL_PERIOD = "all"
+META_ID = "_meta"
+
+# metric 名稱（讀寫兩端共用，避免字串散落）
+TASKS_DAILY = "tasks_daily"
+SUMMARIES_DAILY = "summaries_daily"
+PUNCT_COST_MONTHLY = "punct_cost_monthly"
+SUMMARY_COST_MONTHLY = "summary_cost_monthly"
+USER_TASKS = "user_tasks"
+USER_SUMMARIES = "user_summaries"
+TASK_DURATION = "task_duration"
+PUNCT_PROVIDER = "punct_provider"
+REVENUE_MONTHLY = "revenue_monthly"
+REVENUE_TOTAL = "revenue_total"
+MODEL_KINDS = ("punctuation", "transcription", "diarization")
+SUMMARY_MODEL = "model_summary"
+
+
+def model_metric(kind: str) -> str:
+    return f"model_{kind}"
+
+
+def rollup_id(metric: str, period: str, key: Optional[str]) -> str:
+    return f"{metric}:{period}:{'' if key is None else key}"
+
+
+def day_utc8(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=TZ_UTC8).strftime("%Y-%m-%d")
+
+
+def month_utc8(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=TZ_UTC8).strftime("%Y-%m")
+
+
+def month_utc(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m")
+
+
+def _inc(metric: str, period: str, key: Optional[str] = None, *,
+         mins: Optional[Dict[str, Any]] = None, maxs: Optional[Dict[str, Any]] = None,
+         **fields) -> Dict[str, Any]:
+    """一筆增量（純資料；apply 時轉成 upsert UpdateOne）。"""
+    return {"metric": metric, "period": period, "key": key,
+            "inc": fields, "min": mins or {}, "max": maxs or {}}
+
+
+# ── 事件 → 增量（純函式，無 Mongo）──────────────────────────────────
+
+def _task_user_id(task: Dict[str, Any]) -> Optional[str]:
+    user = task.get("user")
+    return user.get("user_id") if isinstance(user, dict) else task.get("user_id")
+
+
+def task_created_increments(task: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """任務建立：當日任務數、使用者任務數、標點服務分布。"""
+    created = (task.get("timestamps") or {}).get("created_at") or get_utc_timestamp()
+    provider = (task.get("config") or {}).get("punct_provider")
+    return [
+        _inc(TASKS_DAILY, day_utc8(created), count=1),
+        _inc(USER_TASKS, ALL_PERIOD, _task_user_id(task), count=1),
+        _inc(PUNCT_PROVIDER, ALL_PERIOD, provider, count=1),
+    ]
+
+
+def task_completed_increments(task: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """任務完成：標點 token（依建立日 / 月）、模型使用、使用者 token、處理時長。"""
+    created = (task.get("timestamps") or {}).get("created_at") or get_utc_timestamp()
+    stats = task.get("stats") or {}
+    models = task.get("models") or {}
+    out = []
+
+    usage = stats.get("token_usage")
+    if usage and usage.get("total") is not None:
+        total = usage.get("total") or 0
+        out.append(_inc(TASKS_DAILY, day_utc8(created), tokens=total))
+        out.append(_inc(USER_TASKS, ALL_PERIOD, _task_user_id(task), tokens=total))
+        out.append(_inc(
+            PUNCT_COST_MONTHLY, month_utc8(created), usage.get("model") or "unknown",
+            prompt=usage.get("prompt") or 0, completion=usage.get("completion") or 0,
+            total=total, count=1,
+        ))
+
+    for kind in MODEL_KINDS:
+        if models.get(kind):
+            out.append(_inc(model_metric(kind), ALL_PERIOD, models[kind], count=1))
+
+    duration = stats.get("duration_seconds")
+    if task.get("status") == "completed" and duration is not None:
+        out.append(_inc(
+            TASK_DURATION, ALL_PERIOD, count=1, duration_sum=duration,
+            mins={"duration_min": duration}, maxs={"duration_max": duration},
+        ))
+    return out
+
+
+def summary_logged_increments(log_doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """摘要生成記錄（成功 / 失敗皆計，同原 summary_logs 統計口徑）。"""
+    created = log_doc.get("created_at") or get_utc_timestamp()
+    usage = log_doc.get("token_usage") or {}
+    total = usage.get("total") or 0
+    out = [
+        _inc(SUMMARIES_DAILY, day_utc8(created), count=1, tokens=total),
+        _inc(USER_SUMMARIES, ALL_PERIOD, log_doc.get("user_id"), count=1, tokens=total),
+    ]
+    if log_doc.get("model"):
+        out.append(_inc(SUMMARY_MODEL, ALL_PERIOD, log_doc["model"], count=1))
+    if usage.get("total") is not None:
+        out.append(_inc(
+            SUMMARY_COST_MONTHLY, month_utc8(created), log_doc.get("model") or "unknown",
+            prompt=usage.get("prompt") or 0, completion=usage.get("completion") or 0,
+            total=total, count=1,
+        ))
+    return out
+
+
+def payment_settled_increments(order: Dict[str, Any], paid_at: float) -> List[Dict[str, Any]]:
+    """訂單結算：月營收（UTC 分月）與全期間營收，依訂單類型分 key。"""
+    amount = order.get("amount_twd") or 0
+    order_type = order.get("type")
+    return [
+        _inc(REVENUE_MONTHLY, month_utc(paid_at), order_type, amount=amount, count=1),
+        _inc(REVENUE_TOTAL, ALL_PERIOD, order_type, amount=amount, count=1),
+    ]
+
+
+def _to_update(item: Dict[str, Any], now: int) -> UpdateOne:
+    op: Dict[str, Any] = {
+        "$set": {"metric": item["metric"], "period": item["period"], "key": item["key"], "updated_at": now},
+    }
+    if item["inc"]:
+        op["$inc"] = item["inc"]
+    if item["min"]:
+        op["$min"] = item["min"]
+    if item["max"]:
+        op["$max"] = item["max"]
+    return UpdateOne(
+        {"_id": rollup_id(item["metric"], item["period"], item["key"])}, op, upsert=True,
+    )
+
+
+def _updates(items: Iterable[Dict[str, Any]]) -> List[UpdateOne]:
+    now = get_utc_timestamp()
+    return [_to_update(item, now) for item in items]
+
+
+# ── 同步寫入（worker / orchestrator 用 pymongo）─────────────────────────
+
+def record_task_completed_sync(db, task: Dict[str, Any]) -> bool:
+    """任務完成的增量；以 task 上的 `stats.rollup_recorded` 旗標保證只計一次
+    （SQS 重送 / 重跑同一任務不會重複累加）。回傳是否有寫入。"""
+    try:
+        claimed = db.tasks.update_one(
+            {"_id": task["_id"], "stats.rollup_recorded": {"$ne": True}},
+            {"$set": {"stats.rollup_recorded": True}},
+        )
+        if claimed.modified_count != 1:
+            return False
+        ops = _updates(task_completed_increments(task))
+        if ops:
+            db.analytics_rollups.bulk_write(ops, ordered=False)
+        return True
+    except Exception as e:
+        log.warning("analytics_rollup.task_completed_failed", task_id=task.get("_id"), error=str(e))
+        return False
+
+
+class AnalyticsRollupRepository:
+    """analytics_rollups 的寫入（事件增量 / 對帳覆寫）與報表讀取。"""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.analytics_rollups
+
+    async def create_indexes(self):
+        # 日 / 月桶範圍讀取
+        await self.collection.create_index([("metric", 1), ("period", 1)])
+        # top users：依任務數取前 N
+        await self.collection.create_index([("metric", 1), ("count", -1)])
+
+    # ── 事件增量 ───────────────────────────────────
+
+    async def _apply(self, items: List[Dict[str, Any]], event: str) -> None:
+        if not items:
+            return
+        try:
+            await self.collection.bulk_write(_updates(items), ordered=False)
+        except Exception as e:
+            log.warning("analytics_rollup.apply_failed", rollup_event=event, error=str(e))
+
+    async def record_task_created(self, task: Dict[str, Any]) -> None:
+        await self._apply(task_created_increments(task), "task_created")
+
+    async def record_summary_logged(self, log_doc: Dict[str, Any]) -> None:
+        await self._apply(summary_logged_increments(log_doc), "summary_logged")
+
+    async def record_payment_settled(self, order: Dict[str, Any], paid_at: Optional[float] = None) -> None:
+        paid_at = paid_at or order.get("paid_at") or get_utc_timestamp()
+        await self._apply(payment_settled_increments(order, paid_at), "payment_settled")
+
+    # ── 對帳覆寫 ───────────────────────────────────
+
+    async def replace_metric(
+        self, metric: str, docs: List[Dict[str, Any]], period_gte: Optional[str] = None,
+    ) -> int:
+        """以重算結果覆寫某 metric（period_gte 限定覆寫範圍，範圍外的舊桶保留）。
+
+        docs 每筆需有 period / key 與數值欄位。範圍內重算結果沒有的桶會被刪掉。
+        回傳寫入筆數。
+        """
+        now = get_utc_timestamp()
+        ops, ids = [], []
+        for d in docs:
+            _id = rollup_id(metric, d["period"], d.get("key"))
+            ids.append(_id)
+            ops.append(ReplaceOne(
+                {"_id": _id},
+                {**d, "_id": _id, "metric": metric, "key": d.get("key"), "updated_at": now},
+                upsert=True,
+            ))
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+        stale: Dict[str, Any] = {"metric": metric, "_id": {"$nin": ids}}
+        if period_gte is not None:
+            stale["period"] = {"$gte": period_gte}
+        await self.collection.delete_many(stale)
+        return len(ops)
+
+    async def mark_reconciled(self, **info) -> None:
+        await self.collection.update_one(
+            {"_id": META_ID},
+            {"$set": {"metric": META_ID, "reconciled_at": get_utc_timestamp(), **info}},
+            upsert=True,
+        )
+
+    async def last_reconciled_at(self) -> Optional[int]:
+        doc = await self.collection.find_one({"_id": META_ID}, {"reconciled_at": 1})
+        return doc.get("reconciled_at") if doc else None
+
+    # ── 報表讀取 ───────────────────────────────────
+
+    async def rows(
+        self, metric: str, *, period: Optional[str] = None, period_gte: Optional[str] = None,
+        keys: Optional[List[str]] = None, sort: Optional[List[tuple]] = None, limit: int = 0,
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"metric": metric}
+        if period is not None:
+            query["period"] = period
+        elif period_gte is not None:
+            query["period"] = {"$gte": period_gte}
+        if keys is not None:
+            query["key"] = {"$in": keys}
+        cursor = self.collection.find(query, {"_id": 0, "metric": 0, "updated_at": 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=limit or None)
+
+    async def named_counts(self, metric: str) -> List[Dict[str, Any]]:
+        """全期間 key → count，形狀同原 `_model_group` 結果：[{_id, count}]（count 降冪）。"""
+        rows = await self.rows(metric, period=ALL_PERIOD)
+        out = [{"_id": r.get("key"), "count": r.get("count", 0)} for r in rows if r.get("count")]
+        out.sort(key=lambda r: r["count"], reverse=True)
+        return out
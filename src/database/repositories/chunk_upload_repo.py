@@ -9,6 +9,10 @@
   避免「兩個請求同時搶同一個 completed upload」的 race
 - 過期清理用 `last_activity_at` 而非 `created_at`，讓慢速大檔上傳不會中途被清掉
 - temp_dir 仍存本機 EBS：同一 upload 的所有 chunk 必須打到同一台 EC2（多 EC2 時須 sticky）
+- 每片的 sha256 隨 `add_chunk` 記在 `chunk_hashes.<index>`：chunk 亂序到達、可能打到
+  不同 worker，hash 狀態放 DB 才能在 complete 時直接合成整檔 hash，不必重讀檔案
+- AWS 模式的串流 handoff：`handoff = {s3_upload_id, ext, etags: {<index>: etag}, failed}`，
+  各片的 S3 part ETag 同樣隨 `add_chunk` 原子寫入
 """
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -42,6 +46,8 @@ class ChunkUploadRepository:
         total_size: int,
         total_chunks: int,
         temp_dir: Path,
+        chunk_size: Optional[int] = None,
+        handoff: Optional[dict] = None,
     ) -> None:
         now = datetime.now(timezone.utc)
         await self.collection.insert_one({
@@ -50,7 +56,10 @@ class ChunkUploadRepository:
             "filename": filename,
             "total_size": total_size,
             "total_chunks": total_chunks,
+            "chunk_size": chunk_size,
             "received": [],
+            "chunk_hashes": {},
+            "handoff": handoff,
             "temp_dir": str(temp_dir),
             "status": "uploading",
             "assembled_path": None,
@@ -62,25 +71,46 @@ class ChunkUploadRepository:
         return await self.collection.find_one({"_id": upload_id})
 
     async def add_chunk(
-        self, upload_id: str, user_id: str, chunk_index: int
+        self, upload_id: str, user_id: str, chunk_index: int,
+        chunk_sha256: Optional[str] = None,
+        part_etag: Optional[str] = None,
     ) -> Optional[dict]:
-        """Atomic $addToSet：回傳更新後的 doc；不存在或非該 user 則回 None。"""
+        """Atomic $addToSet：回傳更新後的 doc；不存在或非該 user 則回 None。
+
+        chunk_sha256 / part_etag 一併寫入 `chunk_hashes.<index>` / `handoff.etags.<index>`
+        （同 index 重傳 → 覆寫成最後一次的內容）。
+        """
+        updates = {"last_activity_at": datetime.now(timezone.utc)}
+        if chunk_sha256 is not None:
+            updates[f"chunk_hashes.{chunk_index}"] = chunk_sha256
+        if part_etag is not None:
+            updates[f"handoff.etags.{chunk_index}"] = part_etag
         return await self.collection.find_one_and_update(
             {"_id": upload_id, "user_id": user_id},
             {
                 "$addToSet": {"received": chunk_index},
-                "$set": {"last_activity_at": datetime.now(timezone.utc)},
+                "$set": updates,
             },
             return_document=ReturnDocument.AFTER,
         )
 
-    async def mark_completed(self, upload_id: str, assembled_path: Path) -> None:
+    async def mark_handoff_failed(self, upload_id: str) -> None:
+        """串流 handoff 中途失敗：之後的片不再送 S3，dispatch 退回整檔上傳。"""
+        await self.collection.update_one(
+            {"_id": upload_id, "handoff": {"$type": "object"}},
+            {"$set": {"handoff.failed": True}},
+        )
+
+    async def mark_completed(
+        self, upload_id: str, assembled_path: Path, content_sha256: Optional[str] = None,
+    ) -> None:
         now = datetime.now(timezone.utc)
         await self.collection.update_one(
             {"_id": upload_id},
             {"$set": {
                 "status": "completed",
                 "assembled_path": str(assembled_path),
+                "content_sha256": content_sha256,
                 "completed_at": now,
                 "last_activity_at": now,
             }},
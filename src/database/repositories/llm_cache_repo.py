@@ -0,0 +1,220 @@
+"""LLM 輸出快取（llm_cache）：摘要與標點的 Gemini 回應以內容定址
+
+重新產生摘要、重試失敗任務、同一段錄音再轉一次，送出的 prompt 都一模一樣，
+舊版每次都重打 Gemini。
+
+快取鍵 = sha256(kind, 正規化後的輸入, prompt 模板版本, 主模型, 語言)：
+- 輸入正規化：NFC、統一換行、去行尾與頭尾空白——只差空白的輸入共用同一筆
+- 模板版本 = 以佔位字串代入輸入後整份 prompt 的雜湊；改 prompt 文案即換鍵，
+  舊條目自然失效（不需手動清），再由 TTL 清掉
+- 模型取呼叫端的主模型；實際回應的（可能是備援）模型記在條目內
+- 存原始回應文字，解析 / 後處理照常在呼叫端做
+
+文件形狀：`{_id: key, kind, model, language, template, value, created_at, expires_at}`，
+expires_at 為 datetime，TTL 索引 LLM_CACHE_TTL_SECONDS 後清除。
+
+命中 / 未命中計數兩份：本進程記憶體（local_cache_stats）與 `llm_cache_stats` 的
+每日 × kind 計數文件（後台 /admin/stats/llm-cache 彙總，跨 replica / worker）。
+
+get 可帶 accept（原始回應 → 是否可用）：過不了的條目（解析失敗、輸出膨脹等）
+當成未命中計數，呼叫端重新呼叫 LLM 後以 put 覆寫。
+
+快取一律 best-effort：讀寫失敗只記 log、當成未命中，不影響 LLM 呼叫本身。
+Worker（pymongo 同步）用 SyncLLMCache，Web Server 用 async 的 LLMCacheRepository。
+"""
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING
+
+from ...utils.time_utils import get_utc_timestamp
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+# 條目保留秒數（預設 30 天）
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 86400)))
+
+# 算模板版本時代入輸入位置的佔位字串
+TEMPLATE_SLOT = "\x00{input}\x00"
+
+
+def normalize_input(text: str) -> str:
+    """NFC + 統一換行 + 去行尾 / 頭尾空白"""
+    text = unicodedata.normalize("NFC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def template_version(rendered_template: str) -> str:
+    """以 TEMPLATE_SLOT 代入輸入後的 prompt → 模板版本（prompt 文案一改就變）"""
+    return hashlib.sha256(rendered_template.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(kind: str, text: str, template: str, model: str, language: str) -> str:
+    payload = json.dumps([kind, template, model, language, normalize_input(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry(key: str, kind: str, value: str, model: str, language: str, template: str) -> Dict[str, Any]:
+    now = get_utc_timestamp()
+    return {
+        "_id": key,
+        "kind": kind,
+        "model": model,
+        "language": language,
+        "template": template,
+        "value": value,
+        "created_at": now,
+        "expires_at": datetime.fromtimestamp(now + LLM_CACHE_TTL_SECONDS, tz=timezone.utc),
+    }
+
+
+def _usable(doc: Optional[Dict[str, Any]], accept: Optional[Callable[[str], Any]]) -> Optional[Dict[str, Any]]:
+    if doc is None or accept is None:
+        return doc
+    try:
+        return doc if accept(doc.get("value")) else None
+    except Exception:
+        return None
+
+
+def _stats_update(kind: str, hit: bool):
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return (
+        {"_id": f"{day}:{kind}"},
+        {"$inc": {"hits" if hit else "misses": 1}, "$setOnInsert": {"day": day, "kind": kind}},
+    )
+
+
+class _Counters:
+    """本進程的命中 / 未命中計數（kind → {hits, misses}）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, kind: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(c) for kind, c in self._counts.items()}
+
+
+_counters = _Counters()
+
+
+def local_cache_stats() -> Dict[str, Dict[str, int]]:
+    """本進程啟動以來的命中 / 未命中數"""
+    return _counters.snapshot()
+
+
+class SyncLLMCache:
+    """pymongo 同步版（Worker / 標點處理的執行緒內用）"""
+
+    def __init__(self, db):
+        self.collection = db.llm_cache
+        self.stats = db.llm_cache_stats
+
+    def get(
+        self, key: str, kind: str, accept: Optional[Callable[[str], Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """命中 → 條目（含 value / model）；未命中、讀取失敗或 accept(value) 不成立 → None"""
+        try:
+            doc = self.collection.find_one({"_id": key})
+        except Exception as e:
+            log.warning("llm_cache.read_failed", kind=kind, error=str(e))
+            doc = None
+        doc = _usable(doc, accept)
+        self._record(kind, doc is not None)
+        return doc
+
+    def put(self, key: str, kind: str, value: str, model: str, language: str, template: str) -> None:
+        try:
+            self.collection.replace_one(
+                {"_id": key}, _entry(key, kind, value, model, language, template), upsert=True
+            )
+        except Exception as e:
+            log.warning("llm_cache.write_failed", kind=kind, error=str(e))
+
+    def _record(self, kind: str, hit: bool) -> None:
+        _counters.record(kind, hit)
+        try:
+            self.stats.update_one(*_stats_update(kind, hit), upsert=True)
+        except Exception as e:
+            log.debug("llm_cache.stats_failed", kind=kind, error=str(e))
+
+
+def sync_llm_cache(db) -> Optional[SyncLLMCache]:
+    """LLM_CACHE_ENABLED 時回傳同步快取，否則 None（給 PunctuationProcessor(cache=...)）"""
+    return SyncLLMCache(db) if LLM_CACHE_ENABLED else None
+
+
+class LLMCacheRepository:
+    """LLM 輸出快取的 Web Server 端（async）存取"""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.llm_cache
+        self.stats = db.llm_cache_stats
+
+    async def get(
+        self, key: str, kind: str, accept: Optional[Callable[[str], Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """命中 → 條目（含 value / model）；未命中、讀取失敗或 accept(value) 不成立 → None"""
+        try:
+            doc = await self.collection.find_one({"_id": key})
+        except Exception as e:
+            log.warning("llm_cache.read_failed", kind=kind, error=str(e))
+            doc = None
+        doc = _usable(doc, accept)
+        await self._record(kind, doc is not None)
+        return doc
+
+    async def put(self, key: str, kind: str, value: str, model: str, language: str, template: str) -> None:
+        try:
+            await self.collection.replace_one(
+                {"_id": key}, _entry(key, kind, value, model, language, template), upsert=True
+            )
+        except Exception as e:
+            log.warning("llm_cache.write_failed", kind=kind, error=str(e))
+
+    async def _record(self, kind: str, hit: bool) -> None:
+        _counters.record(kind, hit)
+        try:
+            await self.stats.update_one(*_stats_update(kind, hit), upsert=True)
+        except Exception as e:
+            log.debug("llm_cache.stats_failed", kind=kind, error=str(e))
+
+    async def stats_between(self, start_day: str, end_day: str) -> List[Dict[str, Any]]:
+        """[start_day, end_day]（YYYY-MM-DD）的每日 × kind 命中 / 未命中數，依日期排序"""
+        cursor = self.stats.find(
+            {"day": {"$gte": start_day, "$lte": end_day}}, {"_id": 0}
+        ).sort([("day", ASCENDING), ("kind", ASCENDING)])
+        return [
+            {"day": d["day"], "kind": d["kind"], "hits": d.get("hits", 0), "misses": d.get("misses", 0)}
+            async for d in cursor
+        ]
+
+    async def create_indexes(self):
+        """建立索引"""
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.stats.create_index([("day", ASCENDING), ("kind", ASCENDING)])
+        log.info("llm_cache.indexes.created")
+
+
+def stats_window(days: int) -> Dict[str, str]:
+    """往回 days 天（含今天）的 start_day / end_day"""
+    today = datetime.now(timezone.utc)
+    return {
+        "start_day": (today - timedelta(days=days - 1)).strftime("%Y-%m-%d"),
+        "end_day": today.strftime("%Y-%m-%d"),
+    }
@@ -0,0 +1,91 @@
+"""標點佇列（punctuation_jobs）：GPU Worker → CPU 標點消費端的移交。
+
+GPU Worker 轉錄完成後，把原始 transcript / segments 與 Compact audio 先落地，
+在此排一筆 job 就釋放 GPU；PUNCTUATION（LLM 呼叫、對齊、繁簡轉換）改由便宜的
+CPU 消費端（`python -m src.punctuation_worker` 或 Web Server 的 PunctuationDrain）
+認領後執行。
+
+文件形狀：`{_id: task_id, status: "queued"|"claimed", params, enqueued_at,
+claimed_by, claimed_at, lease_until, attempts}`。
+- 認領走 find_one_and_update 原子改 status，多個消費端搶同一筆只有一個拿得到
+- 消費端中途掛掉：lease_until 過期後可被重新認領；attempts 超過上限由消費端標 failed
+- 同一任務重送（SQS 重送後重跑轉錄）以 `_id` upsert，不會排兩筆
+
+Worker / 消費端都是 pymongo 同步連線，故以 module 層級的 `*_sync` 函式為主；
+async class 只負責建索引與 Web Server 端的查詢。
+"""
+import os
+from typing import Any, Dict, Iterable, Optional, Set
+
+from pymongo import ASCENDING, ReturnDocument
+
+from ...utils.time_utils import get_utc_timestamp
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+QUEUED = "queued"
+CLAIMED = "claimed"
+
+# 認領後多久沒完成視為消費端已死、可被重新認領（秒）；須大於最長的標點處理時間
+PUNCTUATION_LEASE_SECONDS = int(os.getenv("PUNCTUATION_LEASE_SECONDS", "900"))
+# 同一筆最多認領幾次（含第一次）；超過代表每次都把消費端弄掛，直接標 failed
+PUNCTUATION_MAX_ATTEMPTS = int(os.getenv("PUNCTUATION_MAX_ATTEMPTS", "3"))
+
+
+def enqueue_sync(db, task_id: str, params: Dict[str, Any]) -> None:
+    """排入標點佇列（同一 task_id 重排會覆蓋並重置認領狀態）。"""
+    now = get_utc_timestamp()
+    db.punctuation_jobs.replace_one(
+        {"_id": task_id},
+        {"_id": task_id, "status": QUEUED, "params": params,
+         "enqueued_at": now, "attempts": 0},
+        upsert=True,
+    )
+    log.info("punctuation_queue.enqueued", task_id=task_id)
+
+
+def claim_sync(
+    db, consumer: str, lease_seconds: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """認領最早排入的一筆（含 lease 已過期的 claimed）；沒有則回 None。"""
+    now = get_utc_timestamp()
+    lease = lease_seconds or PUNCTUATION_LEASE_SECONDS
+    return db.punctuation_jobs.find_one_and_update(
+        {"$or": [
+            {"status": QUEUED},
+            {"status": CLAIMED, "lease_until": {"$lt": now}},
+        ]},
+        {
+            "$set": {"status": CLAIMED, "claimed_by": consumer,
+                     "claimed_at": now, "lease_until": now + lease},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("enqueued_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def finish_sync(db, task_id: str) -> None:
+    """處理結束（完成 / 失敗 / 取消）後移除。"""
+    db.punctuation_jobs.delete_one({"_id": task_id})
+
+
+class PunctuationQueueRepository:
+    """標點佇列的 Web Server 端（async）存取。"""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.punctuation_jobs
+
+    async def create_indexes(self):
+        # 認領依 status 篩、enqueued_at 排序；lease 過期的 claimed 也走同一條索引
+        await self.collection.create_index([("status", ASCENDING), ("enqueued_at", ASCENDING)])
+
+    async def queued_task_ids(self, task_ids: Iterable[str]) -> Set[str]:
+        """回傳其中仍在標點佇列（排隊中或處理中）的 task_id。"""
+        ids = list(task_ids)
+        if not ids:
+            return set()
+        cursor = self.collection.find({"_id": {"$in": ids}}, {"_id": 1})
+        return {doc["_id"] async for doc in cursor}
@@ -1,18 +1,124 @@
-"""速率限制資料存取層"""
-from typing import Optional, Dict, Any
+"""速率限制資料存取層
+
+舊版每次請求 insert 一筆、檢查時對時間窗 count_documents——每次限流都是一次寫入
+加一次範圍計數，collection 也隨請求量無限長（expires_at 存 int，TTL 索引其實刪不掉）。
+
+改為滑動窗計數器：
+- 時間窗切成約 RATE_LIMIT_SLOTS_PER_WINDOW 格（slot），同一 (type, key, slot) 只有
+  一份文件，記錄一次請求 = 一次 upsert `$inc`
+- 檢查 = 一次 aggregate 加總涵蓋時間窗的 slot；跟舊版相比只會在窗口起點多算最多
+  一格（更嚴不更鬆），60 秒以下的窗 slot 為 1 秒、與舊版逐筆計數完全相同
+- 舊格式（每請求一筆）文件一併計入，部署前後限額不中斷，自然過期後不再出現
+
+另有選配的 in-process token bucket（RATE_LIMIT_LOCAL_BUCKET，預設開）：容量 =
+max_requests、每秒補 max_requests / window，本進程記錄過的請求會扣 token。bucket
+空代表本進程在時間窗內已記錄滿額，Mongo 的全域計數只會更多；此時若 Mongo 剛判定
+過超限，後續的爆量請求直接在本地拒絕、不打 Mongo。放行一律以 Mongo 為準。
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
 from ...utils.time_utils import get_utc_timestamp
 
+# 每個時間窗切幾格；越多越接近逐筆計數，但檢查時要加總的文件也越多
+RATE_LIMIT_SLOTS_PER_WINDOW = int(os.getenv("RATE_LIMIT_SLOTS_PER_WINDOW", "60"))
+# in-process token bucket 快速拒絕
+RATE_LIMIT_LOCAL_BUCKET = os.getenv("RATE_LIMIT_LOCAL_BUCKET", "true").lower() == "true"
+# 本進程最多追蹤幾組 (type, key) 的 bucket；超過淘汰最久沒用的（只影響快速拒絕的命中率）
+RATE_LIMIT_LOCAL_MAX_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "10000"))
+# 本地拒絕需要 Mongo 在幾秒內也判定過超限（別的 replica clear 的最大落差）
+RATE_LIMIT_LOCAL_CONFIRM_SECONDS = float(os.getenv("RATE_LIMIT_LOCAL_CONFIRM_SECONDS", "5"))
+
+
+def slot_seconds(window_seconds: int) -> int:
+    """時間窗對應的 slot 長度（秒），至少 1 秒。"""
+    return max(1, int(window_seconds) // max(1, RATE_LIMIT_SLOTS_PER_WINDOW))
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "pending", "denied_at")
+
+    def __init__(self, now: float):
+        self.tokens: Optional[float] = None  # None = 尚未結算過（滿額）
+        self.updated_at = now
+        self.pending = 0  # record 後尚未扣掉的次數
+        self.denied_at: Optional[float] = None  # 最近一次 Mongo 判定超限的時間
+
+
+class _LocalBuckets:
+    """本進程的 token bucket，key = (limit_type, key)。
+
+    bucket 只在檢查時才知道容量與補充速率（record 不帶 max_requests），故記錄時
+    先累積待扣次數，下次檢查時再結算（先補再扣，只會比真實 bucket 寬鬆）。
+
+    只有「token 不足」且「RATE_LIMIT_LOCAL_CONFIRM_SECONDS 內 Mongo 也判定超限」才在
+    本地拒絕：別的 replica 的 clear_records（例如登入成功清失敗次數）本地看不到，
+    確認期限把這種落差限制在幾秒內。
+    """
+
+    def __init__(self, max_keys: int, confirm_seconds: float):
+        self._max_keys = max_keys
+        self._confirm_seconds = confirm_seconds
+        self._buckets: "OrderedDict[Tuple[str, str], _Bucket]" = OrderedDict()
+
+    def _touch(self, limit_type: str, key: str, now: float) -> _Bucket:
+        bucket = self._buckets.get((limit_type, key))
+        if bucket is None:
+            bucket = self._buckets[(limit_type, key)] = _Bucket(now)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((limit_type, key))
+        return bucket
+
+    def allows(self, limit_type: str, key: str, max_requests: int, window_seconds: int) -> bool:
+        """False = 可直接拒絕；沒把握一律回 True 交給 Mongo 判斷。"""
+        bucket = self._buckets.get((limit_type, key))
+        if bucket is None:
+            return True
+        now = time.monotonic()
+        self._buckets.move_to_end((limit_type, key))
+        capacity = float(max_requests)
+        tokens = capacity if bucket.tokens is None else bucket.tokens
+        tokens += (now - bucket.updated_at) * capacity / max(1, window_seconds)
+        bucket.tokens = max(0.0, min(capacity, tokens) - bucket.pending)
+        bucket.updated_at = now
+        bucket.pending = 0
+        if bucket.tokens >= 1:
+            return True
+        confirmed = bucket.denied_at is not None and now - bucket.denied_at < self._confirm_seconds
+        return not confirmed
+
+    def record(self, limit_type: str, key: str) -> None:
+        self._touch(limit_type, key, time.monotonic()).pending += 1
+
+    def observe(self, limit_type: str, key: str, allowed: bool) -> None:
+        """記下 Mongo 的判定結果（只對已追蹤的 key）。"""
+        bucket = self._buckets.get((limit_type, key))
+        if bucket is not None:
+            bucket.denied_at = None if allowed else time.monotonic()
+
+    def clear(self, limit_type: str, key: str) -> None:
+        self._buckets.pop((limit_type, key), None)
+
+
+_local = _LocalBuckets(RATE_LIMIT_LOCAL_MAX_KEYS, RATE_LIMIT_LOCAL_CONFIRM_SECONDS)
+
 
 class RateLimitRepository:
     """速率限制資料庫操作
 
-    使用 MongoDB 存儲速率限制記錄，支援多實例部署。
-    記錄會自動過期清理（透過 MongoDB TTL 索引）。
+    使用 MongoDB 存儲速率限制計數，支援多實例部署。
+    計數文件會自動過期清理（透過 MongoDB TTL 索引）。
     """
 
-    def __init__(self, db):
+    def __init__(self, db, local_bucket: Optional[bool] = None):
         self.db = db
         self.collection = db.rate_limits
+        self._local = _local if (RATE_LIMIT_LOCAL_BUCKET if local_bucket is None else local_bucket) else None
 
     async def ensure_indexes(self):
         """確保必要的索引存在（應用啟動時呼叫）"""
@@ -45,13 +151,23 @@ class RateLimitRepository:
         """
         now = get_utc_timestamp()
         window_start = now - window_seconds
+        step = slot_seconds(window_seconds)
+        first_slot = (window_start // step) * step
 
-        count = await self.collection.count_documents({
-            "type": limit_type,
-            "key": key,
-            "created_at": {"$gte": window_start}
-        })
-        return count
+        cursor = self.collection.aggregate([
+            {"$match": {
+                "type": limit_type,
+                "key": key,
+                "$or": [
+                    {"start": {"$gte": first_slot}},
+                    {"created_at": {"$gte": window_start}},  # 舊格式：一請求一筆
+                ],
+            }},
+            {"$group": {"_id": None, "n": {"$sum": {"$ifNull": ["$count", 1]}}}},
+        ])
+        async for doc in cursor:
+            return int(doc["n"])
+        return 0
 
     async def record_request(
         self,
@@ -64,15 +180,28 @@ class RateLimitRepository:
         Args:
             limit_type: 限制類型
             key: 限制的鍵值
-            ttl_seconds: 記錄保留時間（秒），預設 1 小時
+            ttl_seconds: 記錄保留時間（秒），預設 1 小時；同時決定 slot 長度，
+                         應與檢查時的 window_seconds 相同
         """
         now = get_utc_timestamp()
-        await self.collection.insert_one({
-            "type": limit_type,
-            "key": key,
-            "created_at": now,
-            "expires_at": now + ttl_seconds  # MongoDB TTL 會自動刪除
-        })
+        step = slot_seconds(ttl_seconds)
+        start = (now // step) * step
+        await self.collection.update_one(
+            {"_id": f"{limit_type}:{step}:{start}:{key}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "type": limit_type,
+                    "key": key,
+                    "start": start,
+                    # slot 最後一筆請求也要保留滿 ttl；datetime 才會被 TTL 索引清掉
+                    "expires_at": datetime.fromtimestamp(start + step + ttl_seconds, tz=timezone.utc),
+                },
+            },
+            upsert=True,
+        )
+        if self._local:
+            self._local.record(limit_type, key)
 
     async def check_rate_limit(
         self,
@@ -92,9 +221,13 @@ class RateLimitRepository:
         Returns:
             (是否允許, 剩餘次數)
         """
+        if self._local and not self._local.allows(limit_type, key, max_requests, window_seconds):
+            return False, 0
         count = await self.get_request_count(limit_type, key, window_seconds)
         remaining = max(0, max_requests - count)
         allowed = count < max_requests
+        if self._local:
+            self._local.observe(limit_type, key, allowed)
         return allowed, remaining
 
     async def clear_records(self, limit_type: str, key: str) -> None:
@@ -103,6 +236,8 @@ class RateLimitRepository:
             "type": limit_type,
             "key": key
         })
+        if self._local:
+            self._local.clear(limit_type, key)
 
     async def check_cooldown(
         self,
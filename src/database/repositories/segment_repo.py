@@ -1,55 +1,270 @@
-"""Segments 資料存取層"""
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-from motor.motor_asyncio import AsyncIOMotorDatabase
+"""Segments 資料存取層（分桶儲存）
+
+舊版整份 segments 陣列塞在 `segments` collection 的單一文件：超長錄音逼近 BSON
+16 MB 上限，且任何讀取 / 編輯都要載入整份逐字稿。
+
+改為固定筆數分桶：
+- `segments`（header）：`{_id: task_id, storage: "buckets", segment_count,
+  bucket_size, bucket_count, created_at, updated_at}`——不再帶陣列
+- `segment_buckets`：`{_id: "<task_id>:<bucket>", task_id, bucket, start_index,
+  count, start_time, end_time, segments: [...]}`，(task_id, bucket) unique index
+- 範圍讀取只載入涵蓋的 buckets；單段編輯只 `$set` 所在 bucket 的陣列元素
+- `apply_patch` 的拆段 / 合併只改所在 bucket 的陣列，其後 bucket 只 `$inc start_index`；
+  bucket 因此不再固定筆數，index → bucket 一律以 start_index / count 定位
+- header 的 `version` 每次寫入 +1，供 patch 的樂觀鎖
+
+舊格式（header 內嵌 `segments` 陣列）讀取時照常回傳；部分更新前先就地轉成分桶，
+整批轉換見 `migrations/migrate_segments_to_buckets.py`。
+
+Worker（pymongo 同步、無 motor）透過 module 層級的 `save_segments_sync` /
+`load_segments_sync` 使用同一套格式。
+"""
+import os
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Awaitable, Callable
+
+from pymongo import ASCENDING, ReplaceOne, ReturnDocument
 
 from ...utils.time_utils import get_utc_timestamp
 from src.utils.logger import get_logger
 
 log = get_logger(__name__)
 
+# 每個 bucket 的 segment 筆數（一筆約數百 bytes，200 筆遠低於 16 MB）；env 可覆寫。
+# 只影響之後寫入的任務——既有任務的 bucket_size 記在 header 上。
+SEGMENT_BUCKET_SIZE = int(os.getenv("SEGMENT_BUCKET_SIZE", "200"))
+# iter_segments 每次向 Mongo 取幾個 bucket（串流匯出時常駐記憶體的上限）
+SEGMENT_STREAM_BUCKET_BATCH = int(os.getenv("SEGMENT_STREAM_BUCKET_BATCH", "4"))
+
+# 拆段讓某個 bucket 超過 bucket_size 的幾倍時整份重新分桶
+SEGMENT_BUCKET_REBALANCE_FACTOR = int(os.getenv("SEGMENT_BUCKET_REBALANCE_FACTOR", "4"))
+BUCKET_STORAGE = "buckets"
+
+# patch 操作可改的欄位
+_OP_FIELDS = {"edit": ("text", "speaker"), "retime": ("start", "end")}
+
+
+class SegmentVersionConflict(Exception):
+    """patch 的 base_version 不是目前版本（別處已改過）"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"segment version conflict (current: {current_version})")
+        self.current_version = current_version
+
+
+def validate_patch_ops(ops: List[Dict[str, Any]], segment_count: int) -> None:
+    """動資料前先檢查 index 與參數（依序模擬 segment 數的變化）；不合法拋 ValueError / IndexError"""
+    count = segment_count
+    for n, op in enumerate(ops):
+        kind, index = op.get("op"), op.get("index")
+        if kind not in ("edit", "split", "merge", "retime") or not isinstance(index, int):
+            raise ValueError(f"op #{n}: invalid op")
+        last = count - 2 if kind == "merge" else count - 1
+        if not 0 <= index <= last:
+            raise IndexError(f"op #{n}: segment index out of range: {index}")
+        if kind == "split":
+            if not isinstance(op.get("at"), int) or op["at"] <= 0:
+                raise ValueError(f"op #{n}: split requires a positive `at`")
+            count += 1
+        elif kind == "merge":
+            count -= 1
+        elif kind == "retime":
+            start, end = op.get("start"), op.get("end")
+            if start is None or end is None or not 0 <= start <= end:
+                raise ValueError(f"op #{n}: retime requires 0 <= start <= end")
+
+
+def patch_window(ops: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """依序套用 ops 可能碰到的原始 index 區間 [start, end)（replay_patch_ops 的輸入範圍）
+
+    所有操作都在 min(index) 之後，該位置之前的 segment 不受影響；後面的操作 index
+    最多因前面的 merge 往後對應 merge 次數，merge 另需下一段。
+    """
+    indices = [op["index"] for op in ops]
+    merges = sum(1 for op in ops if op["op"] == "merge")
+    return min(indices), max(indices) + merges + 2
+
+
+def split_segment(segment: Dict[str, Any], op: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """split 操作 → 前後兩段；`at` / `time` 超出該段拋 ValueError"""
+    text = segment.get("text") or ""
+    at = op["at"]
+    if not 0 < at < len(text):
+        raise ValueError(f"split offset {at} out of range for segment {op['index']}")
+    start, end = segment.get("start") or 0, segment.get("end") or 0
+    t = op.get("time")
+    if t is None:
+        t = round(start + (end - start) * at / len(text), 3)  # 依字數比例切時間
+    elif not start <= t <= end:
+        raise ValueError(f"split time {t} outside segment {op['index']}")
+    return [{**segment, "text": text[:at], "end": t}, {**segment, "text": text[at:], "start": t}]
+
+
+def merge_segments(first: Dict[str, Any], second: Dict[str, Any], op: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **first,
+        "text": op["text"] if op.get("text") is not None else (first.get("text") or "") + (second.get("text") or ""),
+        "end": max(first.get("end") or 0, second.get("end") or 0),
+    }
+
+
+def replay_patch_ops(ops: List[Dict[str, Any]], window: List[Dict[str, Any]], offset: int) -> None:
+    """在 window（原始 index offset 起的 segments 複本）上依序重播 ops，檢查需要內容才能判斷的參數
+
+    split 的 `at` / `time` 取決於前面操作改過後的文字與時間，只能重播才驗得到；
+    apply_patch 在搶版本號前先跑一遍，不合法拋 ValueError，資料一筆都不動。
+    """
+    segments = [dict(s) for s in window]
+    for op in ops:
+        position = op["index"] - offset
+        if not 0 <= position < len(segments):
+            raise IndexError(f"segment index out of range: {op['index']}")
+        kind = op["op"]
+        if kind == "split":
+            segments[position:position + 1] = split_segment(segments[position], op)
+        elif kind == "merge":
+            if position + 1 >= len(segments):
+                raise IndexError(f"segment index out of range: {op['index'] + 1}")
+            segments[position:position + 2] = [merge_segments(segments[position], segments[position + 1], op)]
+        else:
+            segments[position].update({k: op[k] for k in _OP_FIELDS[kind] if op.get(k) is not None})
+
+
+# ── 格式（async repo 與 worker 同步寫入共用）────────────────────
+
+def bucket_id(task_id: str, bucket: int) -> str:
+    return f"{task_id}:{bucket:06d}"
+
+
+def _bucket_doc(task_id: str, bucket: int, start_index: int, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "_id": bucket_id(task_id, bucket),
+        "task_id": task_id,
+        "bucket": bucket,
+        "start_index": start_index,
+        "count": len(segments),
+        "start_time": min((s.get("start") or 0) for s in segments) if segments else None,
+        "end_time": max((s.get("end") or 0) for s in segments) if segments else None,
+        "segments": segments,
+    }
+
+
+def build_segment_buckets(
+    task_id: str, segments: List[Dict[str, Any]], bucket_size: Optional[int] = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """segments 陣列 → (header $set 欄位, bucket 文件列表)。"""
+    bucket_size = max(1, bucket_size or SEGMENT_BUCKET_SIZE)
+    buckets = [
+        _bucket_doc(task_id, b, start, segments[start:start + bucket_size])
+        for b, start in enumerate(range(0, len(segments), bucket_size))
+    ]
+    header = {
+        "storage": BUCKET_STORAGE,
+        "segment_count": len(segments),
+        "bucket_size": bucket_size,
+        "bucket_count": len(buckets),
+    }
+    return header, buckets
+
+
+def _header_update(header: Dict[str, Any], now: int) -> Dict[str, Any]:
+    return {
+        "$set": {**header, "updated_at": now},
+        "$setOnInsert": {"created_at": now},
+        "$unset": {"segments": ""},
+        "$inc": {"version": 1},
+    }
+
+
+def _range_filter(task_id: str, header: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    """index 區間 [start, end) 涵蓋的 bucket 查詢條件（bucket 筆數不固定，以 start_index / count 判斷）。"""
+    return {
+        "task_id": task_id,
+        "bucket": {"$lt": header["bucket_count"]},
+        "start_index": {"$lt": end},
+        "$expr": {"$gt": [{"$add": ["$start_index", "$count"]}, start]},
+    }
+
+
+def assemble_segments(buckets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for doc in sorted(buckets, key=lambda d: d["bucket"]):
+        out.extend(doc.get("segments") or [])
+    return out
+
+
+def is_bucketed(header: Optional[Dict[str, Any]]) -> bool:
+    return bool(header) and header.get("storage") == BUCKET_STORAGE
+
+
+def save_segments_sync(db, task_id: str, segments: List[Dict[str, Any]]) -> None:
+    """pymongo 同步版整批寫入（Worker / Orchestrator 用）。"""
+    header, buckets = build_segment_buckets(task_id, segments)
+    if buckets:
+        db.segment_buckets.bulk_write(
+            [ReplaceOne({"_id": b["_id"]}, b, upsert=True) for b in buckets], ordered=False
+        )
+    db.segment_buckets.delete_many({"task_id": task_id, "bucket": {"$gte": len(buckets)}})
+    db.segments.update_one({"_id": task_id}, _header_update(header, get_utc_timestamp()), upsert=True)
+
+
+def load_segments_sync(db, task_id: str) -> Optional[List[Dict[str, Any]]]:
+    """pymongo 同步版讀取整份 segments（相容舊的內嵌格式）；不存在 → None。"""
+    header = db.segments.find_one({"_id": task_id})
+    if not header:
+        return None
+    if not is_bucketed(header):
+        return header.get("segments") or []
+    return assemble_segments(list(db.segment_buckets.find(
+        {"task_id": task_id, "bucket": {"$lt": header["bucket_count"]}}
+    )))
+
 
 class SegmentRepository:
     """Segments 資料存取層"""
 
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db):
         self.db = db
         self.collection = db.segments
+        self.buckets = db.segment_buckets
 
-    async def create(self, task_id: str, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """建立 segments
+    # ── 整批寫入 ──────────────────────────────────────
+
+    async def replace_all(self, task_id: str, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """以新的 segments 陣列整批取代（分桶寫入、清掉多餘的舊 bucket）
 
         Args:
-            task_id: 任務 ID（作為 _id）
+            task_id: 任務 ID
             segments: Segments 陣列
 
         Returns:
-            建立的文檔
+            寫入後的 header（含 version / updated_at）
         """
-        now = get_utc_timestamp()
-        doc = {
-            "_id": task_id,
-            "segments": segments,
-            "segment_count": len(segments),
-            "created_at": now,
-            "updated_at": now
-        }
-        await self.collection.insert_one(doc)
-        return doc
+        header, buckets = build_segment_buckets(task_id, segments)
+        if buckets:
+            await self.buckets.bulk_write(
+                [ReplaceOne({"_id": b["_id"]}, b, upsert=True) for b in buckets], ordered=False
+            )
+        await self.buckets.delete_many({"task_id": task_id, "bucket": {"$gte": len(buckets)}})
+        # header 最後寫：讀取端以 header 的 bucket_count 為準，不會讀到新舊混雜的尾端
+        return await self.collection.find_one_and_update(
+            {"_id": task_id}, _header_update(header, get_utc_timestamp()),
+            projection={"segments": 0}, upsert=True, return_document=ReturnDocument.AFTER,
+        )
 
-    async def get_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """根據 task_id 獲取 segments
+    async def create(self, task_id: str, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """建立 segments
 
         Args:
             task_id: 任務 ID
+            segments: Segments 陣列
 
         Returns:
-            Segments 文檔，不存在則返回 None
+            header 欄位
         """
-        return await self.collection.find_one({"_id": task_id})
+        return await self.replace_all(task_id, segments)
 
     async def update(self, task_id: str, segments: List[Dict[str, Any]]) -> bool:
-        """更新 segments
+        """更新 segments（整批取代）
 
         Args:
             task_id: 任務 ID
@@ -58,20 +273,347 @@ class SegmentRepository:
         Returns:
             是否更新成功
         """
-        result = await self.collection.update_one(
-            {"_id": task_id},
-            {
-                "$set": {
-                    "segments": segments,
-                    "segment_count": len(segments),
-                    "updated_at": get_utc_timestamp()
-                }
-            }
+        await self.replace_all(task_id, segments)
+        return True
+
+    # ── 讀取 ──────────────────────────────────────────
+
+    async def get_header(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """只讀 header（segment_count / bucket 資訊），不載入任何 segment"""
+        return await self.collection.find_one({"_id": task_id}, {"segments": 0})
+
+    async def get_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """根據 task_id 獲取 segments（組合成舊的單一文件形狀，含完整 `segments` 陣列）
+
+        Args:
+            task_id: 任務 ID
+
+        Returns:
+            Segments 文檔，不存在則返回 None
+        """
+        doc = await self.collection.find_one({"_id": task_id})
+        if not doc or not is_bucketed(doc):
+            return doc
+        doc["segments"] = await self._read_buckets(task_id, 0, doc["bucket_count"])
+        return doc
+
+    async def get_segments(self, task_id: str) -> Optional[List[Dict[str, Any]]]:
+        """整份 segments 陣列；不存在 → None"""
+        doc = await self.get_by_task_id(task_id)
+        return None if doc is None else (doc.get("segments") or [])
+
+    async def get_range(self, task_id: str, start: int, end: int) -> Optional[List[Dict[str, Any]]]:
+        """index 區間 [start, end) 的 segments，只載入涵蓋的 buckets
+
+        Returns:
+            segments 子陣列；任務沒有 segments → None
+        """
+        doc = await self.collection.find_one({"_id": task_id})
+        if not doc:
+            return None
+        start = max(0, start)
+        if not is_bucketed(doc):
+            return (doc.get("segments") or [])[start:max(start, end)]
+        end = min(end, doc["segment_count"])
+        if end <= start:
+            return []
+        buckets = await self.buckets.find(_range_filter(task_id, doc, start, end)).to_list(length=None)
+        if not buckets:
+            return []
+        offset = min(b["start_index"] for b in buckets)
+        return assemble_segments(buckets)[start - offset:end - offset]
+
+    async def get_time_range(
+        self, task_id: str, start_time: float, end_time: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        """與時間區間 [start_time, end_time) 重疊的 segments（bucket 以 start/end_time 預篩）"""
+        doc = await self.collection.find_one({"_id": task_id})
+        if not doc:
+            return None
+        if is_bucketed(doc):
+            cursor = self.buckets.find({
+                "task_id": task_id,
+                "bucket": {"$lt": doc["bucket_count"]},
+                "start_time": {"$lt": end_time},
+                "end_time": {"$gt": start_time},
+            })
+            segments = assemble_segments(await cursor.to_list(length=None))
+        else:
+            segments = doc.get("segments") or []
+        return [
+            s for s in segments
+            if (s.get("start") or 0) < end_time and (s.get("end") or 0) > start_time
+        ]
+
+    async def index_at_time(self, task_id: str, t: float, header: Dict[str, Any]) -> int:
+        """第一個 end > t 的 segment index（t 所在或之後的第一段）；全部在 t 之前 → segment_count
+
+        header 須為分桶格式。bucket 以 end_time 預篩，只掃描第一個可能命中的 bucket 起。
+        """
+        return await self._first_index(task_id, header, t, lambda s: (s.get("end") or 0) > t)
+
+    async def index_starting_from(self, task_id: str, t: float, header: Dict[str, Any]) -> int:
+        """第一個 start >= t 的 segment index；沒有 → segment_count（header 須為分桶格式）"""
+        return await self._first_index(task_id, header, t, lambda s: (s.get("start") or 0) >= t)
+
+    async def _first_index(self, task_id: str, header: Dict[str, Any], t: float, predicate) -> int:
+        # end >= start，故 predicate 命中的 segment 所在 bucket 必有 end_time >= t
+        cursor = self.buckets.find(
+            {"task_id": task_id, "bucket": {"$lt": header["bucket_count"]}, "end_time": {"$gte": t}},
+            {"start_index": 1, "segments.start": 1, "segments.end": 1},
+        ).sort("bucket", ASCENDING).batch_size(SEGMENT_STREAM_BUCKET_BATCH)
+        async for bucket in cursor:
+            for offset, segment in enumerate(bucket.get("segments") or []):
+                if predicate(segment):
+                    return bucket["start_index"] + offset
+        return header["segment_count"]
+
+    async def iter_segments(self, task_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """依順序逐筆 yield 整份 segments，一次只向 Mongo 取 SEGMENT_STREAM_BUCKET_BATCH 個 bucket
+
+        舊的內嵌格式整份在 header 裡，照常逐筆 yield。不存在 → 不 yield 任何東西。
+        """
+        doc = await self.collection.find_one({"_id": task_id})
+        if not doc:
+            return
+        if not is_bucketed(doc):
+            for segment in doc.get("segments") or []:
+                yield segment
+            return
+        cursor = self.buckets.find(
+            {"task_id": task_id, "bucket": {"$lt": doc["bucket_count"]}}
+        ).sort("bucket", ASCENDING).batch_size(SEGMENT_STREAM_BUCKET_BATCH)
+        async for bucket in cursor:
+            for segment in bucket.get("segments") or []:
+                yield segment
+
+    async def _read_buckets(self, task_id: str, first: int, last: int) -> List[Dict[str, Any]]:
+        cursor = self.buckets.find({"task_id": task_id, "bucket": {"$gte": first, "$lt": last}})
+        return assemble_segments(await cursor.to_list(length=None))
+
+    # ── 部分更新 ──────────────────────────────────────
+
+    async def update_segments(self, task_id: str, updates: Dict[int, Dict[str, Any]]) -> int:
+        """以 index → 新 segment 局部更新；每個受影響的 bucket 一次 update
+
+        舊的內嵌格式先就地轉成分桶。超出範圍的 index 拋 IndexError（不改任何資料）。
+
+        Returns:
+            實際修改的 bucket 數
+        """
+        if not updates:
+            return 0
+        header = await self.migrate_embedded(task_id)
+        if header is None:
+            raise KeyError(task_id)
+        count = header["segment_count"]
+        bad = [i for i in updates if not 0 <= i < count]
+        if bad:
+            raise IndexError(f"segment index out of range: {sorted(bad)[:5]}")
+
+        located = await self._locate_many(task_id, header, list(updates))
+        by_bucket: Dict[int, Dict[str, Any]] = {}
+        for index, segment in updates.items():
+            bucket, position = located[index]
+            by_bucket.setdefault(bucket, {})[f"segments.{position}"] = segment
+
+        modified = 0
+        for bucket, fields in sorted(by_bucket.items()):
+            result = await self.buckets.update_one({"_id": bucket_id(task_id, bucket)}, {"$set": fields})
+            modified += result.modified_count
+            await self._refresh_bucket_bounds(task_id, bucket)
+        await self.collection.update_one(
+            {"_id": task_id}, {"$set": {"updated_at": get_utc_timestamp()}, "$inc": {"version": 1}}
+        )
+        return modified
+
+    async def _locate_many(
+        self, task_id: str, header: Dict[str, Any], indices: List[int]
+    ) -> Dict[int, Tuple[int, int]]:
+        """index → (bucket, 陣列位置)；只讀涵蓋範圍內 bucket 的 start_index / count"""
+        cursor = self.buckets.find(
+            _range_filter(task_id, header, min(indices), max(indices) + 1),
+            {"bucket": 1, "start_index": 1, "count": 1},
+        ).sort("bucket", ASCENDING)
+        metas = [m async for m in cursor if m.get("count")]
+        located: Dict[int, Tuple[int, int]] = {}
+        for index in indices:
+            for meta in metas:
+                if meta["start_index"] <= index < meta["start_index"] + meta["count"]:
+                    located[index] = (meta["bucket"], index - meta["start_index"])
+                    break
+            else:
+                raise IndexError(f"segment index out of range: {index}")
+        return located
+
+    async def _segment_at(self, task_id: str, bucket: int, position: int) -> Dict[str, Any]:
+        doc = await self.buckets.find_one(
+            {"_id": bucket_id(task_id, bucket)}, {"segments": {"$slice": [position, 1]}}
+        )
+        return dict(((doc or {}).get("segments") or [{}])[0])
+
+    async def _shift_after(self, task_id: str, bucket: int, delta: int) -> None:
+        """拆段 / 合併後，其後所有 bucket 的 start_index 平移（不動陣列）"""
+        await self.buckets.update_many(
+            {"task_id": task_id, "bucket": {"$gt": bucket}}, {"$inc": {"start_index": delta}}
+        )
+
+    async def _splice_bucket(
+        self, task_id: str, bucket: int, position: int, remove: int, insert: List[Dict[str, Any]]
+    ) -> None:
+        """在 server 端把 bucket 陣列 [position, position + remove) 換成 insert（pipeline update）"""
+        await self.buckets.update_one({"_id": bucket_id(task_id, bucket)}, [{"$set": {
+            "segments": {"$concatArrays": [
+                {"$slice": ["$segments", position]},
+                {"$literal": insert},
+                {"$slice": ["$segments", position + remove, {"$max": [1, {"$size": "$segments"}]}]},
+            ]},
+            "count": {"$add": ["$count", len(insert) - remove]},
+        }}])
+
+    # ── patch（樂觀鎖 + 逐段操作）────────────────────────
+
+    async def apply_patch(
+        self,
+        task_id: str,
+        base_version: int,
+        ops: List[Dict[str, Any]],
+        before_write: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """依序套用 segment 操作（edit / split / merge / retime），回傳更新後的 header
+
+        - base_version 與目前 header 的 version 不同 → SegmentVersionConflict（不改任何資料）
+        - 操作的 index 以「前面操作套用後」的狀態為準（同 JSON Patch）；index / 參數（含
+          split 的 `at` / `time`，在受影響範圍的複本上重播）不合法，在搶版本號前就拋
+          ValueError / IndexError
+        - before_write：搶到版本號後、寫 segments 前呼叫（例如帶條件的全文 splice）；
+          它拋例外 → 版本號退回、segments 不動，例外原樣往上拋
+        - 每個操作只改所在 bucket（或相鄰兩個），拆段 / 合併另對其後 bucket `$inc start_index`
+        - 沒有交易：驗證都在寫入前做完，剩下只有 Mongo 本身的寫入失敗會留下部分結果
+
+        Raises:
+            KeyError: 任務沒有 segments
+        """
+        doc = await self.collection.find_one({"_id": task_id}, {"version": 1, "storage": 1, "segment_count": 1})
+        if not doc:
+            raise KeyError(task_id)
+        if (doc.get("version") or 0) != base_version:
+            raise SegmentVersionConflict(doc.get("version") or 0)
+        if not is_bucketed(doc):
+            # 舊的內嵌格式先轉分桶（replace_all 本身 +1 version）
+            doc = await self.migrate_embedded(task_id)
+        expected = doc.get("version") or 0
+        validate_patch_ops(ops, doc["segment_count"])
+        if any(op["op"] in ("split", "merge") for op in ops):
+            start, end = patch_window(ops)
+            replay_patch_ops(ops, await self.get_range(task_id, start, end) or [], start)
+
+        # 先搶版本號：同時間兩個 patch 只有一個能從 base 往前推
+        claimed = await self.collection.find_one_and_update(
+            {"_id": task_id, "version": expected if expected else {"$in": [0, None]}},
+            {"$inc": {"version": 1}, "$set": {"updated_at": get_utc_timestamp()}},
+            projection={"segments": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+        if claimed is None:
+            current = await self.collection.find_one({"_id": task_id}, {"version": 1})
+            raise SegmentVersionConflict((current or {}).get("version") or 0)
+        header = claimed
+        if before_write is not None:
+            try:
+                await before_write()
+            except BaseException:
+                # 還沒寫任何 segment：把剛搶到的版本號退回
+                await self.collection.update_one(
+                    {"_id": task_id, "version": header["version"]}, {"$inc": {"version": -1}}
+                )
+                raise
+
+        touched: set = set()
+        for op in ops:
+            delta, buckets = await self._apply_op(task_id, header, op)
+            header["segment_count"] += delta
+            touched.update(buckets)
+        for bucket in sorted(touched):
+            await self._refresh_bucket_bounds(task_id, bucket)
+        await self.collection.update_one(
+            {"_id": task_id}, {"$set": {"segment_count": header["segment_count"]}}
+        )
+        if touched and await self.buckets.count_documents({
+            "task_id": task_id, "count": {"$gt": header["bucket_size"] * SEGMENT_BUCKET_REBALANCE_FACTOR},
+        }, limit=1):
+            # 同一 bucket 被拆太多次：整份重新分桶（罕見；會再 +1 version）
+            segments = await self.get_segments(task_id) or []
+            header = await self.replace_all(task_id, segments)
+            log.info("segment.rebalanced", task_id=task_id, segment_count=len(segments))
+        return header
+
+    async def _apply_op(self, task_id: str, header: Dict[str, Any], op: Dict[str, Any]) -> Tuple[int, List[int]]:
+        """套用單一操作，回傳 (segment 數變化, 受影響的 bucket)"""
+        kind, index = op["op"], op["index"]
+        if kind == "merge":
+            located = await self._locate_many(task_id, header, [index, index + 1])
+            (b1, p1), (b2, p2) = located[index], located[index + 1]
+            first = await self._segment_at(task_id, b1, p1)
+            second = await self._segment_at(task_id, b2, p2)
+            merged = merge_segments(first, second, op)
+            if b1 == b2:
+                await self._splice_bucket(task_id, b1, p1, 2, [merged])
+                await self._shift_after(task_id, b1, -1)
+                return -1, [b1]
+            # 跨 bucket：前段就地改、後段從下一個 bucket 頭 $pop；後 bucket 的 start_index 不變
+            await self.buckets.update_one({"_id": bucket_id(task_id, b1)}, {"$set": {f"segments.{p1}": merged}})
+            await self.buckets.update_one(
+                {"_id": bucket_id(task_id, b2)}, {"$pop": {"segments": -1}, "$inc": {"count": -1}}
+            )
+            await self._shift_after(task_id, b2, -1)
+            return -1, [b1, b2]
+
+        bucket, position = (await self._locate_many(task_id, header, [index]))[index]
+        if kind == "split":
+            segment = await self._segment_at(task_id, bucket, position)
+            await self._splice_bucket(task_id, bucket, position, 1, split_segment(segment, op))
+            await self._shift_after(task_id, bucket, 1)
+            return 1, [bucket]
+
+        fields = {k: op[k] for k in _OP_FIELDS[kind] if op.get(k) is not None}
+        if fields:
+            await self.buckets.update_one(
+                {"_id": bucket_id(task_id, bucket)},
+                {"$set": {f"segments.{position}.{k}": v for k, v in fields.items()}},
+            )
+        return 0, [bucket] if kind == "retime" else []
+
+    async def _refresh_bucket_bounds(self, task_id: str, bucket: int) -> None:
+        """編輯可能改到時間戳：重算該 bucket 的 start_time / end_time（時間範圍查詢用）"""
+        doc = await self.buckets.find_one({"_id": bucket_id(task_id, bucket)}, {"segments.start": 1, "segments.end": 1})
+        segments = (doc or {}).get("segments") or []
+        if not segments:
+            return
+        await self.buckets.update_one(
+            {"_id": bucket_id(task_id, bucket)},
+            {"$set": {
+                "start_time": min((s.get("start") or 0) for s in segments),
+                "end_time": max((s.get("end") or 0) for s in segments),
+            }},
         )
-        return result.modified_count > 0
+
+    async def migrate_embedded(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """舊的內嵌陣列格式 → 分桶（冪等）；回傳分桶後的 header，不存在 → None"""
+        doc = await self.collection.find_one({"_id": task_id})
+        if not doc:
+            return None
+        if is_bucketed(doc):
+            return doc
+        segments = doc.get("segments") or []
+        header = await self.replace_all(task_id, segments)
+        log.info("segment.migrated_to_buckets", task_id=task_id, segment_count=len(segments))
+        return header
+
+    # ── 刪除 / 查詢 ───────────────────────────────────
 
     async def delete(self, task_id: str) -> bool:
-        """刪除 segments
+        """刪除 segments（header + 所有 buckets）
 
         Args:
             task_id: 任務 ID
@@ -79,9 +621,15 @@ class SegmentRepository:
         Returns:
             是否刪除成功
         """
+        await self.buckets.delete_many({"task_id": task_id})
         result = await self.collection.delete_one({"_id": task_id})
         return result.deleted_count > 0
 
+    async def delete_many(self, task_ids: List[str]) -> None:
+        """批次刪除多個任務的 segments"""
+        await self.buckets.delete_many({"task_id": {"$in": task_ids}})
+        await self.collection.delete_many({"_id": {"$in": task_ids}})
+
     async def exists(self, task_id: str) -> bool:
         """檢查 segments 是否存在
 
@@ -98,4 +646,7 @@ class SegmentRepository:
         """建立索引"""
         # _id 已經是主鍵,自動有唯一索引
         await self.collection.create_index("created_at")
+        await self.buckets.create_index(
+            [("task_id", ASCENDING), ("bucket", ASCENDING)], unique=True
+        )
         log.info("segment.indexes.created")
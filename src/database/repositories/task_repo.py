@@ -11,6 +11,8 @@ log = get_logger(__name__)
 # 允許的查詢參數值（白名單）
 ALLOWED_STATUSES = {"pending", "processing", "completed", "failed", "cancelled"}
 ALLOWED_TASK_TYPES = {"paragraph", "subtitle"}
+# 列表 status=active 對應的狀態（進行中；也只有這些任務會有 ProgressStore snapshot）
+ACTIVE_STATUSES = ("pending", "processing")
 
 
 def _validate_status(status: Optional[str]) -> Optional[str]:
@@ -22,6 +24,26 @@ def _validate_status(status: Optional[str]) -> Optional[str]:
     return status
 
 
+def _apply_status_filter(
+    filters: Dict[str, Any],
+    status: Optional[str],
+    status_in: Optional[List[str]] = None,
+    status_nin: Optional[List[str]] = None,
+) -> None:
+    """status / status_in / status_nin 三者互斥，依序優先；皆經白名單驗證"""
+    validated_status = _validate_status(status)
+    if validated_status:
+        filters["status"] = validated_status
+    elif status_in:
+        validated_in = [s for s in status_in if s in ALLOWED_STATUSES]
+        if validated_in:
+            filters["status"] = {"$in": validated_in}
+    elif status_nin:
+        validated_nin = [s for s in status_nin if s in ALLOWED_STATUSES]
+        if validated_nin:
+            filters["status"] = {"$nin": validated_nin}
+
+
 def _validate_task_type(task_type: Optional[str]) -> Optional[str]:
     """驗證 task_type 參數在白名單內"""
     if task_type is None:
@@ -126,12 +148,14 @@ class TaskRepository:
         tags: Optional[List[str]] = None,
         sort: List[tuple] = None,
         include_deleted: bool = False,
-        has_audio: Optional[bool] = None
+        has_audio: Optional[bool] = None,
+        status_in: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         """查詢用戶的任務列表
 
         Args:
             status_nin: 排除指定 status 列表（白名單驗證；status 已指定時忽略）
+            status_in: 只取指定 status 列表（白名單驗證；status 已指定時忽略）
             include_deleted: 是否包含已刪除的任務（默認 False，過濾已刪除）
             task_type: 過濾任務類型（可選：paragraph, subtitle）
             tags: 過濾標籤列表（AND 邏輯，任務必須包含所有指定的標籤）
@@ -143,14 +167,8 @@ class TaskRepository:
 
         filters = dict(self.owned_by(user_id))
 
-        # 驗證並應用 status 篩選（白名單）；status 與 status_nin 互斥，status 優先
-        validated_status = _validate_status(status)
-        if validated_status:
-            filters["status"] = validated_status
-        elif status_nin:
-            validated_nin = [s for s in status_nin if s in ALLOWED_STATUSES]
-            if validated_nin:
-                filters["status"] = {"$nin": validated_nin}
+        # 驗證並應用 status 篩選（白名單）；status / status_in / status_nin 互斥，依序優先
+        _apply_status_filter(filters, status, status_in=status_in, status_nin=status_nin)
 
         # 驗證並應用 task_type 篩選（白名單）
         validated_task_type = _validate_task_type(task_type)
@@ -172,7 +190,7 @@ class TaskRepository:
         cursor = self.collection.find(filters).skip(skip).limit(limit).sort(sort)
         return await cursor.to_list(length=limit)
 
-    async def count_by_user(self, user_id: str, status: Optional[str] = None, task_type: Optional[str] = None, tags: Optional[List[str]] = None, include_deleted: bool = False, has_audio: Optional[bool] = None) -> int:
+    async def count_by_user(self, user_id: str, status: Optional[str] = None, task_type: Optional[str] = None, tags: Optional[List[str]] = None, include_deleted: bool = False, has_audio: Optional[bool] = None, status_in: Optional[List[str]] = None) -> int:
         """計算用戶的任務數量
 
         Args:
@@ -184,9 +202,7 @@ class TaskRepository:
         filters = dict(self.owned_by(user_id))
 
         # 驗證並應用 status 篩選（白名單）
-        validated_status = _validate_status(status)
-        if validated_status:
-            filters["status"] = validated_status
+        _apply_status_filter(filters, status, status_in=status_in)
 
         # 驗證並應用 task_type 篩選（白名單）
         validated_task_type = _validate_task_type(task_type)
@@ -1,6 +1,6 @@
 """轉錄內容資料存取層"""
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from ...utils.time_utils import get_utc_timestamp
@@ -9,6 +9,24 @@ from src.utils.logger import get_logger
 log = get_logger(__name__)
 
 
+def validate_splices(splices: List[Dict[str, Any]], text_length: int) -> int:
+    """依序檢查 splice 的範圍（offset / delete 以套用前面 splice 後的文字為準）
+
+    Returns:
+        套用後的文字長度
+
+    Raises:
+        ValueError: 範圍超出文字
+    """
+    length = text_length
+    for n, splice in enumerate(splices):
+        offset, delete = splice["offset"], splice.get("delete", 0)
+        if offset < 0 or delete < 0 or offset + delete > length:
+            raise ValueError(f"splice #{n} out of range (length {length})")
+        length += len(splice.get("insert", "")) - delete
+    return length
+
+
 class TranscriptionRepository:
     """轉錄內容資料存取層"""
 
@@ -70,6 +88,42 @@ class TranscriptionRepository:
         )
         return result.modified_count > 0
 
+    async def get_text_length(self, task_id: str) -> Optional[int]:
+        """只讀 text_length（不載入內容）；不存在 → None"""
+        doc = await self.collection.find_one({"_id": task_id}, {"text_length": 1})
+        return None if doc is None else doc.get("text_length", 0)
+
+    async def apply_splices(
+        self, task_id: str, splices: List[Dict[str, Any]], expected_length: int
+    ) -> bool:
+        """在 server 端依序套用文字 splice（pipeline update 的 $substrCP / $concat），不經過 app
+
+        offset / delete 以字元（code point）計，與 Python len 及 $strLenCP 一致。
+        以 text_length == expected_length 為條件，文字在檢查後被別處改過就不套用。
+
+        Args:
+            task_id: 任務 ID
+            splices: [{"offset", "delete", "insert"}, ...]（須先通過 validate_splices）
+            expected_length: 套用前的 text_length
+
+        Returns:
+            是否套用（False = 文件不存在或長度已變）
+        """
+        length = expected_length
+        stages = []
+        for splice in splices:
+            offset, delete, insert = splice["offset"], splice.get("delete", 0), splice.get("insert", "")
+            tail = offset + delete
+            stages.append({"$set": {"content": {"$concat": [
+                {"$substrCP": ["$content", 0, offset]},
+                {"$literal": insert},
+                {"$substrCP": ["$content", tail, length - tail]},
+            ]}}})
+            length += len(insert) - delete
+        stages.append({"$set": {"text_length": {"$strLenCP": "$content"}, "updated_at": get_utc_timestamp()}})
+        result = await self.collection.update_one({"_id": task_id, "text_length": expected_length}, stages)
+        return result.matched_count > 0
+
     async def delete(self, task_id: str) -> bool:
         """刪除轉錄內容
 
@@ -1,15 +1,19 @@
 """用戶資料存取層"""
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from bson import ObjectId
 from bson.errors import InvalidId
 
 from ...auth.password import hash_token
+from .task_repo import ACTIVE_STATUSES
 from ...utils.time_utils import get_utc_timestamp
 from src.utils.logger import get_logger
 
 log = get_logger(__name__)
 
+# admin 用戶列表由 $lookup tasks 算出的衍生欄位（可排序 / 篩選）
+_TASK_STAT_FIELDS = ("task_count", "active_task_count")
+
 
 class UserRepository:
     """用戶資料庫操作"""
@@ -398,3 +402,101 @@ class UserRepository:
 
         cursor = self.collection.find(filters).skip(skip).limit(limit).sort(sort)
         return await cursor.to_list(length=limit)
+
+    # ── Admin 用戶列表（附任務統計）──────────────────────────────────────────
+
+    @staticmethod
+    def _task_count_lookup_stages() -> List[Dict[str, Any]]:
+        """`$lookup` tasks 算出每位用戶的 task_count / active_task_count。
+
+        口徑同 `TaskRepository.count_by_user`（排除已刪除）與 `count_active_by_user`
+        （pending / processing）。users._id 是 ObjectId、tasks 的 ownership 是字串
+        `user.user_id`，先轉字串再用 localField/foreignField 對上（走 `user.user_id`
+        索引，每位用戶一次 index range scan，不是逐筆 $expr 比對）。
+        """
+        return [
+            {"$addFields": {"_uid": {"$toString": "$_id"}}},
+            {"$lookup": {
+                "from": "tasks",
+                "localField": "_uid",
+                "foreignField": "user.user_id",
+                "pipeline": [
+                    {"$match": {"deleted": {"$ne": True}}},
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "active": {"$sum": {"$cond": [{"$in": ["$status", list(ACTIVE_STATUSES)]}, 1, 0]}},
+                    }},
+                ],
+                "as": "_task_stats",
+            }},
+            {"$addFields": {
+                "task_count": {"$ifNull": [{"$first": "$_task_stats.total"}, 0]},
+                "active_task_count": {"$ifNull": [{"$first": "$_task_stats.active"}, 0]},
+            }},
+            {"$project": {"_uid": 0, "_task_stats": 0}},
+        ]
+
+    async def admin_list_with_task_counts(
+        self,
+        filters: Dict[str, Any],
+        sort: List[tuple],
+        skip: int,
+        limit: int,
+        task_filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """管理後台用戶列表：一條 aggregation 帶出每位用戶的任務統計（取代逐筆 2N 次 count）。
+
+        Args:
+            filters: users 欄位的篩選條件
+            sort: 排序；可用 `task_count` / `active_task_count`
+            task_filters: 對任務統計欄位的篩選（如 `{"task_count": {"$gte": 5}}`）
+
+        效能：同 `OrderRepository.admin_list_with_invoices` 的兩條路徑——不依任務統計
+        排序 / 篩選時（常見情況）先 `count_documents` + 分頁截到當頁才 `$lookup`，
+        每頁只對 limit 位用戶查 tasks；依任務統計排序或篩選時沒得選，整批 `$lookup`
+        完再 `$facet` 分頁 / 計數。
+        """
+        # 加 _id 當 tie-breaker：排序欄位相同時分頁結果穩定（不會跨頁重複 / 漏列）
+        sort_spec = dict(sort)
+        sort_spec.setdefault("_id", 1)
+        by_task_stats = any(key in _TASK_STAT_FIELDS for key in sort_spec)
+        if not task_filters and not by_task_stats:
+            return await self._admin_list_page_then_lookup(filters, sort_spec, skip, limit)
+        return await self._admin_list_lookup_then_page(filters, sort_spec, skip, limit, task_filters)
+
+    async def _admin_list_page_then_lookup(
+        self, filters: Dict[str, Any], sort_spec: Dict[str, int], skip: int, limit: int,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        total = await self.collection.count_documents(filters)
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": filters},
+            {"$sort": sort_spec},
+            {"$skip": skip},
+            {"$limit": limit},
+        ] + self._task_count_lookup_stages()
+        users = await self.collection.aggregate(pipeline).to_list(length=limit)
+        return users, total
+
+    async def _admin_list_lookup_then_page(
+        self,
+        filters: Dict[str, Any],
+        sort_spec: Dict[str, int],
+        skip: int,
+        limit: int,
+        task_filters: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        pipeline: List[Dict[str, Any]] = [{"$match": filters}] + self._task_count_lookup_stages()
+        if task_filters:
+            pipeline.append({"$match": task_filters})
+        pipeline.append({
+            "$facet": {
+                "data": [{"$sort": sort_spec}, {"$skip": skip}, {"$limit": limit}],
+                "total": [{"$count": "count"}],
+            }
+        })
+        # 整批 $lookup 後排序可能超過 100MB 記憶體上限 → 允許落地暫存
+        result = await self.collection.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+        facet = result[0] if result else {"data": [], "total": []}
+        total = facet["total"][0]["count"] if facet["total"] else 0
+        return facet["data"], total
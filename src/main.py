@@ -334,6 +334,14 @@ async def startup_event():
     processed_webhook_repo_init = ProcessedWebhookRepository(db)
     await _safe_create("processed_webhooks", processed_webhook_repo_init.create_indexes())
 
+    # segments header + segment_buckets 的 (task_id, bucket) unique index
+    from src.database.repositories.segment_repo import SegmentRepository
+    await _safe_create("segments", SegmentRepository(db).create_indexes())
+
+    # analytics_rollups：後台統計預聚合桶（報表只讀桶，見 admin_analytics）
+    from src.database.repositories.analytics_rollup_repo import AnalyticsRollupRepository
+    await _safe_create("analytics_rollups", AnalyticsRollupRepository(db).create_indexes())
+
     # job_leases：背景 sweep 的 per-window leader lease（P0-2(a)，多 uvicorn worker 防重複掃描）
     from src.database.repositories.job_lease_repo import JobLeaseRepository
     job_lease_repo_init = JobLeaseRepository(db)
@@ -344,6 +352,14 @@ async def startup_event():
     chunk_upload_repo_init = ChunkUploadRepository(db)
     await _safe_create("chunk_uploads", chunk_upload_repo_init.create_indexes())
 
+    # 建立 punctuation_jobs 索引（GPU Worker 移交給 CPU 標點消費端的佇列）
+    from src.database.repositories.punctuation_queue_repo import PunctuationQueueRepository
+    await _safe_create("punctuation_jobs", PunctuationQueueRepository(db).create_indexes())
+
+    # llm_cache：摘要 / 標點的 LLM 回應快取（expires_at TTL）與每日命中計數
+    from src.database.repositories.llm_cache_repo import LLMCacheRepository
+    await _safe_create("llm_cache", LLMCacheRepository(db).create_indexes())
+
     # Tags 用獨立的 hint 訊息：unique index 建立失敗大概率代表 collection 有重複資料
     # 需要先清理（migrations/cleanup_duplicate_tags.py），跟一般 drift 情境不同。
     try:
@@ -478,6 +494,13 @@ async def startup_event():
             periodic_dau_rollup(db),
             name="periodic_dau_rollup",
         )
+
+        # 5.8 定期重算後台統計預聚合桶（修正增量寫入的漂移）
+        from src.services.admin_analytics import periodic_analytics_reconcile
+        create_background_task(
+            periodic_analytics_reconcile(db),
+            name="periodic_analytics_reconcile",
+        )
     else:
         logger.info("app.background_jobs.disabled", reason="RUN_BACKGROUND_JOBS=false")
 
@@ -495,8 +518,8 @@ async def startup_event():
             current_model_name,
             device="auto",
             compute_type="int8",
-            cpu_threads=2,  # 優化：配合 ProcessPoolExecutor，降低單進程並行度
-            num_workers=1   # 優化：避免進程內過度並行（外部已有 ProcessPoolExecutor）
+            cpu_threads=2,  # 優化：配合 ChunkWorkerPool 多進程，降低單進程並行度
+            num_workers=1   # 優化：避免進程內過度並行（外部已有 ChunkWorkerPool）
         )
         logger.info("app.whisper.loaded", model=current_model_name)
     else:
@@ -522,7 +545,7 @@ async def startup_event():
         transcriptions_router.init_local_dispatch(
             whisper_model=whisper_model,
             task_service=task_service,
-            model_name=current_model_name,  # 傳遞模型名稱供 ProcessPoolExecutor 使用
+            model_name=current_model_name,  # 傳遞模型名稱供 ChunkWorkerPool 的 worker 載入
             diarization_pipeline=diarization_pipeline,
             executor=executor,
             progress_store=progress_store,
@@ -553,6 +576,17 @@ async def startup_event():
             priority_queue_enabled=bool(priority_sqs_queue_url),
         )
 
+        # 9.1 標點佇列消費（GPU Worker PUNCTUATION_OFFLOAD=true 時移交過來的任務）
+        if os.getenv("PUNCTUATION_QUEUE_DRAIN", "false").lower() == "true":
+            from src.services.punctuation_drain import PunctuationDrain
+            from src.services.utils.punctuation_processor import PunctuationProcessor
+            from src.database.repositories.llm_cache_repo import sync_llm_cache
+            from src.database.sync_client import get_sync_db
+            PunctuationDrain(
+                progress_store=progress_store,
+                punctuation=PunctuationProcessor(cache=sync_llm_cache(get_sync_db())),
+            ).start()
+
     # 10. 啟動 dispatch 背景機制（LocalDispatch 起撿單器；WorkerDispatch no-op）
     get_task_dispatch().start()
 
@@ -569,7 +603,22 @@ async def shutdown_event():
         executor.shutdown(wait=True)
         logger.info("app.shutdown.executor_closed")
 
-    # 清理所有 ProcessPoolExecutor worker 進程
+    # 關閉常駐 chunk 轉錄池（CPU chunked 路徑；從未建立時 no-op）
+    try:
+        from src.services.utils.chunk_worker_pool import shutdown_chunk_worker_pool
+        shutdown_chunk_worker_pool(wait=True)
+        logger.info("app.shutdown.chunk_pool_closed")
+    except Exception as e:
+        logger.warning("app.shutdown.chunk_pool_close_failed", error=str(e))
+
+    # 停掉 SSE 廣播 hub 的觀察迴圈（change stream / poll）
+    try:
+        from src.services.task_event_hub import close_task_event_hub
+        await close_task_event_hub()
+    except Exception as e:
+        logger.warning("app.shutdown.sse_hub_close_failed", error=str(e))
+
+    # 清理殘留的 ProcessPoolExecutor worker 進程（池已優雅關閉時通常為 0）
     cleaned = cleanup_worker_processes()
     if cleaned > 0:
         logger.info("app.shutdown.worker_processes_cleaned", count=cleaned)
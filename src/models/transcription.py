@@ -1,7 +1,7 @@
 """轉錄內容資料模型"""
 from pydantic import BaseModel, Field, RootModel, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 
 class TranscriptionInDB(BaseModel):
@@ -47,3 +47,35 @@ class SpeakerNamesUpdate(RootModel[dict[str, str]]):
             if len(name) > 100:
                 raise ValueError("Speaker name too long (max 100 characters)")
         return v
+
+
+class SegmentPatchOp(BaseModel):
+    """單一 segment 操作（index 以前面操作套用後的狀態為準）
+
+    - edit：改 text / speaker
+    - split：在 text 第 `at` 個字元處拆成兩段，`time` 為切點（省略則依字數比例）
+    - merge：與下一段合併，`text` 省略則直接相接
+    - retime：改 start / end
+    """
+    op: Literal["edit", "split", "merge", "retime"]
+    index: int = Field(..., ge=0)
+    text: Optional[str] = None
+    speaker: Optional[str] = Field(None, max_length=50)
+    at: Optional[int] = Field(None, ge=1)
+    time: Optional[float] = Field(None, ge=0)
+    start: Optional[float] = Field(None, ge=0)
+    end: Optional[float] = Field(None, ge=0)
+
+
+class TextSplice(BaseModel):
+    """逐字稿全文的一段替換：從 offset（字元）起刪 delete 個字元、插入 insert"""
+    offset: int = Field(..., ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+
+class SegmentPatchRequest(BaseModel):
+    """PATCH /segments 的請求模型（樂觀鎖：base_version 須為目前版本）"""
+    base_version: int = Field(..., ge=0)
+    ops: List[SegmentPatchOp] = Field(default_factory=list, max_length=500)
+    text_splices: List[TextSplice] = Field(default_factory=list, max_length=500)
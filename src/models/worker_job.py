@@ -54,6 +54,11 @@ class TranscriptionJob(BaseModel):
     `handoff/{task_id}.{ext}`。local 模式不使用。None = 來自舊版 Server（Layer
     2 前），Worker fallback 到 `uploads/{tier}/{task_id}.mp3` 下載——SQS 排空後可拔。"""
 
+    media_probe: Optional[dict] = None
+    """intake 時的 ffprobe 精簡結果（`MediaProbe.to_dict()`：size / format /
+    streams）。Orchestrator 綁到 acquire 後的本機檔，PREPARATION / TRANSCRIPTION
+    不再各自 ffprobe。None = 舊版 Server 或 intake 探測失敗 → Worker 自行探測。"""
+
     @model_validator(mode="after")
     def _normalize_single_speaker(self) -> "TranscriptionJob":
         """max_speakers == 1 時 diarization 無意義，強制關閉。
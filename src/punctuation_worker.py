@@ -0,0 +1,28 @@
+"""
+標點 Worker — 標點佇列（punctuation_jobs）的 CPU 消費端入口點
+
+啟動方式：
+    DEPLOY_ENV=aws APP_ROLE=worker python -m src.punctuation_worker
+
+GPU Worker 設 PUNCTUATION_OFFLOAD=true 後，轉錄完的任務排進標點佇列，由本進程
+跑 LLM 標點並收尾（見 worker_core/punctuation_consumer.py）。不需要 GPU。
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.utils.logger import setup_logging
+setup_logging()
+
+from src.utils.sentry_init import init_sentry
+init_sentry(component="punctuation_worker")
+
+from src.worker_core.punctuation_consumer import main
+
+if __name__ == "__main__":
+    main()
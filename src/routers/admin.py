@@ -23,6 +23,7 @@ from ..database.repositories.summary_log_repo import SummaryLogRepository
 from ..database.repositories.presence_repo import PresenceRepository, PRESENCE_TTL_SECONDS
 from ..database.repositories.presence_rollup_repo import PresenceRollupRepository
 from ..database.repositories.daily_active_repo import DailyActiveRepository
+from ..database.repositories.llm_cache_repo import LLMCacheRepository, local_cache_stats, stats_window
 from ..database.repositories.order_repo import OrderRepository
 from ..database.repositories.invoice_repo import InvoiceRepository
 from ..services import invoice_service
@@ -208,16 +209,21 @@ async def list_users(
     role: Optional[str] = Query(None, description="篩選角色 (user/admin)"),
     is_active: Optional[bool] = Query(None, description="篩選狀態"),
     tier: Optional[str] = Query(None, description="篩選配額等級"),
-    sort_by: str = Query("created_at", description="排序欄位"),
+    min_task_count: Optional[int] = Query(None, ge=0, description="篩選任務數下限"),
+    has_active_tasks: Optional[bool] = Query(None, description="篩選是否有進行中任務"),
+    sort_by: str = Query("created_at", description="排序欄位（可用 task_count / active_task_count）"),
     sort_order: int = Query(-1, description="排序方向 (1=升序, -1=降序)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     admin: dict = Depends(require_permission(Permission.USER_READ)),
     db = Depends(get_database)
 ):
-    """獲取用戶列表（管理員）"""
+    """獲取用戶列表（管理員）
+
+    任務統計由同一條 aggregation `$lookup` tasks 帶出（不再逐筆 count），
+    因此也能依 task_count / active_task_count 排序與篩選。
+    """
     user_repo = UserRepository(db)
-    task_repo = TaskRepository(db)
 
     # 建立篩選條件
     filters = {}
@@ -234,20 +240,24 @@ async def list_users(
     if tier:
         filters["quota.tier"] = tier
 
-    # 查詢用戶
+    # 任務統計欄位的篩選（$lookup 之後才能 $match）
+    task_filters = {}
+    if min_task_count:
+        task_filters["task_count"] = {"$gte": min_task_count}
+    if has_active_tasks is not None:
+        task_filters["active_task_count"] = {"$gt": 0} if has_active_tasks else 0
+
+    # 查詢用戶（附任務統計）
     sort = [(sort_by, sort_order)]
-    users = await user_repo.find(filters, skip=skip, limit=limit, sort=sort)
-    total = await user_repo.count(filters)
+    users, total = await user_repo.admin_list_with_task_counts(
+        filters, sort=sort, skip=skip, limit=limit, task_filters=task_filters,
+    )
 
-    # 處理用戶資料（移除敏感資訊、加入統計）
+    # 處理用戶資料（移除敏感資訊）
     result = []
     for user in users:
         user_id = str(user["_id"])
 
-        # 計算任務統計
-        task_count = await task_repo.count_by_user(user_id)
-        active_task_count = await task_repo.count_active_by_user(user_id)
-
         result.append({
             "id": user_id,
             "email": user.get("email"),
@@ -264,8 +274,8 @@ async def list_users(
             "period_usage": compute_period_usage(user),
             "created_at": user.get("created_at"),
             "updated_at": user.get("updated_at"),
-            "task_count": task_count,
-            "active_task_count": active_task_count
+            "task_count": user.get("task_count", 0),
+            "active_task_count": user.get("active_task_count", 0)
         })
 
     return {
@@ -1227,6 +1237,29 @@ async def get_dau(
     return {"days": days, "series": series, "today": today}
 
 
+@router.get("/stats/llm-cache")
+async def get_llm_cache_stats(
+    days: int = Query(7, ge=1, le=90, description="往回涵蓋幾天"),
+    admin: dict = Depends(require_permission(Permission.ANALYTICS_READ)),
+    db=Depends(get_database),
+):
+    """LLM 回應快取（摘要 / 標點）的命中 / 未命中數。
+
+    series 為每日 × kind 計數（llm_cache_stats，涵蓋所有 replica 與 Worker）；
+    totals 為區間加總與命中率；process 為本 API 進程啟動以來的記憶體計數。
+    """
+    series = await LLMCacheRepository(db).stats_between(**stats_window(days))
+    totals: Dict[str, Dict[str, Any]] = {}
+    for row in series:
+        t = totals.setdefault(row["kind"], {"hits": 0, "misses": 0})
+        t["hits"] += row["hits"]
+        t["misses"] += row["misses"]
+    for t in totals.values():
+        lookups = t["hits"] + t["misses"]
+        t["hit_rate"] = round(t["hits"] / lookups, 4) if lookups else None
+    return {"days": days, "series": series, "totals": totals, "process": local_cache_stats()}
+
+
 @router.get("/stats/online/users")
 async def get_online_users_list(
     request: Request,
@@ -66,6 +66,7 @@ from ..auth.password import hash_password, verify_password
 from ..auth.jwt_handler import create_access_token, create_refresh_token, verify_token
 from ..auth.dependencies import get_current_user
 from ..database.mongodb import get_database
+from ..database.repositories.segment_repo import SegmentRepository
 from ..database.repositories.user_repo import UserRepository
 from ..database.repositories.rate_limit_repo import RateLimitRepository
 from ..utils.audit_logger import get_audit_logger
@@ -1238,7 +1239,7 @@ async def delete_account(
     # 3. 硬刪內容（含實際逐字內容，屬 PII 風險，必須清除）
     if task_ids:
         await db.transcriptions.delete_many({"_id": {"$in": task_ids}})
-        await db.segments.delete_many({"_id": {"$in": task_ids}})
+        await SegmentRepository(db).delete_many(task_ids)
         await db.summaries.delete_many({"_id": {"$in": task_ids}})
 
     # 4. 任務去識別化保留（清 PII/內容參照，留統計欄位）——非硬刪
@@ -7,6 +7,7 @@ import secrets
 
 from ..auth.dependencies import get_current_user
 from ..database.mongodb import get_database
+from ..database.repositories.segment_repo import SegmentRepository
 from ..database.repositories.task_repo import TaskRepository
 from ..utils.api_errors import api_error
 from ..utils.storage.backend import is_aws
@@ -192,9 +193,9 @@ async def get_shared_task(
     # 取得 segments
     segments = []
     speaker_names = task.get("speaker_names", {})
-    segment_doc = await db.segments.find_one({"_id": task_id})
-    if segment_doc:
-        segments = segment_doc.get("segments", [])
+    stored_segments = await SegmentRepository(db).get_segments(task_id)
+    if stored_segments:
+        segments = stored_segments
 
     # 判斷音檔是否可用（與 tasks.py 詳情頁邏輯一致：套用擁有者 tier 的保留天數，過期則視為無音檔）
     has_audio = bool(result_info.get("audio_file"))
@@ -279,19 +280,18 @@ async def get_shared_audio(
         )
 
     if is_aws():
-        from ..utils.storage.compact import audio_exists_by_path, get_presigned_url_by_path
+        from ..utils.storage.compact import resolve_audio_url_async
         from urllib.parse import urlparse
 
         audio_file_path = task.get("result", {}).get("audio_file")
-        if not audio_file_path or not audio_exists_by_path(audio_file_path):
+        presigned_url = await resolve_audio_url_async(audio_file_path) if audio_file_path else None
+        if not presigned_url:
             raise api_error(
                 "SHARED_AUDIO_EXPIRED",
                 "Audio file has expired or been deleted",
                 status.HTTP_404_NOT_FOUND,
             )
 
-        presigned_url = get_presigned_url_by_path(audio_file_path, expires_in=3600)
-
         parsed = urlparse(presigned_url)
         if not parsed.hostname or not parsed.hostname.endswith(".amazonaws.com"):
             raise api_error(
@@ -8,9 +8,15 @@ import json
 import os
 
 from ..auth.dependencies import get_current_user, get_current_user_sse
-from ..database.repositories.task_repo import TaskRepository
+from ..database.repositories.task_repo import ACTIVE_STATUSES, TaskRepository
 from ..services.task_service import TaskService
 from ..services.tag_service import TagService
+from ..services.task_event_hub import (
+    SSE_HEARTBEAT_SECONDS,
+    TERMINAL_STATUSES,
+    get_task_event_hub,
+    task_state_delta,
+)
 from ..services.task_query_helpers import (
     enrich_task_data,
     filter_task_for_list,
@@ -139,99 +145,54 @@ async def get_tasks(
     Returns:
         任務列表
     """
-    retention_days = await get_user_retention_days(task_service.task_repo.db, str(current_user["_id"]))
+    user_id = str(current_user["_id"])
 
     # 解析標籤參數
     tags_list = None
     if tags:
         tags_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-    # 如果 status 是 'active'，轉換為 pending 和 processing
-    if status == 'active':
-        # 獲取所有任務並在記憶體中過濾
-        all_tasks = await task_service.task_repo.find_by_user(
-            str(current_user["_id"]),
-            skip=skip,
-            limit=limit,
-            task_type=task_type,
-            tags=tags_list,
-            include_deleted=False,
-            has_audio=has_audio
-        )
 
-        # 過濾出進行中的任務
-        active_tasks = []
-        for task in all_tasks:
-            # 合併記憶體狀態
-            task_id = str(task.get("_id") or task.get("task_id"))
-            enriched_task = await task_service.get_task(task_id, str(current_user["_id"]))
-            if enriched_task and enriched_task.get("status") in ["pending", "processing"]:
-                enriched = enrich_task_data(enriched_task)
-                had_audio = bool(enriched.get("result", {}).get("audio_file"))
-                filtered = filter_task_for_list(enriched, retention_days)
-                if had_audio and not filtered.get("result", {}).get("audio_file"):
-                    if background_tasks:
-                        background_tasks.add_task(
-                            _clear_expired_audio_in_db,
-                            task_service.task_repo,
-                            task_id
-                        )
-                    continue
-                active_tasks.append(filtered)
+    # 'active' = pending + processing：篩選推進 Mongo 查詢（分頁與總數都正確）
+    query = dict(
+        status=None if status == 'active' else status,
+        status_in=list(ACTIVE_STATUSES) if status == 'active' else None,
+        task_type=task_type,
+        tags=tags_list,
+        include_deleted=False,
+        has_audio=has_audio,
+    )
 
-        return {
-            "tasks": active_tasks,
-            "total": len(active_tasks),
-            "limit": limit,
-            "skip": skip
-        }
-    else:
-        # 從資料庫獲取任務
-        tasks = await task_service.task_repo.find_by_user(
-            str(current_user["_id"]),
-            skip=skip,
-            limit=limit,
-            status=status,
-            task_type=task_type,
-            tags=tags_list,
-            include_deleted=False,
-            has_audio=has_audio
-        )
+    # 每頁固定 round trip：retention / 列表 / 總數並行，progress 一次 get_many
+    retention_days, tasks, total = await asyncio.gather(
+        get_user_retention_days(task_service.task_repo.db, user_id),
+        task_service.task_repo.find_by_user(user_id, skip=skip, limit=limit, **query),
+        task_service.task_repo.count_by_user(user_id, **query),
+    )
+    await task_service.merge_progress(tasks)
 
-        # 合併記憶體狀態並過濾數據
-        enriched_tasks = []
-        for task in tasks:
-            task_id = str(task.get("_id") or task.get("task_id"))
-            enriched_task = await task_service.get_task(task_id, str(current_user["_id"]))
-            if enriched_task:
-                enriched = enrich_task_data(enriched_task)
-                had_audio = bool(enriched.get("result", {}).get("audio_file"))
-                filtered = filter_task_for_list(enriched, retention_days)
-                if had_audio and not filtered.get("result", {}).get("audio_file"):
-                    if background_tasks:
-                        background_tasks.add_task(
-                            _clear_expired_audio_in_db,
-                            task_service.task_repo,
-                            task_id
-                        )
-                    continue
-                enriched_tasks.append(filtered)
-
-        # 計算總數（包含 task_type 和 tags 篩選）
-        total = await task_service.task_repo.count_by_user(
-            str(current_user["_id"]),
-            status=status,
-            task_type=task_type,
-            tags=tags_list,
-            include_deleted=False,
-            has_audio=has_audio
-        )
+    # 豐富並過濾數據
+    enriched_tasks = []
+    for task in tasks:
+        task_id = str(task.get("_id") or task.get("task_id"))
+        enriched = enrich_task_data(task)
+        had_audio = bool(enriched.get("result", {}).get("audio_file"))
+        filtered = filter_task_for_list(enriched, retention_days)
+        if had_audio and not filtered.get("result", {}).get("audio_file"):
+            if background_tasks:
+                background_tasks.add_task(
+                    _clear_expired_audio_in_db,
+                    task_service.task_repo,
+                    task_id
+                )
+            continue
+        enriched_tasks.append(filtered)
 
-        return {
-            "tasks": enriched_tasks,
-            "total": total,
-            "limit": limit,
-            "skip": skip
-        }
+    return {
+        "tasks": enriched_tasks,
+        "total": total,
+        "limit": limit,
+        "skip": skip
+    }
 
 
 async def _clear_expired_audio_in_db(task_repo: TaskRepository, task_id: str) -> None:
@@ -316,60 +277,46 @@ async def task_status_events(
         SSE 事件流
     """
     async def event_generator():
-        """生成 SSE 事件流（兩種部署模式統一走 task_service.get_task → ProgressStore）"""
-        poll_interval = 2 if is_aws() else 1
+        """生成 SSE 事件流：權限檢查後訂閱 process 共用的 TaskEventHub，只送變動欄位"""
+        hub = get_task_event_hub(task_service)
+        subscription = None
 
         try:
-            # 首先驗證權限
+            # 首先驗證權限（之後的狀態由 hub 統一觀察，不再每條連線各自 polling）
             task = await task_service.get_task(task_id, str(current_user["_id"]))
 
             if not task:
                 yield f"event: error\ndata: {json.dumps({'error': '任務不存在或無權訪問'})}\n\n"
                 return
 
-            # 持續推送狀態更新
-            previous_status = None
-            previous_progress = None
-            heartbeat_counter = 0
+            state = serialize_for_json(enrich_task_data(task))
+            subscription = hub.subscribe(task_id, state)
+            previous = None
 
             while True:
-                task_data = await task_service.get_task(task_id, str(current_user["_id"]))
-
-                if not task_data:
+                if state is not None:
+                    # 第一筆送完整狀態，之後只送變動欄位（前端 Object.assign 合併）
+                    delta = task_state_delta(previous, state)
+                    if delta:
+                        log.debug("sse.progress.pushed", task_id=task_id, progress=state.get("progress"))
+                        yield f"data: {json.dumps(delta)}\n\n"
+                        previous = state
+
+                    # 如果任務已完成或失敗，結束推送
+                    current_status = state.get("status")
+                    if current_status in TERMINAL_STATUSES:
+                        yield f"event: end\ndata: {json.dumps({'status': current_status})}\n\n"
+                        break
+
+                if subscription.gone:
                     yield f"event: error\ndata: {json.dumps({'error': '任務不存在'})}\n\n"
                     break
 
-                # 豐富任務數據
-                enriched_data = enrich_task_data(task_data)
-                current_status = enriched_data.get("status")
-                current_progress = enriched_data.get("progress")
-
-                # 調試：輸出當前進度
-                log.debug("sse.poll.tick", task_id=task_id, status=current_status, progress=current_progress)
-
-                # 只在狀態或進度改變時推送
-                if current_status != previous_status or current_progress != previous_progress:
-                    log.debug("sse.progress.pushed", task_id=task_id, progress=current_progress)
-                    # 序列化數據（處理 datetime 等特殊類型）
-                    serialized_data = serialize_for_json(enriched_data)
-                    yield f"data: {json.dumps(serialized_data)}\n\n"
-                    previous_status = current_status
-                    previous_progress = current_progress
-                    heartbeat_counter = 0
-                else:
-                    # 每 25 秒送一次 heartbeat comment，防止 ALB / proxy 因 idle timeout 斷線
-                    heartbeat_counter += 1
-                    if heartbeat_counter >= (25 // poll_interval):
-                        yield ": heartbeat\n\n"
-                        heartbeat_counter = 0
-
-                # 如果任務已完成或失敗，結束推送
-                if current_status in ["completed", "failed", "cancelled"]:
-                    yield f"event: end\ndata: {json.dumps({'status': current_status})}\n\n"
-                    break
-
-                # 等待再檢查（AWS 間隔較長因為是 DB polling）
-                await asyncio.sleep(poll_interval)
+                # 等 hub 推送；SSE_HEARTBEAT_SECONDS 內沒有變動就送 heartbeat comment，
+                # 防止 ALB / proxy 因 idle timeout 斷線
+                state = await subscription.next(timeout=SSE_HEARTBEAT_SECONDS)
+                if state is None and not subscription.gone:
+                    yield ": heartbeat\n\n"
 
         except asyncio.CancelledError:
             # 客戶端斷開連接
@@ -378,6 +325,9 @@ async def task_status_events(
         except Exception as e:
             log.error("sse.stream.error", task_id=task_id, error=str(e), exc_info=True)
             yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            if subscription is not None:
+                hub.unsubscribe(subscription)
 
     return StreamingResponse(
         event_generator(),
@@ -1,13 +1,16 @@
 """轉錄管理路由"""
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import AsyncIterable, AsyncIterator, Optional, List, Literal
 from pathlib import Path
 from urllib.parse import quote
 from datetime import datetime, timezone
-from io import BytesIO
 import asyncio
+import base64
+import hashlib
+import os
 import uuid
 import json
 import shutil
@@ -19,10 +22,12 @@ from ..auth.dependencies import get_current_user
 from ..database.mongodb import get_database
 from ..database.repositories.task_repo import TaskRepository
 from ..database.repositories.user_repo import UserRepository
+from ..database.repositories.llm_cache_repo import sync_llm_cache
+from ..database.sync_client import get_sync_db
 from ..dependencies import get_intake_service
 from ..models.intake import IntakeConfig
 from ..models.quota import has_feature
-from ..models.transcription import SpeakerNamesUpdate
+from ..models.transcription import SegmentPatchRequest, SpeakerNamesUpdate
 from ..services.intake_service import TranscriptionIntakeService
 from ..services.task_service import TaskService
 from ..services.utils.audio_validator import (
@@ -36,6 +41,7 @@ from ..utils.api_errors import api_error
 from ..utils.storage.backend import is_aws
 from ..utils.config_loader import get_parameter, get_temp_dir
 from ..utils.logger import get_logger
+from ..utils.subtitle_export import MAX_DENSITY_SECONDS, group_segments, iter_srt, iter_txt, iter_vtt
 from ..services.task_dispatch import (
     LocalDispatch,
     get_task_dispatch,
@@ -46,6 +52,12 @@ from ..services.task_dispatch import (
 router = APIRouter(prefix="/transcriptions", tags=["Transcriptions"])
 log = get_logger(__name__)
 
+# 單一 process 同時最多幾份 PDF 在 render（各佔一條 thread + 一批 flowable 的記憶體）
+PDF_EXPORT_CONCURRENCY = int(os.getenv("PDF_EXPORT_CONCURRENCY", "2"))
+# 排隊等 render 名額最多幾秒，逾時回 503 請前端稍後重試
+PDF_EXPORT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PDF_EXPORT_QUEUE_TIMEOUT_SECONDS", "30"))
+_pdf_export_semaphore = asyncio.Semaphore(PDF_EXPORT_CONCURRENCY)
+
 
 async def _stream_upload_to(upload_file: UploadFile, dest_path: Path) -> None:
     """Streaming UploadFile -> 磁碟，避免 await read() 一次性把整檔載入 RAM + sync write 卡 event loop。"""
@@ -77,14 +89,14 @@ def init_local_dispatch(
         whisper_model: Whisper 模型實例
         task_service: TaskService 實例
         progress_store: ProgressStore（應與 task_service 共用同一個實例）
-        model_name: 模型名稱（用於 ProcessPoolExecutor 中重新載入模型）
+        model_name: 模型名稱（ChunkWorkerPool 的 worker 進程以此載入常駐模型）
         diarization_pipeline: Diarization pipeline（可選）
         executor: 線程池執行器（可選）
     """
     global _whisper_processor, _punctuation_processor, _diarization_processor
 
     _whisper_processor = WhisperProcessor(whisper_model, model_name)
-    _punctuation_processor = PunctuationProcessor()
+    _punctuation_processor = PunctuationProcessor(cache=sync_llm_cache(get_sync_db()))
     _diarization_processor = (
         DiarizationProcessor(diarization_pipeline) if diarization_pipeline else None
     )
@@ -442,6 +454,66 @@ async def create_transcription(
     }
 
 
+# 串流匯出時累積到約這麼多字元才送出一個 chunk（避免一列字幕一個 chunk）
+EXPORT_STREAM_CHUNK_CHARS = 64 * 1024
+
+_EXPORT_MEDIA_TYPES = {
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+}
+
+
+async def _load_transcript_content(task: dict, task_id: str, db) -> str:
+    """段落模式全文：transcriptions collection，舊任務退回 result_file。"""
+    from src.database.repositories.transcription_repo import TranscriptionRepository
+
+    transcription = await TranscriptionRepository(db).get_by_task_id(task_id)
+    if transcription:
+        return transcription["content"]
+    # 向後相容：嘗試從檔案讀取
+    result_file_path = get_task_field(task, "result_file")
+    if result_file_path:
+        result_file = Path(result_file_path)
+        if result_file.exists():
+            return result_file.read_text(encoding='utf-8')
+    raise api_error("TRANSCRIPTION_CONTENT_NOT_FOUND", "Transcription content not found", status.HTTP_404_NOT_FOUND)
+
+
+def _export_filename(task: dict, task_id: str, ext: str) -> str:
+    """下載檔名：有自訂名稱用自訂名稱（去掉音訊副檔名），否則用 task_id。"""
+    download_filename = task.get("custom_name")
+    if not download_filename:
+        return f"{task_id}.{ext}"
+    # 移除音訊副檔名
+    for audio_ext in ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma']:
+        if download_filename.lower().endswith(audio_ext):
+            download_filename = download_filename[:-len(audio_ext)]
+            break
+    if not download_filename.endswith(f".{ext}"):
+        download_filename = f"{download_filename}.{ext}"
+    return download_filename
+
+
+async def _iter_text(content: str) -> AsyncIterator[str]:
+    for i in range(0, len(content), EXPORT_STREAM_CHUNK_CHARS):
+        yield content[i:i + EXPORT_STREAM_CHUNK_CHARS]
+
+
+async def _encode_chunks(pieces: AsyncIterable[str]) -> AsyncIterator[bytes]:
+    """把小文字片段累積成約 EXPORT_STREAM_CHUNK_CHARS 再編碼送出。"""
+    buf: List[str] = []
+    size = 0
+    async for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= EXPORT_STREAM_CHUNK_CHARS:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
 @router.get("/{task_id}/download")
 async def download_transcription(
     request: Request,
@@ -479,41 +551,9 @@ async def download_transcription(
     if task["status"] != "completed":
         raise api_error("TRANSCRIPTION_TASK_NOT_COMPLETED", "Task not completed yet (current status: {status})", status.HTTP_400_BAD_REQUEST, status=task['status'])
 
-    # 從 transcriptions collection 讀取內容（新方式）
-    from src.database.repositories.transcription_repo import TranscriptionRepository
-    from fastapi.responses import StreamingResponse
-    from io import BytesIO
+    content = await _load_transcript_content(task, task_id, db)
 
-    transcription_repo = TranscriptionRepository(db)
-    transcription = await transcription_repo.get_by_task_id(task_id)
-
-    if not transcription:
-        # 向後相容：嘗試從檔案讀取
-        result_file_path = get_task_field(task, "result_file")
-        if result_file_path:
-            result_file = Path(result_file_path)
-            if result_file.exists():
-                content = result_file.read_text(encoding='utf-8')
-            else:
-                raise api_error("TRANSCRIPTION_CONTENT_NOT_FOUND", "Transcription content not found", status.HTTP_404_NOT_FOUND)
-        else:
-            raise api_error("TRANSCRIPTION_CONTENT_NOT_FOUND", "Transcription content not found", status.HTTP_404_NOT_FOUND)
-    else:
-        content = transcription["content"]
-
-    # 使用自訂名稱作為下載檔名（如果有設定）
-    download_filename = task.get("custom_name")
-    if download_filename:
-        # 移除音訊副檔名
-        for ext in ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.wma']:
-            if download_filename.lower().endswith(ext):
-                download_filename = download_filename[:-len(ext)]
-                break
-        # 確保有 .txt 副檔名
-        if not download_filename.endswith('.txt'):
-            download_filename = download_filename + '.txt'
-    else:
-        download_filename = f"{task_id}.txt"
+    download_filename = _export_filename(task, task_id, "txt")
 
     # 使用 RFC 5987 編碼來支援中文檔名
     encoded_filename = quote(download_filename, safe='')
@@ -538,7 +578,7 @@ async def download_transcription(
         log.warning("transcription.audit_log.failed", action=audit_action, error=str(e))
 
     return StreamingResponse(
-        BytesIO(content.encode('utf-8')),
+        _encode_chunks(_iter_text(content)),
         media_type="text/plain; charset=utf-8",
         headers={
             "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
@@ -604,17 +644,35 @@ async def export_transcription_pdf(
     # 4. 生成 PDF — ReportLab 是 sync CPU-bound（10k 行轉錄 ~1.5s，極端 alternating
     #    script 可達數十秒）。用 asyncio.to_thread 搬到 thread pool 避免阻塞
     #    event loop 卡住 SSE 進度推送、login、其他 API。
-    from ..utils.pdf.pdf_generator import generate_pdf
-    pdf_bytes = await asyncio.to_thread(
-        generate_pdf,
-        title=payload.title,
-        summary=summary_doc,
-        transcript_text=payload.transcript_text,
-        include_summary=payload.include_summary,
-        include_transcript=payload.include_transcript,
-        primary_lang=primary_lang,
-        locale=payload.locale,
-    )
+    #    成品寫暫存檔再以 FileResponse 分塊送出，不整份留在記憶體；同時 render 的
+    #    份數由 _pdf_export_semaphore 限制，幾份大匯出不會一起把 process 記憶體吃光。
+    from ..utils.pdf.pdf_generator import render_pdf
+    try:
+        await asyncio.wait_for(_pdf_export_semaphore.acquire(), PDF_EXPORT_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        log.warning("transcription.export_pdf.busy", task_id=task_id)
+        raise api_error("TRANSCRIPTION_EXPORT_BUSY", "Too many PDF exports in progress, please retry shortly",
+                        status.HTTP_503_SERVICE_UNAVAILABLE)
+    temp_dir = get_temp_dir(prefix="export_pdf_")
+    pdf_path = temp_dir / "export.pdf"
+    try:
+        await asyncio.to_thread(
+            render_pdf,
+            pdf_path,
+            title=payload.title,
+            summary=summary_doc,
+            transcript_text=payload.transcript_text,
+            include_summary=payload.include_summary,
+            include_transcript=payload.include_transcript,
+            primary_lang=primary_lang,
+            locale=payload.locale,
+        )
+        pdf_size = pdf_path.stat().st_size
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    finally:
+        _pdf_export_semaphore.release()
 
     # 5. 組檔名（UTF-8 percent-encode 給 Content-Disposition）
     download_filename = (payload.title or "transcript").strip() or "transcript"
@@ -632,18 +690,19 @@ async def export_transcription_pdf(
             user_id=str(current_user["_id"]),
             task_id=task_id,
             status_code=200,
-            message=f"匯出 PDF：{download_filename}（{len(pdf_bytes):,} bytes，lang={primary_lang}）"
+            message=f"匯出 PDF：{download_filename}（{pdf_size:,} bytes，lang={primary_lang}）"
         )
     except Exception as e:
         log.warning("transcription.audit_log.failed", action="export_pdf", error=str(e))
 
-    return StreamingResponse(
-        BytesIO(pdf_bytes),
+    # FileResponse 自帶 Content-Length；送完（含 client 中斷）由 background 清暫存
+    return FileResponse(
+        pdf_path,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename*=UTF-8''{encoded}",
-            "Content-Length": str(len(pdf_bytes)),
-        }
+        },
+        background=BackgroundTask(shutil.rmtree, temp_dir, ignore_errors=True),
     )
 
 
@@ -695,6 +754,92 @@ async def log_transcript_export(
     return {"success": True}
 
 
+@router.get("/{task_id}/export/{fmt}")
+async def export_transcript(
+    request: Request,
+    task_id: str,
+    fmt: Literal["srt", "vtt", "txt"],
+    mode: Literal["subtitle", "paragraph"] = Query("subtitle", description="txt 專用：subtitle=時間軸逐列 / paragraph=段落全文"),
+    density: float = Query(3.0, ge=0, le=MAX_DENSITY_SECONDS, description="字幕疏密度（秒），同前端拉桿"),
+    time_format: Literal["start", "range"] = Query("start", description="txt 字幕模式的時間戳格式"),
+    include_speaker: bool = True,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Server-side 串流匯出 SRT / VTT / TXT。
+
+    輸出與前端 client-side 匯出（useSubtitleMode.js）逐字相同。segments 從分桶
+    逐批讀出、邊合併邊寫進回應，講者名稱即時套用；server 端只常駐幾個 bucket
+    與當前一列，不需把整份 segments 載入記憶體或先組好整份檔案。
+    前端編輯中尚未存檔的內容不在 DB，那種情境仍走 client-side 匯出 + /export/log。
+    """
+    task_repo = TaskRepository(db)
+    task = await task_repo.get_by_id_and_user(task_id, str(current_user["_id"]))
+    if not task:
+        raise api_error("TRANSCRIPTION_TASK_NOT_FOUND", "Task not found or access denied", status.HTTP_404_NOT_FOUND)
+    if task["status"] != "completed":
+        raise api_error("TRANSCRIPTION_TASK_NOT_COMPLETED", "Task not completed yet (current status: {status})", status.HTTP_400_BAD_REQUEST, status=task['status'])
+
+    speaker_names = (task.get("speaker_names") or {}) if include_speaker else None
+
+    if fmt == "txt" and mode == "paragraph":
+        pieces = _iter_text(await _load_transcript_content(task, task_id, db))
+    else:
+        from src.database.repositories.segment_repo import SegmentRepository
+
+        segment_repo = SegmentRepository(db)
+        if await segment_repo.get_header(task_id):
+            segments = segment_repo.iter_segments(task_id)
+        else:
+            # 向後相容：舊任務的 segments 存在檔案
+            segments_file_path = get_task_field(task, "segments_file")
+            if not segments_file_path or not Path(segments_file_path).exists():
+                raise api_error("TRANSCRIPTION_SEGMENTS_NOT_FOUND", "Segments not found", status.HTTP_404_NOT_FOUND)
+            try:
+                legacy_segments = json.loads(Path(segments_file_path).read_text(encoding='utf-8'))
+            except Exception as e:
+                raise api_error("TRANSCRIPTION_SEGMENTS_READ_FAILED", "Failed to read segments file: {error}", status.HTTP_500_INTERNAL_SERVER_ERROR, error=str(e))
+
+            async def _legacy_iter():
+                for segment in legacy_segments:
+                    yield segment
+            segments = _legacy_iter()
+
+        groups = group_segments(segments, density)
+        if fmt == "srt":
+            pieces = iter_srt(groups, speaker_names)
+        elif fmt == "vtt":
+            pieces = iter_vtt(groups, speaker_names)
+        else:
+            pieces = iter_txt(groups, speaker_names, time_format)
+
+    download_filename = _export_filename(task, task_id, fmt)
+    encoded_filename = quote(download_filename, safe='')
+
+    # 同 /export/log 的 action 命名，client-side 與 server-side 匯出在稽核上一致
+    try:
+        from ..utils.audit_logger import get_audit_logger
+        audit_logger = get_audit_logger()
+        await audit_logger.log_transcription_operation(
+            request=request,
+            action=f"export_{fmt}",
+            user_id=str(current_user["_id"]),
+            task_id=task_id,
+            status_code=200,
+            message=f"匯出 {fmt.upper()}：{download_filename}"
+        )
+    except Exception as e:
+        log.warning("transcription.audit_log.failed", action=f"export_{fmt}", error=str(e))
+
+    return StreamingResponse(
+        _encode_chunks(pieces),
+        media_type=_EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
+        }
+    )
+
+
 @router.get("/{task_id}/audio")
 async def download_audio(
     task_id: str,
@@ -730,12 +875,14 @@ async def download_audio(
     if is_aws():
         # AWS 模式：回傳 S3 presigned URL redirect
         from ..utils.storage.backend import S3_REGION
-        from ..utils.storage.compact import audio_exists_by_path, get_presigned_url_by_path
+        from ..utils.storage.compact import resolve_audio_url_async
         from fastapi.responses import RedirectResponse
         from urllib.parse import urlparse
 
         audio_file_path = task.get("result", {}).get("audio_file")
-        if not audio_file_path or not audio_exists_by_path(audio_file_path):
+        # 存在檢查 + presigned URL 有快取；未命中才在 thread 打 S3
+        presigned_url = await resolve_audio_url_async(audio_file_path) if audio_file_path else None
+        if not presigned_url:
             # S3 Lifecycle 已刪除，順便清掉 DB 殘留記錄
             if audio_file_path:
                 task_repo = TaskRepository(db)
@@ -745,8 +892,6 @@ async def download_audio(
                 })
             raise api_error("TRANSCRIPTION_AUDIO_EXPIRED", "Audio file has expired or been deleted", status.HTTP_404_NOT_FOUND)
 
-        presigned_url = get_presigned_url_by_path(audio_file_path, expires_in=3600)
-
         # 驗證 presigned URL 指向合法的 S3 域名，防止 open redirect
         parsed = urlparse(presigned_url)
         if not parsed.hostname or not parsed.hostname.endswith(".amazonaws.com"):
@@ -862,7 +1007,223 @@ async def get_segments(
     return {
         "task_id": task_id,
         "segments": segments_data,
-        "speaker_names": speaker_names
+        "speaker_names": speaker_names,
+        "version": (segment_doc or {}).get("version", 0),
+    }
+
+
+# /segments/range 每頁預設 / 最多幾段
+SEGMENT_PAGE_DEFAULT_LIMIT = 200
+SEGMENT_PAGE_MAX_LIMIT = 1000
+
+
+def _encode_segment_cursor(index: int) -> str:
+    raw = json.dumps({"i": index}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_segment_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        index = json.loads(base64.urlsafe_b64decode(padded.encode()))["i"]
+    except Exception:
+        index = None
+    if not isinstance(index, int) or index < 0:
+        raise api_error("TRANSCRIPTION_INVALID_CURSOR", "Invalid segment cursor", status.HTTP_400_BAD_REQUEST)
+    return index
+
+
+def _segments_etag(header: dict, speaker_names: dict, query: str) -> str:
+    """weak ETag：segments 版本（version + updated_at + 筆數）+ 講者名稱 + 查詢參數"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"{header.get('version')}:{header.get('updated_at')}:{header.get('segment_count')}:".encode())
+    digest.update(json.dumps(speaker_names, sort_keys=True, ensure_ascii=False).encode())
+    digest.update(query.encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 的 weak 比對（忽略 W/ 前綴，支援逗號列表與 *）"""
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+@router.get("/{task_id}/segments/range")
+async def get_segments_range(
+    request: Request,
+    task_id: str,
+    start_time: Optional[float] = Query(None, ge=0, description="時間窗起點（秒），與 end_time 一起用"),
+    end_time: Optional[float] = Query(None, ge=0, description="時間窗終點（秒，不含）"),
+    around: Optional[float] = Query(None, ge=0, description="以此時間點所在的 segment 為中心取一段"),
+    before: int = Query(50, ge=0, le=SEGMENT_PAGE_MAX_LIMIT, description="around 模式：中心之前幾段"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor / prev_cursor"),
+    limit: int = Query(SEGMENT_PAGE_DEFAULT_LIMIT, ge=1, le=SEGMENT_PAGE_MAX_LIMIT),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """分段讀取 segments（編輯器 / 播放器先載可見範圍，其餘再 lazy 載入）
+
+    三種取法擇一（都不給 = 從第 0 段開始的第一頁）：
+    - 時間窗：start_time + end_time，回傳與 [start_time, end_time) 重疊的段（最多 limit 段）
+    - 游標：cursor，延續上一次回應的 next_cursor / prev_cursor
+    - 時間點附近：around，從該時間點所在段往前 before 段起取 limit 段
+
+    只載入涵蓋的 buckets（segment_buckets 的 (task_id, bucket) 索引），時間定位以 bucket
+    的 end_time 預篩。回應帶 weak ETag，If-None-Match 命中回 304。
+
+    Returns:
+        {task_id, segment_count, version, start_index, end_index, segments, speaker_names,
+         next_cursor, prev_cursor}；end_index 不含，沒有下一 / 上一頁時 cursor 為 None
+    """
+    modes = sum([start_time is not None or end_time is not None, around is not None, cursor is not None])
+    if modes > 1 or (start_time is None) != (end_time is None):
+        raise api_error("TRANSCRIPTION_INVALID_RANGE", "Specify exactly one of start_time+end_time, around, or cursor", status.HTTP_400_BAD_REQUEST)
+    if start_time is not None and end_time < start_time:
+        raise api_error("TRANSCRIPTION_INVALID_RANGE", "end_time must not be earlier than start_time", status.HTTP_400_BAD_REQUEST)
+
+    task_repo = TaskRepository(db)
+    task = await task_repo.get_by_id_and_user(task_id, str(current_user["_id"]))
+    if not task:
+        raise api_error("TRANSCRIPTION_TASK_NOT_FOUND", "Task not found or access denied", status.HTTP_404_NOT_FOUND)
+    if task["status"] != "completed":
+        raise api_error("TRANSCRIPTION_TASK_NOT_COMPLETED", "Task not completed yet (current status: {status})", status.HTTP_400_BAD_REQUEST, status=task['status'])
+
+    from src.database.repositories.segment_repo import SegmentRepository, is_bucketed
+
+    segment_repo = SegmentRepository(db)
+    header = await segment_repo.get_header(task_id)
+    if header and not is_bucketed(header):
+        # 舊的內嵌格式：就地轉成分桶（冪等，一次性）後才能走索引範圍讀取
+        header = await segment_repo.migrate_embedded(task_id)
+    if not header:
+        # 更舊的檔案格式沒有分桶，前端退回整份 /segments
+        raise api_error("TRANSCRIPTION_SEGMENTS_NOT_FOUND", "Segments not found", status.HTTP_404_NOT_FOUND)
+
+    speaker_names = task.get("speaker_names", {})
+    etag = _segments_etag(header, speaker_names, request.url.query)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    count = header["segment_count"]
+    if start_time is not None:
+        start = await segment_repo.index_at_time(task_id, start_time, header)
+        stop = await segment_repo.index_starting_from(task_id, end_time, header)
+        end = min(max(start, stop), start + limit)
+    else:
+        if around is not None:
+            start = max(0, await segment_repo.index_at_time(task_id, around, header) - before)
+        elif cursor is not None:
+            start = min(_decode_segment_cursor(cursor), count)
+        else:
+            start = 0
+        end = min(count, start + limit)
+
+    segments = await segment_repo.get_range(task_id, start, end) if end > start else []
+
+    return JSONResponse(
+        {
+            "task_id": task_id,
+            "segment_count": count,
+            "version": header.get("version", 0),
+            "start_index": start,
+            "end_index": end,
+            "segments": segments,
+            "speaker_names": speaker_names,
+            "next_cursor": _encode_segment_cursor(end) if end < count else None,
+            "prev_cursor": _encode_segment_cursor(max(0, start - limit)) if start > 0 else None,
+        },
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+@router.patch("/{task_id}/segments")
+async def patch_segments(
+    request: Request,
+    task_id: str,
+    patch: SegmentPatchRequest,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """以增量操作更新 segments 與逐字稿全文（編輯器 autosave 用，取代整份 PUT /content）
+
+    - ops：依序套用的 segment 操作（edit / split / merge / retime），只改所在 bucket 的陣列元素
+    - text_splices：全文的 {offset, delete, insert} 替換，在 Mongo 端以 pipeline update 套用
+    - base_version：樂觀鎖，須等於目前 segments 的 version（/segments、/segments/range 回傳）
+
+    Returns:
+        {task_id, version, segment_count, applied, text_length}
+
+    Raises:
+        HTTPException: 任務不存在 / 未完成（404 / 400）、版本衝突（409）、操作不合法（422）
+    """
+    task_repo = TaskRepository(db)
+    task = await task_repo.get_by_id_and_user(task_id, str(current_user["_id"]))
+    if not task:
+        raise api_error("TRANSCRIPTION_TASK_NOT_FOUND", "Task not found or access denied", status.HTTP_404_NOT_FOUND)
+    if task["status"] != "completed":
+        raise api_error("TRANSCRIPTION_CONTENT_UPDATE_NOT_COMPLETED", "Can only update content of completed tasks (current status: {status})", status.HTTP_400_BAD_REQUEST, status=task['status'])
+
+    from src.database.repositories.segment_repo import SegmentRepository, SegmentVersionConflict
+    from src.database.repositories.transcription_repo import TranscriptionRepository, validate_splices
+
+    transcription_repo = TranscriptionRepository(db)
+    splices = [s.model_dump() for s in patch.text_splices]
+    text_length = None
+    if splices:
+        text_length = await transcription_repo.get_text_length(task_id)
+        try:
+            if text_length is None:
+                raise ValueError("transcription content not found")
+            validate_splices(splices, text_length)
+        except ValueError as e:
+            raise api_error("TRANSCRIPTION_INVALID_PATCH", "Invalid patch: {error}", status.HTTP_422_UNPROCESSABLE_ENTITY, error=str(e))
+
+    async def splice_text():
+        # 版本已搶到、segments 尚未寫：長度對不上 = 有人同時走了整份 PUT /content，
+        # 拋 409 後 apply_patch 會退回版本號，segments 與全文都不動
+        if not await transcription_repo.apply_splices(task_id, splices, text_length):
+            raise api_error("TRANSCRIPTION_VERSION_CONFLICT", "Transcript was modified elsewhere (current version: {current_version})", status.HTTP_409_CONFLICT, current_version=patch.base_version)
+
+    segment_repo = SegmentRepository(db)
+    ops = [op.model_dump(exclude_none=True) for op in patch.ops]
+    try:
+        header = await segment_repo.apply_patch(
+            task_id, patch.base_version, ops, before_write=splice_text if splices else None
+        )
+    except KeyError:
+        raise api_error("TRANSCRIPTION_SEGMENTS_NOT_FOUND", "Segments not found", status.HTTP_404_NOT_FOUND)
+    except SegmentVersionConflict as e:
+        raise api_error("TRANSCRIPTION_VERSION_CONFLICT", "Transcript was modified elsewhere (current version: {current_version})", status.HTTP_409_CONFLICT, current_version=e.current_version)
+    except (ValueError, IndexError) as e:
+        raise api_error("TRANSCRIPTION_INVALID_PATCH", "Invalid patch: {error}", status.HTTP_422_UNPROCESSABLE_ENTITY, error=str(e))
+
+    if splices:
+        text_length = await transcription_repo.get_text_length(task_id)
+
+    await task_repo.update(task_id, {})
+    log.debug("transcription.segments.patched", task_id=task_id, ops=len(ops), splices=len(splices), version=header.get("version"))
+
+    try:
+        from ..utils.audit_logger import get_audit_logger
+        await get_audit_logger().log_transcription_operation(
+            request=request,
+            action="update_content",
+            user_id=str(current_user["_id"]),
+            task_id=task_id,
+            status_code=200,
+            message=f"patch: {len(ops)} ops, {len(splices)} splices",
+        )
+    except Exception as e:
+        log.warning("transcription.audit_log.failed", action="update_content", error=str(e))
+
+    return {
+        "task_id": task_id,
+        "version": header.get("version", 0),
+        "segment_count": header["segment_count"],
+        "applied": len(ops),
+        "text_length": text_length,
     }
 
 
@@ -922,14 +1283,8 @@ async def update_content(
         new_segments = content.get("segments")
         if new_segments is not None:
             segment_repo = SegmentRepository(db)
-
-            exists = await segment_repo.exists(task_id)
-            if exists:
-                await segment_repo.update(task_id, new_segments)
-                log.debug("transcription.segments.updated", task_id=task_id, count=len(new_segments), created=False)
-            else:
-                await segment_repo.create(task_id, new_segments)
-                log.debug("transcription.segments.updated", task_id=task_id, count=len(new_segments), created=True)
+            await segment_repo.replace_all(task_id, new_segments)
+            log.debug("transcription.segments.updated", task_id=task_id, count=len(new_segments))
 
         # 3. 更新 tasks collection 的時間戳（task_repo.update 會自動同步 updated_at 和 timestamps.updated_at）
         await task_repo.update(task_id, {})
@@ -1,29 +1,49 @@
 """分片上傳路由 — 解決 Cloudflare 100MB 上傳限制。
 
 metadata 存於 MongoDB `chunk_uploads` collection（透過 ChunkUploadRepository）。
-chunk 檔案仍存本機 EBS（temp_dir）：同一 upload 的所有 chunk 必須打到同一台
+chunk 資料存本機 EBS（temp_dir）：同一 upload 的所有 chunk 必須打到同一台
 EC2，多 EC2 部署時要做 sticky session（依 upload_id）。
+
+組裝方式：init 時在 temp_dir 預先配置一個完整大小的 `upload.part`，每片到達時
+直接 pwrite 到 `index * chunk_size` 的位置（不另存 chunk 檔、不在 complete 時
+整檔串接重寫）。每片的 sha256 與第 0 片的 magic bytes 在寫入當下就算 / 驗，
+complete 只剩合成 hash + rename，成本與檔案大小無關。
+
+AWS 模式另外把每片當 S3 multipart part 即時轉送（串流 handoff，見
+storage.handoff 模組說明）：上傳完成時 staged 物件也已在 S3，dispatch 只需
+server-side copy，不必再把整檔從本機傳一次。串流任一步失敗只是退回整檔上傳。
 """
 import os
 import asyncio
+import errno
+import hashlib
 import shutil
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
-import aiofiles
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
 
 from ..auth.dependencies import get_current_user
 from ..database.mongodb import MongoDB
 from ..database.repositories.chunk_upload_repo import ChunkUploadRepository
 from ..services.utils.audio_validator import (
+    MAGIC_HEADER_SIZE,
     validate_filename_extension,
     validate_magic_bytes,
+    validate_magic_header,
 )
 from ..utils.api_errors import api_error
 from ..utils.config_loader import get_temp_dir, temp_free_bytes
 from ..utils.logger import get_logger
+from ..utils.storage.handoff import (
+    complete_staged_upload,
+    discard_staged_upload,
+    mark_staged,
+    staged_handoff_enabled,
+    start_staged_upload,
+    upload_staged_part,
+)
 
 router = APIRouter(prefix="/uploads", tags=["Uploads"])
 log = get_logger(__name__)
@@ -43,8 +63,9 @@ CLEANUP_INTERVAL_SECONDS = 300  # 每 5 分鐘掃一次
 
 # 磁碟容量守門：分片暫存與轉錄 working copy 都落在本機 EBS（t3.small 磁碟不大）。
 # init 時若「放得下這個檔後、剩餘空間」會低於這條保留底線就拒絕，避免多人/大檔
-# 上傳把磁碟塞爆拖垮整機。底線要留給：complete 組裝時 chunks 與 assembled 短暫
-# 並存、其他併發上傳、轉錄 working copy、系統本身。預設 2GB，可用環境變數調整。
+# 上傳把磁碟塞爆拖垮整機。底線要留給：其他併發上傳、轉錄 working copy、系統本身。
+# init 會用 posix_fallocate 預先配置整檔空間，已 init 的 session 也會反映在
+# disk_usage 裡。預設 2GB，可用環境變數調整。
 DISK_RESERVE_MB = int(os.environ.get("UPLOAD_DISK_RESERVE_MB", "2048"))
 DISK_RESERVE_BYTES = DISK_RESERVE_MB * 1024 * 1024
 
@@ -62,6 +83,11 @@ _user_chunk_semaphores: dict[str, asyncio.Semaphore] = {}
 GLOBAL_CHUNK_CONCURRENCY = 5
 _global_chunk_semaphore = asyncio.Semaphore(GLOBAL_CHUNK_CONCURRENCY)
 
+# 各片 pwrite 進去的組裝目標檔（complete 時 rename 成原檔名）
+PART_FILENAME = "upload.part"
+# 每片 streaming 讀取 / 寫入的 buffer
+_IO_BUFFER_SIZE = 1024 * 1024
+
 
 def _has_room_for(total_size: int, free_bytes: int) -> bool:
     """放得下 total_size 後，剩餘空間是否仍 >= 保留底線。純函式方便測試。"""
@@ -114,6 +140,7 @@ async def init_upload(
         td = Path(doc.get("temp_dir", ""))
         if td.exists():
             await asyncio.to_thread(shutil.rmtree, td, ignore_errors=True)
+        await _drop_handoff(doc)
     if stale:
         log.info("chunk_upload.init.evicted_stale", user_id=user_id, count=len(stale))
 
@@ -135,6 +162,20 @@ async def init_upload(
     upload_id = str(uuid.uuid4())
     temp_dir = get_temp_dir(prefix="chunk_")
 
+    # 預先配置整檔空間：之後各片直接 pwrite 進去。空間不足在這裡就擋下，
+    # 不會傳到一半才 ENOSPC。
+    try:
+        await asyncio.to_thread(_preallocate, temp_dir / PART_FILENAME, total_size)
+    except OSError as e:
+        await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+        if e.errno != errno.ENOSPC:
+            raise
+        log.warning("chunk_upload.init.preallocate_no_space", user_id=user_id,
+                    need_mb=total_size // (1024 * 1024))
+        raise api_error("UPLOAD_DISK_FULL",
+                        "Server storage is temporarily full, please try again later",
+                        status.HTTP_507_INSUFFICIENT_STORAGE)
+
     await repo.init_upload(
         upload_id=upload_id,
         user_id=user_id,
@@ -142,6 +183,8 @@ async def init_upload(
         total_size=total_size,
         total_chunks=total_chunks,
         temp_dir=temp_dir,
+        chunk_size=CHUNK_SIZE,
+        handoff=await _start_handoff(upload_id, filename),
     )
 
     return {
@@ -181,24 +224,54 @@ async def upload_chunk(
             status.HTTP_400_BAD_REQUEST,
         )
 
+    chunk_size = meta.get("chunk_size") or CHUNK_SIZE
+    offset, expected_len = _chunk_span(meta["total_size"], chunk_size, chunk_index)
+
     # 驗證通過才搶 semaphore：4xx 不消耗配額，能快速回客戶端。
     # 雙層 semaphore：
     #   外層 user — 同 user 卡這層時不占整機名額（user 11 的第 1 條不會被 user 1 的第 4 條擋）
     #   內層 global — 整機 disk I/O 上限，防多用戶突發流量沖垮磁碟
     async with _get_user_chunk_semaphore(user_id):
         async with _global_chunk_semaphore:
-            # 寫入 chunk 檔案
-            # streaming 1MB-per-iter，避免 90MB 一次進 RAM + sync write_bytes 卡 event loop
-            chunk_path = Path(meta["temp_dir"]) / f"chunk_{chunk_index:04d}"
-            async with aiofiles.open(chunk_path, "wb") as out:
+            # streaming 1MB-per-iter pwrite 到組裝檔的對應位置，同時算本片 sha256
+            # 並留下檔頭（第 0 片驗 magic bytes 用）
+            temp_dir = Path(meta["temp_dir"])
+            digest = hashlib.sha256()
+            header = b""
+            written = 0
+            fd = await asyncio.to_thread(_open_part, temp_dir / PART_FILENAME)
+            try:
                 while True:
-                    buf = await file.read(1024 * 1024)
+                    buf = await file.read(_IO_BUFFER_SIZE)
                     if not buf:
                         break
-                    await out.write(buf)
-
-            # 原子 $addToSet 寫入 received，回傳更新後的 doc
-            updated = await repo.add_chunk(upload_id, user_id, chunk_index)
+                    if written + len(buf) > expected_len:
+                        raise _chunk_size_mismatch(chunk_index, expected_len)
+                    await asyncio.to_thread(_pwrite_all, fd, buf, offset + written)
+                    digest.update(buf)
+                    if len(header) < MAGIC_HEADER_SIZE:
+                        header += buf[:MAGIC_HEADER_SIZE - len(header)]
+                    written += len(buf)
+            finally:
+                os.close(fd)
+            if written != expected_len:
+                raise _chunk_size_mismatch(chunk_index, expected_len)
+
+            if chunk_index == 0:
+                # 偽造副檔名的非音檔在第一片就擋下，不必等整檔傳完
+                try:
+                    validate_magic_header(header)
+                except HTTPException:
+                    await _discard_upload(repo, meta)
+                    raise
+
+            # AWS：本片同時送成 S3 multipart part（剛寫完，讀回走 page cache）
+            etag = await _send_handoff_part(
+                repo, meta, chunk_index, temp_dir / PART_FILENAME, offset, expected_len)
+
+            # 原子 $addToSet 寫入 received（含本片 hash / ETag），回傳更新後的 doc
+            updated = await repo.add_chunk(
+                upload_id, user_id, chunk_index, digest.hexdigest(), part_etag=etag)
             if updated is None:
                 # 驗證與寫入之間 doc 被刪除（極罕見：例如 concurrent complete 驗證
                 # 失敗或 cleanup sweep 邊界 race）。chunk 檔還在但已無 metadata 對應，
@@ -222,7 +295,7 @@ async def complete_upload(
     upload_id: str,
     current_user: dict = Depends(get_current_user),
 ):
-    """驗證所有 chunk 到齊，組裝成完整檔案"""
+    """驗證所有 chunk 到齊，完成組裝（rename + 合成 content hash，不重寫資料）"""
     repo = _repo()
     meta = await repo.get(upload_id)
     if not meta:
@@ -237,6 +310,10 @@ async def complete_upload(
                         "You do not have permission for this upload",
                         status.HTTP_403_FORBIDDEN)
 
+    if meta.get("status") == "completed":
+        # 重送 complete（例如前端逾時重試）：已完成就原樣回傳
+        return _completed_response(upload_id, meta)
+
     received = set(meta.get("received") or [])
     missing = set(range(meta["total_chunks"])) - received
     if missing:
@@ -247,30 +324,30 @@ async def complete_upload(
         )
 
     temp_dir = Path(meta["temp_dir"])
+    part_path = temp_dir / PART_FILENAME
     assembled_path = temp_dir / meta["filename"]
+    chunk_size = meta.get("chunk_size") or CHUNK_SIZE
+    hashes = dict(meta.get("chunk_hashes") or {})
 
-    # 組裝：sync I/O 在 threadpool 跑，避免卡 event loop
-    await asyncio.to_thread(_assemble_chunks, temp_dir, assembled_path, meta["total_chunks"])
-
-    # 組裝完成後驗證 magic bytes（防止上傳偽造副檔名的非音檔）
     try:
-        validate_magic_bytes(assembled_path)
+        # 升級前開始的 session 仍是一片一檔：併進組裝檔（新 session 不會有）
+        legacy = await asyncio.to_thread(
+            _absorb_legacy_chunks, temp_dir, part_path, meta["total_chunks"], chunk_size)
+        hashes.update(legacy)
+        # 第 0 片寫入時已驗過；這裡只讀檔頭 16 bytes，涵蓋舊格式 session
+        validate_magic_bytes(part_path)
     except HTTPException:
-        # 驗證失敗：清理已組裝檔案與整個 upload，讓使用者重傳
-        if assembled_path.exists():
-            assembled_path.unlink()
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        await repo.delete(upload_id)
+        # 驗證失敗：清理整個 upload，讓使用者重傳
+        await _discard_upload(repo, meta)
         raise
 
-    await repo.mark_completed(upload_id, assembled_path)
+    content_sha256 = combine_chunk_hashes(hashes, meta["total_chunks"])
+    await asyncio.to_thread(os.replace, part_path, assembled_path)
+    # 最後一片已到：完成 staged multipart，dispatch 時直接 server-side copy
+    await _finish_handoff(meta, assembled_path, content_sha256, chunk_size)
+    await repo.mark_completed(upload_id, assembled_path, content_sha256)
 
-    return {
-        "status": "assembled",
-        "upload_id": upload_id,
-        "filename": meta["filename"],
-        "size": assembled_path.stat().st_size,
-    }
+    return _completed_response(upload_id, {**meta, "content_sha256": content_sha256})
 
 
 @router.delete("/{upload_id}")
@@ -291,17 +368,181 @@ async def abort_upload(
         td = Path(doc.get("temp_dir", ""))
         if td.exists():
             await asyncio.to_thread(shutil.rmtree, td, ignore_errors=True)
+        await _drop_handoff(doc)
         log.info("chunk_upload.aborted", upload_id=upload_id)
     return {"status": "aborted", "found": doc is not None}
 
 
-def _assemble_chunks(temp_dir: Path, assembled_path: Path, total_chunks: int) -> None:
-    """把 N 個 chunk 串接成完整檔。Sync I/O，由 to_thread 包覆。"""
-    with assembled_path.open("wb") as out:
+def _completed_response(upload_id: str, meta: dict) -> dict:
+    return {
+        "status": "assembled",
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "size": meta["total_size"],
+        "content_sha256": meta.get("content_sha256"),
+    }
+
+
+async def _discard_upload(repo: ChunkUploadRepository, meta: dict) -> None:
+    """驗證失敗：刪掉整個 upload（metadata + temp_dir + staged handoff），讓使用者重傳。"""
+    await asyncio.to_thread(shutil.rmtree, Path(meta["temp_dir"]), ignore_errors=True)
+    await repo.delete(meta["_id"])
+    await _drop_handoff(meta)
+
+
+# ── 串流 handoff（AWS）───────────────────────────────────
+
+async def _start_handoff(upload_id: str, filename: str) -> Optional[dict]:
+    """開 staged multipart upload；不適用或失敗回 None（之後照舊整檔上傳）。"""
+    ext = Path(filename).suffix.lstrip(".").lower()
+    if not staged_handoff_enabled(ext):
+        return None
+    try:
+        s3_upload_id = await asyncio.to_thread(start_staged_upload, upload_id, ext)
+    except Exception as e:
+        log.warning("chunk_upload.handoff.start_failed", upload_id=upload_id, error=str(e))
+        return None
+    return {"s3_upload_id": s3_upload_id, "ext": ext, "etags": {}, "failed": False}
+
+
+async def _send_handoff_part(
+    repo: ChunkUploadRepository, meta: dict, chunk_index: int,
+    part_path: Path, offset: int, length: int,
+) -> Optional[str]:
+    """把剛寫好的一片送成 S3 part，回傳 ETag；未啟用 / 已失敗 / 本次失敗回 None。"""
+    handoff = meta.get("handoff")
+    if not handoff or handoff.get("failed"):
+        return None
+    try:
+        return await asyncio.to_thread(
+            upload_staged_part, meta["_id"], handoff["ext"], handoff["s3_upload_id"],
+            chunk_index + 1, part_path, offset, length,
+        )
+    except Exception as e:
+        # 不讓 S3 問題擋住使用者上傳：標記失敗，dispatch 退回整檔上傳
+        log.warning("chunk_upload.handoff.part_failed", upload_id=meta["_id"],
+                    chunk_index=chunk_index, error=str(e))
+        await repo.mark_handoff_failed(meta["_id"])
+        return None
+
+
+async def _finish_handoff(
+    meta: dict, assembled_path: Path, content_sha256: Optional[str], chunk_size: int,
+) -> None:
+    """完成 staged multipart 並在組裝檔旁留 sidecar（含 content hash）；缺 part、沒有 hash
+    或失敗則放棄 staged 物件。"""
+    handoff = meta.get("handoff")
+    if not handoff:
+        return
+    etags = handoff.get("etags") or {}
+    ordered = [etags.get(str(i)) for i in range(meta["total_chunks"])]
+    if not handoff.get("failed") and None not in ordered and content_sha256:
+        try:
+            key = await asyncio.to_thread(
+                complete_staged_upload, meta["_id"], handoff["ext"], handoff["s3_upload_id"], ordered)
+            await asyncio.to_thread(mark_staged, assembled_path, key, content_sha256, chunk_size)
+            log.info("chunk_upload.handoff.staged", upload_id=meta["_id"], parts=len(ordered))
+            return
+        except Exception as e:
+            log.warning("chunk_upload.handoff.complete_failed", upload_id=meta["_id"], error=str(e))
+    await _drop_handoff(meta)
+
+
+async def _drop_handoff(doc: dict) -> None:
+    """清掉 upload session 對應的 staged multipart / 物件（best-effort）。"""
+    handoff = doc.get("handoff")
+    if handoff:
+        await asyncio.to_thread(
+            discard_staged_upload, doc["_id"], handoff["ext"], handoff.get("s3_upload_id"))
+
+
+def _chunk_size_mismatch(chunk_index: int, expected_len: int):
+    return api_error(
+        "UPLOAD_CHUNK_SIZE_MISMATCH",
+        f"Chunk {chunk_index} must be exactly {expected_len} bytes",
+        status.HTTP_400_BAD_REQUEST,
+        expected=expected_len,
+    )
+
+
+# ── 組裝檔 I/O（sync，由 to_thread 包覆）────────────────────
+
+def _chunk_span(total_size: int, chunk_size: int, chunk_index: int) -> tuple:
+    """第 chunk_index 片在整檔中的 (offset, 長度)；最後一片為餘數。純函式方便測試。"""
+    offset = chunk_index * chunk_size
+    return offset, max(0, min(chunk_size, total_size - offset))
+
+
+def _preallocate(path: Path, size: int) -> None:
+    """建立並預先配置 size bytes 的組裝檔。
+
+    posix_fallocate 真的保留磁碟 block（空間不足 → ENOSPC）；平台 / 檔案系統不支援時
+    退回 ftruncate（sparse file，寫入時才配置）。
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except AttributeError:
+            os.ftruncate(fd, size)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                raise
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _open_part(path: Path) -> int:
+    # O_CREAT：升級前開始的 session 沒有預先配置的組裝檔
+    return os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    """pwrite 可能只寫一部分（磁碟 / signal），寫到完為止。"""
+    view = memoryview(data)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        view = view[n:]
+        offset += n
+
+
+def _absorb_legacy_chunks(
+    temp_dir: Path, part_path: Path, total_chunks: int, chunk_size: int,
+) -> Dict[str, str]:
+    """把舊格式的 `chunk_NNNN` 檔寫進組裝檔並刪掉，回傳 {index: sha256}。"""
+    hashes: Dict[str, str] = {}
+    fd = None
+    try:
         for i in range(total_chunks):
             chunk_path = temp_dir / f"chunk_{i:04d}"
-            out.write(chunk_path.read_bytes())
+            if not chunk_path.exists():
+                continue
+            if fd is None:
+                fd = _open_part(part_path)
+            data = chunk_path.read_bytes()
+            _pwrite_all(fd, data, i * chunk_size)
+            hashes[str(i)] = hashlib.sha256(data).hexdigest()
             chunk_path.unlink()
+    finally:
+        if fd is not None:
+            os.close(fd)
+    return hashes
+
+
+def combine_chunk_hashes(chunk_hashes: Dict[str, str], total_chunks: int) -> Optional[str]:
+    """整檔 content hash = sha256(各片 sha256 digest 依 index 串接)。
+
+    同 S3 multipart ETag 的作法：各片亂序到達、各自算 hash，complete 時只合成，
+    不必重讀整檔。任一片缺 hash 回 None。
+    """
+    outer = hashlib.sha256()
+    for i in range(total_chunks):
+        h = chunk_hashes.get(str(i))
+        if h is None:
+            return None
+        outer.update(bytes.fromhex(h))
+    return outer.hexdigest()
 
 
 # ── 給其他 router 用的 API ─────────────────────────────
@@ -317,6 +558,7 @@ async def consume_upload(upload_id: str, user_id: str) -> Optional[dict]:
         - filename (str)
         - temp_dir (Path)
         - assembled_path (Path)
+        - content_sha256 (str | None，見 combine_chunk_hashes)
     Caller 拿到非 None 後，須負責清 temp_dir。
     """
     doc = await ChunkUploadRepository(MongoDB.get_db()).consume(upload_id, user_id)
@@ -327,6 +569,7 @@ async def consume_upload(upload_id: str, user_id: str) -> Optional[dict]:
         "filename": doc["filename"],
         "temp_dir": Path(doc["temp_dir"]),
         "assembled_path": Path(doc["assembled_path"]),
+        "content_sha256": doc.get("content_sha256"),
     }
 
 
@@ -353,6 +596,7 @@ async def periodic_chunk_upload_cleanup(
                 td = Path(doc.get("temp_dir", ""))
                 if td.exists():
                     await asyncio.to_thread(shutil.rmtree, td, ignore_errors=True)
+                await _drop_handoff(doc)
             if expired:
                 log.info("chunk_upload.sweep.completed", count=len(expired))
         except Exception as e:
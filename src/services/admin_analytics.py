@@ -5,14 +5,35 @@
   - 純函式（本檔上半）：吃 aggregation 結果 dict、回 response 區塊；無 Mongo，可快速 unit test。
   - AdminAnalytics(db)（下半）：跑 pipeline 的 orchestration + 組 full_report()。
 
+報表端點只讀 analytics_rollups 預聚合桶（事件發生時增量維護，見 analytics_rollup_repo）；
+本檔的 aggregation pipeline 改由 reconcile_rollups 定期重算、覆寫桶以修正漂移，
+且走 secondaryPreferred，不再壓在 primary 上。
+
 詳見 CONTEXT.md「後台統計」。
 """
+import asyncio
+import os
 from datetime import datetime, timedelta, timezone
 
+from pymongo import ReadPreference
+
+from ..database.repositories import analytics_rollup_repo as rollups
+from ..database.repositories.analytics_rollup_repo import AnalyticsRollupRepository
+from ..utils.logger import get_logger
 from .llm_pricing import cost_usd, pricing_table_for_response
 
+log = get_logger(__name__)
+
 TZ_UTC8 = timezone(timedelta(hours=8))
 
+# 對帳：日桶重算最近幾天（報表看 30 天，多留幾天緩衝）、月桶重算幾個月（= monthly_cost 上限）
+ROLLUP_RECONCILE_DAYS = int(os.getenv("ROLLUP_RECONCILE_DAYS", "35"))
+ROLLUP_RECONCILE_MONTHS = 24
+ANALYTICS_RECONCILE_INTERVAL_SECONDS = int(os.getenv("ANALYTICS_RECONCILE_INTERVAL_SECONDS", "3600"))
+
+# 首次對帳（_ensure_rollups）同時只跑一次：同時湧入的第一批請求等它、不各自重建
+_initial_reconcile_lock = asyncio.Lock()
+
 
 # ── 純函式（無 Mongo；統計的 merge / derive 邏輯）──────────────────────────────
 
@@ -242,13 +263,63 @@ def format_recent_orders(recent_raw: list, email_map: dict) -> list:
     } for o in recent_raw]
 
 
+# ── 預聚合桶 → 報表輸入（純函式；輸出形狀同原 aggregation 結果，直接餵上面的 merge/derive）──
+
+def rollup_daily_rows(rows: list, count_key: str, token_key: str) -> list:
+    """日桶 → `[{_id: date, <count_key>, <token_key>}]`（同 `_daily_group` 結果）。"""
+    return [{"_id": r["period"], count_key: r.get("count", 0), token_key: r.get("tokens", 0)} for r in rows]
+
+
+def rollup_user_rows(rows: list, count_key: str, token_key: str) -> list:
+    """使用者桶 → `[{_id: user_id, <count_key>, <token_key>}]`。"""
+    return [{"_id": r.get("key"), count_key: r.get("count", 0), token_key: r.get("tokens", 0)} for r in rows]
+
+
+def rollup_cost_rows(rows: list) -> list:
+    """月 × 模型桶 → `[{_id: {month, model}, prompt, completion, total, count}]`（同 `_monthly_cost_group`）。"""
+    return [{
+        "_id": {"month": r["period"], "model": r.get("key") or "unknown"},
+        "prompt": r.get("prompt", 0), "completion": r.get("completion", 0),
+        "total": r.get("total", 0), "count": r.get("count", 0),
+    } for r in rows]
+
+
+def rollup_duration(row: dict) -> dict:
+    """處理時長桶（sum / count / min / max）→ avg/min/max；無完成任務回空 dict（format_performance 補 0）。"""
+    count = (row or {}).get("count", 0)
+    if not count:
+        return {}
+    return {
+        "avg_duration": row.get("duration_sum", 0) / count,
+        "min_duration": row.get("duration_min", 0),
+        "max_duration": row.get("duration_max", 0),
+    }
+
+
+def rollup_revenue(total_rows: list, monthly_rows: list, *, limit: int = 6) -> tuple:
+    """營收桶 → (總收入, 額外額度收入, 近月收入 [{month, amount}] 新到舊)。"""
+    total = sum(r.get("amount", 0) for r in total_rows)
+    extra = sum(r.get("amount", 0) for r in total_rows if r.get("key") == "extra_quota")
+    per_month = {}
+    for r in monthly_rows:
+        if r.get("count"):
+            per_month[r["period"]] = per_month.get(r["period"], 0) + r.get("amount", 0)
+    monthly = [{"month": m, "amount": per_month[m]} for m in sorted(per_month, reverse=True)[:limit]]
+    return total, extra, monthly
+
+
 # ── orchestration（跑 pipeline + 用上面的純函式組 report）──────────────────────
 
 
+def _days_ago_ts(days: int) -> int:
+    """N 天前（以 UTC+8 當天 00:00 起算）的 Unix timestamp（秒）。"""
+    dt = datetime.now(TZ_UTC8).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    return int(dt.timestamp())
+
+
 def _thirty_days_ago_ts() -> int:
     """30 天前（以 UTC+8 當天 00:00 起算）的 Unix timestamp（秒）。"""
-    dt = datetime.now(TZ_UTC8).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
-    return int(dt.timestamp())
+    return _days_ago_ts(30)
 
 
 def _daily_date_series(cutoff_ts: int) -> list:
@@ -307,6 +378,12 @@ def _month_window(months: int) -> tuple:
     return int(cutoff.timestamp()), month_list
 
 
+def _utc_month_start(month: str) -> int:
+    """'YYYY-MM' → 該月 UTC 月初的 timestamp（營收以 UTC 分月，cutoff 需對齊同一個時區）"""
+    year, mon = (int(x) for x in month.split("-"))
+    return int(datetime(year, mon, 1, tzinfo=timezone.utc).timestamp())
+
+
 def _monthly_cost_group(date_field: str, prompt_f: str, completion_f: str,
                         total_f: str, model_f: str, cutoff_ts: int) -> list:
     """逐月 × 逐模型 的 token 聚合（UTC+8 分月）。單價在 Python 端套（因各模型/級距不同）。"""
@@ -329,11 +406,25 @@ def _monthly_cost_group(date_field: str, prompt_f: str, completion_f: str,
     ]
 
 
+def _named_group(field: str) -> list:
+    """全期間依欄位值計數（含缺值 → _id None），對帳用。"""
+    return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+
+
+def _user_group(user_field: str, token_path: str) -> list:
+    return [{"$group": {
+        "_id": f"${user_field}",
+        "count": {"$sum": 1},
+        "tokens": {"$sum": {"$ifNull": [f"${token_path}", 0]}},
+    }}]
+
+
 class AdminAnalytics:
-    """後台統計：跑 3-collection aggregation，組成 /statistics 回應。"""
+    """後台統計：報表讀 analytics_rollups 預聚合桶；reconcile_rollups 以原始 aggregation 重算覆寫。"""
 
     def __init__(self, db):
         self.db = db
+        self.rollups = AnalyticsRollupRepository(db)
 
     async def _agg(self, collection, pipeline, *, one: bool = False, default: dict = None):
         cursor = collection.aggregate(pipeline)
@@ -342,70 +433,175 @@ class AdminAnalytics:
             return rows[0] if rows else dict(default or {})
         return rows
 
+    async def _ensure_rollups(self) -> None:
+        """從未對帳過（新部署 / 新環境）→ 先同步重算一次，之後交給增量 + 定期對帳。
+
+        同時湧入的請求排隊等同一把鎖，拿到鎖後再確認一次，只有第一個真的重算。
+        """
+        if await self.rollups.last_reconciled_at() is not None:
+            return
+        async with _initial_reconcile_lock:
+            if await self.rollups.last_reconciled_at() is None:
+                await self.reconcile_rollups()
+
+    # ── 對帳（原始 aggregation → 覆寫預聚合桶）────────────────────────
+
+    async def reconcile_rollups(
+        self, days: int = ROLLUP_RECONCILE_DAYS, months: int = ROLLUP_RECONCILE_MONTHS,
+    ) -> dict:
+        """以原始 aggregation 重算所有預聚合桶並覆寫（修正增量寫入失敗、刪帳號、退款等漂移）。
+
+        日桶只重算最近 `days` 天、月桶最近 `months` 個月，更早的桶保留不動；全期間桶整批重算。
+        讀取走 secondaryPreferred（有 secondary 時不壓 primary）。對帳期間落在重算與覆寫之間的
+        增量可能被覆蓋，下一輪對帳會補回。回傳各 metric 寫入筆數。
+        """
+        def src(name):
+            return self.db[name].with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+
+        tasks, summary_logs, orders = src("tasks"), src("summary_logs"), src("orders")
+        day_cutoff = _days_ago_ts(days)
+        first_day = rollups.day_utc8(day_cutoff)
+        month_cutoff, month_list = _month_window(months)
+        written = {}
+
+        async def replace(metric, docs, period_gte=None):
+            if period_gte is not None:
+                # 重算只覆寫 period_gte 起的桶：cutoff 與分桶時區若有落差，前一個桶只會算到
+                # 邊界附近幾小時，不能拿來覆寫該桶的完整值
+                docs = [d for d in docs if d["period"] >= period_gte]
+            written[metric] = await self.rollups.replace_metric(metric, docs, period_gte=period_gte)
+
+        daily_tasks = await self._agg(tasks, _daily_group(
+            "timestamps.created_at", "count", "stats.token_usage.total", "tokens", day_cutoff))
+        await replace(rollups.TASKS_DAILY, [
+            {"period": r["_id"], "count": r["count"], "tokens": r["tokens"]} for r in daily_tasks
+        ], first_day)
+        daily_summaries = await self._agg(summary_logs, _daily_group(
+            "created_at", "count", "token_usage.total", "tokens", day_cutoff))
+        await replace(rollups.SUMMARIES_DAILY, [
+            {"period": r["_id"], "count": r["count"], "tokens": r["tokens"]} for r in daily_summaries
+        ], first_day)
+
+        for metric, coll, fields in (
+            (rollups.PUNCT_COST_MONTHLY, tasks, ("timestamps.created_at", "stats.token_usage.prompt",
+             "stats.token_usage.completion", "stats.token_usage.total", "stats.token_usage.model")),
+            (rollups.SUMMARY_COST_MONTHLY, summary_logs, ("created_at", "token_usage.prompt",
+             "token_usage.completion", "token_usage.total", "model")),
+        ):
+            rows = await self._agg(coll, _monthly_cost_group(*fields, month_cutoff))
+            await replace(metric, [{
+                "period": r["_id"]["month"], "key": r["_id"]["model"],
+                "prompt": r["prompt"], "completion": r["completion"], "total": r["total"], "count": r["count"],
+            } for r in rows], month_list[0])
+
+        for kind in rollups.MODEL_KINDS:
+            rows = await self._agg(tasks, _model_group(f"models.{kind}"))
+            await replace(rollups.model_metric(kind), [
+                {"period": rollups.ALL_PERIOD, "key": r["_id"], "count": r["count"]} for r in rows])
+        rows = await self._agg(summary_logs, _model_group("model"))
+        await replace(rollups.SUMMARY_MODEL, [
+            {"period": rollups.ALL_PERIOD, "key": r["_id"], "count": r["count"]} for r in rows])
+        rows = await self._agg(tasks, _named_group("config.punct_provider"))
+        await replace(rollups.PUNCT_PROVIDER, [
+            {"period": rollups.ALL_PERIOD, "key": r["_id"], "count": r["count"]} for r in rows])
+
+        for metric, coll, user_field, token_path in (
+            (rollups.USER_TASKS, tasks, "user.user_id", "stats.token_usage.total"),
+            (rollups.USER_SUMMARIES, summary_logs, "user_id", "token_usage.total"),
+        ):
+            rows = await self._agg(coll, _user_group(user_field, token_path))
+            await replace(metric, [
+                {"period": rollups.ALL_PERIOD, "key": r["_id"], "count": r["count"], "tokens": r["tokens"]}
+                for r in rows])
+
+        duration = await self._agg(tasks, [
+            {"$match": {"status": "completed", "stats.duration_seconds": {"$exists": True, "$ne": None}}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "duration_sum": {"$sum": "$stats.duration_seconds"},
+                "duration_min": {"$min": "$stats.duration_seconds"},
+                "duration_max": {"$max": "$stats.duration_seconds"},
+            }},
+        ])
+        await replace(rollups.TASK_DURATION, [
+            {"period": rollups.ALL_PERIOD, "key": None, **{k: v for k, v in r.items() if k != "_id"}}
+            for r in duration])
+
+        revenue_monthly = await self._agg(orders, [
+            # 營收以 UTC 分月：cutoff 取 month_list[0] 的 UTC 月初（非 UTC+8 月初）
+            {"$match": {"status": "paid", "paid_at": {"$gte": _utc_month_start(month_list[0])}}},
+            {"$group": {
+                "_id": {
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": {"$toDate": {"$multiply": ["$paid_at", 1000]}}}},
+                    "type": "$type",
+                },
+                "amount": {"$sum": "$amount_twd"},
+                "count": {"$sum": 1},
+            }},
+        ])
+        await replace(rollups.REVENUE_MONTHLY, [{
+            "period": r["_id"]["month"], "key": r["_id"].get("type"), "amount": r["amount"], "count": r["count"],
+        } for r in revenue_monthly], month_list[0])
+        revenue_total = await self._agg(orders, [
+            {"$match": {"status": "paid"}},
+            {"$group": {"_id": "$type", "amount": {"$sum": "$amount_twd"}, "count": {"$sum": 1}}},
+        ])
+        await replace(rollups.REVENUE_TOTAL, [
+            {"period": rollups.ALL_PERIOD, "key": r["_id"], "amount": r["amount"], "count": r["count"]}
+            for r in revenue_total])
+
+        await self.rollups.mark_reconciled(days=days, months=months)
+        log.info("analytics.rollups.reconciled", written=written)
+        return written
+
+    # ── 報表（只讀預聚合桶 + 少量有索引的即時計數）───────────────────────
+
     async def full_report(self) -> dict:
         db = self.db
-
-        # 1/8 計數
-        total_tasks = await db.tasks.count_documents({})
-        completed_tasks = await db.tasks.count_documents({"status": "completed"})
-        processing_tasks = await db.tasks.count_documents({"status": "processing"})
-        failed_tasks = await db.tasks.count_documents({"status": "failed"})
-        total_users = await db.users.count_documents({})
-        active_users = await db.users.count_documents({"is_active": True})
+        await self._ensure_rollups()
+
+        # 1/8 計數：狀態計數走 status 索引；總數用 collection metadata，不掃表
+        (total_tasks, completed_tasks, processing_tasks, failed_tasks,
+         total_users, active_users) = await asyncio.gather(
+            db.tasks.estimated_document_count(),
+            db.tasks.count_documents({"status": "completed"}),
+            db.tasks.count_documents({"status": "processing"}),
+            db.tasks.count_documents({"status": "failed"}),
+            db.users.estimated_document_count(),
+            db.users.count_documents({"is_active": True}),
+        )
 
         # token 成本統計已獨立成 /admin/cost（monthly_cost）；此處不再重複聚合全期間
         # token_usage（dashboard 改顯示當月成本、AI 成本頁顯示各區間）。
 
         # 3 模型使用
-        # 摘要類統計改讀 summary_logs（帳號刪除時 summaries 內容被砍、summary_logs 保留）
+        # 摘要類統計源自 summary_logs（帳號刪除時 summaries 內容被砍、summary_logs 保留）
         # → 歷史數字不掉；且 summary_logs 記每次生成，貼近實際用量。見 docs/ACCOUNT_DELETION_GDPR.md D2。
-        punct_models = await self._agg(db.tasks, _model_group("models.punctuation"))
-        trans_models = await self._agg(db.tasks, _model_group("models.transcription"))
-        diar_models = await self._agg(db.tasks, _model_group("models.diarization"))
-        summary_models = await self._agg(db.summary_logs, _model_group("model"))
+        punct_models, trans_models, diar_models, summary_models, punct_providers = await asyncio.gather(
+            *(self.rollups.named_counts(rollups.model_metric(kind)) for kind in rollups.MODEL_KINDS),
+            self.rollups.named_counts(rollups.SUMMARY_MODEL),
+            self.rollups.named_counts(rollups.PUNCT_PROVIDER),
+        )
 
-        # 4 每日統計（兩條 pipeline 共用同一個 30 天界線）
+        # 4 每日統計（兩組日桶共用同一個 30 天界線）
         cutoff = _thirty_days_ago_ts()
-        daily_tasks = await self._agg(db.tasks, _daily_group(
-            "timestamps.created_at", "tasks_count", "stats.token_usage.total", "punctuation_tokens", cutoff))
-        daily_summaries = await self._agg(db.summary_logs, _daily_group(
-            "created_at", "summaries_count", "token_usage.total", "summary_tokens", cutoff))
+        date_list = _daily_date_series(cutoff)
+        daily_tasks, daily_summaries = await asyncio.gather(
+            self.rollups.rows(rollups.TASKS_DAILY, period_gte=date_list[0]),
+            self.rollups.rows(rollups.SUMMARIES_DAILY, period_gte=date_list[0]),
+        )
 
-        # 5 top users
-        user_tasks = await self._agg(db.tasks, [
-            {"$group": {
-                "_id": "$user.user_id",
-                "tasks_count": {"$sum": 1},
-                "punctuation_tokens": {"$sum": {"$ifNull": ["$stats.token_usage.total", 0]}},
-            }},
-            {"$sort": {"tasks_count": -1}},
-            {"$limit": 20},
-        ])
-        # summary_logs 直接帶 user_id（= tasks.user.user_id），免 $lookup join
-        user_summaries = await self._agg(db.summary_logs, [
-            {"$group": {
-                "_id": "$user_id",
-                "summaries_count": {"$sum": 1},
-                "summary_tokens": {"$sum": {"$ifNull": ["$token_usage.total", 0]}},
-            }},
-        ])
+        # 5 top users：依任務數取前 20，再只撈這些人的摘要桶
+        user_tasks = rollup_user_rows(await self.rollups.rows(
+            rollups.USER_TASKS, period=rollups.ALL_PERIOD, sort=[("count", -1)], limit=20,
+        ), "tasks_count", "punctuation_tokens")
+        user_summaries = rollup_user_rows(await self.rollups.rows(
+            rollups.USER_SUMMARIES, period=rollups.ALL_PERIOD, keys=[u["_id"] for u in user_tasks],
+        ), "summaries_count", "summary_tokens")
 
         # 6 平均處理時間
-        duration = await self._agg(db.tasks, [
-            {"$match": {"status": "completed", "stats.duration_seconds": {"$exists": True, "$ne": None}}},
-            {"$group": {
-                "_id": None,
-                "avg_duration": {"$avg": "$stats.duration_seconds"},
-                "min_duration": {"$min": "$stats.duration_seconds"},
-                "max_duration": {"$max": "$stats.duration_seconds"},
-            }},
-        ], one=True, default={"avg_duration": 0, "min_duration": 0, "max_duration": 0})
-
-        # 7 標點服務使用
-        punct_providers = await self._agg(db.tasks, [
-            {"$group": {"_id": "$config.punct_provider", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-        ])
+        duration_rows = await self.rollups.rows(rollups.TASK_DURATION, period=rollups.ALL_PERIOD)
 
         return {
             "overview": derive_overview(
@@ -419,33 +615,38 @@ class AdminAnalytics:
                 "diarization": format_named_counts(diar_models, key="model", default="未知"),
                 "summary": format_named_counts(summary_models, key="model", default="未知"),
             },
-            "daily_stats": merge_daily(daily_tasks, daily_summaries, _daily_date_series(cutoff)),
+            "daily_stats": merge_daily(
+                rollup_daily_rows(daily_tasks, "tasks_count", "punctuation_tokens"),
+                rollup_daily_rows(daily_summaries, "summaries_count", "summary_tokens"),
+                date_list,
+            ),
             "top_users": merge_top_users(user_tasks, user_summaries),
-            "performance": format_performance(duration),
+            "performance": format_performance(rollup_duration(duration_rows[0] if duration_rows else {})),
+            # 7 標點服務使用
             "punct_provider_usage": format_named_counts(punct_providers, key="provider", default="none"),
         }
 
     async def monthly_cost(self, months: int = 6) -> dict:
         """AI 成本 dashboard：逐月 × 功能（標點/摘要）× 模型的 token → USD 試算。
 
-        資料來源：
+        資料來源（皆讀月桶，原始口徑見 reconcile_rollups）：
           - 標點：`tasks.stats.token_usage`（分月依 timestamps.created_at）。
           - 摘要：`summary_logs`（append-only，逐次生成含 model/token；分月依 created_at）。
             用 summary_logs 而非 summaries，因它涵蓋重新生成、貼近實際 API 計費次數。
 
         單價與計價假設見 `llm_pricing`。金額為估算（幣別 USD），非 Google/OpenAI 帳單實數。
         """
-        months = max(1, min(int(months), 24))  # 白名單化，防惡意大範圍掃描
-        cutoff_ts, month_list = _month_window(months)
+        months = max(1, min(int(months), ROLLUP_RECONCILE_MONTHS))  # 白名單化，防惡意大範圍掃描
+        _, month_list = _month_window(months)
+        await self._ensure_rollups()
 
-        punct_rows = await self._agg(self.db.tasks, _monthly_cost_group(
-            "timestamps.created_at", "stats.token_usage.prompt", "stats.token_usage.completion",
-            "stats.token_usage.total", "stats.token_usage.model", cutoff_ts))
-        summary_rows = await self._agg(self.db.summary_logs, _monthly_cost_group(
-            "created_at", "token_usage.prompt", "token_usage.completion",
-            "token_usage.total", "model", cutoff_ts))
+        punct_rows, summary_rows = await asyncio.gather(
+            self.rollups.rows(rollups.PUNCT_COST_MONTHLY, period_gte=month_list[0]),
+            self.rollups.rows(rollups.SUMMARY_COST_MONTHLY, period_gte=month_list[0]),
+        )
 
-        months_out, totals = build_monthly_cost(punct_rows, summary_rows, month_list)
+        months_out, totals = build_monthly_cost(
+            rollup_cost_rows(punct_rows), rollup_cost_rows(summary_rows), month_list)
         return {
             "currency": "USD",
             "range_months": months,
@@ -479,26 +680,13 @@ class AdminAnalytics:
         ])
         subscriber_count, mrr = summarize_subscriptions(sub_list, Payments91APPService.get_subscription_price)
 
-        # 2 總收入 / 3 額外額度收入
-        total = await self._agg(db.orders, [
-            {"$match": {"status": "paid"}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount_twd"}}},
-        ], one=True, default={"total": 0})
-        extra = await self._agg(db.orders, [
-            {"$match": {"status": "paid", "type": "extra_quota"}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount_twd"}}},
-        ], one=True, default={"total": 0})
-
-        # 4 近 6 個月月收入
-        six_months_ago = now - (180 * 86400)
-        monthly_list = await self._agg(db.orders, [
-            {"$match": {"status": "paid", "paid_at": {"$gte": six_months_ago}}},
-            {"$addFields": {"paid_date": {"$toDate": {"$multiply": ["$paid_at", 1000]}}}},
-            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$paid_date"}}, "amount": {"$sum": "$amount_twd"}}},
-            {"$sort": {"_id": -1}},
-            {"$limit": 6},
-        ])
-        monthly_revenue = [{"month": m["_id"], "amount": m["amount"]} for m in monthly_list]
+        # 2 總收入 / 3 額外額度收入 / 4 近 6 個月月收入：讀營收桶（UTC 分月，同原 aggregation）
+        await self._ensure_rollups()
+        total_rows, monthly_rows = await asyncio.gather(
+            self.rollups.rows(rollups.REVENUE_TOTAL, period=rollups.ALL_PERIOD),
+            self.rollups.rows(rollups.REVENUE_MONTHLY, period_gte=rollups.month_utc(now - 180 * 86400)),
+        )
+        total_revenue, extra_revenue, monthly_revenue = rollup_revenue(total_rows, monthly_rows)
 
         # 5 近 10 筆已付款訂單 + join email
         recent_raw = await db.orders.find(
@@ -534,13 +722,39 @@ class AdminAnalytics:
         return {
             "mrr": int(mrr),
             "subscriber_count": subscriber_count,
-            "total_revenue": total.get("total", 0),
+            "total_revenue": total_revenue,
             "monthly_revenue": monthly_revenue,
             "recent_orders": recent_orders,
             "churn": {"pending_cancel": pending_cancel, "expired_this_month": expired_this_month},
-            "extra_quota_revenue": extra.get("total", 0),
+            "extra_quota_revenue": extra_revenue,
         }
 
 
 def build_admin_analytics(db) -> AdminAnalytics:
     return AdminAnalytics(db)
+
+
+async def periodic_analytics_reconcile(
+    db, interval_seconds: int = ANALYTICS_RECONCILE_INTERVAL_SECONDS
+) -> None:
+    """定期以原始 aggregation 重算後台統計預聚合桶（背景任務，由 main.py startup 啟動）。
+
+    多 worker 用 JobLeaseRepository 搶時間窗，同一輪只跑一次；lease 檢查失敗採 fail-open
+    （對帳冪等，重跑只是多一次掃描）。
+    """
+    from ..database.repositories.job_lease_repo import JobLeaseRepository
+    analytics = AdminAnalytics(db)
+    lease_repo = JobLeaseRepository(db)
+    while True:
+        await asyncio.sleep(interval_seconds)
+        should_run = True
+        try:
+            should_run = await lease_repo.claim_window("analytics_reconcile", interval_seconds)
+        except Exception as e:
+            log.warning("analytics.reconcile.lease_check_failed", error=str(e))
+        if not should_run:
+            continue
+        try:
+            await analytics.reconcile_rollups()
+        except Exception as e:
+            log.error("analytics.reconcile.failed", error=str(e), exc_info=True)
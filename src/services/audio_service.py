@@ -10,10 +10,10 @@ from typing import List, Optional
 import subprocess
 from datetime import datetime
 import pytz
-import json
 import uuid
 
 from src.utils.logger import get_logger
+from src.utils.media_probe import probe_media
 
 log = get_logger(__name__)
 
@@ -113,27 +113,13 @@ class AudioService:
     def get_audio_duration(self, audio_path: Path) -> int:
         """獲取音檔時長（毫秒）
 
-        使用 ffprobe（快速，不載入記憶體）
+        經 `media_probe` 快取（同一檔案版本本進程只 ffprobe 一次，不載入記憶體）
 
         Args:
             audio_path: 音檔路徑
 
         Returns:
-            音檔時長（毫秒）
+            音檔時長（毫秒）；探測失敗回 0
         """
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', str(audio_path)
-            ], capture_output=True, text=True, timeout=10)
-
-            if result.returncode == 0:
-                probe_data = json.loads(result.stdout)
-                duration_seconds = float(probe_data['format']['duration'])
-                return int(duration_seconds * 1000)
-            else:
-                return 0
-
-        except Exception as e:
-            log.warning("audio.get_duration_failed", error=str(e))
-            return 0
+        probe = probe_media(audio_path)
+        return probe.duration_ms if probe else 0
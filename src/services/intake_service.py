@@ -14,16 +14,17 @@ from typing import Optional
 
 from fastapi import HTTPException, status
 
+from ..database.repositories.analytics_rollup_repo import AnalyticsRollupRepository
 from ..database.repositories.reservation_repo import ReservationRepository
 from ..database.repositories.task_repo import TaskRepository
 from ..database.repositories.user_repo import UserRepository
 from ..models.intake import IntakeConfig, IntakeResult
 from ..models.quota import has_feature
 from ..models.worker_job import TranscriptionJob
-from ..services.audio_service import AudioService
 from ..services.tag_service import TagService
 from ..services.task_dispatch import get_task_dispatch
 from ..utils.logger import get_logger
+from ..utils.media_probe import probe_media
 from ..utils.storage.backend import is_aws
 from ..utils.time_utils import get_utc_timestamp
 
@@ -82,13 +83,11 @@ class TranscriptionIntakeService:
 
         try:
             # 1. 音檔資訊
-            audio_service = AudioService()
             try:
-                # ffprobe 跑 subprocess，sync I/O 包進 threadpool 才不會卡 event loop
-                audio_duration_ms = await asyncio.to_thread(
-                    audio_service.get_audio_duration, file_path
-                )
-                audio_duration_seconds = audio_duration_ms / 1000.0
+                # ffprobe 跑 subprocess，sync I/O 包進 threadpool 才不會卡 event loop。
+                # 結果隨 job 帶給 Orchestrator，之後整條 pipeline 不再 ffprobe。
+                media_probe = await asyncio.to_thread(probe_media, file_path)
+                audio_duration_seconds = media_probe.duration_seconds if media_probe else 0.0
                 audio_size_mb = round(file_path.stat().st_size / 1024 / 1024, 2)
             except Exception as e:
                 raise HTTPException(
@@ -173,6 +172,8 @@ class TranscriptionIntakeService:
                 task_data["batch_id"] = config.batch_id
 
             await self.task_repo.create(task_data)
+            # 後台統計預聚合：當日任務數 / 使用者任務數 / 標點服務分布（best-effort）
+            await AnalyticsRollupRepository(self.task_repo.db).record_task_created(task_data)
 
             # 7. Dispatch
             dispatch_result = await get_task_dispatch().submit(
@@ -186,6 +187,7 @@ class TranscriptionIntakeService:
                     max_speakers=config.max_speakers,
                     ui_language=config.ui_language,
                     handoff_ext=file_path.suffix.lstrip(".").lower(),
+                    media_probe=media_probe.to_dict() if media_probe else None,
                 ),
                 audio_local_path=file_path,
                 temp_dir=temp_dir,
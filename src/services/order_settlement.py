@@ -30,6 +30,7 @@ from ..models.quota import build_quota_from_tier
 from ..utils.billing_period import calc_period_end
 from ..utils.sentry_helpers import create_background_task
 from ..utils.logger import get_logger
+from ..utils.time_utils import get_utc_timestamp
 
 log = get_logger(__name__)
 
@@ -187,6 +188,8 @@ class OrderSettlement:
         if not await self.order_repo.claim_paid(n.order_no, extra_updates=extra):
             log.warning("subscription.webhook.claim_paid_lost_race", merchant_order_no=n.order_no)
             return SettleResult(SettleOutcome.ALREADY_PAID, n.order_no)
+        # 只有 claim_paid 贏家記營收預聚合 → 重放 / 併發 callback 不會重複累加
+        await self._record_revenue_rollup(order)
 
         try:
             result = await settle_fn(order, n)
@@ -204,6 +207,15 @@ class OrderSettlement:
             self._trigger_subscription_email(n.order_no, result.outcome.value)
         return result
 
+    async def _record_revenue_rollup(self, order: dict) -> None:
+        """後台營收預聚合 $inc（best-effort：失敗只記 log，由定期對帳補正，絕不影響結算）。"""
+        try:
+            from ..database.repositories.analytics_rollup_repo import AnalyticsRollupRepository
+            await AnalyticsRollupRepository(self.order_repo.db).record_payment_settled(
+                order, paid_at=get_utc_timestamp())
+        except Exception as e:
+            log.warning("settle.revenue_rollup_failed", merchant_order_no=order.get("merchant_order_no"), error=str(e))
+
     async def _mark_entitlement_pending(self, order_no: str, exc: Exception) -> None:
         """標記「paid 但權益可能未施加完整」+ Sentry 告警（見 settle() 呼叫處）。
 
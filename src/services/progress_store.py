@@ -8,15 +8,22 @@ overall_percentage 由 store 在讀出時動態計算，呼叫端只負責回報
 與 phase 內部進度（phase_progress: 0.0~1.0）。
 
 Stage 1 只實作 InMemoryProgressStore（local 模式用）。Stage 2 加入 MongoProgressStore。
+
+高頻回報（每個 Whisper segment / 每個標點 chunk）經 CoalescingProgressWriter
+依時間與進度差合併後才寫 store——Mongo 模式下每次寫入都是一次 round trip。
 """
 
 from __future__ import annotations
 
+import os
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from threading import Lock
-from typing import Any, Dict, Optional, Protocol
+from typing import Any, Callable, Dict, Iterable, Optional, Protocol
+
+from pymongo.errors import DuplicateKeyError
 
 
 class Phase(Enum):
@@ -79,6 +86,10 @@ class ProgressStore(Protocol):
 
     def get(self, task_id: str) -> Optional[ProgressSnapshot]: ...
 
+    def get_many(self, task_ids: Iterable[str]) -> Dict[str, ProgressSnapshot]:
+        """批次讀取；沒有 snapshot 的 task_id 不出現在結果中。"""
+        ...
+
     def clear(self, task_id: str) -> None: ...
 
 
@@ -131,11 +142,113 @@ class InMemoryProgressStore:
         with self._lock:
             return self._snapshots.get(task_id)
 
+    def get_many(self, task_ids: Iterable[str]) -> Dict[str, ProgressSnapshot]:
+        with self._lock:
+            return {
+                tid: snap for tid in task_ids
+                if (snap := self._snapshots.get(tid)) is not None
+            }
+
     def clear(self, task_id: str) -> None:
         with self._lock:
             self._snapshots.pop(task_id, None)
 
 
+# ── 合併寫入 ──────────────────────────────────────────────
+
+# 同一 phase 內兩次實際寫入的最短間隔（秒）與最小進度差；任一達標即寫。env 可覆寫
+PROGRESS_MIN_INTERVAL_SECONDS = float(os.getenv("PROGRESS_MIN_INTERVAL_SECONDS", "1.0"))
+PROGRESS_MIN_DELTA = float(os.getenv("PROGRESS_MIN_DELTA", "0.02"))
+
+
+class CoalescingProgressWriter:
+    """單一 task 的進度合併寫入器，包住任一 ProgressStore。
+
+    - 同 phase 內的更新依「距上次寫入的時間」與「進度差」合併，未達門檻只記在記憶體
+    - phase 切換、phase_progress = 1.0 或 force=True（階段邊界的一次性回報）一律立即寫
+    - no-regression 在記憶體內判斷：phase 倒退 raise ValueError（同 store 語意）；
+      同 phase 進度變小時沿用已知最大值，使用者看到的百分比不會往回跳
+    - flush() 把最後一筆未寫的狀態寫出
+
+    thread-safe（diarization 與轉錄兩條 thread 會同時回報）。
+    """
+
+    def __init__(
+        self,
+        store: ProgressStore,
+        task_id: str,
+        min_interval_s: float = PROGRESS_MIN_INTERVAL_SECONDS,
+        min_delta: float = PROGRESS_MIN_DELTA,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._store = store
+        self._task_id = task_id
+        self._min_interval_s = min_interval_s
+        self._min_delta = min_delta
+        self._clock = clock
+        self._lock = Lock()
+        self._phase: Optional[Phase] = None
+        self._progress = 0.0
+        self._flushed_progress = 0.0
+        self._flushed_at = float("-inf")
+        self._pending: Optional[tuple] = None
+
+    def write(
+        self,
+        phase: Phase,
+        phase_progress: float,
+        message: str = "",
+        details: Optional[Dict[str, Any]] = None,
+        force: bool = False,
+    ) -> bool:
+        """記錄一筆進度；實際寫入 store 時回傳 True。"""
+        if not 0.0 <= phase_progress <= 1.0:
+            raise ValueError(
+                f"phase_progress 必須在 [0.0, 1.0]，收到 {phase_progress}"
+            )
+        with self._lock:
+            phase_changed = phase is not self._phase
+            if self._phase is not None and phase_changed:
+                if _PHASE_ORDER.index(phase) < _PHASE_ORDER.index(self._phase):
+                    raise ValueError(
+                        f"phase 不可倒退：task {self._task_id} 已在 {self._phase.value}，"
+                        f"嘗試設成 {phase.value}"
+                    )
+            elif self._phase is not None:
+                phase_progress = max(phase_progress, self._progress)
+
+            self._phase, self._progress = phase, phase_progress
+            self._pending = (phase, phase_progress, message, details)
+
+            now = self._clock()
+            due = (
+                force
+                or phase_changed
+                or phase_progress >= 1.0
+                or now - self._flushed_at >= self._min_interval_s
+                or phase_progress - self._flushed_progress >= self._min_delta
+            )
+            if not due:
+                return False
+            self._flush_locked(now)
+            return True
+
+    def flush(self) -> None:
+        """寫出最後一筆尚未寫入的進度（沒有就 no-op）。"""
+        with self._lock:
+            if self._pending is not None:
+                self._flush_locked(self._clock())
+
+    def _flush_locked(self, now: float) -> None:
+        phase, phase_progress, message, details = self._pending
+        self._store.set_phase(
+            self._task_id, phase, phase_progress, message=message, details=details
+        )
+        self._pending = None
+        self._flushed_progress = phase_progress
+        self._flushed_at = now
+
+
 # task_progress collection 的 TTL：6 小時。Spot 中斷或 worker crash 時自動清。
 _PROGRESS_TTL_SECONDS = 6 * 60 * 60
 
@@ -189,23 +302,6 @@ class MongoProgressStore:
                 f"phase_progress 必須在 [0.0, 1.0]，收到 {phase_progress}"
             )
 
-        # Phase 不可倒退：先讀現況檢查
-        existing = self._collection.find_one({"_id": task_id}, {"phase": 1})
-        if existing is not None and "phase" in existing:
-            try:
-                existing_phase = Phase(existing["phase"])
-                existing_idx = _PHASE_ORDER.index(existing_phase)
-                new_idx = _PHASE_ORDER.index(phase)
-                if new_idx < existing_idx:
-                    raise ValueError(
-                        f"phase 不可倒退：task {task_id} 已在 {existing_phase.value}，"
-                        f"嘗試設成 {phase.value}"
-                    )
-            except (ValueError, KeyError) as e:
-                # 如果是上面 raise 的 ValueError 要 re-raise；其他（無效 phase 字串等）忽略，當作沒紀錄
-                if "不可倒退" in str(e):
-                    raise
-
         doc = {
             "phase": phase.value,
             "phase_progress": phase_progress,
@@ -214,14 +310,37 @@ class MongoProgressStore:
             "details": dict(details) if details else {},
             "updated_at": datetime.now(timezone.utc),
         }
-        self._collection.update_one(
-            {"_id": task_id},
-            {"$set": doc},
-            upsert=True,
-        )
+        # Phase 不可倒退：條件寫在 filter 裡，單次 round trip（不先 find_one）。
+        # 現存 doc 已在較後 phase → filter 不命中 → upsert 嘗試插入同 _id →
+        # DuplicateKeyError 即「倒退」。無 phase / 無效 phase 字串的 doc 照常覆寫。
+        later = [p.value for p in _PHASE_ORDER[_PHASE_ORDER.index(phase) + 1:]]
+        query: Dict[str, Any] = {"_id": task_id}
+        if later:
+            query["phase"] = {"$nin": later}
+        try:
+            self._collection.update_one(query, {"$set": doc}, upsert=True)
+        except DuplicateKeyError as e:
+            raise ValueError(
+                f"phase 不可倒退：task {task_id} 已在較後的 phase，嘗試設成 {phase.value}"
+            ) from e
 
     def get(self, task_id: str) -> Optional[ProgressSnapshot]:
-        doc = self._collection.find_one({"_id": task_id})
+        return self._to_snapshot(self._collection.find_one({"_id": task_id}))
+
+    def get_many(self, task_ids: Iterable[str]) -> Dict[str, ProgressSnapshot]:
+        """單次 $in 查詢（任務列表一頁一次 round trip，而不是每個任務一次）。"""
+        ids = list(dict.fromkeys(task_ids))
+        if not ids:
+            return {}
+        result: Dict[str, ProgressSnapshot] = {}
+        for doc in self._collection.find({"_id": {"$in": ids}}):
+            snap = self._to_snapshot(doc)
+            if snap is not None:
+                result[doc["_id"]] = snap
+        return result
+
+    @staticmethod
+    def _to_snapshot(doc: Optional[Dict[str, Any]]) -> Optional[ProgressSnapshot]:
         if doc is None:
             return None
         try:
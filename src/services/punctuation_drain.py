@@ -0,0 +1,71 @@
+"""PunctuationDrain — Web Server 端的標點佇列消費者。
+
+AWS 模式下 GPU Worker 設 PUNCTUATION_OFFLOAD=true 後，轉錄完的任務排進標點佇列
+（punctuation_jobs）。除了獨立的 `python -m src.punctuation_worker`，Web Server
+也可以設 PUNCTUATION_QUEUE_DRAIN=true 順手消化：PUNCTUATION 幾乎都在等 LLM 回應，
+放在既有的 executor 跑不佔多少 CPU。
+
+認領與收尾都走 punctuation_queue_repo 的原子操作，多個 replica / 獨立消費端同時
+開也不會重複處理同一筆。
+"""
+import asyncio
+import os
+import socket
+from concurrent.futures import Executor
+from typing import Optional
+
+from src.database.repositories.punctuation_queue_repo import claim_sync
+from src.database.sync_client import get_sync_db
+from src.transcription.orchestrator import TranscriptionOrchestrator
+from src.utils.logger import get_logger
+from src.utils.sentry_helpers import create_background_task
+
+log = get_logger(__name__)
+
+# 佇列空時多久再認領一次（秒）
+PUNCTUATION_DRAIN_INTERVAL_SECONDS = int(os.getenv("PUNCTUATION_DRAIN_INTERVAL_SECONDS", "5"))
+# 每個 replica 同時處理幾筆（各佔 executor 一條 thread）
+PUNCTUATION_DRAIN_CONCURRENCY = int(os.getenv("PUNCTUATION_DRAIN_CONCURRENCY", "2"))
+
+
+class PunctuationDrain:
+    """在 Web Server event loop 上輪詢標點佇列，認領到的 job 丟 executor 跑。"""
+
+    def __init__(self, *, progress_store, punctuation, executor: Optional[Executor] = None):
+        self.executor = executor
+        self.orchestrator = TranscriptionOrchestrator(
+            db=get_sync_db(),
+            progress_store=progress_store,
+            whisper=None,
+            punctuation=punctuation,
+        )
+        self.consumer = f"web:{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+
+    def start(self) -> None:
+        """啟動 PUNCTUATION_DRAIN_CONCURRENCY 條輪詢迴圈（idempotent）。"""
+        if self._tasks:
+            return
+        self._tasks = [
+            create_background_task(self._run(), name=f"punctuation_drain:{i}")
+            for i in range(max(1, PUNCTUATION_DRAIN_CONCURRENCY))
+        ]
+        log.info("punctuation_drain.started", consumer=self.consumer, concurrency=len(self._tasks))
+
+    def _run_next(self) -> bool:
+        """（executor thread）認領並處理一筆；佇列空回 False。"""
+        job = claim_sync(self.orchestrator.db, self.consumer)
+        if job is None:
+            return False
+        self.orchestrator.run_punctuation(job)
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if await loop.run_in_executor(self.executor, self._run_next):
+                    continue
+            except Exception as e:
+                log.error("punctuation_drain.error", error=str(e), exc_info=True)
+            await asyncio.sleep(PUNCTUATION_DRAIN_INTERVAL_SECONDS)
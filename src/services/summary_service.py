@@ -1,36 +1,62 @@
 """
 SummaryService - AI 摘要服務
 職責：使用 Gemini API 生成逐字稿摘要
+
+短逐字稿一次 prompt 生成；超過 SUMMARY_MAP_THRESHOLD_CHARS 改走 map-reduce：
+- map：依講者 / segment 邊界切塊（summary_chunker），各塊並行產生條列筆記，
+  同時送出的數量受 SUMMARY_MAX_CONCURRENCY 與共用 GeminiKeyPool 限制
+- reduce：筆記依序串接後套原本的摘要 prompt 產生最終 JSON；筆記仍太長就再切塊濃縮一層
+語言偵測與備援模型鏈不變（語言以原文偵測，各階段共用）。
+
+每次 Gemini 呼叫前先查 llm_cache（見 llm_cache_repo）：同樣的輸入 / prompt 版本 /
+模型 / 語言直接用快取的回應，重新產生摘要時 map 與 reduce 都不必重打。
 """
 
 import asyncio
 import os
 import json
 import re
+import threading
 import time
 from typing import Optional, Dict, Any, Tuple, List
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from ..database.repositories.segment_repo import SegmentRepository
 from ..database.repositories.summary_repo import SummaryRepository
 from ..database.repositories.summary_log_repo import SummaryLogRepository
+from ..database.repositories.analytics_rollup_repo import AnalyticsRollupRepository
 from ..database.repositories.task_repo import TaskRepository
+from ..database.repositories.llm_cache_repo import (
+    LLM_CACHE_ENABLED,
+    TEMPLATE_SLOT,
+    LLMCacheRepository,
+    cache_key,
+    template_version,
+)
+from src.services.utils.gemini_key_pool import (
+    GeminiKeyPool,
+    get_gemini_key_pool,
+    is_quota_error,
+)
+from src.services.utils.summary_chunker import split_transcript
 from src.utils.logger import get_logger
 
 log = get_logger(__name__)
 
 
-def _gemini_generate_sync(api_key: str, model_name: str, prompt: str):
-    """在 thread pool 內執行的同步 Gemini 呼叫。
-    configure 和 generate_content 在同一 thread 內完成，避免全域 api_key 被並發覆寫。
-    """
-    import google.generativeai as genai
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(model_name)
-    return model.generate_content(
-        [{"role": "user", "parts": [prompt]}],
-        generation_config={"temperature": 0.3}
-    )
+# 超過此字數改走 map-reduce（單一 prompt 舊版會截斷在 30000 字）
+SUMMARY_MAP_THRESHOLD_CHARS = int(os.getenv("SUMMARY_MAP_THRESHOLD_CHARS", "30000"))
+# map 階段每塊字數上限（切在講者 / segment 邊界）
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+# 同一份摘要同時送 Gemini 的上限（另受 key 池冷卻 / RPM 節流）
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+_GENERATION_CONFIG = {"temperature": 0.3}
+
+
+class SummaryGenerationExhausted(Exception):
+    """所有 key 與備援模型都沒有產出可用回應"""
 
 
 class SummaryService:
@@ -39,19 +65,31 @@ class SummaryService:
     def __init__(
         self,
         db: AsyncIOMotorDatabase,
-        default_model: str = "gemini-2.5-flash"
+        default_model: str = "gemini-2.5-flash",
+        key_pool: Optional[GeminiKeyPool] = None,
+        max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+        llm_cache: Optional[LLMCacheRepository] = None,
     ):
         """初始化 SummaryService
 
         Args:
             db: MongoDB 資料庫實例
             default_model: 預設 Gemini 模型
+            key_pool: Gemini key 池；None 則使用進程共用池（依 GOOGLE_API_KEY_n 建立）
+            max_concurrency: map 階段同時送出的上限
+            llm_cache: LLM 輸出快取；None 則依 LLM_CACHE_ENABLED 使用 db.llm_cache
         """
         self.db = db
         self.summary_repo = SummaryRepository(db)
         self.summary_log_repo = SummaryLogRepository(db)
+        self.analytics_rollup_repo = AnalyticsRollupRepository(db)
         self.task_repo = TaskRepository(db)
         self.default_model = default_model
+        self.key_pool = key_pool
+        self.max_concurrency = max(1, max_concurrency)
+        if llm_cache is None and LLM_CACHE_ENABLED:
+            llm_cache = LLMCacheRepository(db)
+        self.llm_cache = llm_cache
 
         # Gemini 備援模型列表（按優先順序）
         self.fallback_models = [
@@ -204,7 +242,7 @@ class SummaryService:
     ) -> None:
         """寫入一筆摘要生成記錄（best-effort，失敗不影響主流程）"""
         try:
-            await self.summary_log_repo.add(
+            log_doc = await self.summary_log_repo.add(
                 task_id=task_id,
                 user_id=user_id,
                 status=status,
@@ -218,6 +256,9 @@ class SummaryService:
             )
         except Exception as e:
             log.warning("summary.generation_log_failed", task_id=task_id, error=str(e))
+            return
+        # 後台統計預聚合（每日摘要數 / 成本月桶 / 模型分布 / 使用者摘要數）
+        await self.analytics_rollup_repo.record_summary_logged(log_doc)
 
     async def get_summary(
         self,
@@ -293,15 +334,15 @@ class SummaryService:
         """
         if mode == "subtitle":
             # 字幕模式：優先從 segments 組合（反映使用者編輯）
-            segments_doc = await self.db.segments.find_one({"_id": task_id})
-            if segments_doc and segments_doc.get("segments"):
+            segments = await SegmentRepository(self.db).get_segments(task_id)
+            if segments:
                 # 取得講者名稱對應
                 task = await self.task_repo.get_by_id(task_id)
                 speaker_names = task.get("speaker_names", {}) if task else {}
 
                 texts = []
                 current_speaker = None
-                for seg in segments_doc["segments"]:
+                for seg in segments:
                     text = seg.get("text", "")
                     speaker = seg.get("speaker")
 
@@ -321,9 +362,9 @@ class SummaryService:
 
         # 最終 fallback：嘗試從 segments 組合
         if mode != "subtitle":
-            segments_doc = await self.db.segments.find_one({"_id": task_id})
-            if segments_doc and segments_doc.get("segments"):
-                texts = [seg.get("text", "") for seg in segments_doc["segments"]]
+            segments = await SegmentRepository(self.db).get_segments(task_id)
+            if segments:
+                texts = [seg.get("text", "") for seg in segments]
                 return " ".join(texts)
 
         return None
@@ -364,116 +405,215 @@ class SummaryService:
         text: str,
         language: str
     ) -> Tuple[Optional[Dict[str, Any]], str, Optional[Dict[str, int]]]:
-        """使用 Gemini API 生成摘要
+        """使用 Gemini API 生成摘要（長文本走 map-reduce）
 
         Args:
             text: 逐字稿文字
             language: 語言代碼
 
         Returns:
-            (摘要內容, 使用的模型名稱, token_usage) 元組
+            (摘要內容, 最終 reduce 使用的模型名稱, 各階段累加的 token_usage) 元組
         """
-        import google.generativeai as genai
+        usage = _TokenUsage()
+        try:
+            if len(text) > SUMMARY_MAP_THRESHOLD_CHARS:
+                text = await self._map_reduce_notes(text, language, usage)
+            summary_data, model = await self._cached_call(
+                "summary", text, language,
+                self._get_summary_prompt(language, text),
+                self._get_summary_prompt(language, TEMPLATE_SLOT),
+                usage, self._parse_summary_response,
+            )
+        except SummaryGenerationExhausted:
+            return None, "", None
+        return summary_data, model, usage.as_dict()
 
-        # 獲取 API Keys
-        api_keys = self._load_google_api_keys()
-        if not api_keys:
-            raise ValueError("未設定任何 GOOGLE_API_KEY")
+    async def _map_reduce_notes(self, text: str, language: str, usage: "_TokenUsage") -> str:
+        """切塊並行產生筆記，依序串接；串接後仍超過門檻就再濃縮一層，直到不超過門檻
 
-        # 生成 prompt
-        prompt = self._get_summary_prompt(language, text)
+        某一層濃縮後沒有變短（不會收斂）才停下，照原樣交給最後的摘要 prompt（不截斷）。
 
-        # 嘗試調用 API
-        current_model = self.default_model
-        fallback_index = -1
-        tried_models = [self.default_model]
-        quota_exceeded_count = 0
+        Raises:
+            SummaryGenerationExhausted: 任一塊所有 key / 模型都失敗
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def summarize(chunk: str, part: int, total: int, condense: bool) -> str:
+            async with semaphore:
+                notes, _ = await self._cached_call(
+                    "summary_map", chunk, language,
+                    self._get_map_prompt(language, chunk, part, total, condense),
+                    self._get_map_prompt(language, TEMPLATE_SLOT, part, total, condense),
+                    usage, _non_empty,
+                )
+                return notes
 
-        max_attempts = len(api_keys) * (len(self.fallback_models) + 1)
+        depth = 0
+        while True:
+            chunks = split_transcript(text, SUMMARY_CHUNK_CHARS)
+            log.info(
+                "summary.map_reduce",
+                depth=depth,
+                input_chars=len(text),
+                chunks=len(chunks),
+                concurrency=min(self.max_concurrency, len(chunks)),
+            )
+            notes = await asyncio.gather(*(
+                summarize(chunk, i, len(chunks), depth > 0)
+                for i, chunk in enumerate(chunks, start=1)
+            ))
+            previous_chars = len(text)
+            text = "\n\n".join(f"[{i}/{len(notes)}]\n{n}" for i, n in enumerate(notes, start=1))
+            if len(text) <= SUMMARY_MAP_THRESHOLD_CHARS:
+                return text
+            if depth > 0 and len(text) >= previous_chars:
+                log.warning("summary.reduce_not_converging", depth=depth, chars=len(text))
+                return text
+            depth += 1
+
+    async def _cached_call(
+        self, kind: str, source: str, language: str, prompt: str, template: str,
+        usage: "_TokenUsage", parse,
+    ) -> Tuple[Any, str]:
+        """先查 llm_cache，未命中才呼叫 Gemini 並寫回原始回應
 
-        for attempt in range(max_attempts):
-            try:
-                # 輪詢 API Key
-                api_key = api_keys[attempt % len(api_keys)]
+        Args:
+            kind: 快取分類（summary / summary_map）
+            source: prompt 內代入的輸入（快取鍵以它正規化後計算）
+            language: 語言代碼
+            prompt: 完整 prompt
+            template: 以 TEMPLATE_SLOT 代入的同一份 prompt（算模板版本）
+            usage: token 使用量累加器（命中時不累加）
+            parse: 回應文字 → 結果；快取內容 parse 失敗視同未命中（計數也記未命中）
 
-                # configure + generate_content 在同一 thread 內執行，
-                # 避免阻塞 event loop，也避免全域 api_key 被並發請求覆寫
-                resp = await asyncio.to_thread(
-                    _gemini_generate_sync, api_key, current_model, prompt
-                )
+        Returns:
+            (parse 結果, 模型名稱)
+        """
+        key = None
+        version = template_version(template)
+        if self.llm_cache is not None:
+            key = cache_key(kind, source, version, self.default_model, language)
+            # parse 不過的條目在 get 內就算未命中，重新呼叫後覆寫
+            cached = await self.llm_cache.get(key, kind, accept=parse)
+            if cached:
+                log.debug("summary.cache_hit", kind=kind, model=cached.get("model"))
+                return parse(cached["value"]), cached.get("model") or self.default_model
+
+        result, model, raw = await asyncio.to_thread(self._call_gemini, prompt, usage, parse)
+        if key is not None:
+            await self.llm_cache.put(key, kind, raw, model, language, version)
+        return result, model
+
+    def _call_gemini(self, prompt: str, usage: "_TokenUsage", parse) -> Tuple[Any, str, str]:
+        """呼叫 Gemini（在 thread 內執行），支援換 key 重試與模型備援
+
+        key 由 GeminiKeyPool 分配：429 / quota 讓該 (key, 模型) 冷卻，其他 key 接手；
+        該模型全部 key 都在冷卻 → 切下一個備援模型。其他錯誤或 parse 回 None 換 key 重試，
+        每個模型最多 key 數量次。
 
-                result_text = (resp.text or "").strip()
+        Args:
+            prompt: 提示文字
+            usage: token 使用量累加器（每次成功回應都會計入）
+            parse: 回應文字 → 結果；None 代表回應不可用
 
-                # 解析 JSON 回應
-                summary_data = self._parse_summary_response(result_text)
+        Returns:
+            (parse 結果, 使用的模型名稱, 原始回應文字)
 
-                if summary_data:
-                    if fallback_index >= 0:
+        Raises:
+            SummaryGenerationExhausted: 所有 key 與備援模型都失敗
+        """
+        pool = self._get_key_pool()
+        tried_models: List[str] = []
+        for model_idx, current_model in enumerate([self.default_model] + self.fallback_models):
+            tried_models.append(current_model)
+            if model_idx > 0:
+                log.info("summary.switch_fallback_model", model=current_model)
+            for attempt in range(len(pool)):
+                lease = pool.acquire(current_model)
+                if lease is None:
+                    log.warning("summary.all_keys_cooling", model=current_model)
+                    break
+                try:
+                    resp = pool.generator(lease).generate_content(
+                        [{"role": "user", "parts": [prompt]}],
+                        generation_config=_GENERATION_CONFIG,
+                    )
+                    result_text = (resp.text or "").strip()
+                except Exception as e:
+                    quota = is_quota_error(e)
+                    pool.release(lease, quota_exceeded=quota)
+                    if quota:
+                        log.warning("summary.quota_exceeded", attempt=attempt + 1, model=current_model)
+                    else:
+                        log.warning("summary.api_call_failed", attempt=attempt + 1, error=str(e))
+                    continue
+                pool.release(lease)
+                usage.add(resp)
+
+                result = parse(result_text)
+                if result:
+                    if model_idx > 0:
                         log.info("summary.fallback_model_succeeded", model=current_model)
+                    return result, current_model, result_text
 
-                    # 提取 token 使用量
-                    token_usage = None
-                    if hasattr(resp, 'usage_metadata') and resp.usage_metadata:
-                        total = getattr(resp.usage_metadata, 'total_token_count', 0)
-                        prompt_tokens = getattr(resp.usage_metadata, 'prompt_token_count', 0)
-                        completion = getattr(resp.usage_metadata, 'candidates_token_count', 0)
-                        token_usage = {
-                            "total": total,
-                            "prompt": prompt_tokens,
-                            "completion": completion
-                        }
-                        log.debug(
-                            "summary.token_usage",
-                            total=total,
-                            prompt=prompt_tokens,
-                            completion=completion,
-                        )
-
-                    return summary_data, current_model, token_usage
-
-            except Exception as e:
-                error_msg = str(e)
-
-                # 檢查是否為配額錯誤
-                is_quota_error = (
-                    "429" in error_msg or
-                    "quota" in error_msg.lower() or
-                    "Quota exceeded" in error_msg
-                )
+        log.error("summary.generation_exhausted", tried_models=tried_models)
+        raise SummaryGenerationExhausted(f"summary generation failed (tried models: {', '.join(tried_models)})")
 
-                if is_quota_error:
-                    quota_exceeded_count += 1
-                    log.warning(
-                        "summary.quota_exceeded",
-                        attempt=attempt + 1,
-                        model=current_model,
-                    )
+    def _get_key_pool(self) -> GeminiKeyPool:
+        """注入的 key 池優先；否則用進程共用池（與標點處理共享冷卻狀態）"""
+        if self.key_pool is not None:
+            return self.key_pool
+        return get_gemini_key_pool(self._load_google_api_keys())
 
-                    # 如果所有 keys 都配額耗盡，嘗試切換模型
-                    if quota_exceeded_count >= len(api_keys):
-                        fallback_index += 1
-
-                        if fallback_index < len(self.fallback_models):
-                            current_model = self.fallback_models[fallback_index]
-                            log.info("summary.switch_fallback_model", model=current_model)
-                            tried_models.append(current_model)
-                            quota_exceeded_count = 0
-                            continue
-                        else:
-                            log.warning("summary.all_models_quota_exceeded")
-                            break
-                else:
-                    log.warning(
-                        "summary.api_call_failed",
-                        attempt=attempt + 1,
-                        error=error_msg,
-                    )
+    def _get_map_prompt(self, language: str, text: str, part: int, total: int, condense: bool = False) -> str:
+        """map 階段 prompt：把一塊逐字稿（condense=True 時為上一層的筆記）整理成條列筆記
 
-                if attempt < max_attempts - 1:
-                    continue
+        Args:
+            language: 語言代碼
+            text: 這一塊的內容
+            part: 第幾塊（從 1 開始）
+            total: 總塊數
+            condense: 輸入是否為上一層的筆記
 
-        log.error("summary.generation_exhausted", tried_models=tried_models)
-        return None, "", None
+        Returns:
+            完整的 prompt
+        """
+        if language == "zh":
+            source = "摘要筆記" if condense else "逐字稿"
+            return f"""以下是一份長{source}的第 {part}/{total} 部分。請整理成條列筆記，供之後合併成完整摘要：
+- 保留主題、重要論點、決議、待辦事項（含負責人與期限）、具體數字與專有名詞
+- 保留講者名稱；日期與時間照原文，不要推測或補充
+- 只輸出條列筆記，不要前言或結語；所有文字請使用繁體中文
+
+【輸入】
+{text}"""
+        elif language == "ja":
+            source = "要約メモ" if condense else "文字起こし"
+            return f"""以下は長い{source}の第 {part}/{total} 部分です。後で全体の要約にまとめるため、箇条書きのメモにしてください：
+- トピック、主な論点、決定事項、アクションアイテム（担当者と期限）、具体的な数値や固有名詞を残す
+- 話者名を残し、日付や時間は原文の通りにし、推測や補完をしない
+- 箇条書きのメモのみを出力し、前置きや結びは不要
+
+【入力】
+{text}"""
+        elif language == "ko":
+            source = "요약 메모" if condense else "전사문"
+            return f"""다음은 긴 {source}의 {part}/{total} 부분입니다. 나중에 전체 요약으로 합칠 수 있도록 글머리표 메모로 정리하세요:
+- 주제, 주요 논점, 결정 사항, 액션 아이템(담당자와 기한), 구체적인 수치와 고유 명사를 유지
+- 화자 이름을 유지하고, 날짜와 시간은 원문 그대로 두며 추측하거나 보충하지 마세요
+- 글머리표 메모만 출력하고 서두나 맺음말은 쓰지 마세요
+
+【입력】
+{text}"""
+        else:
+            source = "summary notes" if condense else "transcript"
+            return f"""Below is part {part}/{total} of a long {source}. Turn it into bullet-point notes that will later be merged into a full summary:
+- Keep topics, main arguments, decisions, action items (with owners and deadlines), concrete numbers and proper nouns
+- Keep speaker names; preserve dates and times exactly as stated, do not guess or fill in
+- Output only the bullet-point notes, with no preamble or closing remarks
+
+【Input】
+{text}"""
 
     def _get_summary_prompt(self, language: str, text: str) -> str:
         """生成摘要的 prompt
@@ -485,11 +625,7 @@ class SummaryService:
         Returns:
             完整的 prompt
         """
-        # 限制文字長度避免超出 token 限制
-        max_length = 30000
-        if len(text) > max_length:
-            text = text[:max_length] + "..."
-
+        # 不截斷：超過 SUMMARY_MAP_THRESHOLD_CHARS 的逐字稿已先經 map-reduce 濃縮
         if language == "zh":
             return f"""【角色設定】
 你是一個自然語言處理 API，專門負責將語音轉錄文字轉換為結構化的 JSON 數據。你的輸出將直接被程式碼解析，請務必嚴格遵守格式要求。
@@ -831,3 +967,30 @@ Output only a valid JSON object. Do not include Markdown markers (such as ```jso
                 keys.append(single_key)
 
         return keys
+
+
+def _non_empty(text: str) -> Optional[str]:
+    return text or None
+
+
+class _TokenUsage:
+    """跨多次呼叫（可能在不同 thread）累加 token 使用量"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = self.prompt = self.completion = 0
+
+    def add(self, resp) -> None:
+        meta = getattr(resp, "usage_metadata", None)
+        if not meta:
+            return
+        with self._lock:
+            self.total += getattr(meta, "total_token_count", 0) or 0
+            self.prompt += getattr(meta, "prompt_token_count", 0) or 0
+            self.completion += getattr(meta, "candidates_token_count", 0) or 0
+
+    def as_dict(self) -> Optional[Dict[str, int]]:
+        if not self.total:
+            return None
+        log.debug("summary.token_usage", total=self.total, prompt=self.prompt, completion=self.completion)
+        return {"total": self.total, "prompt": self.prompt, "completion": self.completion}
@@ -164,6 +164,7 @@ class LocalDispatch:
                 task_id, audio_source, job.language, job.use_chunking,
                 job.use_punctuation, job.punctuation_provider, job.use_diarization,
                 job.max_speakers, job.ui_language,
+                media_probe=job.media_probe,
             )
             log.info("dispatch.local.task_submitted", task_id=task_id)
         except Exception as e:
@@ -0,0 +1,283 @@
+"""TaskEventHub — 每個 process 一份的 SSE 任務狀態廣播器
+
+舊版 `/tasks/{task_id}/events` 每條 SSE 連線各自每 1 秒（local）/ 2 秒（AWS）
+呼叫一次 `TaskService.get_task`（tasks 一次讀 + ProgressStore 一次讀），Mongo 負載
+跟「開著的分頁數」成正比，而不是跟任務活動量成正比。
+
+改為 process 層級的 hub：
+- 同一個任務不論幾條連線，hub 只觀察一次：
+  - 有 Mongo change stream 可用（AWS 模式 + replica set）→ 監看 tasks / task_progress
+    的變更，只有被訂閱的任務有變動才重讀一次
+  - 否則（local 模式 InMemoryProgressStore、standalone Mongo、change stream 開失敗）
+    → 單一共用 poll loop，每 SSE_HUB_POLL_INTERVAL_SECONDS 把所有被訂閱的任務各讀一次
+- 狀態有變才廣播；每個訂閱者只保留「最新一筆」（conflation），hub 廣播永不阻塞，
+  慢的 client 只會少看到中間態，不會拖住 hub 或其他訂閱者
+- heartbeat 與 delta（只送變動的欄位）由各訂閱者自己的 SSE 產生器處理
+
+`fetch(task_id)` 由呼叫端注入：回傳可直接 json.dumps 的任務狀態 dict，
+任務不存在回 None（訂閱者收到 gone）。權限檢查在訂閱前由 router 做一次。
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+# ── hub 參數（env 可覆寫）──────────────────────────────────────
+SSE_HUB_POLL_INTERVAL_SECONDS = float(os.getenv("SSE_HUB_POLL_INTERVAL_SECONDS", "1.0"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "25"))
+# change stream 開關：auto = AWS 模式（Mongo ProgressStore）時嘗試；off = 一律 poll
+SSE_HUB_CHANGE_STREAM = os.getenv("SSE_HUB_CHANGE_STREAM", "auto").lower()
+# poll loop 同時重讀的任務數上限（避免大量訂閱時一次塞爆 executor / 連線池）
+SSE_HUB_FETCH_CONCURRENCY = int(os.getenv("SSE_HUB_FETCH_CONCURRENCY", "16"))
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# change stream 只關心這兩個 collection 的寫入
+WATCH_PIPELINE = [
+    {"$match": {
+        "ns.coll": {"$in": ["tasks", "task_progress"]},
+        "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+    }},
+    {"$project": {"documentKey": 1}},
+]
+
+FetchFn = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def task_state_delta(
+    previous: Optional[Dict[str, Any]], current: Dict[str, Any]
+) -> Dict[str, Any]:
+    """current 相對 previous 變動的欄位；previous 為 None 時回傳完整狀態。
+
+    被移除的欄位以 None 表示（前端 Object.assign 合併即可清掉）。
+    非空 delta 一律帶 task_id 與 status，前端據此判斷完成 / 失敗。
+    """
+    if previous is None:
+        return dict(current)
+    delta = {k: v for k, v in current.items() if k not in previous or previous[k] != v}
+    delta.update({k: None for k in previous if k not in current})
+    if delta:
+        for key in ("task_id", "status"):
+            if key in current:
+                delta[key] = current[key]
+    return delta
+
+
+class TaskSubscription:
+    """單一 SSE 連線對某任務的訂閱；只保留最新狀態，永不排隊。"""
+
+    __slots__ = ("task_id", "_latest", "_event", "gone", "conflated")
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self._latest: Optional[Dict[str, Any]] = None
+        self._event = asyncio.Event()
+        self.gone = False
+        self.conflated = 0  # 被後來狀態蓋掉、沒送出去的更新數（觀測用）
+
+    def offer(self, state: Optional[Dict[str, Any]]) -> None:
+        """hub 呼叫：放入最新狀態（None = 任務已不存在）。不阻塞。"""
+        if self._event.is_set():
+            self.conflated += 1
+        if state is None:
+            self.gone = True
+        else:
+            self._latest = state
+        self._event.set()
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """等下一筆狀態；timeout 內沒有更新回 None（呼叫端送 heartbeat）。"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._event.clear()
+        return self._latest
+
+
+class TaskEventHub:
+    """process 層級的任務狀態廣播器（見模組說明）。"""
+
+    def __init__(
+        self,
+        fetch: FetchFn,
+        poll_interval: float = SSE_HUB_POLL_INTERVAL_SECONDS,
+        watch: Optional[Callable[[], Any]] = None,
+        fetch_concurrency: int = SSE_HUB_FETCH_CONCURRENCY,
+    ):
+        """
+        Args:
+            fetch: 讀單一任務目前狀態的 coroutine function
+            poll_interval: poll 模式的間隔秒數
+            watch: 回傳 change stream（支援 async with / async for）的 callable；
+                None 表示只用 poll
+            fetch_concurrency: 一輪重讀時的並行上限
+        """
+        self._fetch = fetch
+        self.poll_interval = poll_interval
+        self._watch = watch
+        self._fetch_sem_size = max(1, fetch_concurrency)
+        self._subs: Dict[str, Set[TaskSubscription]] = {}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self.mode = "poll"
+
+    # ── 訂閱 ──────────────────────────────────────────
+
+    def subscribe(self, task_id: str, initial: Optional[Dict[str, Any]] = None) -> TaskSubscription:
+        """註冊訂閱；initial 為訂閱前已讀到的狀態（避免第一輪重複讀）。"""
+        sub = TaskSubscription(task_id)
+        self._subs.setdefault(task_id, set()).add(sub)
+        if initial is not None:
+            self._states[task_id] = initial
+        self._ensure_runner()
+        log.debug("sse_hub.subscribed", task_id=task_id, subscribers=len(self._subs[task_id]))
+        return sub
+
+    def unsubscribe(self, sub: TaskSubscription) -> None:
+        subs = self._subs.get(sub.task_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subs[sub.task_id]
+            self._states.pop(sub.task_id, None)
+        log.debug("sse_hub.unsubscribed", task_id=sub.task_id, conflated=sub.conflated)
+
+    def subscriber_count(self, task_id: Optional[str] = None) -> int:
+        if task_id is not None:
+            return len(self._subs.get(task_id, ()))
+        return sum(len(s) for s in self._subs.values())
+
+    # ── 廣播 ──────────────────────────────────────────
+
+    def publish(self, task_id: str, state: Optional[Dict[str, Any]]) -> bool:
+        """狀態有變才推給該任務的所有訂閱者；回傳是否有推送。"""
+        subs = self._subs.get(task_id)
+        if not subs:
+            return False
+        if state is not None and self._states.get(task_id) == state:
+            return False
+        if state is None:
+            self._states.pop(task_id, None)
+        else:
+            self._states[task_id] = state
+        for sub in tuple(subs):
+            sub.offer(state)
+        return True
+
+    async def refresh(self, task_ids) -> None:
+        """重讀指定任務（只限有訂閱者的）並廣播變動。單一任務讀失敗不影響其他任務。"""
+        ids = [t for t in task_ids if t in self._subs]
+        if not ids:
+            return
+        sem = asyncio.Semaphore(self._fetch_sem_size)
+
+        async def _one(task_id: str) -> None:
+            async with sem:
+                try:
+                    state = await self._fetch(task_id)
+                except Exception as e:
+                    log.warning("sse_hub.fetch_failed", task_id=task_id, error=str(e))
+                    return
+            self.publish(task_id, state)
+
+        await asyncio.gather(*(_one(t) for t in ids))
+
+    # ── 觀察迴圈 ──────────────────────────────────────
+
+    def _ensure_runner(self) -> None:
+        loop = asyncio.get_running_loop()
+        runner = self._runner
+        if runner is not None and not runner.done() and runner.get_loop() is loop:
+            return
+        self._runner = loop.create_task(self._run(), name="task_event_hub")
+
+    async def _run(self) -> None:
+        if self._watch is not None:
+            try:
+                await self._watch_loop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # standalone Mongo / 權限不足 / stream 中斷 → 降級成共用 poll
+                log.warning("sse_hub.change_stream_unavailable", error=str(e))
+        await self._poll_loop()
+
+    async def _watch_loop(self) -> None:
+        async with self._watch() as stream:
+            self.mode = "change_stream"
+            log.info("sse_hub.mode", mode=self.mode)
+            # 開 stream 前的狀態可能已經變了：先對現有訂閱補讀一次
+            await self.refresh(list(self._subs))
+            async for change in stream:
+                task_id = (change.get("documentKey") or {}).get("_id")
+                if task_id in self._subs:
+                    await self.refresh([task_id])
+        raise RuntimeError("change stream closed")
+
+    async def _poll_loop(self) -> None:
+        self.mode = "poll"
+        log.info("sse_hub.mode", mode=self.mode, interval=self.poll_interval)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._subs:
+                await self.refresh(list(self._subs))
+
+    async def close(self) -> None:
+        runner, self._runner = self._runner, None
+        if runner is not None and not runner.done():
+            runner.cancel()
+            try:
+                await runner
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+# ── module-level singleton ────────────────────────────────────
+
+_hub: Optional[TaskEventHub] = None
+_hub_owner: Any = None
+
+
+def get_task_event_hub(task_service) -> TaskEventHub:
+    """取得綁定 task_service 的 process 共用 hub（task_service 換了就重建）。"""
+    global _hub, _hub_owner
+    if _hub is None or _hub_owner is not task_service:
+        from src.services.progress_store import MongoProgressStore
+        from src.services.task_query_helpers import enrich_task_data, serialize_for_json
+
+        async def _fetch(task_id: str) -> Optional[Dict[str, Any]]:
+            task = await task_service.get_task(task_id)
+            if not task:
+                return None
+            return serialize_for_json(enrich_task_data(task))
+
+        watch = None
+        progress_store = getattr(task_service, "progress_store", None)
+        db = getattr(getattr(task_service, "task_repo", None), "db", None)
+        # local 模式進度在記憶體，change stream 看不到 → 只有 Mongo ProgressStore 才監看
+        if (
+            SSE_HUB_CHANGE_STREAM != "off"
+            and isinstance(progress_store, MongoProgressStore)
+            and db is not None
+        ):
+            def watch():
+                return db.watch(WATCH_PIPELINE)
+
+        _hub = TaskEventHub(_fetch, watch=watch)
+        _hub_owner = task_service
+    return _hub
+
+
+async def close_task_event_hub() -> None:
+    """關閉 hub 的觀察迴圈（app shutdown 呼叫）。"""
+    global _hub, _hub_owner
+    hub, _hub, _hub_owner = _hub, None, None
+    if hub is not None:
+        await hub.close()
@@ -17,7 +17,7 @@ import asyncio
 import gc
 import os
 
-from src.database.repositories.task_repo import TaskRepository
+from src.database.repositories.task_repo import ACTIVE_STATUSES as IN_FLIGHT_STATUSES, TaskRepository
 from src.utils.time_utils import get_current_time, get_utc_timestamp
 from src.utils.shared_state import TaskStateStore
 from src.services.progress_store import Phase, ProgressStore
@@ -87,6 +87,34 @@ class TaskService:
         snapshot = await loop.run_in_executor(
             None, self.progress_store.get, task_id
         )
+        return self._apply_progress(task, snapshot)
+
+    async def merge_progress(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """把 ProgressSnapshot 批次合併進已查出的任務文件（任務列表用）。
+
+        只有進行中（pending / processing）的任務才可能有 snapshot（run 結束時
+        orchestrator 會 clear），所以只對這些 id 做一次 get_many；
+        其餘任務原樣回傳。整頁固定一次 progress 讀取，不再每個任務一次。
+        """
+        in_flight = [
+            str(t.get("_id") or t.get("task_id"))
+            for t in tasks
+            if t.get("status") in IN_FLIGHT_STATUSES
+        ]
+        if not in_flight:
+            return tasks
+        loop = asyncio.get_event_loop()
+        snapshots = await loop.run_in_executor(
+            None, self.progress_store.get_many, in_flight
+        )
+        for task in tasks:
+            snapshot = snapshots.get(str(task.get("_id") or task.get("task_id")))
+            if snapshot is not None:
+                self._apply_progress(task, snapshot)
+        return tasks
+
+    @staticmethod
+    def _apply_progress(task: Dict[str, Any], snapshot) -> Dict[str, Any]:
         if snapshot is not None:
             if snapshot.message:
                 task["progress"] = snapshot.message
@@ -94,7 +122,6 @@ class TaskService:
             task["phase"] = snapshot.phase.value
             if snapshot.details:
                 task.update(snapshot.details)
-
         return task
 
     async def update_task_status(
@@ -495,9 +522,18 @@ class TaskService:
             liveness_threshold = datetime.utcnow() - timedelta(minutes=5)
             progress_coll = self.task_repo.collection.database.task_progress
 
+            # 轉錄完、排在標點佇列等 CPU 消費端的任務可能好幾分鐘沒寫進度，但並未中斷
+            from src.database.repositories.punctuation_queue_repo import PunctuationQueueRepository
+            punct_queued = await PunctuationQueueRepository(
+                self.task_repo.collection.database
+            ).queued_task_ids(t["_id"] for t in orphaned_tasks)
+
             truly_orphaned = []
             alive_task_ids = []
             for task in orphaned_tasks:
+                if task["_id"] in punct_queued:
+                    alive_task_ids.append(task.get("task_id"))
+                    continue
                 tp = await progress_coll.find_one(
                     {"_id": task["_id"]},
                     {"updated_at": 1}
@@ -62,6 +62,10 @@ def validate_filename_extension(filename: Optional[str]) -> str:
     return suffix
 
 
+# 判斷 magic bytes 需要的檔頭長度（所有簽章 offset + 長度的上限）
+MAGIC_HEADER_SIZE = 16
+
+
 def validate_magic_bytes(file_path: Path) -> None:
     """讀取檔頭驗證 magic bytes 對應已知音/視訊格式。
 
@@ -69,13 +73,20 @@ def validate_magic_bytes(file_path: Path) -> None:
     """
     try:
         with file_path.open("rb") as f:
-            header = f.read(16)
+            header = f.read(MAGIC_HEADER_SIZE)
     except OSError as e:
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST,
             f"無法讀取上傳檔案：{e}",
         )
+    validate_magic_header(header)
+
 
+def validate_magic_header(header: bytes) -> None:
+    """驗證已在記憶體中的檔頭（前 MAGIC_HEADER_SIZE bytes）。
+
+    給分片上傳用：第 0 片寫入時就能檢查，不必等整檔組裝完再讀回來。
+    """
     for offset, sig in _MAGIC_SIGNATURES:
         if header[offset:offset + len(sig)] == sig:
             return
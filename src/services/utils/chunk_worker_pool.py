@@ -0,0 +1,142 @@
+"""ChunkWorkerPool — CPU chunked 轉錄的常駐多進程池
+
+舊版 `transcribe_in_chunks_parallel` 每次呼叫都新建 ProcessPoolExecutor，且每個
+chunk 在 worker 內重新載入 WhisperModel——CPU 主機上短 chunk 的載入時間可與推論
+相當。改為進程層級單例：池在首個 chunked 任務 lazy 建立、跨 chunk / 跨任務重用，
+worker 進程內的模型由 `whisper_processor._get_worker_model` 以 LRU 常駐。
+
+記憶體上限由兩個旋鈕控制：
+- WHISPER_CHUNK_MAX_MODELS：每個 worker 進程最多常駐幾個模型（LRU 淘汰）
+- WHISPER_CHUNK_MAX_TASKS_PER_CHILD：worker 處理 N 個 chunk 後回收重生（0 = 不回收），
+  防 ctranslate2 / 解碼器長期運行的記憶體碎片
+
+只在 CPU 路徑使用（GPU 走 BatchedInferencePipeline 整檔轉錄，不經此池）。
+main.py shutdown 呼叫 `shutdown_chunk_worker_pool()` 收掉子進程。
+"""
+
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+# ── 池參數（env 可覆寫，改 .env + 重啟即生效）──────────────────
+CHUNK_POOL_WORKERS = int(os.getenv("WHISPER_CHUNK_WORKERS", "3"))
+CHUNK_POOL_CPU_THREADS = int(os.getenv("WHISPER_CHUNK_CPU_THREADS", "2"))
+CHUNK_POOL_COMPUTE_TYPE = os.getenv("WHISPER_CHUNK_COMPUTE_TYPE", "int8")
+CHUNK_POOL_MAX_MODELS = int(os.getenv("WHISPER_CHUNK_MAX_MODELS", "1"))
+CHUNK_POOL_MAX_TASKS_PER_CHILD = int(os.getenv("WHISPER_CHUNK_MAX_TASKS_PER_CHILD", "0"))
+
+
+class ChunkWorkerPool:
+    """跨任務共用的 ProcessPoolExecutor 包裝。
+
+    - executor lazy 建立；worker 進程崩潰（BrokenProcessPool）時丟棄整個池，
+      下一次 submit 自動重建，不會讓一次 OOM 拖垮之後所有任務。
+    - 取消/失敗只 cancel 呼叫端自己的 futures，不關池（池是共用的）。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CHUNK_POOL_WORKERS,
+        max_tasks_per_child: int = CHUNK_POOL_MAX_TASKS_PER_CHILD,
+    ):
+        self.max_workers = max(1, max_workers)
+        self._max_tasks_per_child = max_tasks_per_child if max_tasks_per_child > 0 else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # future → 送出它的 executor（discard_for 只丟那一個，不誤關已換上的新池）
+        self._owners: "weakref.WeakKeyDictionary[Future, ProcessPoolExecutor]" = weakref.WeakKeyDictionary()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # 顯式 spawn：fork 帶著已載入的 ctranslate2 / torch 執行緒狀態進子進程不安全，
+        # 且 max_tasks_per_child 本身就要求非 fork context
+        kwargs = {
+            "max_workers": self.max_workers,
+            "mp_context": multiprocessing.get_context("spawn"),
+        }
+        if self._max_tasks_per_child:
+            kwargs["max_tasks_per_child"] = self._max_tasks_per_child
+        log.info(
+            "chunk_pool.created",
+            max_workers=self.max_workers,
+            max_tasks_per_child=self._max_tasks_per_child,
+        )
+        return ProcessPoolExecutor(**kwargs)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """提交一個 chunk 工作；池已損壞時重建一次再送。"""
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            log.warning("chunk_pool.broken_on_submit")
+            self.discard(executor)
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        self._owners[future] = executor
+        return future
+
+    def discard(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        """丟棄（損壞的）executor；下一次 submit 會重建。
+
+        executor 不是目前的池（已被別的呼叫端換掉）→ no-op，避免誤關新池。
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            stale, self._executor = self._executor, None
+        if stale is not None:
+            log.warning("chunk_pool.discarded")
+            stale.shutdown(wait=False, cancel_futures=True)
+
+    def discard_for(self, future: Future) -> None:
+        """丟棄送出 future 的 executor（future 回報 BrokenProcessPool 時用）；該池已被換掉 → no-op"""
+        executor = self._owners.get(future)
+        if executor is not None:
+            self.discard(executor)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """關閉池並回收子進程（app shutdown 用）。之後再 submit 會重建。"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            log.info("chunk_pool.shutdown")
+
+
+# ── module-level singleton ────────────────────────────────────
+
+_pool: Optional[ChunkWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_chunk_worker_pool() -> ChunkWorkerPool:
+    """取得進程層級共用的 ChunkWorkerPool（首次呼叫時建立，子進程仍 lazy）。"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ChunkWorkerPool()
+        return _pool
+
+
+def shutdown_chunk_worker_pool(wait: bool = True) -> None:
+    """main.py shutdown 呼叫：池從未建立時 no-op。"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -8,6 +8,7 @@ from typing import Optional, List, Dict
 import os
 
 from src.utils.logger import get_logger
+from src.utils.pcm_buffer import PcmBuffer
 
 log = get_logger(__name__)
 
@@ -47,13 +48,15 @@ class DiarizationProcessor:
     def perform_diarization(
         self,
         audio_path: Path,
-        max_speakers: Optional[int] = None
+        max_speakers: Optional[int] = None,
+        pcm: Optional[PcmBuffer] = None,
     ) -> Optional[List[Dict]]:
         """執行說話者辨識
 
         Args:
             audio_path: 音檔路徑
             max_speakers: 最大講者人數（可選，2-10）
+            pcm: 已解碼的共享 PCM（有則以 in-memory waveform 餵 pipeline，不再解碼 audio_path）
 
         Returns:
             Diarization segments 列表，格式：
@@ -75,7 +78,8 @@ class DiarizationProcessor:
                 diarization_kwargs["max_speakers"] = max_speakers
 
             log.debug("diarization.params", max_speakers=max_speakers, diarization_kwargs=diarization_kwargs)
-            diarization = self.pipeline(str(audio_path), **diarization_kwargs)
+            audio_input = pcm.as_pyannote_input() if pcm is not None else str(audio_path)
+            diarization = self.pipeline(audio_input, **diarization_kwargs)
 
             segments = []
             for turn, _, speaker in diarization.itertracks(yield_label=True):
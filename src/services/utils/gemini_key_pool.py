@@ -0,0 +1,228 @@
+"""GeminiKeyPool — 多把 GOOGLE_API_KEY_n 的速率感知排程
+
+舊版 `_call_gemini_with_retry` 每次嘗試都 `genai.configure(api_key=...)`（改的是
+process 全域狀態，無法並行），且只在撞到 429 後才被動換下一把 key。長逐字稿的
+PUNCTUATION 階段因此只能一段一段串行送，GPU worker 在旁邊乾等。
+
+改為 process 層級的 key 池：
+- 每把 key 各自一個 GenerativeServiceClient（不碰 `genai.configure`），可多執行緒並行
+- 以 (key, model) 為單位記錄冷卻：429 / quota 後該組合冷卻 GEMINI_KEY_COOLDOWN_SECONDS，
+  期間其他 chunk 不會再打它；某模型全部 key 都在冷卻 → acquire 回 None，
+  呼叫端照舊切下一個備援模型
+- 可選每 key 每分鐘請求上限（GEMINI_KEY_RPM，0 = 不限）：額度用滿時 acquire
+  等到視窗釋出為止，而不是先打一發 429
+- 挑 key 時優先選 in-flight 最少、最久沒用的，讓負載攤平在各 key 上
+
+`generator_factory(api_key, model_name)` 可注入（測試用假 Gemini client），
+回傳物件只需有 `generate_content(contents, generation_config=...)`。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+# ── 池參數（env 可覆寫，改 .env + 重啟即生效）──────────────────
+GEMINI_KEY_COOLDOWN_SECONDS = float(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", "30"))
+GEMINI_KEY_RPM = int(os.getenv("GEMINI_KEY_RPM", "0"))
+# RPM 視窗等待的上限：超過就當成沒有可用 key（交給呼叫端換備援模型）
+GEMINI_KEY_MAX_WAIT_SECONDS = float(os.getenv("GEMINI_KEY_MAX_WAIT_SECONDS", "60"))
+
+_RPM_WINDOW_SECONDS = 60.0
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """429 / quota 類錯誤（與舊版 `_call_gemini_with_retry` 的判定字串相同）。"""
+    msg = str(error)
+    return "429" in msg or "quota" in msg.lower() or "Quota exceeded" in msg
+
+
+class _GenerateResponse:
+    """GenerateContentResponse 的薄包裝：補上 SDK GenerativeModel 回應的 `.text`。
+
+    與 SDK 的 `.text` 一樣，被擋下 / 截斷的回應（沒有 candidates / parts，或 finish_reason
+    不是 STOP，例如 SAFETY、MAX_TOKENS、RECITATION）直接拋 ValueError，讓呼叫端當成這次
+    嘗試失敗、換 key / 備援模型，而不是把空字串當成功。
+    """
+
+    __slots__ = ("raw", "text", "usage_metadata")
+
+    def __init__(self, raw):
+        self.raw = raw
+        if not raw.candidates:
+            raise ValueError(f"Gemini 回應沒有 candidates（prompt_feedback={raw.prompt_feedback}）")
+        candidate = raw.candidates[0]
+        finish_reason = getattr(candidate.finish_reason, "name", candidate.finish_reason)
+        if finish_reason != "STOP":
+            raise ValueError(f"Gemini 回應未正常結束（finish_reason={finish_reason}）")
+        parts = candidate.content.parts
+        if not parts:
+            raise ValueError("Gemini 回應沒有 parts")
+        self.text = "".join(part.text for part in parts)
+        self.usage_metadata = raw.usage_metadata
+
+
+class _KeyedGeminiModel:
+    """綁定一把 key 的模型：直接用公開的 GenerativeServiceClient（每把 key 一個）。
+
+    介面與 `genai.GenerativeModel.generate_content` 呼叫端用到的部分相同：
+    contents 為 `[{"role", "parts": [str, ...]}]`，generation_config 為 dict。
+    """
+
+    def __init__(self, client, model_name: str):
+        self._client = client
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+    def generate_content(self, contents, generation_config=None):
+        import google.ai.generativelanguage as glm
+
+        request = glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[
+                glm.Content(role=c.get("role", "user"), parts=[glm.Part(text=p) for p in c["parts"]])
+                for c in contents
+            ],
+            generation_config=glm.GenerationConfig(**(generation_config or {})),
+        )
+        return _GenerateResponse(self._client.generate_content(request=request))
+
+
+def _default_generator_factory(api_key: str, model_name: str):
+    """每把 key 一個獨立 GenerativeServiceClient（不改 genai 全域設定、不碰 SDK 私有屬性）。"""
+    import google.ai.generativelanguage as glm
+
+    return _KeyedGeminiModel(glm.GenerativeServiceClient(client_options={"api_key": api_key}), model_name)
+
+
+class _KeyState:
+    __slots__ = ("index", "api_key", "in_flight", "last_used", "recent", "cooldown_until")
+
+    def __init__(self, index: int, api_key: str):
+        self.index = index
+        self.api_key = api_key
+        self.in_flight = 0
+        self.last_used = float("-inf")
+        self.recent: Deque[float] = deque()  # RPM 視窗內的請求時間
+        self.cooldown_until: Dict[str, float] = {}  # model → 冷卻到期時間
+
+
+class KeyLease:
+    """acquire 拿到的一次使用權；用完必須 `GeminiKeyPool.release`。"""
+
+    __slots__ = ("key_index", "api_key", "model_name")
+
+    def __init__(self, key_index: int, api_key: str, model_name: str):
+        self.key_index = key_index
+        self.api_key = api_key
+        self.model_name = model_name
+
+
+class GeminiKeyPool:
+    """跨執行緒共用的 Gemini API key 排程器。"""
+
+    def __init__(
+        self,
+        api_keys: Sequence[str],
+        rpm_limit: int = GEMINI_KEY_RPM,
+        cooldown_seconds: float = GEMINI_KEY_COOLDOWN_SECONDS,
+        max_wait_seconds: float = GEMINI_KEY_MAX_WAIT_SECONDS,
+        generator_factory: Optional[Callable[[str, str], object]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not api_keys:
+            raise ValueError("未設定任何 GOOGLE_API_KEY")
+        self.api_keys: Tuple[str, ...] = tuple(api_keys)
+        self.rpm_limit = max(0, rpm_limit)
+        self.cooldown_seconds = cooldown_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._factory = generator_factory or _default_generator_factory
+        self._clock = clock
+        self._states: List[_KeyState] = [_KeyState(i, k) for i, k in enumerate(self.api_keys)]
+        self._generators: Dict[Tuple[int, str], object] = {}
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    # ── 排程 ──────────────────────────────────────────
+
+    def _prune(self, state: _KeyState, now: float) -> None:
+        while state.recent and now - state.recent[0] >= _RPM_WINDOW_SECONDS:
+            state.recent.popleft()
+
+    def acquire(self, model_name: str) -> Optional[KeyLease]:
+        """取得一把可用 key；該模型的 key 全在冷卻中（或 RPM 等待逾時）→ None。"""
+        deadline = self._clock() + self.max_wait_seconds
+        with self._cond:
+            while True:
+                now = self._clock()
+                warm = [s for s in self._states if s.cooldown_until.get(model_name, 0.0) <= now]
+                if not warm:
+                    return None
+                for s in warm:
+                    self._prune(s, now)
+                ready = [s for s in warm if not self.rpm_limit or len(s.recent) < self.rpm_limit]
+                if ready:
+                    state = min(ready, key=lambda s: (s.in_flight, s.last_used, s.index))
+                    state.in_flight += 1
+                    state.last_used = now
+                    state.recent.append(now)
+                    return KeyLease(state.index, state.api_key, model_name)
+
+                # 全部 key 的 RPM 額度都用滿：等最早的一筆滑出視窗
+                wait = min(s.recent[0] for s in warm) + _RPM_WINDOW_SECONDS - now
+                if now + wait > deadline:
+                    log.warning("gemini_key_pool.rpm_wait_exceeded", model=model_name)
+                    return None
+                log.debug("gemini_key_pool.rpm_wait", model=model_name, wait_seconds=round(wait, 2))
+                self._cond.wait(timeout=max(wait, 0.01))
+
+    def release(self, lease: KeyLease, quota_exceeded: bool = False) -> None:
+        """歸還使用權；quota_exceeded=True 時讓 (key, model) 進入冷卻。"""
+        with self._cond:
+            state = self._states[lease.key_index]
+            state.in_flight = max(0, state.in_flight - 1)
+            if quota_exceeded:
+                state.cooldown_until[lease.model_name] = self._clock() + self.cooldown_seconds
+                log.warning(
+                    "gemini_key_pool.key_cooling",
+                    key_index=lease.key_index + 1,
+                    model=lease.model_name,
+                    cooldown_seconds=self.cooldown_seconds,
+                )
+            self._cond.notify_all()
+
+    def generator(self, lease: KeyLease):
+        """lease 對應 (key, model) 的 generator；每組合只建一次，跨 chunk 重用連線。"""
+        cache_key = (lease.key_index, lease.model_name)
+        with self._cond:
+            gen = self._generators.get(cache_key)
+        if gen is None:
+            gen = self._factory(lease.api_key, lease.model_name)
+            with self._cond:
+                gen = self._generators.setdefault(cache_key, gen)
+        return gen
+
+
+# ── module-level singleton ────────────────────────────────────
+
+_pool: Optional[GeminiKeyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_gemini_key_pool(api_keys: Sequence[str]) -> GeminiKeyPool:
+    """取得進程層級共用的 key 池（冷卻狀態跨 chunk / 跨任務共享）。
+
+    key 清單變動（例如 Secrets 重新載入）時重建。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.api_keys != tuple(api_keys):
+            _pool = GeminiKeyPool(api_keys)
+        return _pool
@@ -3,14 +3,29 @@ PunctuationProcessor - 標點符號處理器
 職責：使用 AI 模型為轉錄文字添加標點符號
 """
 
-from typing import Optional, Tuple, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple, Dict, Any, Callable, List
 import os
 import re
 
+from src.database.repositories.llm_cache_repo import (
+    TEMPLATE_SLOT,
+    SyncLLMCache,
+    cache_key,
+    template_version,
+)
+from src.services.utils.gemini_key_pool import (
+    GeminiKeyPool,
+    get_gemini_key_pool,
+    is_quota_error,
+)
 from src.utils.logger import get_logger
 
 log = get_logger(__name__)
 
+# 長文本分段同時送 Gemini 的上限（另受 key 池冷卻 / RPM 節流）；1 = 舊版串行行為
+PUNCTUATION_MAX_CONCURRENCY = int(os.getenv("PUNCTUATION_MAX_CONCURRENCY", "4"))
+
 
 # ── LLM 前言/結尾註記偵測（_strip_llm_preamble 用）────────────────────────
 # 雙關鍵詞規則：一行要同時含「前言動詞」與「領域詞」才視為 LLM 客套話，缺一不剝——
@@ -44,7 +59,10 @@ class PunctuationProcessor:
         self,
         default_provider: str = "gemini",
         gemini_model: str = "gemini-2.5-flash-lite",
-        openai_model: str = "gpt-4o-mini"
+        openai_model: str = "gpt-4o-mini",
+        key_pool: Optional[GeminiKeyPool] = None,
+        max_concurrency: int = PUNCTUATION_MAX_CONCURRENCY,
+        cache: Optional[SyncLLMCache] = None,
     ):
         """初始化 PunctuationProcessor
 
@@ -52,10 +70,16 @@ class PunctuationProcessor:
             default_provider: 預設提供商（"gemini" 或 "openai"）
             gemini_model: Gemini 模型名稱
             openai_model: OpenAI 模型名稱
+            key_pool: Gemini key 池；None 則使用進程共用池（依 GOOGLE_API_KEY_n 建立）
+            max_concurrency: 長文本分段同時送出的上限
+            cache: LLM 輸出快取（Gemini 每次呼叫前先查）；None 不快取
         """
         self.default_provider = default_provider
         self.gemini_model = gemini_model
         self.openai_model = openai_model
+        self.key_pool = key_pool
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
 
         # Gemini 備援模型列表（按優先順序）
         self.gemini_fallback_models = [
@@ -261,8 +285,6 @@ class PunctuationProcessor:
         Returns:
             (處理後的文字, 使用的模型名稱, token_usage) 元組
         """
-        import google.generativeai as genai
-
         # 自動決定 chunk_size（考慮輸出限制 65,536 tokens）
         if chunk_size is None:
             if language in ("zh", "zh-TW", "zh-CN", "ja", "ko"):
@@ -273,75 +295,45 @@ class PunctuationProcessor:
         # 如果文字不長，直接處理
         if len(text) <= chunk_size:
             system_msg, user_msg = self._get_punctuation_prompt(language, text)
-            prompt = f"{system_msg}\n\n{user_msg}"
-            max_out = self._estimate_max_output_tokens(text, language)
-            result, model_used, token_usage = self._call_gemini_with_retry(
-                prompt, max_output_tokens=max_out
+            return self._punctuate_gemini_prompt(
+                f"{system_msg}\n\n{user_msg}", text, language,
+                template="\n\n".join(self._get_punctuation_prompt(language, TEMPLATE_SLOT)),
             )
-            result = self._strip_llm_preamble(result)
-            if self._is_output_exploded(text, result):
-                log.warning(
-                    "punctuation.output_exploded",
-                    input_chars=len(text),
-                    output_chars=len(result),
-                )
-                result = text
-            if language in ("zh", "zh-TW", "zh-CN"):
-                result = self._remove_cjk_latin_spaces(result)
-            return result, model_used, token_usage
 
-        # 長文本：分段處理
+        # 長文本：分段並行處理（key 池負責冷卻 / 節流），結果依原順序合併
         chunks = self._split_text_into_chunks(text, chunk_size)
         total_chunks = len(chunks)
+        workers = min(self.max_concurrency, total_chunks)
         log.info(
             "punctuation.chunking",
             input_chars=len(text),
             chunk_size=chunk_size,
             total_chunks=total_chunks,
+            concurrency=workers,
         )
 
-        results = []
-        model_used = None
-        # 累加所有 chunk 的 token 使用量
+        results: List[Optional[Tuple[str, str, Optional[Dict[str, int]]]]] = [None] * total_chunks
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="punctuation")
+        try:
+            futures = {
+                executor.submit(
+                    self._punctuate_gemini_chunk, chunk_text, language, chunk_idx, total_chunks
+                ): chunk_idx - 1
+                for chunk_idx, chunk_text in enumerate(chunks, start=1)
+            }
+            # 進度回調在呼叫端執行緒觸發（回調可能拋 TranscriptionCancelled）
+            for completed, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(completed, total_chunks)
+        finally:
+            # 失敗 / 取消時不等其餘 chunk：尚未開始的直接取消
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # 記錄使用的模型（第一段成功的模型）並累加所有 chunk 的 token 使用量
+        model_used = results[0][1]
         total_token_usage = {"total": 0, "prompt": 0, "completion": 0}
-
-        for chunk_idx, chunk_text in enumerate(chunks, start=1):
-            log.debug("punctuation.chunk_processing", chunk_idx=chunk_idx, total_chunks=total_chunks)
-
-            # 進度回調
-            if progress_callback:
-                progress_callback(chunk_idx, total_chunks)
-
-            # 獲取分段提示語
-            system_msg, user_msg = self._get_chunked_punctuation_prompt(
-                language, chunk_text, chunk_idx, total_chunks
-            )
-            prompt = f"{system_msg}\n\n{user_msg}"
-
-            # 調用 Gemini
-            max_out = self._estimate_max_output_tokens(chunk_text, language)
-            result, chunk_model, chunk_token_usage = self._call_gemini_with_retry(
-                prompt, max_output_tokens=max_out
-            )
-            result = self._strip_llm_preamble(result)
-            if self._is_output_exploded(chunk_text, result):
-                log.warning(
-                    "punctuation.output_exploded",
-                    chunk_idx=chunk_idx,
-                    total_chunks=total_chunks,
-                    input_chars=len(chunk_text),
-                    output_chars=len(result),
-                )
-                result = chunk_text
-            if language in ("zh", "zh-TW", "zh-CN"):
-                result = self._remove_cjk_latin_spaces(result)
-            results.append(result)
-
-            # 記錄使用的模型（使用第一個成功的模型）
-            if model_used is None:
-                model_used = chunk_model
-
-            # 累加 token 使用量
+        for _, _, chunk_token_usage in results:
             if chunk_token_usage:
                 total_token_usage["total"] += chunk_token_usage.get("total", 0)
                 total_token_usage["prompt"] += chunk_token_usage.get("prompt", 0)
@@ -359,7 +351,82 @@ class PunctuationProcessor:
 
         # 合併結果
         final_token_usage = total_token_usage if total_token_usage["total"] > 0 else None
-        return "\n\n".join(results), model_used or self.gemini_model, final_token_usage
+        return (
+            "\n\n".join(result for result, _, _ in results),
+            model_used or self.gemini_model,
+            final_token_usage,
+        )
+
+    def _punctuate_gemini_chunk(
+        self,
+        chunk_text: str,
+        language: str,
+        chunk_idx: int,
+        total_chunks: int
+    ) -> Tuple[str, str, Optional[Dict[str, int]]]:
+        """處理長文本的單一分段（在 worker 執行緒內執行）"""
+        log.debug("punctuation.chunk_processing", chunk_idx=chunk_idx, total_chunks=total_chunks)
+        system_msg, user_msg = self._get_chunked_punctuation_prompt(
+            language, chunk_text, chunk_idx, total_chunks
+        )
+        template = "\n\n".join(self._get_chunked_punctuation_prompt(
+            language, TEMPLATE_SLOT, chunk_idx, total_chunks
+        ))
+        return self._punctuate_gemini_prompt(
+            f"{system_msg}\n\n{user_msg}", chunk_text, language, template=template,
+            chunk_idx=chunk_idx, total_chunks=total_chunks,
+        )
+
+    def _punctuate_gemini_prompt(
+        self,
+        prompt: str,
+        source_text: str,
+        language: str,
+        template: Optional[str] = None,
+        **log_context: Any
+    ) -> Tuple[str, str, Optional[Dict[str, int]]]:
+        """送出一次標點 prompt，並套用前言剝除 / 膨脹守門 / 中英空白清理
+
+        有 cache 且給了 template（算模板版本）時先查快取，命中就不呼叫 Gemini、token_usage 為 None。
+        快取存原始回應，但只存通過膨脹守門的；快取內容過不了守門視同未命中，
+        避免一次壞回應在 TTL 內被重播、重跑永遠修不好。
+        """
+        key = version = None
+        if self.cache is not None and template is not None:
+            version = template_version(template)
+            key = cache_key("punctuation", source_text, version, self.gemini_model, language)
+            cached = self.cache.get(
+                key, "punctuation", accept=lambda raw: bool(raw) and not self._is_output_exploded(
+                    source_text, self._strip_llm_preamble(raw)
+                ),
+            )
+            if cached:
+                log.debug("punctuation.cache_hit", model=cached.get("model"))
+                return (
+                    self._finish_output(self._strip_llm_preamble(cached["value"]), language),
+                    cached.get("model") or self.gemini_model,
+                    None,
+                )
+
+        max_out = self._estimate_max_output_tokens(source_text, language)
+        raw, model_used, token_usage = self._call_gemini_with_retry(prompt, max_output_tokens=max_out)
+        result = self._strip_llm_preamble(raw)
+        if self._is_output_exploded(source_text, result):
+            log.warning(
+                "punctuation.output_exploded",
+                input_chars=len(source_text),
+                output_chars=len(result),
+                **log_context,
+            )
+            result = source_text
+        elif key is not None and raw:
+            self.cache.put(key, "punctuation", raw, model_used, language, version)
+        return self._finish_output(result, language), model_used, token_usage
+
+    def _finish_output(self, text: str, language: str) -> str:
+        if language in ("zh", "zh-TW", "zh-CN"):
+            return self._remove_cjk_latin_spaces(text)
+        return text
 
     def _call_gemini_with_retry(
         self,
@@ -367,11 +434,15 @@ class PunctuationProcessor:
         max_retries: Optional[int] = None,
         max_output_tokens: Optional[int] = None
     ) -> Tuple[str, str, Optional[Dict[str, int]]]:
-        """調用 Gemini API，支援自動重試和模型備援
+        """調用 Gemini API，支援自動重試和模型備援（可多執行緒並行呼叫）
+
+        key 由 GeminiKeyPool 分配：429 / quota 讓該 (key, 模型) 冷卻，其他 key 接手；
+        該模型全部 key 都在冷卻 → 切下一個備援模型。非配額錯誤（含空回應、被擋下 /
+        截斷的回應）換 key 重試，每個模型最多 max_retries 次。
 
         Args:
             prompt: 提示文字
-            max_retries: 最大重試次數
+            max_retries: 每個模型的最大嘗試次數（None = key 數量）
 
         Returns:
             (處理後的文字, 使用的模型名稱, token_usage) 元組
@@ -379,44 +450,48 @@ class PunctuationProcessor:
         Raises:
             RuntimeError: 所有 API Keys 和備援模型都失敗
         """
-        import google.generativeai as genai
-
-        # 獲取 Google API Keys
-        google_api_keys = self._load_google_api_keys()
-
+        pool = self._get_key_pool()
         if max_retries is None:
-            max_retries = len(google_api_keys)
-
-        last_error = None
-        quota_exceeded_count = 0
-        current_model = self.gemini_model
-        fallback_index = -1
-        tried_models = [self.gemini_model]
-        current_key_index = 0
-
-        max_attempts = max_retries * (len(self.gemini_fallback_models) + 1)
-
-        for attempt in range(max_attempts):
-            try:
-                # 獲取下一個 API Key（輪詢）
-                api_key = google_api_keys[current_key_index % len(google_api_keys)]
-                current_key_index += 1
-
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel(current_model)
-
-                # 調用 API
-                gen_config: Dict[str, Any] = {"temperature": 0.2}
-                if max_output_tokens:
-                    gen_config["max_output_tokens"] = max_output_tokens
-                resp = model.generate_content(
-                    [{"role": "user", "parts": [prompt]}],
-                    generation_config=gen_config
-                )
-
-                result = (resp.text or "").strip()
+            max_retries = len(pool)
+
+        gen_config: Dict[str, Any] = {"temperature": 0.2}
+        if max_output_tokens:
+            gen_config["max_output_tokens"] = max_output_tokens
+
+        last_error: Optional[Exception] = None
+        tried_models: List[str] = []
+        models = [self.gemini_model] + self.gemini_fallback_models
+
+        for model_idx, current_model in enumerate(models):
+            tried_models.append(current_model)
+            if model_idx > 0:
+                log.warning("punctuation.switching_fallback_model", model=current_model)
+
+            for attempt in range(max_retries):
+                lease = pool.acquire(current_model)
+                if lease is None:
+                    # 這個模型的 key 全在冷卻中 → 下一個備援模型
+                    break
+                try:
+                    resp = pool.generator(lease).generate_content(
+                        [{"role": "user", "parts": [prompt]}],
+                        generation_config=gen_config
+                    )
+                    result = (resp.text or "").strip()
+                    if not result:
+                        raise ValueError("Gemini 回應為空")
+                except Exception as e:
+                    last_error = e
+                    quota = is_quota_error(e)
+                    pool.release(lease, quota_exceeded=quota)
+                    if quota:
+                        log.warning("punctuation.quota_exceeded", attempt=attempt + 1, model=current_model)
+                    else:
+                        log.warning("punctuation.api_call_failed", attempt=attempt + 1, error=str(e))
+                    continue
+                pool.release(lease)
 
-                if fallback_index >= 0:
+                if model_idx > 0:
                     log.info("punctuation.fallback_model_succeeded", model=current_model)
 
                 # 提取 token 使用量
@@ -441,58 +516,19 @@ class PunctuationProcessor:
 
                 return result, current_model, token_usage
 
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-
-                # 檢查是否為 429 配額錯誤
-                is_quota_error = (
-                    "429" in error_msg or
-                    "quota" in error_msg.lower() or
-                    "Quota exceeded" in error_msg
-                )
-
-                if is_quota_error:
-                    quota_exceeded_count += 1
-                    log.warning("punctuation.quota_exceeded", attempt=attempt + 1, model=current_model)
-
-                    # 如果所有 keys 都配額耗盡，嘗試切換到下一個備援模型
-                    if quota_exceeded_count >= len(google_api_keys):
-                        fallback_index += 1
-
-                        if fallback_index < len(self.gemini_fallback_models):
-                            current_model = self.gemini_fallback_models[fallback_index]
-                            log.warning("punctuation.switching_fallback_model", model=current_model)
-                            tried_models.append(current_model)
-                            quota_exceeded_count = 0
-                            current_key_index = 0  # 重置 key 索引
-                            continue
-                        else:
-                            # 所有備援模型都用完了
-                            log.error("punctuation.all_models_quota_exceeded", tried_models=tried_models)
-                            raise RuntimeError(
-                                f"所有 Google API Keys 都調用失敗。"
-                                f"已嘗試模型: {', '.join(tried_models)}。"
-                                f"最後錯誤: {error_msg}"
-                            ) from last_error
-                else:
-                    log.warning("punctuation.api_call_failed", attempt=attempt + 1, error=error_msg)
-
-                # 如果還有 key 可用，繼續嘗試
-                if attempt < max_attempts - 1:
-                    log.debug("punctuation.switching_api_key")
-                    continue
-                else:
-                    raise RuntimeError(
-                        f"所有 Google API Keys 都調用失敗。"
-                        f"已嘗試模型: {', '.join(tried_models)}。"
-                        f"最後錯誤: {error_msg}"
-                    ) from last_error
-
+        log.error("punctuation.all_models_failed", tried_models=tried_models)
         raise RuntimeError(
-            f"無法調用 Gemini API。已嘗試模型: {', '.join(tried_models)}"
+            f"所有 Google API Keys 都調用失敗。"
+            f"已嘗試模型: {', '.join(tried_models)}。"
+            f"最後錯誤: {last_error}"
         ) from last_error
 
+    def _get_key_pool(self) -> GeminiKeyPool:
+        """注入的 key 池優先；否則用進程共用池（冷卻狀態跨任務共享）"""
+        if self.key_pool is not None:
+            return self.key_pool
+        return get_gemini_key_pool(self._load_google_api_keys())
+
     def _get_punctuation_prompt(
         self,
         language: str,
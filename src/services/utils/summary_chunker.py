@@ -0,0 +1,65 @@
+"""
+逐字稿切塊（map-reduce 摘要用）
+職責：把長逐字稿切成不超過指定字數的片段，盡量切在講者 / segment 邊界上
+
+斷點優先順序（一層切不下才往下一層）：
+1. 講者段落：獨立一行的 `[講者]` 標籤（字幕模式組出的內容）或行內 `[SPEAKER_00]`
+2. 空行（段落模式的段落）、換行（segment）
+3. 句尾標點（。！？.!?）、空白
+4. 都沒有才硬切
+相鄰的小單位會往前合併，直到再加就超過上限為止。
+"""
+
+import re
+from typing import List
+
+# 講者標籤之前：獨立一行的 [名稱]，或行內的 [SPEAKER_00] / [Speaker A]
+_SPEAKER_RE = re.compile(
+    r"(?m)(?=^\[[^\]\n]{1,100}\]\s*$)|(?=\[SPEAKER[_\s]?\d*\]|\[Speaker\s*\w*\])",
+    re.IGNORECASE,
+)
+_PARAGRAPH_RE = re.compile(r"(?<=\n\n)")
+_LINE_RE = re.compile(r"(?<=\n)")
+_SENTENCE_RE = re.compile(r"(?<=[。！？!?])|(?<=[.;])(?=\s)")
+_SPACE_RE = re.compile(r"(?<=\s)")
+
+_LEVELS = (_SPEAKER_RE, _PARAGRAPH_RE, _LINE_RE, _SENTENCE_RE, _SPACE_RE)
+
+
+def _split_at(text: str, pattern: re.Pattern) -> List[str]:
+    return [part for part in pattern.split(text) if part]
+
+
+def _units(text: str, max_chars: int, level: int = 0) -> List[str]:
+    """切成每塊都 <= max_chars 的最小單位（保留原文，串接回去等於原文）"""
+    if len(text) <= max_chars:
+        return [text]
+    if level >= len(_LEVELS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    out: List[str] = []
+    for part in _split_at(text, _LEVELS[level]):
+        out.extend(_units(part, max_chars, level + 1))
+    return out
+
+
+def split_transcript(text: str, max_chars: int) -> List[str]:
+    """切成數塊，每塊 <= max_chars；空白塊略去，各塊頭尾空白已去除
+
+    Args:
+        text: 逐字稿全文
+        max_chars: 每塊字數上限
+
+    Returns:
+        依原順序的片段列表
+    """
+    max_chars = max(1, max_chars)
+    chunks: List[str] = []
+    current = ""
+    for unit in _units(text, max_chars):
+        if current and len(current) + len(unit) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += unit
+    if current:
+        chunks.append(current)
+    return [c.strip() for c in chunks if c.strip()]
@@ -6,12 +6,14 @@ WhisperProcessor - Whisper 轉錄處理器
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Any, TYPE_CHECKING
 import bisect
+import gc
 import subprocess
-import json
 import re
 import os
+from collections import OrderedDict
 from pydub import AudioSegment
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # faster_whisper 是 ML 重依賴。
 # - GPU Worker / local 開發：有裝（requirements.txt），轉錄走 WhisperModel
@@ -23,7 +25,21 @@ except ImportError:
     WhisperModel = None
     BatchedInferencePipeline = None
 
+# numpy 隨 faster_whisper 安裝；Web Server 沒有時語者對齊退回純 Python 參考實作
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.services.utils.chunk_worker_pool import (
+    CHUNK_POOL_COMPUTE_TYPE,
+    CHUNK_POOL_CPU_THREADS,
+    CHUNK_POOL_MAX_MODELS,
+    get_chunk_worker_pool,
+)
 from src.utils.logger import get_logger
+from src.utils.media_probe import MediaProbe, probe_media
+from src.utils.pcm_buffer import PcmBuffer, load_pcm_slice
 
 log = get_logger(__name__)
 
@@ -349,17 +365,7 @@ def _word_speaker_candidates(
 
     if not overlapping:
         # 零重疊（落在 turn 間隙）→ 依區間中點距最近的 turn 歸屬（rare path，全掃沒關係）
-        midpoint = (start + end) / 2.0
-
-        def _distance(turn: Dict) -> float:
-            if midpoint < turn["start"]:
-                return turn["start"] - midpoint
-            if midpoint > turn["end"]:
-                return midpoint - turn["end"]
-            return 0.0
-
-        nearest = min(sorted_turns, key=_distance)["speaker"]
-        return {nearest: NEAREST_FALLBACK_SCORE}
+        return {_nearest_turn_speaker(start, end, sorted_turns): NEAREST_FALLBACK_SCORE}
 
     candidates: Dict[str, float] = {}
 
@@ -395,6 +401,185 @@ def _word_speaker_candidates(
     return candidates
 
 
+def _nearest_turn_speaker(start: float, end: float, sorted_turns: List[Dict]) -> str:
+    """區間中點距離最近的 turn 的 speaker（距離相同取排序較前者）。"""
+    midpoint = (start + end) / 2.0
+
+    def _distance(turn: Dict) -> float:
+        if midpoint < turn["start"]:
+            return turn["start"] - midpoint
+        if midpoint > turn["end"]:
+            return midpoint - turn["end"]
+        return 0.0
+
+    return min(sorted_turns, key=_distance)["speaker"]
+
+
+# 最近 turn 批次計算的距離矩陣區塊上限（元素數），避免 gap 單位 × turns 一次 materialize
+_NEAREST_BLOCK_ELEMENTS = 1 << 20
+
+
+def _nearest_turn_indices(span_start, span_end, t_start, t_end):
+    """`_nearest_turn_speaker` 的批次版：回傳每個區間中點最近 turn 的索引（距離相同取第一個）。"""
+    midpoints = (span_start + span_end) / 2.0
+    rows = max(1, _NEAREST_BLOCK_ELEMENTS // max(t_start.size, 1))
+    out = np.empty(midpoints.size, dtype=np.intp)
+    for i in range(0, midpoints.size, rows):
+        mid = midpoints[i:i + rows, None]
+        distance = np.where(
+            mid < t_start, t_start - mid, np.where(mid > t_end, mid - t_end, 0.0)
+        )
+        out[i:i + rows] = distance.argmin(axis=1)
+    return out
+
+
+def _unit_emission_matrix(
+    units: List[Dict],
+    sorted_turns: List[Dict],
+    starts: List[float],
+    prefix_max_end: List[float],
+):
+    """`_word_speaker_candidates`（word 路徑）的向量化版：一次算出全部單位的 emission。
+
+    回傳 (speakers, emissions)：speakers 為出現在任一單位候選中的 speaker（sorted，
+    同 `_viterbi_word_speakers` 的狀態集合），emissions[u, s] 為分數（不在候選 = 0.0）。
+
+    每個單位可能重疊的 turns 恰為 [lo, hi)：hi = bisect_left(starts, end)、
+    lo = 第一個 prefix_max_end > 有效起點的位置——與逐字版「往回掃到 prefix max-end
+    ≤ start 為止」是同一個集合。所有 (unit, turn) 配對一次攤開、逐元素計算
+    overlap / near-tie / affinity / proximity，運算順序與逐字版相同，浮點結果逐位一致。
+    零重疊單位以 `_nearest_turn_indices` 批次找最近 turn（同 `_nearest_turn_speaker`）。
+    """
+    n_units = len(units)
+    u_end = np.array([u["end"] for u in units], dtype=np.float64)
+    budgets = np.array(
+        [WORD_TAIL_ANCHOR_SEC * len(u["words"]) for u in units], dtype=np.float64
+    )
+    u_start = np.maximum(np.array([u["start"] for u in units], dtype=np.float64), u_end - budgets)
+
+    all_speakers = sorted({t["speaker"] for t in sorted_turns})
+    spk_col = {spk: i for i, spk in enumerate(all_speakers)}
+    t_start = np.array(starts, dtype=np.float64)
+    t_end = np.array([t["end"] for t in sorted_turns], dtype=np.float64)
+    t_spk = np.array([spk_col[t["speaker"]] for t in sorted_turns], dtype=np.intp)
+
+    # ── 候選配對：每個單位的 turn 區間 [lo, hi) 攤平成 (pair_u, pair_t) ──
+    hi = np.searchsorted(t_start, u_end, side="left")
+    lo = np.searchsorted(np.array(prefix_max_end, dtype=np.float64), u_start, side="right")
+    counts = np.maximum(hi - lo, 0)
+    pair_u = np.repeat(np.arange(n_units), counts)
+    run_offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_t = np.repeat(lo, counts) + run_offsets
+
+    ps, pe = u_start[pair_u], u_end[pair_u]
+    ts, te = t_start[pair_t], t_end[pair_t]
+    overlap = np.maximum(0.0, np.minimum(pe, te) - np.maximum(ps, ts))
+    hit = overlap > 0.0
+    pair_u, pair_t = pair_u[hit], pair_t[hit]
+    ps, pe, ts, te, overlap = ps[hit], pe[hit], ts[hit], te[hit], overlap[hit]
+    pair_spk = t_spk[pair_t]
+
+    span_len = np.maximum(u_end - u_start, 1e-6)
+    fraction = overlap / span_len[pair_u]
+
+    # ── 近平手：per-speaker 最佳 fraction 的前兩名（不同 speaker）差 < epsilon ──
+    n_spk = len(all_speakers)
+    best_frac = np.zeros((n_units, n_spk), dtype=np.float64)
+    np.maximum.at(best_frac, (pair_u, pair_spk), fraction)
+    if n_spk >= 2:
+        top = -np.sort(-best_frac, axis=1)[:, :2]
+        near_tie = ((best_frac > 0.0).sum(axis=1) >= 2) & (top[:, 0] - top[:, 1] < NEAR_TIE_EPSILON)
+    else:
+        near_tie = np.zeros(n_units, dtype=bool)
+
+    # ── tie-break：近平手用 turn-start affinity，其餘用 proximity ──
+    affinity = np.maximum(0.0, 1 - np.abs(ps - ts) / AFFINITY_SCALE_SEC)
+    turn_len = te - ts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proximity = np.where(
+            turn_len > 0,
+            np.maximum(0.0, 1 - np.abs((ps + pe) / 2.0 - (ts + te) / 2.0) / (turn_len / 2.0)),
+            0.0,
+        )
+    tiebreak = np.where(near_tie[pair_u], affinity, proximity)
+    score = fraction + TIEBREAK_WEIGHT * tiebreak
+
+    emissions = np.zeros((n_units, n_spk), dtype=np.float64)
+    np.maximum.at(emissions, (pair_u, pair_spk), score)
+
+    # 零重疊單位 → 最近 turn 的 speaker 得 NEAREST_FALLBACK_SCORE
+    has_overlap = np.zeros(n_units, dtype=bool)
+    has_overlap[pair_u] = True
+    gap_units = np.flatnonzero(~has_overlap)
+    if gap_units.size:
+        emissions[gap_units, t_spk[_nearest_turn_indices(u_start[gap_units], u_end[gap_units], t_start, t_end)]] = (
+            NEAREST_FALLBACK_SCORE
+        )
+
+    used = np.flatnonzero((emissions > 0.0).any(axis=0))
+    return [all_speakers[c] for c in used.tolist()], emissions[:, used]
+
+
+def _viterbi_matrix(items: List[Dict], speakers: List[str], emissions) -> List[Optional[str]]:
+    """`_viterbi_word_speakers` 的矩陣版：emission 為 (items × speakers) 矩陣。
+
+    transition 只有「同 speaker 0 / 換手固定成本」兩種，所以 cur 的最佳前驅只可能是
+    自己（stay）或「前一步最高分的 speaker」（若正是自己則取次高）——每步 O(speakers)
+    而非 O(speakers²)。平分規則與逐字版相同（sorted 順序下第一個達最大值者），
+    浮點運算也相同，輸出逐項一致。
+
+    DP 迴圈刻意跑在 `tolist()` 後的 Python list 上：speakers 實務上是個位數，
+    每步呼叫 NumPy 的固定開銷反而比整步計算還貴。
+    """
+    n = len(items)
+    if len(speakers) <= 1:
+        return [speakers[0] if speakers else None] * n
+
+    n_spk = len(speakers)
+    rows = emissions.tolist()
+    costs = (SWITCH_PENALTY * 1.0, SWITCH_PENALTY * SWITCH_GAP_RELIEF_FACTOR)
+    state_range = range(n_spk)
+
+    backptrs: List[List[int]] = []
+    prev_best = rows[0]
+    for i in range(1, n):
+        switch_cost = costs[items[i]["start"] - items[i - 1]["end"] >= SWITCH_GAP_RELIEF_SEC]
+        # 前一步最高分（第一個）與排除它之後的次高分（第一個）
+        top, top_val = 0, prev_best[0]
+        for s in state_range:
+            if prev_best[s] > top_val:
+                top, top_val = s, prev_best[s]
+        runner, runner_val = -1, float("-inf")
+        for s in state_range:
+            if s != top and prev_best[s] > runner_val:
+                runner, runner_val = s, prev_best[s]
+
+        emission = rows[i]
+        cur_best = [0.0] * n_spk
+        bp = [0] * n_spk
+        for s in state_range:
+            other, other_val = (top, top_val) if s != top else (runner, runner_val)
+            stay_val = prev_best[s]
+            switch_val = other_val - switch_cost
+            if stay_val > switch_val or (stay_val == switch_val and s < other):
+                bp[s] = s
+                cur_best[s] = stay_val + emission[s]
+            else:
+                bp[s] = other
+                cur_best[s] = switch_val + emission[s]
+        backptrs.append(bp)
+        prev_best = cur_best
+
+    # 回溯（末端取最高累計分，平分時取字典序最小者 = 第一個）
+    state = max(state_range, key=lambda s: (prev_best[s], -s))
+    path = [state]
+    for bp in reversed(backptrs):
+        state = bp[state]
+        path.append(state)
+    path.reverse()
+    return [speakers[k] for k in path]
+
+
 def _argmax_speaker(scores: Dict[str, float]) -> str:
     """分數最高的 speaker；精確平分時取字典序最小者（決定性，不依賴掃描/插入順序）。"""
     return min(scores, key=lambda spk: (-scores[spk], spk))
@@ -556,9 +741,12 @@ def assign_speakers_word_level(
     - diar_turns 空：原樣回傳（不加 speaker、不剝 words——words 的剝除統一由
       orchestrator `_run_transcription_phase` 出口單點處理，此處不重複）。
 
-    效能：turns 只排序 + 建 prefix max-end 索引一次（`_build_turn_index`），
-    每個單位重用同一份索引（bisect 找窗口）；全域 DP 狀態 = 全檔 speaker 聯集
-    （實務上個位數），O(units × speakers²)。
+    效能：turns 只排序 + 建 prefix max-end 索引一次（`_build_turn_index`）。
+    有 numpy 時 emission 一次算成 (units × speakers) 矩陣（`_unit_emission_matrix`）、
+    Viterbi 利用均一換手成本每步 O(speakers)（`_viterbi_matrix`）；沒有時走逐單位 bisect +
+    dict DP 的參考實作（`_word_speaker_candidates` / `_viterbi_word_speakers`）。
+    兩條路徑輸出逐項一致；全域 DP 狀態 = 全檔 speaker 聯集。複雜度：矩陣路徑 Viterbi
+    O(units × speakers)；參考實作逐步比較所有前驅，O(units × speakers²)。
     """
     if not diar_turns:
         return transcription_segments
@@ -578,14 +766,19 @@ def assign_speakers_word_level(
     # ── 2. 逐單位 emission + 跨段 Viterbi → 攤平回逐 word speaker ──
     # 錨定預算隨單位 token 數放大：多 token 英文字（黏合單位）的 span 由多個真實
     # token 組成，不該被裁到只剩尾端 0.6s（單 word 單位 = 1 × 0.6，行為不變）
-    candidates_list = [
-        _word_speaker_candidates(
-            u["start"], u["end"], sorted_turns, starts, prefix_max_end,
-            anchor_budget=WORD_TAIL_ANCHOR_SEC * len(u["words"]),
-        )
-        for u in units
-    ]
-    unit_speakers = _viterbi_word_speakers(units, candidates_list)
+    if np is not None and units:
+        # 向量化：(units × speakers) emission 矩陣 + 矩陣版 Viterbi，輸出與下方逐字版一致
+        speakers, emissions = _unit_emission_matrix(units, sorted_turns, starts, prefix_max_end)
+        unit_speakers = _viterbi_matrix(units, speakers, emissions)
+    else:
+        candidates_list = [
+            _word_speaker_candidates(
+                u["start"], u["end"], sorted_turns, starts, prefix_max_end,
+                anchor_budget=WORD_TAIL_ANCHOR_SEC * len(u["words"]),
+            )
+            for u in units
+        ]
+        unit_speakers = _viterbi_word_speakers(units, candidates_list)
     word_speaker: Dict[Tuple[int, int], str] = {}
     # 不用 zip(strict=)：本地 dev venv 仍是 3.9（strict= 需 3.10+）；enumerate 等價且通吃
     if len(unit_speakers) != len(units):
@@ -632,6 +825,146 @@ def assign_speakers_word_level(
     return out
 
 
+# ── CPU chunked 分段規劃 ─────────────────────────────────────
+# 切點會調整到目標位置 ±SPLIT_SEARCH_RANGE_MS 內最近的靜音中點，避免切在對話中間。
+SPLIT_SEARCH_RANGE_MS = 30000
+SPLIT_SILENCE_NOISE_DB = -30
+SPLIT_SILENCE_MIN_SEC = 0.5
+# 最後一段短於目標長度的此比例時併入前一段
+SPLIT_SHORT_TAIL_RATIO = 0.2
+
+_SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[\d.]+)')
+_SILENCE_END_RE = re.compile(r'silence_end:\s*(-?[\d.]+)')
+
+
+def _parse_silencedetect(stderr: str) -> List[Tuple[int, int]]:
+    """解析 ffmpeg silencedetect 的 stderr → [(start_ms, end_ms), ...]（時間序）。
+
+    silence_start / silence_end 成對出現；檔尾未收尾的 silence_start（無 end）丟棄。
+    起點可能是極小負值（檔頭即靜音的浮點誤差），夾到 0。
+    """
+    starts = _SILENCE_START_RE.findall(stderr)
+    ends = _SILENCE_END_RE.findall(stderr)
+    silences = []
+    for i in range(min(len(starts), len(ends))):
+        start_ms = max(0, int(float(starts[i]) * 1000))
+        end_ms = max(0, int(float(ends[i]) * 1000))
+        if end_ms > start_ms:
+            silences.append((start_ms, end_ms))
+    return silences
+
+
+def _nearest_silence_cut(
+    silences: List[Tuple[int, int]],
+    starts: List[int],
+    target_ms: int,
+    search_range_ms: int = SPLIT_SEARCH_RANGE_MS,
+) -> int:
+    """在 target ±search_range 視窗內挑最近的靜音中點；視窗內無靜音 → 回 target。
+
+    語意沿用舊版逐點 silencedetect：跨視窗邊界的靜音先裁到視窗內再取中點
+    （舊版 ffmpeg 只看得到視窗內那一截）。starts 是 silences 起點的排序陣列，
+    bisect 只掃與視窗重疊的區間。
+    """
+    window_start = max(0, target_ms - search_range_ms)
+    window_end = target_ms + search_range_ms
+    # 起點 ≥ window_end 的區間不可能重疊；往回掃到 end ≤ window_start 為止
+    # （區間互不重疊且時間序，end 也單調）
+    best = None
+    i = bisect.bisect_left(starts, window_end) - 1
+    while i >= 0:
+        s_start, s_end = silences[i]
+        if s_end <= window_start:
+            break
+        mid = (max(s_start, window_start) + min(s_end, window_end)) // 2
+        if best is None or abs(mid - target_ms) < abs(best - target_ms):
+            best = mid
+        i -= 1
+    return target_ms if best is None else best
+
+
+def _plan_cut_points(
+    silences: List[Tuple[int, int]],
+    total_duration_ms: int,
+    chunk_duration_ms: int,
+    search_range_ms: int = SPLIT_SEARCH_RANGE_MS,
+) -> List[int]:
+    """從單趟靜音地圖規劃所有切點（毫秒，不含 0 與 total_duration_ms）。
+
+    每個目標切點 = 上一切點 + chunk_duration_ms，調整到附近靜音中點；
+    最後一段 < SPLIT_SHORT_TAIL_RATIO × 目標長度時移除最後一個切點（併入前一段）。
+    純函數，不碰 ffmpeg。
+    """
+    starts = [s for s, _ in silences]
+    cut_points: List[int] = []
+    pos = chunk_duration_ms
+    while pos < total_duration_ms:
+        adjusted = _nearest_silence_cut(silences, starts, pos, search_range_ms)
+        if adjusted != pos:
+            log.debug(
+                "whisper.split.cutpoint_adjusted",
+                target_minutes=round(pos / 1000 / 60, 1),
+                adjusted_minutes=round(adjusted / 1000 / 60, 1),
+            )
+        # 防呆：靜音中點理論上必在 (上一切點, 檔尾) 之間；異常時保留原目標，避免空段/倒退
+        prev = cut_points[-1] if cut_points else 0
+        if not (prev < adjusted < total_duration_ms):
+            adjusted = pos
+        cut_points.append(adjusted)
+        pos = adjusted + chunk_duration_ms
+
+    if cut_points:
+        last_segment_ms = total_duration_ms - cut_points[-1]
+        if last_segment_ms < chunk_duration_ms * SPLIT_SHORT_TAIL_RATIO:
+            removed = cut_points.pop()
+            log.debug(
+                "whisper.split.short_tail_merged",
+                last_segment_minutes=round(last_segment_ms / 1000 / 60, 1),
+                removed_cutpoint_minutes=round(removed / 1000 / 60, 1),
+            )
+    return cut_points
+
+
+# 常駐 chunk worker 進程內的模型快取（ChunkWorkerPool 的 worker 端，module 全域 = 每進程一份）。
+# key = (模型名稱/路徑, device, compute_type, cpu_threads, num_workers)：語言路由
+# （LANGUAGE_MODEL_OVERRIDES）在主進程已解析成模型路徑，不同語言解析到同一模型即共用。
+# LRU 上限 CHUNK_POOL_MAX_MODELS 控制每進程常駐記憶體，超過即淘汰最久未用者。
+_worker_models: "OrderedDict[Tuple[str, str, str, int, int], Any]" = OrderedDict()
+
+
+def _get_worker_model(
+    model_name: str,
+    device: str,
+    compute_type: str,
+    cpu_threads: int,
+    num_workers: int,
+):
+    """取得 worker 進程內常駐的 WhisperModel；未命中才載入（LRU 淘汰舊模型）。"""
+    key = (model_name, device, compute_type, cpu_threads, num_workers)
+    model = _worker_models.get(key)
+    if model is not None:
+        _worker_models.move_to_end(key)
+        log.debug("whisper.worker.model.reused", model_name=model_name)
+        return model
+
+    while _worker_models and len(_worker_models) >= max(1, CHUNK_POOL_MAX_MODELS):
+        evicted_key, _evicted = _worker_models.popitem(last=False)
+        del _evicted
+        log.info("whisper.worker.model.evicted", model_name=evicted_key[0])
+        gc.collect()
+
+    log.debug("whisper.worker.model.loading", model_name=model_name, compute_type=compute_type)
+    model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+    _worker_models[key] = model
+    return model
+
+
 def transcribe_chunk_worker(
     chunk_path: str,
     model_name: str,
@@ -644,6 +977,9 @@ def transcribe_chunk_worker(
     """
     獨立進程中執行的 chunk 轉錄函數（必須是頂層函數以支持 pickle）
 
+    跑在常駐的 ChunkWorkerPool 進程內：模型經 `_get_worker_model` 取得，
+    同進程後續 chunk / 後續任務直接重用，不再每個 chunk 重新載入。
+
     Args:
         chunk_path: chunk 文件路徑（字符串，可序列化）
         model_name: Whisper 模型名稱
@@ -656,31 +992,62 @@ def transcribe_chunk_worker(
     Returns:
         (chunk_idx, text, segments, detected_language)
     """
-    from faster_whisper import WhisperModel
-    from pathlib import Path
-    import re
-
     log.debug("whisper.worker.started", chunk_path=chunk_path)
 
     # 從文件名提取 chunk_idx（例如：_temp_input_chunk_3.wav → 3）
     chunk_idx = int(re.search(r'chunk_(\d+)', chunk_path).group(1))
 
-    log.debug("whisper.worker.model.loading", chunk_idx=chunk_idx, model_name=model_name)
-
-    # 在進程內獨立創建 Whisper 模型實例
-    model = WhisperModel(
-        model_name,
-        device=device,
-        compute_type=compute_type,
-        cpu_threads=cpu_threads,
-        num_workers=num_workers
-    )
+    model = _get_worker_model(model_name, device, compute_type, cpu_threads, num_workers)
 
     log.debug("whisper.worker.transcribe.started", chunk_idx=chunk_idx)
+    full_text, segments, detected_language = _transcribe_chunk_audio(model, chunk_path, language)
+    log.debug("whisper.worker.transcribe.completed", chunk_idx=chunk_idx, text_length=len(full_text))
 
+    # 清理臨時文件
+    try:
+        Path(chunk_path).unlink()
+        log.debug("whisper.worker.tempfile.deleted", chunk_idx=chunk_idx)
+    except Exception as e:
+        log.warning("whisper.worker.tempfile.cleanup_failed", chunk_idx=chunk_idx, error=str(e))
+
+    return chunk_idx, full_text, segments, detected_language
+
+
+def transcribe_pcm_chunk_worker(
+    pcm_path: str,
+    start_sample: int,
+    end_sample: int,
+    chunk_idx: int,
+    model_name: str,
+    device: str,
+    compute_type: str,
+    cpu_threads: int,
+    num_workers: int,
+    language: Optional[str] = None
+) -> Tuple[int, str, List[Dict], str]:
+    """`transcribe_chunk_worker` 的共享 PCM 版（頂層函數以支持 pickle）
+
+    Orchestrator 已把音訊解碼成 PcmBuffer：worker 以 memmap 映射同一份 raw f32 檔
+    （OS page cache 共享），只取 [start_sample, end_sample) 區間——不寫 chunk 檔、
+    不再 ffmpeg 解碼。
+
+    Returns:
+        (chunk_idx, text, segments, detected_language)
+    """
+    model = _get_worker_model(model_name, device, compute_type, cpu_threads, num_workers)
+    audio = load_pcm_slice(pcm_path, start_sample, end_sample)
+
+    log.debug("whisper.worker.transcribe.started", chunk_idx=chunk_idx, pcm=True)
+    full_text, segments, detected_language = _transcribe_chunk_audio(model, audio, language)
+    log.debug("whisper.worker.transcribe.completed", chunk_idx=chunk_idx, text_length=len(full_text))
+    return chunk_idx, full_text, segments, detected_language
+
+
+def _transcribe_chunk_audio(model, audio, language: Optional[str]) -> Tuple[str, List[Dict], str]:
+    """worker 內單一 chunk 的轉錄 + 幻覺清理；audio 可為檔案路徑或 16kHz float32 陣列。"""
     normalized_lang = _normalize_language(language)
     segments_list, info = model.transcribe(
-        chunk_path,
+        audio,
         language=normalized_lang,
         beam_size=5,
         vad_filter=True,
@@ -707,18 +1074,7 @@ def transcribe_chunk_worker(
     segments = _filter_hallucination_segments(segments)
     segments = _resegment_by_words(segments)
     full_text = " ".join(seg["text"] for seg in segments)
-    detected_language = info.language
-
-    log.debug("whisper.worker.transcribe.completed", chunk_idx=chunk_idx, text_length=len(full_text))
-
-    # 清理臨時文件
-    try:
-        Path(chunk_path).unlink()
-        log.debug("whisper.worker.tempfile.deleted", chunk_idx=chunk_idx)
-    except Exception as e:
-        log.warning("whisper.worker.tempfile.cleanup_failed", chunk_idx=chunk_idx, error=str(e))
-
-    return chunk_idx, full_text, segments, detected_language
+    return full_text, segments, info.language
 
 
 class WhisperProcessor:
@@ -745,6 +1101,8 @@ class WhisperProcessor:
         audio_path: Path,
         language: Optional[str] = None,
         progress_callback: Optional[callable] = None,
+        media_probe: Optional[MediaProbe] = None,
+        pcm: Optional[PcmBuffer] = None,
     ) -> Tuple[str, List[Dict], str]:
         """轉錄音檔（單次轉錄，不分段）
 
@@ -752,13 +1110,16 @@ class WhisperProcessor:
             audio_path: 音檔路徑
             language: 語言代碼（None 表示自動偵測）
             progress_callback: segment 完成時呼叫 callback(elapsed_seconds, total_seconds)
+            media_probe: 呼叫端已有的 MediaProbe（None → 經快取探測）
+            pcm: 已解碼的共享 PCM（有就直接餵模型，不再解碼 audio_path）
 
         Returns:
             (完整文字, segments 列表, 偵測到的語言)
         """
-        audio_path = self._ensure_valid_audio(audio_path)
+        if pcm is None:
+            audio_path = self._ensure_valid_audio(audio_path, media_probe)
         segments_list, detected_language = self._transcribe_with_timestamps(
-            audio_path, language, progress_callback=progress_callback,
+            audio_path, language, progress_callback=progress_callback, pcm=pcm,
         )
 
         # 合併所有 segment 的文字
@@ -790,6 +1151,8 @@ class WhisperProcessor:
         chunk_duration_ms: int = 1500000,  # 25 分鐘
         language: Optional[str] = None,
         progress_callback: Optional[callable] = None,
+        media_probe: Optional[MediaProbe] = None,
+        pcm: Optional[PcmBuffer] = None,
     ) -> Tuple[str, List[Dict], str]:
         """長音檔轉錄。GPU 走整檔 batched、CPU 走多進程平行，由 device 自動決定。
 
@@ -798,12 +1161,15 @@ class WhisperProcessor:
         CPU：單張 GPU 不存在時，多進程平行(各進程獨立模型)才有意義；GPU 上
         多進程只會搶 VRAM 不會更快。對外是單一方法，呼叫端(Orchestrator)
         不需知道跑在什麼裝置上。chunk_duration_ms 僅 CPU 平行路徑使用。
+        media_probe 為 Orchestrator 帶來的探測結果，codec 驗證 / 取時長不再 ffprobe；
+        pcm 為 diarization 任務共用的已解碼 PCM，兩條路徑都直接吃它、不再解碼。
         """
         if self._has_gpu():
             # batched 內建 VAD 切分，整檔單次轉錄即可，毋須手動 25 分鐘分段
-            audio_path = self._ensure_valid_audio(audio_path)
+            if pcm is None:
+                audio_path = self._ensure_valid_audio(audio_path, media_probe)
             segments_list, detected_language = self._transcribe_with_timestamps(
-                audio_path, language, progress_callback=progress_callback,
+                audio_path, language, progress_callback=progress_callback, pcm=pcm,
             )
             full_text = " ".join(seg["text"] for seg in segments_list)
             return full_text, segments_list, detected_language
@@ -817,6 +1183,8 @@ class WhisperProcessor:
             chunk_duration_ms=chunk_duration_ms,
             language=language,
             progress_callback=cb,
+            media_probe=media_probe,
+            pcm=pcm,
         )
 
     def transcribe_in_chunks_parallel(
@@ -824,75 +1192,98 @@ class WhisperProcessor:
         audio_path: Path,
         chunk_duration_ms: int = 1500000,  # 25 分鐘
         language: Optional[str] = None,
-        max_workers: int = 3,  # 優化：默認 3 個並行進程
         progress_callback: Optional[callable] = None,
-        cancel_check: Optional[callable] = None
+        cancel_check: Optional[callable] = None,
+        media_probe: Optional[MediaProbe] = None,
+        pcm: Optional[PcmBuffer] = None,
     ) -> Tuple[str, List[Dict], str]:
-        """將音檔分段後並行轉錄（使用 ProcessPoolExecutor，真正的多進程並行）
+        """將音檔分段後並行轉錄（送進常駐 ChunkWorkerPool，真正的多進程並行）
+
+        池與 worker 內的模型跨任務重用（見 chunk_worker_pool）；並行度 / 執行緒數 /
+        compute_type 由 WHISPER_CHUNK_* env 決定。
 
         Args:
             audio_path: 音檔路徑
             chunk_duration_ms: 每段長度（毫秒）
             language: 語言代碼（None 表示自動偵測）
-            max_workers: 並行工作進程數（默認 3）
             progress_callback: 進度回調函數 callback(completed_count, total_chunks)
             cancel_check: 取消檢查函數，返回 True 表示任務被取消
+            media_probe: 呼叫端已有的 MediaProbe（None → 經快取探測）
+            pcm: 已解碼的共享 PCM；有則 worker 直接 memmap 取樣本區間，不切 chunk 檔
 
         Returns:
             (完整文字, segments 列表, 偵測到的語言)
         """
         log.debug("transcribe.parallel.started")
 
-        audio_path = self._ensure_valid_audio(audio_path)
-
         # 1. 獲取音檔長度並分割
-        total_duration_ms = self._get_audio_duration(audio_path)
+        if pcm is not None:
+            total_duration_ms = pcm.duration_ms
+        else:
+            audio_path = self._ensure_valid_audio(audio_path, media_probe)
+            total_duration_ms = self._get_audio_duration(audio_path, media_probe)
         total_minutes = total_duration_ms / 1000 / 60
         log.debug("transcribe.audio.duration", total_minutes=round(total_minutes, 1))
 
         if total_duration_ms <= chunk_duration_ms:
             log.debug("transcribe.direct.started", chunk_threshold_minutes=chunk_duration_ms / 1000 / 60)
             # audio_path 已 normalize，跳過重複 probe
-            segments_list, detected_language = self._transcribe_with_timestamps(audio_path, language)
+            segments_list, detected_language = self._transcribe_with_timestamps(
+                audio_path, language, pcm=pcm,
+            )
             full_text = " ".join(seg["text"] for seg in segments_list)
             return full_text, segments_list, detected_language
 
-        # 智慧分段（回傳 [(chunk_path, start_seconds), ...]）
-        chunk_entries = self._split_audio_into_chunks(audio_path, total_duration_ms, chunk_duration_ms)
-        num_chunks = len(chunk_entries)
+        # 智慧分段：每個 chunk 一組 (worker 函數, 參數)，附該段在原音檔中的起始秒數
+        if pcm is not None:
+            chunk_entries = []
+            chunk_jobs = self._plan_pcm_chunks(
+                pcm, Path(audio_path).parent, chunk_duration_ms, language,
+            )
+        else:
+            # [(chunk_path, start_seconds), ...]
+            chunk_entries = self._split_audio_into_chunks(
+                audio_path, total_duration_ms, chunk_duration_ms
+            )
+            chunk_jobs = [
+                (
+                    transcribe_chunk_worker,
+                    (
+                        str(chunk_path),  # 轉為字符串以支持序列化
+                        self.model_name,
+                        "auto",
+                        CHUNK_POOL_COMPUTE_TYPE,
+                        CHUNK_POOL_CPU_THREADS,
+                        1,  # num_workers：避免進程內過度並行（外部已有多進程）
+                        language,
+                    ),
+                    start_seconds,
+                )
+                for chunk_path, start_seconds in chunk_entries
+            ]
+        num_chunks = len(chunk_jobs)
 
         # 建立 chunk_idx → start_seconds 的映射
         chunk_offsets = {}
-        for chunk_idx, (_chunk_path, start_seconds) in enumerate(chunk_entries, start=1):
+        for chunk_idx, (_fn, _args, start_seconds) in enumerate(chunk_jobs, start=1):
             chunk_offsets[chunk_idx] = start_seconds
 
-        # 2. 使用 ProcessPoolExecutor 並行轉錄
+        # 2. 送進常駐池並行轉錄（池是共用的：取消/失敗只收掉本次的 futures，不關池）
+        pool = get_chunk_worker_pool()
+        max_workers = pool.max_workers
         results = {}
         completed_count = 0
-        executor = None
+        future_to_idx = {}
 
-        log.debug("transcribe.parallel.pool.created", max_workers=max_workers)
+        def _cancel_own_futures() -> None:
+            for f in future_to_idx.keys():
+                f.cancel()
 
         try:
-            executor = ProcessPoolExecutor(max_workers=max_workers)
+            log.debug("transcribe.parallel.tasks.submitting", num_chunks=num_chunks, max_workers=max_workers)
 
-            # 提交所有任務
-            log.debug("transcribe.parallel.tasks.submitting", num_chunks=num_chunks)
-
-            # 準備參數（從當前模型實例獲取配置）
-            future_to_idx = {}
-            for chunk_path, _ in chunk_entries:
-                future = executor.submit(
-                    transcribe_chunk_worker,
-                    str(chunk_path),  # 轉為字符串以支持序列化
-                    self.model_name,
-                    "auto",
-                    "int8",
-                    2,  # 優化後的 cpu_threads
-                    1,  # 優化後的 num_workers（避免進程內過度並行）
-                    language
-                )
-                chunk_idx = int(re.search(r'chunk_(\d+)', str(chunk_path)).group(1))
+            for chunk_idx, (fn, args, _) in enumerate(chunk_jobs, start=1):
+                future = pool.submit(fn, *args)
                 future_to_idx[future] = chunk_idx
 
             log.debug("transcribe.parallel.tasks.submitted", num_chunks=num_chunks)
@@ -908,12 +1299,7 @@ class WhisperProcessor:
                 # 檢查取消
                 if cancel_check and cancel_check():
                     log.warning("transcribe.parallel.cancelled")
-                    # 取消所有未完成的 future
-                    for f in future_to_idx.keys():
-                        f.cancel()
-                    # 強制關閉 executor（不等待）
-                    log.debug("transcribe.parallel.pool.force_shutdown")
-                    executor.shutdown(wait=False, cancel_futures=True)
+                    _cancel_own_futures()
                     raise Exception("任務被取消")
 
                 try:
@@ -941,12 +1327,12 @@ class WhisperProcessor:
                 except Exception as e:
                     chunk_idx = future_to_idx[future]
                     log.error("whisper.chunk.transcribe_failed", chunk_idx=chunk_idx, error=str(e))
-                    # 立即失敗：取消所有剩餘任務
-                    for f in future_to_idx.keys():
-                        f.cancel()
-                    # 強制關閉 executor
-                    log.debug("transcribe.parallel.pool.force_shutdown")
-                    executor.shutdown(wait=False, cancel_futures=True)
+                    # 立即失敗：取消本次剩餘的 chunk
+                    _cancel_own_futures()
+                    if isinstance(e, BrokenProcessPool):
+                        # worker 進程崩潰（OOM 等）→ 丟棄送出這個 chunk 的池，下個任務重建；
+                        # 別的呼叫端已換上新池時不動它
+                        pool.discard_for(future)
                     raise Exception(f"並行轉錄失敗：{e}")
 
         except Exception:
@@ -958,17 +1344,6 @@ class WhisperProcessor:
                     pass
             raise
 
-        finally:
-            # 確保 executor 被正確清理
-            if executor is not None:
-                log.debug("transcribe.parallel.pool.cleanup")
-                try:
-                    # 優雅關閉，最多等待 10 秒
-                    executor.shutdown(wait=True, cancel_futures=False)
-                    log.debug("transcribe.parallel.pool.closed")
-                except Exception as cleanup_error:
-                    log.warning("transcribe.parallel.pool.cleanup_failed", error=str(cleanup_error))
-
         # 3. 檢查並合併結果
         if len(results) != num_chunks:
             missing = set(range(1, num_chunks + 1)) - set(results.keys())
@@ -1000,30 +1375,29 @@ class WhisperProcessor:
 
     # ========== 私有輔助方法 ==========
 
-    def _ensure_valid_audio(self, audio_path: Path) -> Path:
+    @staticmethod
+    def _probe_for(audio_path: Path, media_probe: Optional[MediaProbe]) -> Optional[MediaProbe]:
+        """media_probe 屬於 audio_path 就直接用；否則（None / 已轉成別的檔）經快取探測。"""
+        if media_probe is not None and media_probe.path == str(audio_path):
+            return media_probe
+        return probe_media(audio_path)
+
+    def _ensure_valid_audio(
+        self, audio_path: Path, media_probe: Optional[MediaProbe] = None
+    ) -> Path:
         """偵測真實音訊格式，若副檔名與實際格式不符則轉碼後回傳新路徑。
 
         某些使用者把 M4A/AAC/MP4 改名為 .mp3 上傳，直接餵給 ffmpeg 會報
         "Failed to find two consecutive MPEG audio frames"。
-        此函數用 ffprobe 偵測真實 codec，若與副檔名不符就轉成
+        此函數用 MediaProbe 的真實 codec 判斷，若與副檔名不符就轉成
         副檔名對應的格式（例如 .mp3 → re-encode 成真正的 MP3）。
         """
         try:
-            result = subprocess.run(
-                ['ffprobe', '-v', 'quiet', '-print_format', 'json',
-                 '-show_streams', str(audio_path)],
-                capture_output=True, text=True, timeout=15
-            )
-            if result.returncode != 0:
+            probe = self._probe_for(audio_path, media_probe)
+            if probe is None or not probe.codec:
                 return audio_path
 
-            probe = json.loads(result.stdout)
-            streams = probe.get('streams', [])
-            audio_streams = [s for s in streams if s.get('codec_type') == 'audio']
-            if not audio_streams:
-                return audio_path
-
-            actual_codec = audio_streams[0].get('codec_name', '').lower()
+            actual_codec = probe.codec
             suffix = audio_path.suffix.lower()
 
             # 副檔名 → 期望的 codec
@@ -1063,6 +1437,7 @@ class WhisperProcessor:
         audio_path: Path,
         language: Optional[str] = None,
         progress_callback: Optional[callable] = None,
+        pcm: Optional[PcmBuffer] = None,
     ) -> Tuple[List[Dict], str]:
         """轉錄音檔並返回帶時間戳的 segments
 
@@ -1072,6 +1447,7 @@ class WhisperProcessor:
             progress_callback: 每個 segment 完成時呼叫 callback(elapsed_seconds, total_seconds)。
                 注意：faster-whisper 的 segments 是 lazy generator，迭代時才實際運算 —
                 所以 callback 自然會隨著轉錄進度發生。
+            pcm: 已解碼的共享 PCM；有則直接餵 16kHz float32 陣列，faster-whisper 不再解碼
 
         Returns:
             (segments 列表, 偵測到的語言)
@@ -1079,6 +1455,7 @@ class WhisperProcessor:
         log.debug("whisper.transcribe.started", audio_path=str(audio_path), language=language)
 
         segments_list = []
+        audio_input = pcm.samples if pcm is not None else str(audio_path)
         normalized_lang = _normalize_language(language)
         transcribe_kwargs = dict(
             language=normalized_lang,
@@ -1096,10 +1473,10 @@ class WhisperProcessor:
             # fallback → 困難音段(低音量/雜訊)可能整段掉。WHISPER_BATCHED=false 改走下面
             # sequential（model.transcribe 連續解 + 溫度 fallback，覆蓋率高但較慢）。
             segments, info = self._get_batched_model().transcribe(
-                str(audio_path), batch_size=self._batch_size, **transcribe_kwargs
+                audio_input, batch_size=self._batch_size, **transcribe_kwargs
             )
         else:
-            segments, info = self.model.transcribe(str(audio_path), **transcribe_kwargs)
+            segments, info = self.model.transcribe(audio_input, **transcribe_kwargs)
         log.debug("whisper.transcribe.model_returned")
 
         # 獲取 Whisper 偵測到的語言與總時長
@@ -1127,99 +1504,95 @@ class WhisperProcessor:
         segments_list = _resegment_by_words(segments_list)
         return segments_list, detected_language
 
-    def _get_audio_duration(self, audio_path: Path) -> int:
+    def _get_audio_duration(
+        self, audio_path: Path, media_probe: Optional[MediaProbe] = None
+    ) -> int:
         """獲取音檔總長度（毫秒）
 
-        優先使用 ffprobe（快速，不載入記憶體），失敗時回退到 pydub
+        取自 MediaProbe（Orchestrator 帶來的或經快取探測），不載入到記憶體。
+        探測失敗回 0——呼叫端會走整檔直接轉錄；不再以 pydub 整檔解碼取時長。
 
         Args:
             audio_path: 音檔路徑
+            media_probe: 呼叫端已有的 MediaProbe
 
         Returns:
             音檔長度（毫秒）
         """
-        # 使用 ffprobe 獲取音檔資訊，不載入到記憶體
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', str(audio_path)
-            ], capture_output=True, text=True, timeout=10)
-
-            if result.returncode == 0:
-                probe_data = json.loads(result.stdout)
-                total_duration_seconds = float(probe_data['format']['duration'])
-                return int(total_duration_seconds * 1000)
-
-        except Exception as e:
-            log.warning("whisper.duration.ffprobe_failed", error=str(e))
-
-        # 回退到 pydub
-        audio = AudioSegment.from_file(audio_path)
-        duration_ms = len(audio)
-        del audio  # 立即釋放記憶體
-        return duration_ms
+        probe = self._probe_for(audio_path, media_probe)
+        if probe is None or probe.duration_ms <= 0:
+            log.warning("whisper.duration.probe_failed")
+            return 0
+        return probe.duration_ms
 
-    def _find_silence_near(
+    def _detect_silences(
         self,
         audio_path: Path,
-        target_ms: int,
-        search_range_ms: int = 30000,
-        noise_db: int = -30,
-        min_silence_duration: float = 0.5
-    ) -> int:
-        """在目標切點附近尋找最近的靜音段
-
-        Args:
-            audio_path: 音檔路徑
-            target_ms: 目標切點（毫秒）
-            search_range_ms: 搜尋範圍 ±（毫秒），預設 ±30 秒
-            noise_db: 靜音偵測門檻（dB）
-            min_silence_duration: 最短靜音長度（秒）
-
-        Returns:
-            調整後的切點（毫秒），找不到靜音則回傳原始 target_ms
+        total_duration_ms: int,
+        noise_db: int = SPLIT_SILENCE_NOISE_DB,
+        min_silence_duration: float = SPLIT_SILENCE_MIN_SEC,
+    ) -> List[Tuple[int, int]]:
+        """對整個檔案跑「一次」ffmpeg silencedetect，回傳靜音區間 [(start_ms, end_ms), ...]。
+
+        舊版每個候選切點各跑一次 silencedetect（`-ss` 放在 `-i` 後 = 每次都從檔頭解碼），
+        總解碼量隨檔長平方成長；改為單趟掃描、靜音地圖留在記憶體，由
+        `_plan_cut_points` 從地圖挑所有切點。失敗 → 空地圖（切點退回原目標位置）。
         """
-        search_start_s = max(0, (target_ms - search_range_ms)) / 1000.0
-        search_duration_s = (search_range_ms * 2) / 1000.0
-
+        # 單趟解碼速度約數十～上百倍即時，timeout 依時長放寬（至少 60 秒）
+        timeout_s = max(60, int(total_duration_ms / 1000 / 10))
         try:
             result = subprocess.run([
-                'ffmpeg', '-i', str(audio_path),
-                '-ss', str(search_start_s),
-                '-t', str(search_duration_s),
+                'ffmpeg', '-nostats', '-i', str(audio_path),
+                '-vn',
                 '-af', f'silencedetect=noise={noise_db}dB:d={min_silence_duration}',
                 '-f', 'null', '-'
-            ], capture_output=True, text=True, timeout=30)
-
-            stderr = result.stderr
-
-            # 解析 silence_start / silence_end
-            silences = []
-            silence_starts = re.findall(r'silence_start:\s*([\d.]+)', stderr)
-            silence_ends = re.findall(r'silence_end:\s*([\d.]+)', stderr)
+            ], capture_output=True, text=True, timeout=timeout_s)
+            silences = _parse_silencedetect(result.stderr)
+            log.debug("whisper.split.silence_map", silence_count=len(silences))
+            return silences
+        except Exception as e:
+            log.warning("whisper.split.silence_detect_failed", error=str(e))
+            return []
 
-            for i in range(min(len(silence_starts), len(silence_ends))):
-                # ffmpeg 輸出的時間是相對於 search_start_s 的
-                abs_start_ms = int((float(silence_starts[i]) + search_start_s) * 1000)
-                abs_end_ms = int((float(silence_ends[i]) + search_start_s) * 1000)
-                mid_ms = (abs_start_ms + abs_end_ms) // 2
-                silences.append(mid_ms)
+    def _plan_pcm_chunks(
+        self,
+        pcm: PcmBuffer,
+        spill_dir: Path,
+        chunk_duration_ms: int,
+        language: Optional[str],
+    ) -> List[Tuple[Any, tuple, float]]:
+        """共享 PCM 版分段：靜音地圖直接在 PCM 上算，chunk 只是樣本區間。
 
-            if not silences:
-                return target_ms
+        與 `_split_audio_into_chunks` 同一套切點規劃（`_plan_cut_points`），但不跑
+        silencedetect、不擷取 chunk 檔；worker 以 memmap 讀同一份 raw f32 檔。
 
-            # 選離目標切點最近的靜音中點
-            best = min(silences, key=lambda s: abs(s - target_ms))
-            log.debug(
-                "whisper.split.cutpoint_adjusted",
-                target_minutes=round(target_ms / 1000 / 60, 1),
-                adjusted_minutes=round(best / 1000 / 60, 1),
+        Returns:
+            [(transcribe_pcm_chunk_worker, 參數 tuple, 該段起始秒數), ...]
+        """
+        total_duration_ms = pcm.duration_ms
+        silences = pcm.detect_silences(SPLIT_SILENCE_NOISE_DB, SPLIT_SILENCE_MIN_SEC)
+        cut_points = _plan_cut_points(silences, total_duration_ms, chunk_duration_ms)
+        boundaries = [0] + cut_points + [total_duration_ms]
+        pcm_path = str(pcm.shared_path(spill_dir))
+        log.debug("whisper.split.planned", num_chunks=len(boundaries) - 1, pcm=True)
+
+        jobs = []
+        for chunk_idx in range(len(boundaries) - 1):
+            start_ms, end_ms = boundaries[chunk_idx], boundaries[chunk_idx + 1]
+            args = (
+                pcm_path,
+                pcm.sample_index(start_ms),
+                pcm.sample_index(end_ms),
+                chunk_idx + 1,
+                self.model_name,
+                "auto",
+                CHUNK_POOL_COMPUTE_TYPE,
+                CHUNK_POOL_CPU_THREADS,
+                1,  # num_workers：避免進程內過度並行（外部已有多進程）
+                language,
             )
-            return best
-
-        except Exception as e:
-            log.warning("whisper.split.silence_detect_failed", error=str(e))
-            return target_ms
+            jobs.append((transcribe_pcm_chunk_worker, args, start_ms / 1000.0))
+        return jobs
 
     def _split_audio_into_chunks(
         self,
@@ -1229,9 +1602,12 @@ class WhisperProcessor:
     ) -> List[Tuple[Path, float]]:
         """將音檔切分為多個 MP3 小段（智慧切割）
 
-        使用 ffmpeg 流式處理，避免記憶體問題。
-        切點會自動調整到附近的靜音段，避免切在對話中間。
-        最後一段太短（< 20% 目標長度）時會併入前一段。
+        1. 單趟 silencedetect 建靜音地圖（`_detect_silences`）
+        2. 純函數 `_plan_cut_points` 從地圖挑切點（附近靜音中點、短尾合併）
+        3. 逐段以 input-side seeking（`-ss` 放在 `-i` 前）擷取——只解碼該段本身，
+           總解碼量與檔長成線性。來源 codec 允許時（MP3 → MP3）直接 stream copy
+           不重編；stream copy 的起點落在 MP3 frame 邊界，與切點差距 < 1 frame
+           （16kHz 約 72ms），切點本身在靜音中，不影響內容。copy 失敗才重編。
 
         Args:
             audio_path: 原始音檔路徑（MP3）
@@ -1244,24 +1620,9 @@ class WhisperProcessor:
         if isinstance(audio_path, str):
             audio_path = Path(audio_path)
 
-        # 1. 計算切點並用靜音偵測調整
-        cut_points = []  # 不含 0 和 total_duration_ms
-        pos = chunk_duration_ms
-        while pos < total_duration_ms:
-            adjusted = self._find_silence_near(audio_path, pos)
-            cut_points.append(adjusted)
-            pos = adjusted + chunk_duration_ms
-
-        # 2. 短尾合併：最後一段 < 20% 目標長度時，移除最後一個切點
-        if cut_points:
-            last_segment_ms = total_duration_ms - cut_points[-1]
-            if last_segment_ms < chunk_duration_ms * 0.2:
-                removed = cut_points.pop()
-                log.debug(
-                    "whisper.split.short_tail_merged",
-                    last_segment_minutes=round(last_segment_ms / 1000 / 60, 1),
-                    removed_cutpoint_minutes=round(removed / 1000 / 60, 1),
-                )
+        # 1-2. 單趟靜音地圖 → 規劃切點（不含 0 和 total_duration_ms）
+        silences = self._detect_silences(audio_path, total_duration_ms)
+        cut_points = _plan_cut_points(silences, total_duration_ms, chunk_duration_ms)
 
         # 3. 建立分段區間
         boundaries = [0] + cut_points + [total_duration_ms]
@@ -1286,16 +1647,7 @@ class WhisperProcessor:
             duration_seconds = (end_ms - start_ms) / 1000.0
 
             try:
-                subprocess.run([
-                    'ffmpeg', '-y', '-i', str(audio_path),
-                    '-ss', str(start_seconds),
-                    '-t', str(duration_seconds),
-                    '-acodec', 'libmp3lame',
-                    '-b:a', '128k',
-                    '-ar', '16000',
-                    '-ac', '1',
-                    str(temp_path)
-                ], check=True, capture_output=True, timeout=120)
+                self._extract_chunk(audio_path, temp_path, start_seconds, duration_seconds)
 
             except subprocess.TimeoutExpired:
                 log.warning("whisper.split.chunk.ffmpeg_timeout", chunk_idx=chunk_idx + 1)
@@ -1315,6 +1667,37 @@ class WhisperProcessor:
 
         return chunk_files
 
+    def _extract_chunk(
+        self,
+        audio_path: Path,
+        dest_path: Path,
+        start_seconds: float,
+        duration_seconds: float,
+    ) -> None:
+        """以 input-side seeking 擷取單段：先試 stream copy，codec 不允許才重編 MP3。
+
+        非 MP3 來源 copy 進 .mp3 容器時 mp3 muxer 會直接報錯（不會產出壞檔），
+        所以「copy 失敗 → 重編」本身就是 codec 判定，不需再 probe 一次。
+        """
+        seek_args = ['-ss', str(start_seconds), '-i', str(audio_path), '-t', str(duration_seconds)]
+        copy_result = subprocess.run(
+            ['ffmpeg', '-y', *seek_args, '-vn', '-c:a', 'copy', str(dest_path)],
+            capture_output=True, timeout=120,
+        )
+        if copy_result.returncode == 0 and dest_path.exists() and dest_path.stat().st_size > 0:
+            return
+
+        log.debug("whisper.split.chunk.stream_copy_unavailable", chunk_path=dest_path.name)
+        subprocess.run([
+            'ffmpeg', '-y', *seek_args,
+            '-vn',
+            '-acodec', 'libmp3lame',
+            '-b:a', '128k',
+            '-ar', '16000',
+            '-ac', '1',
+            str(dest_path)
+        ], check=True, capture_output=True, timeout=120)
+
     def _merge_transcription_with_diarization(
         self,
         transcription_segments: List[Dict],
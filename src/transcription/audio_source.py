@@ -5,10 +5,12 @@
 
 - LocalFileSource: Web Server 同進程模式,router 已把音檔放在 disk 上。
 - S3Source: AWS Worker,從 handoff/{task_id}.{ext} 下載;成功時刪除 handoff 物件。
+- PrefetchedSource: AWS Worker 預取模式,音檔已在前一顆任務推論期間下載並轉好 MP3。
 
 只負責 acquire() + cleanup()——格式轉換歸 audio_converter、永久儲存歸
 storage.compact,都不在此。
 """
+import shutil
 from pathlib import Path
 from typing import Optional, Protocol
 
@@ -34,6 +36,9 @@ class AudioSource(Protocol):
         """
         ...
 
+    # 選配:`prepared` 屬性為 (mp3_path, mp3_probe) 時,代表 acquire 回傳的已是
+    # Compact audio,Orchestrator 跳過 PREPARATION 的轉檔。
+
 
 class LocalFileSource:
     """Web Server 同進程模式:router 已把音檔放在 temp_dir,直接回傳路徑。"""
@@ -47,7 +52,6 @@ class LocalFileSource:
     def cleanup(self, succeeded: bool) -> None:
         # router 為每個 task 建獨立 temp_dir 放輸入音檔(path 的父目錄);
         # 轉錄結束後整個清掉。Compact audio 此時已被 save_audio 搬到永久區。
-        import shutil
         shutil.rmtree(self._path.parent, ignore_errors=True)
 
 
@@ -82,3 +86,25 @@ class S3Source:
                 delete_handoff(self._task_id, self._handoff_ext)
             except Exception as e:
                 log.warning("handoff.delete_failed", task_id=self._task_id, error=str(e))
+
+
+class PrefetchedSource:
+    """AWS Worker 預取模式:音檔已由 worker_core.prefetch 下載並轉成 Compact audio。
+
+    acquire 直接回傳預取目錄裡的 MP3(不搬進 run temp_dir);handoff 物件的去留
+    仍交給內層 S3Source,預取目錄在 cleanup 時整個刪掉。
+    """
+
+    def __init__(self, inner: S3Source, mp3_path: Path, mp3_probe, scratch_dir: Path):
+        self._inner = inner
+        self._scratch_dir = scratch_dir
+        self.prepared = (mp3_path, mp3_probe)
+
+    def acquire(self, dest_dir: Path) -> Path:
+        return self.prepared[0]
+
+    def cleanup(self, succeeded: bool) -> None:
+        try:
+            self._inner.cleanup(succeeded)
+        finally:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
@@ -4,6 +4,8 @@
 
 職責:跑 PREPARATION → TRANSCRIPTION → PUNCTUATION 三 Phase、DB-poll 取消、
 終態寫入(成功 _mark_completed / 失敗 _mark_failed)、run temp_dir 生命週期。
+GPU Worker 可把 PUNCTUATION 移交標點佇列(defer_punctuation),由 CPU 消費端
+以 run_punctuation() 接手。
 
 兩進程之間唯一的變化點(「音檔從哪來」)由注入的 AudioSource 抽掉。processor
 與 db 也是注入——orchestrator 不知道自己跑在 server 還是 worker。
@@ -11,16 +13,26 @@
 import gc
 import os
 import shutil
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
 from structlog.contextvars import bind_contextvars, clear_contextvars
 
-from src.services.progress_store import Phase
-from src.utils.audio_converter import convert_to_mp3, convert_to_wav
+from src.database.repositories.analytics_rollup_repo import record_task_completed_sync
+from src.database.repositories.punctuation_queue_repo import (
+    PUNCTUATION_MAX_ATTEMPTS,
+    enqueue_sync,
+    finish_sync,
+)
+from src.database.repositories.segment_repo import load_segments_sync, save_segments_sync
+from src.services.progress_store import CoalescingProgressWriter, Phase
+from src.utils.audio_converter import compact_probe, convert_to_mp3, convert_to_wav
 from src.utils.config_loader import get_temp_dir
 from src.utils.logger import get_logger
+from src.utils.media_probe import MediaProbe, resolve_probe
+from src.utils.pcm_buffer import PcmBuffer, decode_pcm
 from src.utils.text_utils import (
     align_segments_to_punctuated_text,
     split_segments_at_sentence_punctuation,
@@ -34,6 +46,10 @@ log = get_logger(__name__)
 
 _CANCEL_STATUSES = {"canceling", "cancelled"}
 
+# 高頻回報點(每個 segment / 標點 chunk)的取消檢查結果沿用多久(秒)才再讀 DB;
+# 階段邊界的檢查不受影響,一律即時讀。env 可覆寫
+CANCEL_CHECK_TTL_SECONDS = float(os.getenv("CANCEL_CHECK_TTL_SECONDS", "2.0"))
+
 
 class TranscriptionCancelled(Exception):
     """使用者透過 cancel endpoint 把 Task status 設成 canceling/cancelled 時拋出。
@@ -71,6 +87,9 @@ class TranscriptionOrchestrator:
         self.whisper = whisper
         self.punctuation = punctuation
         self.diarization = diarization
+        # per-task 暫態:進度合併寫入器與上次取消檢查時間(run 收尾時移除)
+        self._progress_writers: Dict[str, CoalescingProgressWriter] = {}
+        self._cancel_checked_at: Dict[str, float] = {}
 
     # ── public:主流程 ────────────────────────────────
 
@@ -85,8 +104,17 @@ class TranscriptionOrchestrator:
         use_diarization: bool,
         max_speakers: Optional[int],
         ui_language: Optional[str] = None,
+        media_probe: Optional[dict] = None,
+        defer_punctuation: bool = False,
     ) -> None:
-        """執行整個 run(sync)。cleanup 由 finally 統一處理。"""
+        """執行整個 run(sync)。cleanup 由 finally 統一處理。
+
+        media_probe:intake 帶來的 `MediaProbe.to_dict()`;綁到 acquire 後的檔案,
+        PREPARATION / TRANSCRIPTION 共用,整個 run 至多一次 ffprobe。
+
+        defer_punctuation:GPU Worker 用。需要標點時,轉錄完只把原始結果落地並排進
+        標點佇列,任務維持 processing,由 CPU 消費端以 run_punctuation() 接手收尾。
+        """
         # 綁定 task_id 到 log context:本 run 內所有 log 都帶 task_id。
         # local 模式 run() 在 executor thread 跑、不繼承 request contextvars,故在此自綁。
         bind_contextvars(task_id=task_id)
@@ -94,54 +122,136 @@ class TranscriptionOrchestrator:
         started_ts = get_utc_timestamp()  # 供 _mark_completed 算 stats.duration_seconds
         temp_dir = get_temp_dir(prefix="run_")
         succeeded = False
+        deferred = False
         try:
             audio_path = audio_source.acquire(temp_dir)
+            # Worker 預取模式:音檔已在上一顆任務推論期間轉好,PREPARATION 不再轉檔
+            prepared = getattr(audio_source, "prepared", None)
+            source_probe = None if prepared else resolve_probe(audio_path, media_probe)
 
             # ── PREPARATION ──────────────────────────
-            mp3_path = self._run_preparation(task_id, audio_path)
+            mp3_path, mp3_probe = self._run_preparation(
+                task_id, audio_path, source_probe, prepared=prepared,
+            )
+            self.flush_progress(task_id)
             self.check_cancelled(task_id)
 
             # ── TRANSCRIPTION (+ 可選並行 diarization) ──
             full_text, segments, detected_language = self._run_transcription_phase(
                 task_id, mp3_path, temp_dir, language, use_chunking,
-                use_diarization, max_speakers,
+                use_diarization, max_speakers, media_probe=mp3_probe,
             )
+            self.flush_progress(task_id)
             self.check_cancelled(task_id)
 
-            # ── 繁簡清洗 + PUNCTUATION ────────────────
+            if defer_punctuation and use_punctuation:
+                # ── PUNCTUATION 移交標點佇列(GPU 不等 LLM)──
+                self._defer_punctuation(
+                    task_id, full_text, segments, mp3_path, started_ts,
+                    language=language, detected_language=detected_language,
+                    ui_language=ui_language, punctuation_provider=punctuation_provider,
+                )
+                deferred = succeeded = True
+                log.info("transcription.run.punctuation_deferred")
+            else:
+                # ── 繁簡清洗 + PUNCTUATION ────────────────
+                final_text, segments, punct_model, punct_tokens = self._run_punctuation_phase(
+                    task_id, full_text, segments, language, detected_language,
+                    ui_language, use_punctuation, punctuation_provider,
+                )
+                self.flush_progress(task_id)
+                self.check_cancelled(task_id)
+
+                # ── 成功收尾 ─────────────────────────────
+                self._save_compact_audio(task_id, mp3_path)
+                self._finish_success(
+                    task_id, final_text, segments, detected_language or language,
+                    punct_model, punct_tokens, started_ts,
+                )
+                succeeded = True
+                log.info("transcription.run.completed")
+
+        except TranscriptionCancelled:
+            self.flush_progress(task_id)
+            log.info("transcription.run.cancelled")
+            # status 已被 cancel endpoint 設,不覆蓋
+
+        except Exception as e:
+            log.error("transcription.run.failed", error=str(e), exc_info=True)
+            try:
+                import sentry_sdk
+                with sentry_sdk.push_scope() as scope:
+                    scope.set_tag("task_id", task_id)
+                    sentry_sdk.capture_exception(e)
+            except Exception:
+                pass
+            self.flush_progress(task_id)
+            self._mark_failed(task_id, str(e))
+
+        finally:
+            try:
+                audio_source.cleanup(succeeded)
+            except Exception as e:
+                log.warning("audio_source.cleanup_failed", error=str(e))
+            self._cleanup_temp_dir(temp_dir)
+            if deferred:
+                # 移交標點佇列時進度留給消費端接著寫：未寫出的最後一筆先落地
+                self.flush_progress(task_id)
+            self._progress_writers.pop(task_id, None)
+            self._cancel_checked_at.pop(task_id, None)
+            if not deferred:
+                # 移交標點佇列時進度停在 PUNCTUATION 起點,由消費端接著寫
+                self.progress_store.clear(task_id)
+            self._release_run_memory()
+            clear_contextvars()
+
+    def run_punctuation(self, job: dict) -> None:
+        """標點佇列消費端:對已轉錄的任務跑 PUNCTUATION 並收尾(sync)。
+
+        job 為 punctuation_queue_repo.claim_sync 認領到的文件。原始 transcript /
+        segments 由 run(defer_punctuation=True) 落地,這裡讀回、加標點後覆寫;
+        進度沿用同一套 Phase 權重,使用者看到的與同進程跑完全一致。
+        """
+        task_id = job["_id"]
+        params = job.get("params") or {}
+        bind_contextvars(task_id=task_id)
+        log.info("transcription.punctuation_stage.started", attempt=job.get("attempts"))
+        stage_started_ts = get_utc_timestamp()
+        try:
+            task = self._get_task(task_id)
+            if not task or task.get("deleted"):
+                log.info("transcription.punctuation_stage.skipped", reason="task_gone")
+                return
+            if job.get("attempts", 1) > PUNCTUATION_MAX_ATTEMPTS:
+                raise RuntimeError("標點處理多次中斷,放棄重試")
+            self.check_cancelled(task_id)
+
+            transcription = self.db.transcriptions.find_one({"_id": task_id}, {"content": 1}) or {}
+            segments = load_segments_sync(self.db, task_id) or []
+            language = params.get("language")
+            detected_language = params.get("detected_language")
             final_text, segments, punct_model, punct_tokens = self._run_punctuation_phase(
-                task_id, full_text, segments, language, detected_language,
-                ui_language, use_punctuation, punctuation_provider,
+                task_id, transcription.get("content", ""), segments, language,
+                detected_language, params.get("ui_language"), True,
+                params.get("punctuation_provider") or "gemini",
             )
+            self.flush_progress(task_id)
             self.check_cancelled(task_id)
 
-            # ── 成功收尾 ─────────────────────────────
-            task = self._get_task(task_id)
-            if task and task.get("task_type") == "subtitle":
-                # 字幕任務一律去標點（含 Whisper 原生標點）；不可再做半形→全形轉換，
-                # 否則會把保護的 3.14 / 1,000 / 12:30 變成 3。14 / 1，000 / 12：30
-                final_text = strip_subtitle_punctuation(final_text)
-                converted_segments = [
-                    {**s, "text": strip_subtitle_punctuation(s.get("text", ""))}
-                    for s in segments
-                ]
-            else:
-                converted_segments = convert_segments_punctuation(segments)
-            self._save_transcription_results(task_id, final_text, converted_segments)
-            self._save_compact_audio(task_id, mp3_path)
-            self._mark_completed(
-                task_id, detected_language or language, final_text,
+            # 處理時長 = GPU 段 + 標點段,不含在標點佇列裡排隊的時間
+            started_ts = stage_started_ts - params.get("transcribe_seconds", 0)
+            self._finish_success(
+                task_id, final_text, segments, detected_language or language,
                 punct_model, punct_tokens, started_ts,
             )
-            succeeded = True
             log.info("transcription.run.completed")
 
         except TranscriptionCancelled:
+            self.flush_progress(task_id)
             log.info("transcription.run.cancelled")
-            # status 已被 cancel endpoint 設,不覆蓋
 
         except Exception as e:
-            log.error("transcription.run.failed", error=str(e), exc_info=True)
+            log.error("transcription.punctuation_stage.failed", error=str(e), exc_info=True)
             try:
                 import sentry_sdk
                 with sentry_sdk.push_scope() as scope:
@@ -149,16 +259,17 @@ class TranscriptionOrchestrator:
                     sentry_sdk.capture_exception(e)
             except Exception:
                 pass
+            self.flush_progress(task_id)
             self._mark_failed(task_id, str(e))
 
         finally:
             try:
-                audio_source.cleanup(succeeded)
+                finish_sync(self.db, task_id)
             except Exception as e:
-                log.warning("audio_source.cleanup_failed", error=str(e))
-            self._cleanup_temp_dir(temp_dir)
+                log.warning("punctuation_queue.finish_failed", error=str(e))
+            self._progress_writers.pop(task_id, None)
+            self._cancel_checked_at.pop(task_id, None)
             self.progress_store.clear(task_id)
-            self._release_run_memory()
             clear_contextvars()
 
     def _release_run_memory(self) -> None:
@@ -189,44 +300,87 @@ class TranscriptionOrchestrator:
     def report_progress(
         self, task_id: str, phase: Phase, phase_progress: float,
         message: str = "", details: Optional[Dict[str, Any]] = None,
+        coalesce: bool = False,
     ) -> None:
+        """回報進度。coalesce=True(高頻回報點)經 CoalescingProgressWriter 合併後才寫。"""
         log.debug(
             "progress.update", phase=phase.value, phase_progress=phase_progress, msg=message
         )
-        self.progress_store.set_phase(
-            task_id, phase, phase_progress, message=message, details=details
+        writer = self._progress_writers.get(task_id)
+        if writer is None:
+            writer = self._progress_writers.setdefault(
+                task_id, CoalescingProgressWriter(self.progress_store, task_id)
+            )
+        writer.write(
+            phase, phase_progress, message=message, details=details, force=not coalesce
         )
 
+    def flush_progress(self, task_id: str) -> None:
+        """寫出被合併、尚未落地的最後一筆進度(phase 邊界與終態前呼叫;best-effort)。"""
+        writer = self._progress_writers.get(task_id)
+        if writer is None:
+            return
+        try:
+            writer.flush()
+        except Exception as e:
+            log.warning("progress.flush_failed", error=str(e))
+
     def complete_phase(
         self, task_id: str, phase: Phase, message: str,
         details: Optional[Dict[str, Any]] = None,
     ) -> None:
         self.report_progress(task_id, phase, 1.0, message=message, details=details)
 
-    def check_cancelled(self, task_id: str) -> None:
-        """DB-poll:Task status 已被 cancel endpoint 設成 canceling/cancelled 即 raise。"""
+    def check_cancelled(self, task_id: str, max_age: float = 0.0) -> None:
+        """DB-poll:Task status 已被 cancel endpoint 設成 canceling/cancelled 即 raise。
+
+        max_age > 0:距上次 DB 檢查未滿 max_age 秒就直接放行(高頻回報點用,
+        取消最多延遲 max_age 秒生效);預設 0 = 每次都讀 DB。
+        """
+        now = time.monotonic()
+        if max_age > 0:
+            last = self._cancel_checked_at.get(task_id)
+            if last is not None and now - last < max_age:
+                return
         doc = self.db.tasks.find_one({"_id": task_id}, {"status": 1})
+        self._cancel_checked_at[task_id] = now
         if doc and doc.get("status") in _CANCEL_STATUSES:
             raise TranscriptionCancelled(f"task {task_id} cancelled by user")
 
     # ── private:phase 實作 ───────────────────────────
 
-    def _run_preparation(self, task_id: str, audio_path: Path) -> Path:
-        """PREPARATION:音訊轉 Compact audio MP3。"""
+    def _run_preparation(
+        self, task_id: str, audio_path: Path, source_probe: Optional[MediaProbe] = None,
+        prepared: Optional[Tuple[Path, Optional[MediaProbe]]] = None,
+    ) -> Tuple[Path, Optional[MediaProbe]]:
+        """PREPARATION:音訊轉 Compact audio MP3,回傳 (mp3_path, mp3 的 MediaProbe)。
+
+        mp3 的 probe 由 source_probe 推得(不再 ffprobe);推不出來時為 None,
+        下游 WhisperProcessor 會經快取自行探測。prepared 為 AudioSource 已轉好的
+        (mp3_path, mp3_probe),直接沿用。
+        """
+        if prepared:
+            self.report_progress(
+                task_id, Phase.PREPARATION, 0.8, message="音檔轉換完成",
+                details={"audio_converted": True},
+            )
+            return prepared
         self.report_progress(
             task_id, Phase.PREPARATION, 0.3, message="正在轉換音檔格式...",
             details={"audio_converted": False},
         )
-        mp3_path, _transcoded = convert_to_mp3(audio_path)
+        mp3_path, transcoded = convert_to_mp3(audio_path, source_probe)
+        mp3_probe = compact_probe(source_probe, mp3_path, transcoded)
         self.report_progress(
             task_id, Phase.PREPARATION, 0.8, message="音檔轉換完成",
             details={"audio_converted": True},
         )
-        return mp3_path
+        return mp3_path, mp3_probe
 
     def _run_transcription_phase(
         self, task_id: str, mp3_path: Path, temp_dir: Path, language: Optional[str],
         use_chunking: bool, use_diarization: bool, max_speakers: Optional[int],
+        media_probe: Optional[MediaProbe] = None,
     ) -> Tuple[str, list, Optional[str]]:
         """TRANSCRIPTION:Whisper(+ 可選並行 diarization)+ 合併。"""
         if use_diarization and self.diarization:
@@ -235,16 +389,26 @@ class TranscriptionOrchestrator:
                 message="正在並行轉錄與說話者辨識...",
                 details={"diarization_started": True},
             )
-            # 裁決:diarization 餵 WAV(不是 MP3)
-            wav_path = convert_to_wav(mp3_path, temp_dir / f"{task_id}.wav")
+            # 解碼一次成 16kHz mono PCM,Whisper 與 pyannote 共用(不再各自解碼)。
+            # numpy 不可用 / 解碼失敗 → 退回舊流程:diarization 餵 WAV(不是 MP3)
+            pcm = decode_pcm(
+                mp3_path, temp_dir,
+                duration_seconds=media_probe.duration_seconds if media_probe else 0.0,
+            )
+            wav_path = (
+                mp3_path if pcm is not None
+                else convert_to_wav(mp3_path, temp_dir / f"{task_id}.wav")
+            )
 
             with ThreadPoolExecutor(max_workers=2) as ex:
                 t_future = ex.submit(
-                    self._run_transcription, task_id, mp3_path, language, use_chunking
+                    self._run_transcription, task_id, mp3_path, language, use_chunking,
+                    media_probe, pcm,
                 )
-                d_future = ex.submit(self._run_diarization, wav_path, max_speakers)
+                d_future = ex.submit(self._run_diarization, wav_path, max_speakers, pcm)
                 for _ in as_completed([t_future, d_future]):
                     pass
+            pcm = None  # 兩邊都用完;放掉 PCM 陣列 / memmap
 
             # 轉錄失敗 → 整個任務失敗(無可用結果);此處讓例外傳播
             full_text, segments, detected_language = t_future.result()
@@ -287,7 +451,7 @@ class TranscriptionOrchestrator:
                 )
         else:
             full_text, segments, detected_language = self._run_transcription(
-                task_id, mp3_path, language, use_chunking
+                task_id, mp3_path, language, use_chunking, media_probe
             )
 
         if full_text is None:
@@ -346,7 +510,8 @@ class TranscriptionOrchestrator:
             log.warning("diar.debug_dump.failed", task_id=task_id, error=str(e))
 
     def _run_transcription(
-        self, task_id: str, mp3_path: Path, language: Optional[str], use_chunking: bool
+        self, task_id: str, mp3_path: Path, language: Optional[str], use_chunking: bool,
+        media_probe: Optional[MediaProbe] = None, pcm: Optional[PcmBuffer] = None,
     ) -> tuple:
         """Whisper 轉錄。單一進度 callback 同時回報進度與檢查取消。"""
         self.report_progress(
@@ -354,25 +519,32 @@ class TranscriptionOrchestrator:
         )
 
         def _on_progress(elapsed_s, total_s):
-            self.check_cancelled(task_id)
+            self.check_cancelled(task_id, max_age=CANCEL_CHECK_TTL_SECONDS)
             if total_s and total_s > 0:
                 pp = min(0.99, elapsed_s / total_s)
                 self.report_progress(
                     task_id, Phase.TRANSCRIPTION, pp,
                     message=f"轉錄中（{int(elapsed_s)}s / {int(total_s)}s）...",
+                    coalesce=True,
                 )
 
         if use_chunking:
             return self.whisper.transcribe_in_chunks(
-                mp3_path, language=language, progress_callback=_on_progress
+                mp3_path, language=language, progress_callback=_on_progress,
+                media_probe=media_probe, pcm=pcm,
             )
         return self.whisper.transcribe(
-            mp3_path, language=language, progress_callback=_on_progress
+            mp3_path, language=language, progress_callback=_on_progress,
+            media_probe=media_probe, pcm=pcm,
         )
 
-    def _run_diarization(self, wav_path: Path, max_speakers: Optional[int]):
+    def _run_diarization(
+        self, wav_path: Path, max_speakers: Optional[int], pcm: Optional[PcmBuffer] = None,
+    ):
         """說話者辨識。失敗讓例外傳播,由 caller 降級。"""
-        return self.diarization.perform_diarization(wav_path, max_speakers=max_speakers)
+        return self.diarization.perform_diarization(
+            wav_path, max_speakers=max_speakers, pcm=pcm
+        )
 
     def _run_punctuation_phase(
         self, task_id: str, full_text: str, segments: list, language: Optional[str],
@@ -426,17 +598,60 @@ class TranscriptionOrchestrator:
             return full_text, segments, None, None
 
     def _update_punctuation_progress(self, task_id: str, idx: int, total: int) -> None:
-        self.check_cancelled(task_id)  # PUNCTUATION 階段也要能即時取消
+        # PUNCTUATION 階段也要能取消(TTL 內沿用上次檢查結果)
+        self.check_cancelled(task_id, max_age=CANCEL_CHECK_TTL_SECONDS)
         denom = max(1, total)
         pp = min(0.99, idx / denom)
         self.report_progress(
             task_id, Phase.PUNCTUATION, pp,
             message=f"正在添加標點（第 {idx}/{total} 段）...",
             details={"punctuation_current_chunk": idx, "punctuation_total_chunks": total},
+            coalesce=True,
         )
 
     # ── private:結果與終態 ───────────────────────────
 
+    def _finish_success(
+        self, task_id: str, final_text: str, segments: list, language: Optional[str],
+        punct_model: Optional[str], punct_tokens: Optional[Dict[str, int]],
+        started_ts: Optional[int],
+    ) -> None:
+        """成功收尾:全形標點 / 字幕去標點 → 寫入結果 → 標記完成。"""
+        task = self._get_task(task_id)
+        if task and task.get("task_type") == "subtitle":
+            # 字幕任務一律去標點（含 Whisper 原生標點）；不可再做半形→全形轉換，
+            # 否則會把保護的 3.14 / 1,000 / 12:30 變成 3。14 / 1，000 / 12：30
+            final_text = strip_subtitle_punctuation(final_text)
+            converted_segments = [
+                {**s, "text": strip_subtitle_punctuation(s.get("text", ""))}
+                for s in segments
+            ]
+        else:
+            converted_segments = convert_segments_punctuation(segments)
+        self._save_transcription_results(task_id, final_text, converted_segments)
+        self._mark_completed(
+            task_id, language, final_text, punct_model, punct_tokens, started_ts,
+        )
+
+    def _defer_punctuation(
+        self, task_id: str, full_text: str, segments: list, mp3_path: Path,
+        started_ts: int, **params,
+    ) -> None:
+        """原始結果與 Compact audio 先落地,排進標點佇列;任務維持 processing。"""
+        self._save_transcription_results(task_id, full_text, segments)
+        self._save_compact_audio(task_id, mp3_path)
+        transcription_model = getattr(self.whisper, "model_name", None)
+        if transcription_model:
+            # 消費端沒有 whisper,轉錄模型在這裡先寫
+            self._update_task(task_id, {"models.transcription": transcription_model})
+        enqueue_sync(self.db, task_id, {
+            **params, "transcribe_seconds": max(0, get_utc_timestamp() - started_ts),
+        })
+        self.report_progress(
+            task_id, Phase.PUNCTUATION, 0.0, message="等待標點處理...",
+            details={"punctuation_queued": True},
+        )
+
     def _save_transcription_results(
         self, task_id: str, text: str, segments: list
     ) -> None:
@@ -449,12 +664,8 @@ class TranscriptionOrchestrator:
             upsert=True,
         )
         if segments:
-            self.db.segments.replace_one(
-                {"_id": task_id},
-                {"_id": task_id, "segments": segments, "segment_count": len(segments),
-                 "created_at": now, "updated_at": now},
-                upsert=True,
-            )
+            # 分桶寫入（segment_buckets），長錄音不受單一文件 16 MB 限制
+            save_segments_sync(self.db, task_id, segments)
 
     def _save_compact_audio(self, task_id: str, mp3_path: Path) -> None:
         """Compact audio 落地永久區,寫 result.audio_file / audio_filename。"""
@@ -506,6 +717,8 @@ class TranscriptionOrchestrator:
         task = self._get_task(task_id)
         if not task:
             return
+        # 後台統計預聚合（token / 模型 / 處理時長）；以 task 旗標保證只計一次
+        record_task_completed_sync(self.db, task)
         user = task.get("user")
         user_id = user.get("user_id") if isinstance(user, dict) else task.get("user_id")
         if not user_id:
@@ -2,17 +2,18 @@
 
 對應 CONTEXT.md「Compact audio」。Web Server 跟 Worker 共用同一份。
 
-實作策略：precise skip + 自適應 re-encode。ffprobe 抓 5 個屬性，全 match
+實作策略：precise skip + 自適應 re-encode。ffprobe（經 `media_probe` 共用快取，
+intake 探測過就不再跑）抓 5 個屬性，全 match
 才 skip ffmpeg；任一不 match 就 re-encode，target 依輸入自適應（不 upsample、
 不 grow）。歷史上踩過兩次半成品 skip（只看 suffix / 只看 codec）導致永久檔
 違反契約——詳見 CONTEXT.md callout。
 """
-import json
 import subprocess
 from pathlib import Path
 from typing import Optional
 
 from src.utils.logger import get_logger
+from src.utils.media_probe import MediaProbe, probe_media
 
 log = get_logger(__name__)
 
@@ -27,17 +28,24 @@ BITRATE_CAP = 128_000
 BITRATE_VBR_SLACK = 130_000
 
 
-def convert_to_mp3(audio_path: Path) -> tuple[Path, bool]:
+def convert_to_mp3(
+    audio_path: Path, media_probe: Optional[MediaProbe] = None
+) -> tuple[Path, bool]:
     """把音檔轉成 Compact audio MP3，回傳 (mp3_path, transcoded)。
 
     transcoded=False：輸入已滿足契約，僅必要時改副檔名
     transcoded=True ：實際 re-encode 過
 
+    media_probe：呼叫端已有的探測結果（None → 經快取探測）。輸出檔的 probe
+    由 `compact_probe()` 推得，不必再 ffprobe。
+
     Raises:
         RuntimeError(error_code="INVALID_AUDIO")：ffmpeg 轉換失敗
     """
     mp3_path = audio_path.with_suffix(".mp3")
-    probe = _probe(audio_path)
+    if media_probe is None:
+        media_probe = probe_media(audio_path)
+    probe = media_probe.ffprobe if media_probe else None
 
     if _is_compact(probe):
         if audio_path != mp3_path:
@@ -92,6 +100,31 @@ def convert_to_mp3(audio_path: Path) -> tuple[Path, bool]:
         raise err from e
 
 
+def compact_probe(
+    source_probe: Optional[MediaProbe], mp3_path: Path, transcoded: bool
+) -> Optional[MediaProbe]:
+    """由輸入的 probe 推得 `convert_to_mp3` 輸出檔的 probe，不跑 ffprobe。
+
+    - 未 re-encode：內容只是 rename → 原 probe 綁到新路徑
+    - re-encode：輸出參數就是 `_adaptive_target` 的結果、時長同輸入
+    source_probe 缺 / 時長未知 → None（呼叫端自行探測）。
+    """
+    if source_probe is None or source_probe.duration_seconds <= 0:
+        return None
+    if not transcoded:
+        return source_probe.rebind(mp3_path)
+    sample_rate, bit_rate = _adaptive_target(source_probe.ffprobe)
+    return MediaProbe.synthesize(
+        mp3_path,
+        duration_seconds=source_probe.duration_seconds,
+        format_name="mp3",
+        codec="mp3",
+        sample_rate=sample_rate,
+        channels=1,
+        bit_rate=bit_rate,
+    )
+
+
 def convert_to_wav(audio_path: Path, wav_path: Path) -> Path:
     """把音檔轉成 16kHz mono WAV（pyannote 說話者辨識的 canonical 輸入）。
 
@@ -117,23 +150,6 @@ def convert_to_wav(audio_path: Path, wav_path: Path) -> Path:
 # ── 內部 helpers ───────────────────────────────────────────────
 
 
-def _probe(audio_path: Path) -> Optional[dict]:
-    """ffprobe → JSON dict；任何失敗回 None（caller 視為「不符契約」）。"""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "quiet",
-                "-print_format", "json",
-                "-show_streams", "-show_format",
-                str(audio_path),
-            ],
-            capture_output=True, text=True, timeout=30, check=True,
-        )
-        return json.loads(result.stdout) if result.stdout else None
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, json.JSONDecodeError):
-        return None
-
-
 def _is_compact(probe: Optional[dict]) -> bool:
     """檢查輸入是否已滿足 Compact audio 契約全部 5 屬性。
 
@@ -0,0 +1,254 @@
+"""MediaProbe — 單一 Task 共用的 ffprobe 結果。
+
+舊版一個 Task 會對同一份音檔跑好幾次 ffprobe：intake 取時長、
+`audio_converter._probe` 判 Compact audio、`WhisperProcessor._ensure_valid_audio`
+驗 codec、`_get_audio_duration` 再取一次時長（失敗還會 pydub 整檔解碼）。
+
+改為：intake 探測一次 → `MediaProbe.to_dict()` 帶在 `TranscriptionJob` 上
+（AWS 模式隨 SQS body 傳到 Worker）→ Orchestrator `resolve_probe()` 綁到
+acquire 後的本機路徑 → PREPARATION / TRANSCRIPTION 全部重用，每個 Task 至多
+一次 ffprobe subprocess。
+
+- 只保留判定需要的欄位（format_name / duration / codec / sample_rate /
+  channels / bit_rate），不帶 ffprobe tags——使用者檔案的 metadata 不外流到 SQS。
+- `ffprobe` property 回傳與 ffprobe JSON 同形的精簡 dict，讓 `audio_converter`
+  的 `_is_compact` / `_adaptive_target` 不必改判定邏輯。
+- process 內另有以 (path, size, mtime) 為 key 的 LRU 快取：同進程（local 模式
+  intake 與 Orchestrator）重複探測同一檔案直接命中。
+"""
+import json
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_FORMAT_KEYS = ("format_name", "duration", "bit_rate")
+_STREAM_KEYS = ("codec_type", "codec_name", "channels", "sample_rate", "bit_rate")
+
+# process 內快取上限（每筆只有數百 bytes；上限只是防長跑進程無界成長）
+_CACHE_MAX_ENTRIES = 256
+_cache: "OrderedDict[Tuple[str, int, int], MediaProbe]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass(frozen=True)
+class MediaProbe:
+    """一次 ffprobe 的結果，綁定 (path, size, mtime_ns) 這個檔案版本。"""
+
+    path: str
+    size: int
+    mtime_ns: int
+    format: Dict[str, Any] = field(default_factory=dict)
+    streams: List[Dict[str, Any]] = field(default_factory=list)
+
+    # ── 衍生屬性 ──────────────────────────────────────
+
+    @property
+    def ffprobe(self) -> dict:
+        """與 ffprobe `-show_streams -show_format` JSON 同形的精簡 dict。"""
+        return {"format": dict(self.format), "streams": [dict(s) for s in self.streams]}
+
+    @property
+    def _audio_stream(self) -> Dict[str, Any]:
+        return next((s for s in self.streams if s.get("codec_type") == "audio"), {})
+
+    @property
+    def duration_seconds(self) -> float:
+        try:
+            return max(0.0, float(self.format.get("duration") or 0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def duration_ms(self) -> int:
+        return int(self.duration_seconds * 1000)
+
+    @property
+    def codec(self) -> str:
+        return str(self._audio_stream.get("codec_name") or "").lower()
+
+    @property
+    def sample_rate(self) -> int:
+        return _to_int(self._audio_stream.get("sample_rate"))
+
+    @property
+    def channels(self) -> int:
+        return _to_int(self._audio_stream.get("channels"))
+
+    @property
+    def bit_rate(self) -> int:
+        return _to_int(self._audio_stream.get("bit_rate") or self.format.get("bit_rate"))
+
+    # ── 檔案版本綁定 ──────────────────────────────────
+
+    def rebind(self, path: Path) -> Optional["MediaProbe"]:
+        """把同內容的 probe 綁到另一個路徑（rename / S3 下載後的副本）。
+
+        只以大小驗證「同一份內容」：handoff 下載、Compact skip 的 rename 都是
+        byte-identical 副本，mtime 必然不同。大小不符 → None（呼叫端重新探測）。
+        """
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return None
+        if st.st_size != self.size:
+            return None
+        rebound = MediaProbe(
+            path=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+            format=dict(self.format), streams=[dict(s) for s in self.streams],
+        )
+        _cache_put(rebound)
+        return rebound
+
+    # ── 序列化（TranscriptionJob / SQS body）──────────────
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "format": dict(self.format),
+            "streams": [dict(s) for s in self.streams],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str = "", mtime_ns: int = 0) -> "MediaProbe":
+        return cls(
+            path=path,
+            size=_to_int(data.get("size")),
+            mtime_ns=mtime_ns,
+            format={k: v for k, v in (data.get("format") or {}).items() if k in _FORMAT_KEYS},
+            streams=[
+                {k: v for k, v in s.items() if k in _STREAM_KEYS}
+                for s in (data.get("streams") or [])
+            ],
+        )
+
+    @classmethod
+    def from_ffprobe(cls, path: Path, raw: dict) -> "MediaProbe":
+        st = Path(path).stat()
+        return cls.from_dict(
+            {"size": st.st_size, "format": raw.get("format"), "streams": raw.get("streams")},
+            path=str(path),
+            mtime_ns=st.st_mtime_ns,
+        )
+
+    @classmethod
+    def synthesize(
+        cls,
+        path: Path,
+        *,
+        duration_seconds: float,
+        format_name: str,
+        codec: str,
+        sample_rate: int,
+        channels: int,
+        bit_rate: int,
+    ) -> "MediaProbe":
+        """由「我們自己剛產出的檔案」的已知參數建 probe，不跑 ffprobe。
+
+        用於 re-encode 後的 Compact audio：輸出參數由 `_adaptive_target` 決定、
+        時長等於輸入，重新探測只是浪費一個 subprocess。不寫入快取——
+        nominal bitrate 與實際 VBR 平均值可能有出入，需要真值時仍應 `probe_media`。
+        """
+        st = Path(path).stat()
+        return cls(
+            path=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+            format={"format_name": format_name, "duration": str(duration_seconds), "bit_rate": str(bit_rate)},
+            streams=[{
+                "codec_type": "audio",
+                "codec_name": codec,
+                "channels": channels,
+                "sample_rate": str(sample_rate),
+                "bit_rate": str(bit_rate),
+            }],
+        )
+
+
+# ── process 內快取 ────────────────────────────────────────
+
+
+def _cache_key(path: Path) -> Optional[Tuple[str, int, int]]:
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return str(path), st.st_size, st.st_mtime_ns
+
+
+def _cache_put(probe: MediaProbe) -> None:
+    key = (probe.path, probe.size, probe.mtime_ns)
+    with _cache_lock:
+        _cache[key] = probe
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _run_ffprobe(path: Path) -> Optional[dict]:
+    """ffprobe → JSON dict；任何失敗回 None。"""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet",
+                "-print_format", "json",
+                "-show_streams", "-show_format",
+                str(path),
+            ],
+            capture_output=True, text=True, timeout=30, check=True,
+        )
+        return json.loads(result.stdout) if result.stdout else None
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, json.JSONDecodeError, OSError):
+        return None
+
+
+def probe_media(path: Path) -> Optional[MediaProbe]:
+    """取得 path 的 MediaProbe；同一檔案版本在本進程內只跑一次 ffprobe。
+
+    ffprobe 失敗 / 檔案不存在 → None（呼叫端決定如何降級）。
+    """
+    key = _cache_key(path)
+    if key is None:
+        return None
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    raw = _run_ffprobe(path)
+    if raw is None:
+        log.warning("media_probe.failed", path=str(path))
+        return None
+    try:
+        probe = MediaProbe.from_ffprobe(path, raw)
+    except OSError:
+        return None
+    _cache_put(probe)
+    log.debug("media_probe.probed", duration_seconds=probe.duration_seconds, codec=probe.codec)
+    return probe
+
+
+def resolve_probe(path: Path, carried: Optional[dict] = None) -> Optional[MediaProbe]:
+    """Orchestrator 用：優先把 job 帶來的 probe 綁到 acquire 後的路徑，不符才探測。"""
+    if carried:
+        try:
+            rebound = MediaProbe.from_dict(carried).rebind(path)
+        except Exception as e:
+            log.warning("media_probe.carried_invalid", error=str(e))
+            rebound = None
+        if rebound is not None:
+            return rebound
+        log.info("media_probe.carried_mismatch", path=str(path))
+    return probe_media(path)
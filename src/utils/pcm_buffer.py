@@ -0,0 +1,158 @@
+"""PcmBuffer — 一次解碼、Whisper 與 diarization 共用的 16kHz mono float32 PCM。
+
+舊版 diarization 任務的音訊會被解碼好幾次：`convert_to_wav` 先轉一份 WAV 給
+pyannote，faster-whisper 在另一條 thread 自己再解碼 MP3，CPU chunk 路徑還要
+逐段 ffmpeg 擷取 chunk 檔、worker 內再各自解碼。
+
+改為 Orchestrator 在 TRANSCRIPTION 前用 ffmpeg 解碼一次：
+- 短音檔：直接放在記憶體（np.ndarray）
+- 長音檔（≥ PCM_MMAP_MIN_SECONDS）：解碼成 run temp_dir 下的 raw f32 檔並 memmap，
+  常駐記憶體只有 page cache；ChunkWorkerPool 的 worker 進程以同一檔案 memmap
+  （OS page cache 共享），只傳 (path, 樣本區間) 不傳資料本身
+faster-whisper 吃 16kHz float32 ndarray、pyannote 吃 {"waveform", "sample_rate"}，
+兩者都不再碰 ffmpeg。
+
+numpy 是 faster-whisper 的依賴：Web Server（requirements-web.txt）沒裝時
+`decode_pcm` 回 None，呼叫端退回原本的檔案路徑流程。
+"""
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Whisper / pyannote 的 canonical 輸入格式
+PCM_SAMPLE_RATE = 16000
+# 超過此長度改 memmap（10 分鐘 ≈ 38MB float32）；env 可覆寫
+PCM_MMAP_MIN_SECONDS = int(os.getenv("PCM_MMAP_MIN_SECONDS", "600"))
+
+
+class PcmBuffer:
+    """一段已解碼的 mono float32 PCM（記憶體陣列或 memmap 檔）。"""
+
+    def __init__(self, samples, sample_rate: int = PCM_SAMPLE_RATE, path: Optional[Path] = None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.path = path  # memmap 來源檔；None = 純記憶體
+
+    @property
+    def num_samples(self) -> int:
+        return int(self.samples.shape[0])
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.num_samples / self.sample_rate
+
+    @property
+    def duration_ms(self) -> int:
+        return int(self.num_samples * 1000 // self.sample_rate)
+
+    def sample_index(self, ms: int) -> int:
+        return min(self.num_samples, max(0, int(ms) * self.sample_rate // 1000))
+
+    def shared_path(self, spill_dir: Path) -> Path:
+        """取得可讓其他進程 memmap 的檔案路徑；純記憶體 buffer 先寫出一次。"""
+        if self.path is None:
+            path = Path(spill_dir) / "_pcm_shared.f32"
+            self.samples.astype("<f4", copy=False).tofile(path)
+            self.path = path
+        return self.path
+
+    def as_pyannote_input(self) -> dict:
+        """pyannote Pipeline 的 in-memory 輸入：waveform 形狀 (channel=1, time)。"""
+        import torch
+
+        return {
+            "waveform": torch.from_numpy(self.samples).unsqueeze(0),
+            "sample_rate": self.sample_rate,
+        }
+
+    def detect_silences(
+        self, noise_db: float, min_silence_sec: float
+    ) -> List[Tuple[int, int]]:
+        """在 PCM 上找靜音區間 [(start_ms, end_ms), ...]，語意同 ffmpeg silencedetect。
+
+        silencedetect 以「連續樣本振幅皆低於門檻、且持續 ≥ d 秒」判定；這裡用同一
+        定義向量化計算，不必再跑一趟 ffmpeg。
+        """
+        n = self.num_samples
+        if n == 0:
+            return []
+        threshold = 10 ** (noise_db / 20)
+        # 逐分鐘算 |x| < 門檻，避免對 memmap 整檔 materialize 一份 float 暫存
+        quiet = np.empty(n, dtype=bool)
+        block = self.sample_rate * 60
+        for i in range(0, n, block):
+            np.less(np.abs(self.samples[i:i + block]), threshold, out=quiet[i:i + block])
+
+        # 相鄰值變化處切成 runs，保留「靜音且夠長」的 run
+        bounds = np.concatenate(([0], np.flatnonzero(quiet[1:] != quiet[:-1]) + 1, [n]))
+        run_starts, run_ends = bounds[:-1], bounds[1:]
+        min_len = int(min_silence_sec * self.sample_rate)
+        keep = quiet[run_starts] & ((run_ends - run_starts) >= min_len)
+        to_ms = 1000 / self.sample_rate
+        return [
+            (int(s * to_ms), int(e * to_ms))
+            for s, e in zip(run_starts[keep], run_ends[keep], strict=True)
+        ]
+
+
+def load_pcm_slice(path: str, start_sample: int, end_sample: int):
+    """worker 進程用：memmap 共享 PCM 檔並取 [start, end) 區間（唯讀 view）。"""
+    samples = np.memmap(path, dtype="<f4", mode="r")
+    return samples[start_sample:end_sample]
+
+
+def decode_pcm(
+    audio_path: Path, dest_dir: Path, duration_seconds: float = 0.0
+) -> Optional[PcmBuffer]:
+    """把音檔解碼成 16kHz mono float32 PCM（ffmpeg 一次）。
+
+    duration_seconds ≥ PCM_MMAP_MIN_SECONDS 時解碼到 dest_dir 下的 raw 檔並 memmap。
+    numpy 不可用 / ffmpeg 失敗 → None（呼叫端退回檔案路徑流程）。
+    """
+    if np is None:
+        return None
+
+    base_cmd = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", str(audio_path),
+        "-vn", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE), "-f", "f32le",
+    ]
+    use_mmap = duration_seconds >= PCM_MMAP_MIN_SECONDS
+    raw_path = Path(dest_dir) / f"{Path(audio_path).stem}.f32"
+    try:
+        if use_mmap:
+            subprocess.run(
+                base_cmd + ["-y", str(raw_path)], check=True, capture_output=True, timeout=600
+            )
+            if raw_path.stat().st_size == 0:
+                return None
+            # mode="c"：copy-on-write，對 torch.from_numpy 而言可寫，不會動到檔案
+            samples = np.memmap(raw_path, dtype="<f4", mode="c")
+            buf = PcmBuffer(samples, path=raw_path)
+        else:
+            result = subprocess.run(
+                base_cmd + ["pipe:1"], check=True, capture_output=True, timeout=600
+            )
+            if not result.stdout:
+                return None
+            # frombuffer 是唯讀 view；copy 一次換成可寫陣列（torch.from_numpy 需要）
+            buf = PcmBuffer(np.frombuffer(result.stdout, dtype="<f4").copy())
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        log.warning("pcm_buffer.decode_failed", error=str(e))
+        return None
+
+    log.info(
+        "pcm_buffer.decoded",
+        duration_seconds=round(buf.duration_seconds, 1),
+        mmap=buf.path is not None,
+    )
+    return buf
@@ -2,16 +2,22 @@
 的 doc 結構與樣式。
 
 Public API:
+    render_pdf(output, ...)   寫到檔案路徑或 file-like（/export/pdf 寫暫存檔）
     generate_pdf(...) -> bytes
 
 字體在 module import 時 lazy register（首次呼叫 generate_pdf 時觸發），
 避免 import 階段就 IO。
+
+記憶體：逐字稿的 Paragraph 不一次建好，由 _StreamingDocTemplate 在排版途中
+每次補 PDF_FLOWABLE_BATCH 個；每頁排完即 zlib 壓縮（pageCompression）。
+一次匯出常駐的是「一批 flowable + 已壓縮的頁面」，不再是整份逐字稿的
+Paragraph 加未壓縮的整份 PDF。
 """
 from __future__ import annotations
 import os
 import threading
 from io import BytesIO
-from typing import Any
+from typing import IO, Any, Iterator, Union
 
 from reportlab.lib.colors import HexColor
 from reportlab.lib.pagesizes import A4
@@ -38,6 +44,8 @@ from .script_detect import (
 )
 
 _FONTS_DIR = os.path.join(os.path.dirname(__file__), "fonts")
+# 排版佇列裡最多預先建好幾個 flowable（逐字稿一行一個）
+PDF_FLOWABLE_BATCH = int(os.getenv("PDF_FLOWABLE_BATCH", "200"))
 _REGISTER_LOCK = threading.Lock()
 _REGISTERED = False
 
@@ -231,25 +239,69 @@ def _summary_flowables(
     return out
 
 
+def _iter_lines(text: str) -> Iterator[str]:
+    """逐行 yield，不像 split 先複製出整份行列表。"""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
 def _transcript_flowables(
     transcript_text: str,
     styles: dict[str, ParagraphStyle],
     primary_lang: str,
     locale: str,
-) -> list[Any]:
-    """對應 frontend formatTranscriptForPdf()."""
-    out: list[Any] = [
-        _p(_t("downloadDialog.transcriptSection", locale), styles["sectionHeader"], primary_lang)
-    ]
-    for line in transcript_text.split("\n"):
+) -> Iterator[Any]:
+    """對應 frontend formatTranscriptForPdf()；generator，排版時才逐行建 Paragraph。"""
+    yield _p(_t("downloadDialog.transcriptSection", locale), styles["sectionHeader"], primary_lang)
+    for line in _iter_lines(transcript_text):
         if line.strip():
-            out.append(_p(line, styles["body"], primary_lang))
+            yield _p(line, styles["body"], primary_lang)
         else:
-            out.append(Spacer(1, 4))
-    return out
+            yield Spacer(1, 4)
+
 
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """從 iterator 分批補 flowable 的 SimpleDocTemplate。
 
-def generate_pdf(
+    BaseDocTemplate.build 每處理一個 flowable 前都會呼叫 filterFlowables(flowables)，
+    在這裡把佇列補回 PDF_FLOWABLE_BATCH 個；build 的 `while len(flowables)` 只要
+    佇列不空就繼續，所以 batch >= 2 時 iterator 沒耗盡前佇列不會見底。
+    換頁時 ReportLab 也會拿內部的 _hanging 清單呼叫 filterFlowables，只補主佇列。
+    """
+
+    def __init__(self, *args, pending: Iterator[Any], batch: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = pending
+        self._batch = max(2, batch)
+        self._queue: list[Any] | None = None
+
+    def _refill(self, flowables: list[Any]) -> None:
+        while self._pending is not None and len(flowables) < self._batch:
+            f = next(self._pending, None)
+            if f is None:
+                self._pending = None
+                return
+            flowables.append(f)
+
+    def filterFlowables(self, flowables: list[Any]) -> None:
+        if flowables is self._queue:
+            self._refill(flowables)
+        super().filterFlowables(flowables)
+
+    def build(self, flowables: list[Any], *args, **kwargs) -> None:
+        self._queue = flowables
+        self._refill(flowables)
+        super().build(flowables, *args, **kwargs)
+
+
+def render_pdf(
+    output: Union[str, os.PathLike, IO[bytes]],
     *,
     title: str,
     summary: dict[str, Any] | None = None,
@@ -258,10 +310,11 @@ def generate_pdf(
     include_transcript: bool = True,
     primary_lang: str = "zh-TW",
     locale: str = "zh-TW",
-) -> bytes:
-    """產生 PDF bytes。
+) -> None:
+    """產生 PDF 寫到 output（檔案路徑或 binary file-like）。
 
     Args:
+        output: 寫入目標；大份匯出給檔案路徑，成品不必整份留在記憶體
         title: PDF 抬頭（通常是 transcript title 或 filename）
         summary: AI 摘要 dict（{"content": {...}}），None 或空則跳過 summary section
         transcript_text: 已格式化的逐字稿純文字（frontend 端先按 paragraph /
@@ -275,20 +328,29 @@ def generate_pdf(
     primary_font = primary_font_for_lang(primary_lang)
     styles = _build_styles(primary_font)
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, pagesize=A4,
-        leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40,
-        title=title,
-    )
-
     flowables: list[Any] = [_p(title, styles["title"], primary_lang)]
 
     if include_summary and summary:
         flowables.extend(_summary_flowables(summary, styles, primary_lang, locale))
 
+    pending: Iterator[Any] = iter(())
     if include_transcript and transcript_text:
-        flowables.extend(_transcript_flowables(transcript_text, styles, primary_lang, locale))
+        pending = _transcript_flowables(transcript_text, styles, primary_lang, locale)
 
+    doc = _StreamingDocTemplate(
+        os.fspath(output) if isinstance(output, (str, os.PathLike)) else output,
+        pagesize=A4,
+        leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40,
+        title=title,
+        pageCompression=1,
+        pending=pending,
+        batch=PDF_FLOWABLE_BATCH,
+    )
     doc.build(flowables)
+
+
+def generate_pdf(**kwargs: Any) -> bytes:
+    """產生 PDF bytes（參數同 render_pdf，不含 output）。小份 / 測試用。"""
+    buffer = BytesIO()
+    render_pdf(buffer, **kwargs)
     return buffer.getvalue()
@@ -72,6 +72,11 @@ _AUDIO_MIME_TYPES = {
 }
 
 
+def audio_content_type(ext: str) -> str:
+    """副檔名（有無前導 "." 皆可）→ MIME type；不認得的當 audio/mpeg。"""
+    return _AUDIO_MIME_TYPES.get(f".{ext.lstrip('.').lower()}", "audio/mpeg")
+
+
 def detect_content_type(local_path: Path) -> str:
     """從檔案前幾個位元組偵測實際 MIME type。"""
     try:
@@ -89,7 +94,7 @@ def detect_content_type(local_path: Path) -> str:
             return "audio/flac"
     except Exception:
         pass
-    return _AUDIO_MIME_TYPES.get(local_path.suffix.lower(), "audio/mpeg")
+    return audio_content_type(local_path.suffix)
 
 
 def parse_s3_key(uri: str):
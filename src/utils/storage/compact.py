@@ -3,10 +3,20 @@
 對應 CONTEXT.md「Compact audio」。AWS 路徑依方案分資料夾（搭配 S3 Lifecycle Rule 過期）：
   uploads/free/{id}.mp3 (3d) / uploads/basic|pro/{id}.mp3 (7d) / uploads/kept/{id}.mp3 (不過期)
 Local 模式不分 tier：uploads/{id}.mp3。
+
+播放端點（/audio、分享頁 /audio）每次請求都要 HEAD 確認存在 + 簽 presigned URL；
+`resolve_audio_url_async` 把結果快取 AUDIO_URL_CACHE_SECONDS（比 URL 效期短，
+client 拿到的 URL 至少還有數分鐘可用），S3 呼叫丟 thread 跑、不卡 event loop。
+本進程的 save / move / delete 會清掉對應路徑的快取。
 """
+import asyncio
+import os
 import shutil
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from .backend import (
     MAX_PRESIGNED_URL_TTL,
@@ -23,6 +33,11 @@ from .backend import (
 # 允許的 tier 值（防止路徑注入）— tier 是 Compact audio 的儲存分區概念
 _VALID_TIERS = {"free", "basic", "pro", "enterprise", "kept"}
 
+# 播放 URL 快取秒數；須小於 MAX_PRESIGNED_URL_TTL，差值 = client 拿到 URL 後的最短可用時間
+AUDIO_URL_CACHE_SECONDS = int(os.getenv("AUDIO_URL_CACHE_SECONDS", "3000"))
+# 最多快取幾個路徑，超過淘汰最久沒用的
+AUDIO_URL_CACHE_MAX_ENTRIES = int(os.getenv("AUDIO_URL_CACHE_MAX_ENTRIES", "10000"))
+
 
 def _validate_tier(tier: str) -> None:
     if tier not in _VALID_TIERS:
@@ -46,6 +61,7 @@ def save_audio(task_id: str, local_path: Path, tier: str = "free") -> str:
             ExtraArgs={"ContentType": content_type},
         )
         local_path.unlink(missing_ok=True)
+        _invalidate_audio_url(f"s3://{S3_BUCKET}/{key}")
         return f"s3://{S3_BUCKET}/{key}"
     else:
         uploads_dir = Path("uploads")
@@ -116,6 +132,8 @@ def delete_audio(task_id: str, tier: str = "free") -> None:
         except Exception as e:
             log.error("storage.audio_delete_failed", error=str(e))
             raise
+        finally:
+            _invalidate_audio_url(f"s3://{S3_BUCKET}/{key}")
     else:
         path = Path("uploads") / f"{task_id}.mp3"
         path.unlink(missing_ok=True)
@@ -134,6 +152,8 @@ def delete_audio_by_path(audio_file_path: str) -> None:
                 log.error("storage.audio_delete_failed", error=str(e))
     else:
         Path(audio_file_path).unlink(missing_ok=True)
+    # 刪完才清：刪除途中的查詢可能還看得到檔案，先清會被寫回
+    _invalidate_audio_url(audio_file_path)
 
 
 def audio_exists(task_id: str, tier: str = "free") -> bool:
@@ -193,6 +213,87 @@ def get_presigned_url_by_path(audio_file_path: str, expires_in: int = 3600) -> O
     )
 
 
+class _AudioUrlCache:
+    """路徑 → (到期時間, presigned URL) 的 LRU。
+
+    只快取「存在」的結果：不存在時播放端點會清掉 DB 的 audio_file，同一路徑不會
+    再被查；也避免 Worker 剛上傳完就被先前的「不存在」擋住。
+
+    invalidate 可能從 executor thread 呼叫（同步的 move / delete），故以 lock 保護；
+    generation 讓「查詢途中被 invalidate」的結果不會寫回快取。
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Tuple[Optional[str], int]:
+        """回 (快取的 URL 或 None, 目前 generation)。"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(path)
+                return entry[1], self._generation
+            self._entries.pop(path, None)
+            return None, self._generation
+
+    def put(self, path: str, url: str, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return  # 查詢途中有 invalidate，結果可能已過時
+            self._entries[path] = (time.monotonic() + self._ttl, url)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+_audio_url_cache = _AudioUrlCache(
+    min(AUDIO_URL_CACHE_SECONDS, MAX_PRESIGNED_URL_TTL), AUDIO_URL_CACHE_MAX_ENTRIES,
+)
+
+
+def _invalidate_audio_url(audio_file_path: str) -> None:
+    _audio_url_cache.invalidate(audio_file_path)
+
+
+def _resolve_audio_url(audio_file_path: str) -> Optional[str]:
+    if not audio_exists_by_path(audio_file_path):
+        return None
+    return get_presigned_url_by_path(audio_file_path, expires_in=MAX_PRESIGNED_URL_TTL)
+
+
+async def resolve_audio_url_async(audio_file_path: str) -> Optional[str]:
+    """AWS 播放用：音檔存在就回 presigned URL，不存在（或非 s3 路徑）回 None。
+
+    命中快取不打 S3；未命中時 HEAD + 簽名在 thread 跑。URL 以最長效期簽發、
+    快取時間較短，命中時 client 拿到的 URL 仍至少有
+    MAX_PRESIGNED_URL_TTL - AUDIO_URL_CACHE_SECONDS 秒可用。
+    """
+    if not audio_file_path or not is_aws() or not audio_file_path.startswith("s3://"):
+        return None
+    url, generation = _audio_url_cache.get(audio_file_path)
+    if url is not None:
+        return url
+    url = await asyncio.to_thread(_resolve_audio_url, audio_file_path)
+    if url is not None:
+        _audio_url_cache.put(audio_file_path, url, generation)
+    return url
+
+
 def move_audio(task_id: str, from_tier: str, to_tier: str) -> str:
     """在 S3 上搬移音檔（用於 keep_audio 切換時）。回搬移後的新路徑。"""
     validate_task_id(task_id)
@@ -209,6 +310,8 @@ def move_audio(task_id: str, from_tier: str, to_tier: str) -> str:
             Key=dst_key,
         )
         s3.delete_object(Bucket=S3_BUCKET, Key=src_key)
+        _invalidate_audio_url(f"s3://{S3_BUCKET}/{src_key}")
+        _invalidate_audio_url(f"s3://{S3_BUCKET}/{dst_key}")
         log.info("storage.audio_moved", src_key=src_key, dst_key=dst_key)
         return f"s3://{S3_BUCKET}/{dst_key}"
     else:
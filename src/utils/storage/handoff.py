@@ -3,11 +3,25 @@
 對應 CONTEXT.md「Handoff audio」。Dispatch 把使用者上傳的原始檔放 `handoff/{id}.{ext}`，
 Worker 取走 + 轉成 Compact audio 後 DELETE；失敗/取消的孤兒由 sweep 定期清。
 Local 模式不適用（temp_dir 直接交給 orchestrator）。
+
+分片上傳的串流 handoff（staged）：上傳進行中就把每片當 S3 multipart part 送到
+`handoff/staged/{upload_id}.{ext}`，上傳完成時 CompleteMultipartUpload。此時還沒有
+task_id，所以 dispatch 時再以 S3 server-side copy 搬到 `handoff/{task_id}.{ext}`
+（資料不經過 Web Server），Worker 端完全不用改。本機檔旁的 `.staged` sidecar
+記錄「這個檔已有對應的 staged 物件」與上傳完成時的 content hash；intake 若改了檔案
+（合併等）就不會有 sidecar，promote 前再以 hash 確認本機檔仍是同一份內容（同大小但
+內容不同也擋得下），對不上就退回整檔上傳。放在 `handoff/` 底下，孤兒一樣由
+sweep_handoff_orphans 清。
 """
+import hashlib
+import json
+import os
 from pathlib import Path
+from typing import List, Optional
 
 from .backend import (
     S3_BUCKET,
+    audio_content_type,
     detect_content_type,
     get_s3,
     get_s3_client_error,
@@ -34,12 +48,18 @@ def _handoff_s3_key(task_id: str, ext: str) -> str:
 
 
 def upload_to_handoff(task_id: str, local_path: Path, ext: str) -> str:
-    """上傳 handoff 音檔到 S3（dispatch 用）。Local 模式 noop 回 local_path 字串。"""
+    """上傳 handoff 音檔到 S3（dispatch 用）。Local 模式 noop 回 local_path 字串。
+
+    本機檔若已在上傳期間串流成 staged 物件（見模組說明），改用 server-side copy。
+    """
     validate_task_id(task_id)
     _validate_ext(ext)
     if is_aws():
-        content_type = detect_content_type(local_path)
         key = _handoff_s3_key(task_id, ext)
+        if _promote_staged(local_path, key):
+            local_path.unlink(missing_ok=True)
+            return f"s3://{S3_BUCKET}/{key}"
+        content_type = detect_content_type(local_path)
         get_s3().upload_file(
             str(local_path), S3_BUCKET, key,
             ExtraArgs={"ContentType": content_type},
@@ -50,6 +70,194 @@ def upload_to_handoff(task_id: str, local_path: Path, ext: str) -> str:
     return str(local_path)
 
 
+# ── 串流 handoff（分片上傳期間以 multipart 送 S3）─────────────────────────
+
+# sidecar 副檔名：`<assembled>.staged` 內容為 {"key", "size", "sha256", "chunk_size"}
+_STAGED_SIDECAR_SUFFIX = ".staged"
+_HASH_READ_SIZE = 1024 * 1024
+
+
+def chunked_content_sha256(path: Path, chunk_size: int) -> str:
+    """整檔 content hash，算法同分片上傳的 combine_chunk_hashes：
+    sha256(每 chunk_size bytes 一片的 sha256 digest 依序串接)。"""
+    outer = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            inner = hashlib.sha256()
+            remaining = chunk_size
+            while remaining:
+                data = f.read(min(_HASH_READ_SIZE, remaining))
+                if not data:
+                    break
+                inner.update(data)
+                remaining -= len(data)
+            if remaining == chunk_size:
+                break
+            outer.update(inner.digest())
+            if remaining:
+                break
+    return outer.hexdigest()
+
+
+def staged_handoff_enabled(ext: str) -> bool:
+    """AWS 模式且副檔名在 handoff 白名單內才串流（HANDOFF_STREAMING=off 可關）。"""
+    return (
+        is_aws()
+        and os.getenv("HANDOFF_STREAMING", "on").lower() != "off"
+        and ext in _VALID_HANDOFF_EXTS
+    )
+
+
+def _staged_s3_key(upload_id: str, ext: str) -> str:
+    validate_task_id(upload_id)
+    _validate_ext(ext)
+    return f"handoff/staged/{upload_id}.{ext}"
+
+
+def start_staged_upload(upload_id: str, ext: str) -> str:
+    """開一個 multipart upload，回傳 S3 UploadId。
+
+    還沒有檔頭可偵測，ContentType 依副檔名推（promote 時 copy 會沿用）。
+    """
+    resp = get_s3().create_multipart_upload(
+        Bucket=S3_BUCKET,
+        Key=_staged_s3_key(upload_id, ext),
+        ContentType=audio_content_type(ext),
+    )
+    return resp["UploadId"]
+
+
+class _FileSlice:
+    """檔案中 [offset, offset+length) 的唯讀 file-like（boto3 Body 用，不整片讀進記憶體）。"""
+
+    def __init__(self, path: Path, offset: int, length: int):
+        self._f = open(path, "rb")
+        self._start = offset
+        self._length = length
+        self._pos = 0
+        self._f.seek(offset)
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self._f.read(size)
+        self._pos += len(data)
+        return data
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        base = {0: 0, 1: self._pos, 2: self._length}[whence]
+        self._pos = max(0, min(self._length, base + pos))
+        self._f.seek(self._start + self._pos)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def upload_staged_part(
+    upload_id: str, ext: str, s3_upload_id: str, part_number: int,
+    path: Path, offset: int, length: int,
+) -> str:
+    """把本機檔中的一段送成第 part_number 個 part（1-based），回傳 ETag。
+
+    S3 規定除最後一個 part 外每個 part 至少 5MB；分片上傳的 CHUNK_SIZE（16MB）滿足。
+    """
+    with _FileSlice(path, offset, length) as body:
+        resp = get_s3().upload_part(
+            Bucket=S3_BUCKET,
+            Key=_staged_s3_key(upload_id, ext),
+            UploadId=s3_upload_id,
+            PartNumber=part_number,
+            Body=body,
+            ContentLength=length,
+        )
+    return resp["ETag"]
+
+
+def complete_staged_upload(upload_id: str, ext: str, s3_upload_id: str, etags: List[str]) -> str:
+    """以依序排列的各 part ETag 完成 multipart upload，回傳 staged 物件 key。"""
+    key = _staged_s3_key(upload_id, ext)
+    get_s3().complete_multipart_upload(
+        Bucket=S3_BUCKET,
+        Key=key,
+        UploadId=s3_upload_id,
+        MultipartUpload={"Parts": [
+            {"PartNumber": i + 1, "ETag": etag} for i, etag in enumerate(etags)
+        ]},
+    )
+    return key
+
+
+def discard_staged_upload(upload_id: str, ext: str, s3_upload_id: Optional[str]) -> None:
+    """放棄 staged handoff：abort 未完成的 multipart、刪掉已完成的 staged 物件。
+
+    best-effort 且 idempotent（NoSuchUpload / NoSuchKey 視為已清）；漏掉的由
+    sweep_handoff_orphans（物件）與 bucket lifecycle（未完成的 multipart）兜底。
+    """
+    key = _staged_s3_key(upload_id, ext)
+    s3 = get_s3()
+    try:
+        if s3_upload_id:
+            try:
+                s3.abort_multipart_upload(Bucket=S3_BUCKET, Key=key, UploadId=s3_upload_id)
+            except get_s3_client_error() as e:
+                if e.response["Error"]["Code"] != "NoSuchUpload":
+                    raise
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+    except Exception as e:
+        log.warning("storage.handoff_staged_discard_failed", upload_id=upload_id, error=str(e))
+
+
+def mark_staged(local_path: Path, staged_key: str, content_sha256: str, chunk_size: int) -> None:
+    """在本機檔旁寫 sidecar，記錄其內容（content_sha256，見 chunked_content_sha256）已完整存在 staged_key。"""
+    sidecar = local_path.with_name(local_path.name + _STAGED_SIDECAR_SUFFIX)
+    sidecar.write_text(json.dumps({
+        "key": staged_key,
+        "size": local_path.stat().st_size,
+        "sha256": content_sha256,
+        "chunk_size": chunk_size,
+    }))
+
+
+def _promote_staged(local_path: Path, key: str) -> bool:
+    """有 staged 物件就 server-side copy 到 handoff key 並刪 staged，回傳是否成功。
+
+    sidecar 不存在 / 大小或 content hash 不符（檔案在 intake 被換掉、同大小但內容已變）/
+    copy 失敗 → False，由呼叫端退回整檔上傳。
+    """
+    sidecar = local_path.with_name(local_path.name + _STAGED_SIDECAR_SUFFIX)
+    if not sidecar.exists():
+        return False
+    try:
+        staged = json.loads(sidecar.read_text())
+        if staged.get("size") != local_path.stat().st_size or not staged.get("sha256"):
+            return False
+        if chunked_content_sha256(local_path, staged["chunk_size"]) != staged["sha256"]:
+            log.warning("storage.handoff_staged_hash_mismatch", key=staged.get("key"))
+            return False
+        s3 = get_s3()
+        # managed copy：大物件自動用 UploadPartCopy 並行，資料不經過本機
+        s3.copy({"Bucket": S3_BUCKET, "Key": staged["key"]}, S3_BUCKET, key)
+        s3.delete_object(Bucket=S3_BUCKET, Key=staged["key"])
+    except Exception as e:
+        log.warning("storage.handoff_promote_failed", key=key, error=str(e))
+        return False
+    finally:
+        sidecar.unlink(missing_ok=True)
+    log.info("storage.handoff_promoted", key=key)
+    return True
+
+
 def download_from_handoff(task_id: str, ext: str, dest: Path) -> Path:
     """從 S3 handoff/ 下載音檔到本機（Worker 用）。"""
     validate_task_id(task_id)
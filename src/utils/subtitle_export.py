@@ -0,0 +1,146 @@
+"""
+字幕 / 逐字稿匯出格式化
+職責：把依時間排序的 segments 逐筆合併成字幕列並輸出 SRT / VTT / TXT 文字片段
+
+輸出與前端 useSubtitleMode.js 的 mergeSegmentsByDensity / generateSRTText /
+generateVTTText / generateSubtitleText 逐字相同；差別在這裡是串流：segments
+一筆筆餵進來、每合併完一列就吐出該列的文字，不需要整份 segments 或整份輸出在記憶體。
+"""
+
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+# 疏密度上限（秒），需與前端 MAX_DENSITY_SECONDS 一致：達此值代表同講者連續 segment 全併
+MAX_DENSITY_SECONDS = 180.0
+
+
+@dataclass
+class SubtitleGroup:
+    """合併後的一列字幕。"""
+    start: float
+    end: float
+    speaker: Optional[str]
+    texts: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.texts).strip()
+
+
+async def group_segments(
+    segments: AsyncIterable[Dict], threshold: float
+) -> AsyncIterator[SubtitleGroup]:
+    """依疏密度閾值合併 segments（對應前端 mergeSegmentsByDensity）。
+
+    segments 需已依 start 排序（儲存順序即時間順序）。講者不同一律拆列；
+    threshold == 0 每句一列；threshold >= MAX_DENSITY_SECONDS 同講者全併；
+    其間以「加入後 group 時長 >= 閾值」為拆列條件。
+    """
+    current: Optional[SubtitleGroup] = None
+    merge_all = threshold >= MAX_DENSITY_SECONDS
+    async for seg in segments:
+        start = seg.get("start") or 0
+        end = seg.get("end") or 0
+        speaker = seg.get("speaker") or None
+        text = (seg.get("text") or "").strip()
+        if current is not None:
+            split = (
+                speaker != current.speaker
+                or threshold == 0
+                or (not merge_all and end - current.start >= threshold)
+            )
+            if not split:
+                current.end = end
+                current.texts.append(text)
+                continue
+            yield current
+        current = SubtitleGroup(start=start, end=end, speaker=speaker, texts=[text])
+    if current is not None:
+        yield current
+
+
+def _clock(seconds: float, sep: str) -> str:
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    ms = int((seconds % 1) * 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def format_time_srt(seconds: float) -> str:
+    """SRT 時間 HH:MM:SS,mmm"""
+    return _clock(seconds, ",")
+
+
+def format_time_vtt(seconds: float) -> str:
+    """VTT 時間 HH:MM:SS.mmm"""
+    return _clock(seconds, ".")
+
+
+def format_timestamp(seconds: float, time_format: str, end_seconds: float) -> str:
+    """TXT 時間戳（對應前端 formatTimestamp）：start → `m:ss` / `h:mm:ss`；range → `a - b`"""
+    def fmt(sec: float) -> str:
+        h = int(sec // 3600)
+        m = int((sec % 3600) // 60)
+        s = int(sec % 60)
+        return f"{h}:{m:02d}:{s:02d}" if h > 0 else f"{m}:{s:02d}"
+
+    if time_format == "start":
+        return fmt(seconds)
+    return f"{fmt(seconds)} - {fmt(end_seconds)}"
+
+
+def _label(group: SubtitleGroup, speaker_names: Optional[Dict[str, str]]) -> str:
+    """講者標籤；speaker_names 為 None 代表不顯示講者。"""
+    if speaker_names is None or not group.speaker:
+        return ""
+    return f"[{speaker_names.get(group.speaker) or group.speaker}]"
+
+
+def _with_label(group: SubtitleGroup, speaker_names: Optional[Dict[str, str]]) -> str:
+    label = _label(group, speaker_names)
+    return f"{label} {group.text}" if label else group.text
+
+
+async def iter_srt(
+    groups: AsyncIterable[SubtitleGroup], speaker_names: Optional[Dict[str, str]]
+) -> AsyncIterator[str]:
+    """SRT：`序號\\n時間\\n內容\\n`，列與列之間一個空行。"""
+    index = 0
+    async for group in groups:
+        index += 1
+        head = "" if index == 1 else "\n"
+        yield (
+            f"{head}{index}\n"
+            f"{format_time_srt(group.start)} --> {format_time_srt(group.end)}\n"
+            f"{_with_label(group, speaker_names)}\n"
+        )
+
+
+async def iter_vtt(
+    groups: AsyncIterable[SubtitleGroup], speaker_names: Optional[Dict[str, str]]
+) -> AsyncIterator[str]:
+    """VTT：`WEBVTT` 標頭後每列 `\\n時間\\n內容\\n`；沒有任何列時為 `WEBVTT\\n\\n`。"""
+    yield "WEBVTT\n"
+    empty = True
+    async for group in groups:
+        empty = False
+        yield (
+            f"\n{format_time_vtt(group.start)} --> {format_time_vtt(group.end)}\n"
+            f"{_with_label(group, speaker_names)}\n"
+        )
+    if empty:
+        yield "\n"
+
+
+async def iter_txt(
+    groups: AsyncIterable[SubtitleGroup],
+    speaker_names: Optional[Dict[str, str]],
+    time_format: str = "start",
+) -> AsyncIterator[str]:
+    """TXT（字幕模式）：每列 `時間戳 [講者] 內容`，以換行分隔、結尾不換行。"""
+    first = True
+    async for group in groups:
+        line = f"{format_timestamp(group.start, time_format, group.end)} {_with_label(group, speaker_names)}"
+        yield line if first else f"\n{line}"
+        first = False
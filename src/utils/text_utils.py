@@ -3,10 +3,11 @@
 職責：提供文本處理相關的工具函數
 """
 
+import bisect
 import difflib
 import re
 import unicodedata
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 # diarization 開啟時 full_text 內嵌的說話者標籤；對齊前需剝除（segments 文字裡沒有）
 _SPEAKER_LABEL_RE = re.compile(r'\[SPEAKER_\d+\]')
@@ -101,6 +102,104 @@ def strip_subtitle_punctuation(text: str) -> str:
     return result.strip()
 
 
+# ── 錨點對齊（align_segments_to_punctuated_text 用）──────────────────────────
+# difflib 對整份逐字稿做 SequenceMatcher 近似 O(n²)，長 CJK 逐字稿（數萬字）會主宰
+# 標點階段。改為先鎖定兩邊「各只出現一次」的 n-gram 作錨點，錨點之間的短缺口才交給
+# difflib；缺口仍太大就以較短的 n-gram 遞迴找錨點。
+_ANCHOR_NGRAM_SIZES = (8, 4)
+# 缺口 len(a) × len(b) 不超過此值就直接 difflib（短逐字稿整份走 difflib，行為與舊版相同）
+_DIRECT_ALIGN_MAX_CELLS = 250_000
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _unique_ngrams(text: str, n: int) -> Dict[str, int]:
+    """text 中只出現一次的 n-gram → 起點。"""
+    first: Dict[str, int] = {}
+    dup = set()
+    for i in range(len(text) - n + 1):
+        gram = text[i:i + n]
+        if gram in first:
+            dup.add(gram)
+        else:
+            first[gram] = i
+    for gram in dup:
+        del first[gram]
+    return first
+
+
+def _anchor_chain(a: str, b: str, n: int) -> List[Tuple[int, int]]:
+    """兩邊皆唯一的 n-gram 配對，取 (i, j) 皆遞增的最長鏈（LIS，O(m log m)）。"""
+    unique_b = _unique_ngrams(b, n)
+    pairs = [
+        (i, unique_b[gram])
+        for gram, i in sorted(_unique_ngrams(a, n).items(), key=lambda kv: kv[1])
+        if gram in unique_b
+    ]
+    if not pairs:
+        return []
+    tails: List[int] = []  # tails[k] = 長度 k+1 的鏈目前最小的結尾 j
+    tail_idx: List[int] = []
+    parent = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        parent[k] = tail_idx[pos - 1] if pos > 0 else -1
+    chain = []
+    k = tail_idx[-1]
+    while k != -1:
+        chain.append(pairs[k])
+        k = parent[k]
+    chain.reverse()
+    return chain
+
+
+def _anchored_opcodes(a: str, b: str, a_off: int = 0, b_off: int = 0, level: int = 0) -> List[Opcode]:
+    """與 `SequenceMatcher.get_opcodes()` 同形的對齊結果（索引已加上 offset）。"""
+    if not a and not b:
+        return []
+    if not a or not b:
+        tag = "delete" if a else "insert"
+        return [(tag, a_off, a_off + len(a), b_off, b_off + len(b))]
+    if len(a) * len(b) <= _DIRECT_ALIGN_MAX_CELLS or level >= len(_ANCHOR_NGRAM_SIZES):
+        sm = difflib.SequenceMatcher(a=a, b=b, autojunk=False)
+        return [
+            (tag, i1 + a_off, i2 + a_off, j1 + b_off, j2 + b_off)
+            for tag, i1, i2, j1, j2 in sm.get_opcodes()
+        ]
+
+    n = _ANCHOR_NGRAM_SIZES[level]
+    chain = _anchor_chain(a, b, n)
+    if not chain:
+        return _anchored_opcodes(a, b, a_off, b_off, level + 1)
+
+    # 錨點合併成 equal 區塊：同對角線且相接/重疊 → 延長；不同對角線而重疊 → 捨棄
+    blocks: List[List[int]] = []  # [i, j, size]
+    for i, j in chain:
+        if blocks:
+            bi, bj, size = blocks[-1]
+            if i - bi == j - bj and i <= bi + size:
+                blocks[-1][2] = max(size, i + n - bi)
+                continue
+            if i < bi + size or j < bj + size:
+                continue
+        blocks.append([i, j, n])
+
+    opcodes: List[Opcode] = []
+    pi = pj = 0
+    for i, j, size in blocks:
+        opcodes.extend(_anchored_opcodes(a[pi:i], b[pj:j], a_off + pi, b_off + pj, level + 1))
+        opcodes.append(("equal", a_off + i, a_off + i + size, b_off + j, b_off + j + size))
+        pi, pj = i + size, j + size
+    opcodes.extend(_anchored_opcodes(a[pi:], b[pj:], a_off + pi, b_off + pj, level + 1))
+    return opcodes
+
+
 def align_segments_to_punctuated_text(segments: List[Dict], punctuated_text: str) -> List[Dict]:
     """標點處理後，將 punctuated_text 的內容對齊回各 segment（把標點/句子分回各段）。
 
@@ -108,8 +207,10 @@ def align_segments_to_punctuated_text(segments: List[Dict], punctuated_text: str
     以容忍 Gemini 的增/刪/改字——舊版要求嚴格 1:1，Gemini 只要動一個字就整個 fallback，
     diarization 的 `[SPEAKER_XX]` 標籤更是必然破壞 1:1 → segments 永遠拿不到標點。
 
-    步驟：① 剝掉 full_text 的 `[SPEAKER_XX]` 標籤 ② difflib 對齊 segment↔punct 內容字符，
+    步驟：① 剝掉 full_text 的 `[SPEAKER_XX]` 標籤 ② 對齊 segment↔punct 內容字符，
     為每段找出在(剝標籤後)文字中的起點 ③ 按相鄰段起點切出含尾隨標點的 span。
+    ② 先以唯一 n-gram 錨點切開、只對錨點間缺口跑 difflib（`_anchored_opcodes`），
+    長逐字稿近線性；短逐字稿整份仍走 difflib。
     任何異常或無內容字 → fallback 回原始 segments（不打斷轉錄）。
     """
     if not segments or not punctuated_text:
@@ -131,12 +232,12 @@ def align_segments_to_punctuated_text(segments: List[Dict], punctuated_text: str
         if not punct_content or not seg_content:
             return segments
 
-        # difflib 對齊：seg 內容字 index → punct 內容字 index（容忍增刪改）
-        sm = difflib.SequenceMatcher(
-            a=[c for _, c in seg_content], b=[c for _, c in punct_content], autojunk=False
+        # 錨點 + difflib 對齊：seg 內容字 index → punct 內容字 index（容忍增刪改）
+        opcodes = _anchored_opcodes(
+            "".join(c for _, c in seg_content), "".join(c for _, c in punct_content)
         )
         map_arr: List = [None] * len(seg_content)
-        for tag, i1, i2, j1, _j2 in sm.get_opcodes():
+        for tag, i1, i2, j1, _j2 in opcodes:
             if tag == "equal":
                 for k in range(i2 - i1):
                     map_arr[i1 + k] = j1 + k
@@ -38,6 +38,15 @@ AUTO_SHUTDOWN_IDLE_MINUTES: int = int(os.getenv("AUTO_SHUTDOWN_IDLE_MINUTES", "5
 # SQS 行為
 SQS_LONG_POLL_SECONDS: int = 20          # receive_message WaitTimeSeconds
 SQS_VISIBILITY_TIMEOUT_SECONDS: int = 600  # 10 分鐘，單個任務最長處理時間
+# 預取：處理當前任務時，背景先收下一則訊息並下載 / 轉檔其音檔（GPU 推論期間不空轉）
+WORKER_PREFETCH: bool = os.getenv("WORKER_PREFETCH", "true").lower() == "true"
+# 預取訊息等待期間每隔幾秒延長一次 visibility（須明顯小於 SQS_VISIBILITY_TIMEOUT_SECONDS）
+PREFETCH_VISIBILITY_EXTEND_SECONDS: int = int(os.getenv("PREFETCH_VISIBILITY_EXTEND_SECONDS", "120"))
+# 標點移交：轉錄完把 PUNCTUATION 排進標點佇列（punctuation_jobs），由 CPU 消費端跑 LLM；
+# 開啟前須先部署消費端（python -m src.punctuation_worker 或 Web Server PUNCTUATION_QUEUE_DRAIN）
+PUNCTUATION_OFFLOAD: bool = os.getenv("PUNCTUATION_OFFLOAD", "false").lower() == "true"
+# 標點消費端：佇列空時多久再認領一次（秒）
+PUNCTUATION_POLL_SECONDS: int = int(os.getenv("PUNCTUATION_POLL_SECONDS", "5"))
 # 防餓死比例：連續處理 N 顆 priority 後，保留一個時隙讓一般佇列先選
 PRIORITY_RATIO: int = int(os.getenv("PRIORITY_RATIO", "3"))
 
@@ -0,0 +1,60 @@
+"""下一顆任務的音檔預取（Worker 用）。
+
+當前任務在 GPU 上推論時，sqs_consumer 的預取執行緒先收下一則訊息，並在此把其
+handoff 音檔下載到獨立暫存目錄、跑完 PREPARATION 的轉檔（convert_to_mp3）。
+輪到該任務時由 PrefetchedSource 直接交給 Orchestrator，省掉 S3 下載與 ffmpeg 的等待。
+
+預取只是加速：任何一步失敗都回 None，任務照舊走 S3Source 完整流程（錯誤也在那裡
+以正常路徑回報），不會因預取失敗讓任務失敗。
+"""
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.utils.audio_converter import compact_probe, convert_to_mp3
+from src.utils.config_loader import get_temp_dir
+from src.utils.media_probe import MediaProbe, resolve_probe
+from src.utils.storage.handoff import download_from_handoff
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass
+class PrefetchedAudio:
+    """預取完成的音檔：handoff_ext 用來確認與任務訊息一致，dir 整個歸預取所有。"""
+
+    task_id: str
+    handoff_ext: str
+    dir: Path
+    mp3_path: Path
+    mp3_probe: Optional[MediaProbe]
+
+    def discard(self) -> None:
+        """刪掉預取目錄（idempotent；任務處理完 / 放棄預取時呼叫）。"""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prefetch_audio(
+    task_id: str, handoff_ext: Optional[str], media_probe: Optional[dict] = None
+) -> Optional[PrefetchedAudio]:
+    """下載 handoff 音檔並轉成 Compact audio MP3；失敗或不適用回 None。
+
+    handoff_ext 為 None（舊版 Server 的 uploads/ fallback）需查 DB 才知道 tier，
+    不預取，交給 S3Source 處理。
+    """
+    if not handoff_ext:
+        return None
+    temp_dir = get_temp_dir(prefix="prefetch_")
+    try:
+        audio_path = download_from_handoff(task_id, handoff_ext, temp_dir / f"{task_id}.{handoff_ext}")
+        source_probe = resolve_probe(audio_path, media_probe)
+        mp3_path, transcoded = convert_to_mp3(audio_path, source_probe)
+        mp3_probe = compact_probe(source_probe, mp3_path, transcoded)
+    except Exception as e:
+        log.warning("worker.prefetch.audio_failed", task_id=task_id, error=str(e))
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return None
+    log.info("worker.prefetch.audio_ready", task_id=task_id, transcoded=transcoded)
+    return PrefetchedAudio(task_id, handoff_ext, temp_dir, mp3_path, mp3_probe)
@@ -0,0 +1,70 @@
+"""
+標點佇列消費端主迴圈（CPU 機器）
+
+職責：
+- 從 punctuation_jobs 認領 GPU Worker 轉錄完、移交過來的任務
+- 以 TranscriptionOrchestrator.run_punctuation 跑 LLM 標點、對齊、繁簡轉換並收尾
+- 不載入任何模型；一次處理一筆，要更多吞吐就多開幾個 process / 機器
+"""
+
+import os
+import signal
+import socket
+import time
+
+from src.database.repositories.llm_cache_repo import sync_llm_cache
+from src.database.repositories.punctuation_queue_repo import claim_sync
+from src.services.progress_store import MongoProgressStore
+from src.services.utils.punctuation_processor import PunctuationProcessor
+from src.transcription.orchestrator import TranscriptionOrchestrator
+from src.worker_core.config import MONGODB_DB_NAME, PUNCTUATION_POLL_SECONDS
+from src.worker_core.db import get_db
+from src.utils.logger import get_logger
+import src.worker_core.state as state
+
+log = get_logger(__name__)
+
+
+def _signal_handler(signum, frame):
+    state.shutdown = True
+    log.info("punctuation_worker.shutdown.signal_received", signal=signum)
+
+
+def run_next(orchestrator: TranscriptionOrchestrator, consumer: str) -> bool:
+    """認領並處理一筆。回傳 False 代表佇列目前是空的。"""
+    job = claim_sync(orchestrator.db, consumer)
+    if job is None:
+        return False
+    orchestrator.run_punctuation(job)
+    return True
+
+
+def main() -> None:
+    """標點消費端主迴圈"""
+    signal.signal(signal.SIGINT, _signal_handler)
+    signal.signal(signal.SIGTERM, _signal_handler)
+
+    db = get_db()
+    consumer = f"{socket.gethostname()}:{os.getpid()}"
+    orchestrator = TranscriptionOrchestrator(
+        db=db,
+        progress_store=MongoProgressStore(db.task_progress),
+        whisper=None,
+        punctuation=PunctuationProcessor(cache=sync_llm_cache(db)),
+    )
+    log.info("punctuation_worker.started", consumer=consumer, db=MONGODB_DB_NAME)
+
+    while not state.shutdown:
+        try:
+            if not run_next(orchestrator, consumer):
+                time.sleep(PUNCTUATION_POLL_SECONDS)
+        except Exception as e:
+            log.error("punctuation_worker.loop.error", error=str(e), exc_info=True)
+            try:
+                import sentry_sdk
+                sentry_sdk.capture_exception(e)
+            except ImportError:
+                pass
+            time.sleep(5)
+
+    log.info("punctuation_worker.stopped")
@@ -5,6 +5,7 @@ Spot Instance 被回收前約 2 分鐘，EC2 metadata endpoint 會回傳 200。
 背景執行緒每 30 秒輪詢一次；偵測到中斷後：
 1. 把當前任務重置為 pending，讓其他 Worker 接手
 2. 縮短 SQS 訊息的 visibility timeout，讓其他 Worker 30 秒內可見
+3. 預取中的下一則訊息尚未開始處理，visibility 直接歸 0 釋放
 """
 
 import time
@@ -67,6 +68,18 @@ def _handle_spot_interruption(sqs) -> None:
         except Exception as e:
             log.error("spot.sqs.visibility_change_failed", error=str(e))
 
+    # 預取的訊息還沒動過任務狀態（仍是 pending），只需立即讓出訊息
+    if state.prefetched_receipt_handle and state.prefetched_queue_url:
+        try:
+            sqs.change_message_visibility(
+                QueueUrl=state.prefetched_queue_url,
+                ReceiptHandle=state.prefetched_receipt_handle,
+                VisibilityTimeout=0,
+            )
+            log.info("spot.sqs.prefetched_released", task_id=state.prefetched_task_id)
+        except Exception as e:
+            log.error("spot.sqs.prefetched_release_failed", error=str(e))
+
 
 def shutdown_instance() -> None:
     """關閉當前 EC2 實例（用於空閒自動關機）"""
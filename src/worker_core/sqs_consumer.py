@@ -6,6 +6,8 @@ SQS Consumer 主迴圈
 - 驗證 HMAC 簽名，拒絕無效訊息
 - 追蹤空閒時間，超過閾值後呼叫 EC2 自動關機
 - 啟動 Spot 中斷監控背景執行緒
+- 預取：當前任務處理期間，背景先收下一則訊息（照 priority/streak 規則）、驗簽並
+  下載 / 轉好音檔，持有期間定期延長 visibility；關機或 Spot 中斷時立即釋放
 """
 
 import sys
@@ -15,6 +17,8 @@ import hmac
 import hashlib
 import signal
 import threading
+from dataclasses import dataclass
+from typing import Optional
 
 import boto3
 
@@ -30,6 +34,8 @@ from src.worker_core.config import (
     SQS_LONG_POLL_SECONDS,
     SQS_VISIBILITY_TIMEOUT_SECONDS,
     SPOT_CHECK_INTERVAL_SECONDS,
+    WORKER_PREFETCH,
+    PREFETCH_VISIBILITY_EXTEND_SECONDS,
 )
 from src.worker_core.priority import (
     NORMAL,
@@ -44,6 +50,7 @@ from src.worker_core.heartbeat import (
     write_heartbeat,
 )
 from src.worker_core.model_cache import get_whisper_processor, get_diarization_pipeline
+from src.worker_core.prefetch import PrefetchedAudio, prefetch_audio
 from src.worker_core.spot_monitor import run_spot_monitor, shutdown_instance
 from src.worker_core.transcription_job import process_task
 from src.services.progress_store import MongoProgressStore
@@ -106,27 +113,154 @@ def _poll_queues(sqs, queues: dict, sequence: list):
     return None, None
 
 
-def _handle_message(sqs, queue_url: str, source: str, msg: dict, progress_store) -> bool:
-    """處理單則訊息。回傳 True 代表確實處理了一顆任務（供 streak 計數），
+@dataclass
+class _Job:
+    """一則已驗簽的訊息。held=True 代表來自預取（曾被持有、visibility 已續期過）。"""
 
-    簽章無效則丟棄並回 False（不計入 streak）。
-    """
+    body: dict
+    source: str
+    queue_url: str
+    receipt_handle: str
+    reset_after: bool
+    held: bool = False
+    audio: Optional[PrefetchedAudio] = None
+
+    @property
+    def task_id(self) -> Optional[str]:
+        return self.body.get("task_id")
+
+
+def _accept_message(sqs, queue_url: str, source: str, msg: dict, reset_after: bool) -> Optional[_Job]:
+    """解析並驗簽。簽章無效則丟棄並回 None（不計入 streak）。"""
     body = json.loads(msg["Body"])
     receipt_handle = msg["ReceiptHandle"]
 
     if not _verify_message_signature(body):
         sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=receipt_handle)
         log.warning("sqs.message.dropped", task_id=body.get("task_id", "unknown"), reason="invalid_signature")
-        return False
+        return None
+    return _Job(body, source, queue_url, receipt_handle, reset_after)
+
+
+def _release_job(sqs, job: _Job) -> None:
+    """放棄尚未開始處理的訊息：visibility 歸 0 讓其他 Worker 立即接手，刪掉預取音檔。"""
+    if job.audio:
+        job.audio.discard()
+    try:
+        sqs.change_message_visibility(
+            QueueUrl=job.queue_url, ReceiptHandle=job.receipt_handle, VisibilityTimeout=0,
+        )
+        log.info("sqs.message.released", task_id=job.task_id, source_queue=job.source)
+    except Exception as e:
+        log.error("sqs.message.release_failed", task_id=job.task_id, error=str(e))
+
+
+class _Prefetcher(threading.Thread):
+    """當前任務處理期間，背景收下一則訊息並預取音檔。
+
+    streak 為「當前任務處理完後」的值，輪詢順序與序列式迴圈下一輪完全相同。
+    收到訊息後持有到 finish()：每 PREFETCH_VISIBILITY_EXTEND_SECONDS 延長一次
+    visibility，避免當前任務跑很久時預取的訊息被重送給別的 Worker。
+    最多持有一則；主迴圈 finish() 後一律接手或釋放，不會遺留。
+    """
+
+    def __init__(self, sqs, queues: dict, streak: int):
+        super().__init__(daemon=True, name="Prefetcher")
+        self._sqs = sqs
+        self._queues = queues
+        self._streak = streak
+        self._done = threading.Event()
+        self._job: Optional[_Job] = None
+
+    def run(self) -> None:
+        try:
+            job = self._receive()
+            if job is None:
+                return
+            self._job = job
+            state.prefetched_queue_url = job.queue_url
+            state.prefetched_task_id = job.task_id
+            state.prefetched_receipt_handle = job.receipt_handle
+            log.info("worker.prefetch.received", task_id=job.task_id, source_queue=job.source)
+            held_at = time.monotonic()
+            if not state.shutdown:
+                job.audio = prefetch_audio(
+                    job.task_id, job.body.get("handoff_ext"), job.body.get("media_probe"),
+                )
+            self._keep_visible(job, held_at)
+        except Exception as e:
+            log.error("worker.prefetch.error", error=str(e), exc_info=True)
+
+    def _receive(self) -> Optional[_Job]:
+        first, second, reset_after = poll_order(self._streak, PRIORITY_RATIO)
+        sequence = build_poll_sequence(first, second, self._queues, SQS_LONG_POLL_SECONDS)
+        while not self._done.is_set() and not state.shutdown:
+            msg, source = _poll_queues(self._sqs, self._queues, sequence)
+            if msg is None:
+                continue
+            job = _accept_message(self._sqs, self._queues[source], source, msg, reset_after)
+            if job is not None:
+                job.held = True
+                return job
+        return None
+
+    def _keep_visible(self, job: _Job, held_at: float) -> None:
+        if state.shutdown:
+            return
+        last = held_at
+        while not self._done.wait(max(0.0, PREFETCH_VISIBILITY_EXTEND_SECONDS - (time.monotonic() - last))):
+            if state.shutdown:
+                return
+            self._sqs.change_message_visibility(
+                QueueUrl=job.queue_url,
+                ReceiptHandle=job.receipt_handle,
+                VisibilityTimeout=SQS_VISIBILITY_TIMEOUT_SECONDS,
+            )
+            last = time.monotonic()
+            log.debug("worker.prefetch.visibility_extended", task_id=job.task_id)
+
+    def finish(self) -> Optional[_Job]:
+        """停止預取並交出持有的訊息（可能為 None）。
+
+        關機中只等一個 long-poll 的長度，預取的轉檔還沒跑完就不等了——
+        訊息照樣交出由主迴圈釋放，殘留的暫存檔隨實例回收。
+        """
+        self._done.set()
+        self.join(timeout=SQS_LONG_POLL_SECONDS + 5 if state.shutdown else None)
+        state.prefetched_task_id = None
+        state.prefetched_receipt_handle = None
+        state.prefetched_queue_url = None
+        return self._job
+
+
+def _handle_job(sqs, job: _Job, progress_store) -> None:
+    """處理單則已驗簽的訊息，處理完刪除（Spot 中斷時保留讓其他 Worker 重跑）。"""
+    task_id = job.task_id
+    if job.held:
+        # 預取期間的續期只為「等待」；開始處理時重給完整的處理時間預算
+        try:
+            sqs.change_message_visibility(
+                QueueUrl=job.queue_url,
+                ReceiptHandle=job.receipt_handle,
+                VisibilityTimeout=SQS_VISIBILITY_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            log.warning("sqs.message.visibility_reset_failed", task_id=task_id, error=str(e))
 
-    task_id = body.get("task_id")
     state.current_task_id = task_id
-    state.current_receipt_handle = receipt_handle
-    state.current_queue_url = queue_url  # SpotMonitor 縮短 visibility 需打對佇列
+    state.current_receipt_handle = job.receipt_handle
+    state.current_queue_url = job.queue_url  # SpotMonitor 縮短 visibility 需打對佇列
     write_heartbeat(status="processing", last_task_id=task_id)
-    log.info("sqs.message.received", task_id=task_id, source_queue=source)
+    log.info(
+        "sqs.message.received", task_id=task_id, source_queue=job.source,
+        prefetched=job.audio is not None,
+    )
 
-    process_task(body, progress_store=progress_store)
+    try:
+        process_task(job.body, progress_store=progress_store, prefetched=job.audio)
+    finally:
+        if job.audio:
+            job.audio.discard()
 
     state.current_task_id = None
     state.current_receipt_handle = None
@@ -135,11 +269,10 @@ def _handle_message(sqs, queue_url: str, source: str, msg: dict, progress_store)
 
     if state.spot_interruption_detected:
         log.warning("sqs.message.retained", reason="spot_interruption")
-        return True
+        return
 
-    sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=receipt_handle)
-    log.debug("sqs.message.deleted", task_id=task_id, source_queue=source)
-    return True
+    sqs.delete_message(QueueUrl=job.queue_url, ReceiptHandle=job.receipt_handle)
+    log.debug("sqs.message.deleted", task_id=task_id, source_queue=job.source)
 
 
 def main() -> None:
@@ -162,6 +295,7 @@ def main() -> None:
         whisper_model=DEFAULT_MODEL,
         db=MONGODB_DB_NAME,
         auto_shutdown_minutes=AUTO_SHUTDOWN_IDLE_MINUTES,
+        prefetch=WORKER_PREFETCH,
     )
 
     monitor_thread = threading.Thread(
@@ -184,31 +318,47 @@ def main() -> None:
     idle_start = None
     idle_threshold = AUTO_SHUTDOWN_IDLE_MINUTES * 60
     streak = 0  # 連續處理的 priority 任務數（in-memory，重啟歸零）
+    next_job: Optional[_Job] = None  # 預取到的下一則訊息
 
     while not state.shutdown:
         try:
-            first, second, reset_after = poll_order(streak, PRIORITY_RATIO)
-            sequence = build_poll_sequence(first, second, queues, SQS_LONG_POLL_SECONDS)
-            msg, source = _poll_queues(sqs, queues, sequence)
-
-            if msg is None:
-                # 兩佇列皆空才算一個 idle tick
-                if idle_start is None:
-                    idle_start = time.time()
-                    log.info("worker.idle", auto_shutdown_minutes=AUTO_SHUTDOWN_IDLE_MINUTES)
-
-                if time.time() - idle_start >= idle_threshold:
-                    log.info("worker.idle.shutdown_triggered", idle_minutes=AUTO_SHUTDOWN_IDLE_MINUTES)
-                    write_heartbeat(status="shutting_down")
-                    shutdown_instance()
-                    break
-                continue
+            if next_job is not None:
+                job, next_job = next_job, None
+            else:
+                first, second, reset_after = poll_order(streak, PRIORITY_RATIO)
+                sequence = build_poll_sequence(first, second, queues, SQS_LONG_POLL_SECONDS)
+                msg, source = _poll_queues(sqs, queues, sequence)
+
+                if msg is None:
+                    # 兩佇列皆空才算一個 idle tick
+                    if idle_start is None:
+                        idle_start = time.time()
+                        log.info("worker.idle", auto_shutdown_minutes=AUTO_SHUTDOWN_IDLE_MINUTES)
+
+                    if time.time() - idle_start >= idle_threshold:
+                        log.info("worker.idle.shutdown_triggered", idle_minutes=AUTO_SHUTDOWN_IDLE_MINUTES)
+                        write_heartbeat(status="shutting_down")
+                        shutdown_instance()
+                        break
+                    continue
+
+                idle_start = None
+                job = _accept_message(sqs, queues[source], source, msg, reset_after)
+                if job is None:
+                    continue
 
             idle_start = None
-
-            processed = _handle_message(sqs, queues[source], source, msg, progress_store)
-            if processed:
-                streak = next_streak(streak, reset_after, source)
+            # 預取下一則用的是「本顆處理完後」的 streak，與序列式處理的下一輪相同
+            after = next_streak(streak, job.reset_after, job.source)
+            prefetcher = _Prefetcher(sqs, queues, after) if WORKER_PREFETCH else None
+            if prefetcher:
+                prefetcher.start()
+            try:
+                _handle_job(sqs, job, progress_store)
+            finally:
+                if prefetcher:
+                    next_job = prefetcher.finish()
+            streak = after
 
             if state.spot_interruption_detected:
                 break
@@ -223,5 +373,9 @@ def main() -> None:
                 pass
             time.sleep(5)
 
+    # 關機 / Spot 中斷：預取到但還沒開始處理的訊息立即讓出
+    if next_job is not None:
+        _release_job(sqs, next_job)
+
     write_heartbeat(status="stopped")
     log.info("worker.stopped")
@@ -7,6 +7,8 @@ Worker 執行時共享狀態
 - current_task_id / current_receipt_handle: 供 SpotMonitor 執行緒重置任務用
 - current_queue_url: 當前處理中訊息所屬的佇列 URL（priority 或 normal）；
   SpotMonitor change_message_visibility 必須打到正確佇列，不可用全域 SQS_QUEUE_URL
+- prefetched_*: 預取中、尚未開始處理的下一則訊息；Spot 中斷時由 SpotMonitor
+  立即釋放（visibility 歸 0），讓其他 Worker 直接接手
 
 Signal handler 的註冊在 sqs_consumer.main() 中執行，
 避免 import 時產生副作用。
@@ -19,3 +21,6 @@ spot_interruption_detected: bool = False
 current_task_id: Optional[str] = None
 current_receipt_handle: Optional[str] = None
 current_queue_url: Optional[str] = None
+prefetched_task_id: Optional[str] = None
+prefetched_receipt_handle: Optional[str] = None
+prefetched_queue_url: Optional[str] = None
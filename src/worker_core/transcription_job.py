@@ -1,21 +1,26 @@
 """轉錄任務 Worker 入口(薄殼)。
 
-解析 SQS 訊息 → SQS 重送 dedup → 建 S3Source → 呼叫統一 TranscriptionOrchestrator。
+解析 SQS 訊息 → SQS 重送 dedup → 建 S3Source(有預取則包成 PrefetchedSource)
+→ 呼叫統一 TranscriptionOrchestrator。PUNCTUATION_OFFLOAD 開啟時標點移交標點佇列,
+GPU 在轉錄完就接下一顆。
 轉錄 pipeline 本身在 src/transcription/orchestrator.py,Web Server 與 Worker 共用同一份。
 """
 from typing import Optional
 
 from structlog.contextvars import bind_contextvars, clear_contextvars
 
+from src.database.repositories.llm_cache_repo import sync_llm_cache
 from src.models.worker_job import TranscriptionJob
 from src.services.progress_store import Phase, ProgressStore
 from src.services.utils.diarization_processor import DiarizationProcessor
 from src.services.utils.punctuation_processor import PunctuationProcessor
-from src.transcription.audio_source import S3Source
+from src.transcription.audio_source import PrefetchedSource, S3Source
 from src.transcription.orchestrator import TranscriptionOrchestrator
 from src.utils.logger import get_logger
+from src.worker_core.config import PUNCTUATION_OFFLOAD
 from src.worker_core.db import get_db, update_task
 from src.worker_core.model_cache import get_diarization_pipeline, get_whisper_processor
+from src.worker_core.prefetch import PrefetchedAudio
 
 log = get_logger(__name__)
 
@@ -36,10 +41,16 @@ def _should_skip(task_doc: Optional[dict]) -> bool:
     return bool(task_doc.get("deleted")) or task_doc.get("status") in _SKIP_STATUSES
 
 
-def process_task(message_body: dict, progress_store: ProgressStore) -> None:
+def process_task(
+    message_body: dict,
+    progress_store: ProgressStore,
+    prefetched: Optional[PrefetchedAudio] = None,
+) -> None:
     """處理單個轉錄任務(由 sqs_consumer 呼叫)。
 
     `message_body` 已被 sqs_consumer 驗 HMAC 並 pop `_signature`。
+    `prefetched` 為預取執行緒已下載並轉好的音檔;跳過任務時不會用到,
+    其目錄由 sqs_consumer 在處理完後統一 discard。
     """
     job = TranscriptionJob.model_validate(message_body)
     task_id = job.task_id
@@ -67,6 +78,10 @@ def process_task(message_body: dict, progress_store: ProgressStore) -> None:
             ui_language = (full_doc.get("config") or {}).get("ui_language")
 
             audio_source = S3Source(task_id, job.handoff_ext, user_tier)
+            if prefetched and prefetched.handoff_ext == job.handoff_ext:
+                audio_source = PrefetchedSource(
+                    audio_source, prefetched.mp3_path, prefetched.mp3_probe, prefetched.dir,
+                )
             diarization = (
                 DiarizationProcessor(get_diarization_pipeline()) if job.use_diarization else None
             )
@@ -74,12 +89,13 @@ def process_task(message_body: dict, progress_store: ProgressStore) -> None:
                 db=db,
                 progress_store=progress_store,
                 whisper=get_whisper_processor(job.language),
-                punctuation=PunctuationProcessor(),
+                punctuation=PunctuationProcessor(cache=sync_llm_cache(db)),
                 diarization=diarization,
             )
             orchestrator.run(
                 task_id, audio_source, job.language, job.use_chunking, job.use_punctuation,
                 job.punctuation_provider, job.use_diarization, job.max_speakers, ui_language,
+                media_probe=job.media_probe, defer_punctuation=PUNCTUATION_OFFLOAD,
             )
         except Exception as e:
             # orchestrator.run() 自己處理 pipeline 失敗;這裡只接薄殼 setup 階段的例外
@@ -69,7 +69,9 @@ pytestmark = pytest.mark.skipif(
 class FakeWhisper:
     """罐頭轉錄結果——不碰真 Whisper。"""
 
-    def transcribe(self, mp3_path, language=None, progress_callback=None):
+    def transcribe(
+        self, mp3_path, language=None, progress_callback=None, media_probe=None, pcm=None
+    ):
         if progress_callback is not None:
             progress_callback(1.0, 1.0)
         return "hello world", [
@@ -77,7 +79,9 @@ class FakeWhisper:
             {"text": "world", "start": 0.5, "end": 1.0},
         ], "en"
 
-    def transcribe_in_chunks(self, mp3_path, language=None, progress_callback=None):
+    def transcribe_in_chunks(
+        self, mp3_path, language=None, progress_callback=None, media_probe=None, pcm=None
+    ):
         return self.transcribe(mp3_path, language, progress_callback)
 
 
@@ -102,7 +106,7 @@ def sync_client():
 def sync_db(sync_client):
     """orchestrator（sync pymongo）視角的 test DB；每個 test 清空 collection。"""
     database = sync_client[_TEST_DB]
-    for coll in ("tasks", "transcriptions", "segments", "reservations", "users"):
+    for coll in ("tasks", "transcriptions", "segments", "segment_buckets", "reservations", "users"):
         database[coll].delete_many({})
     return database
 
@@ -0,0 +1,167 @@
+"""PATCH /transcriptions/{id}/segments 增量更新端點測試。
+
+monkeypatch TaskRepository / SegmentRepository / TranscriptionRepository，不起真的
+Mongo；apply_patch 的 bucket 操作在 tests/unit/test_segment_repo.py 覆蓋（需要 Mongo）。
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.requests import Request
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.database.repositories import segment_repo, transcription_repo  # noqa: E402
+from src.database.repositories.segment_repo import SegmentVersionConflict  # noqa: E402
+from src.database.repositories.transcription_repo import validate_splices  # noqa: E402
+from src.models.transcription import SegmentPatchRequest  # noqa: E402
+from src.routers import transcriptions  # noqa: E402
+
+CURRENT_USER = {"_id": "507f1f77bcf86cd799439011"}
+
+
+class _FakeTaskRepo:
+    status = "completed"
+    touched = 0
+
+    def __init__(self, db):
+        pass
+
+    async def get_by_id_and_user(self, task_id, user_id):
+        return {"_id": task_id, "status": self.status}
+
+    async def update(self, task_id, fields):
+        _FakeTaskRepo.touched += 1
+
+
+class _FakeSegmentRepo:
+    version = 3
+    calls = []
+
+    def __init__(self, db):
+        pass
+
+    async def apply_patch(self, task_id, base_version, ops, before_write=None):
+        if base_version != self.version:
+            raise SegmentVersionConflict(self.version)
+        segment_repo.validate_patch_ops(ops, 10)
+        if before_write is not None:
+            await before_write()
+        _FakeSegmentRepo.calls.append(ops)
+        delta = sum({"split": 1, "merge": -1}.get(op["op"], 0) for op in ops)
+        return {"_id": task_id, "version": self.version + 1, "segment_count": 10 + delta}
+
+
+class _FakeTranscriptionRepo:
+    text = "hello world"
+
+    def __init__(self, db):
+        pass
+
+    async def get_text_length(self, task_id):
+        return None if self.text is None else len(self.text)
+
+    async def apply_splices(self, task_id, splices, expected_length):
+        if len(_FakeTranscriptionRepo.text) != expected_length:
+            return False
+        text = _FakeTranscriptionRepo.text
+        for s in splices:
+            text = text[:s["offset"]] + s["insert"] + text[s["offset"] + s["delete"]:]
+        _FakeTranscriptionRepo.text = text
+        return True
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    monkeypatch.setattr(transcriptions, "TaskRepository", _FakeTaskRepo)
+    monkeypatch.setattr(segment_repo, "SegmentRepository", _FakeSegmentRepo)
+    monkeypatch.setattr(transcription_repo, "TranscriptionRepository", _FakeTranscriptionRepo)
+    monkeypatch.setattr(_FakeTaskRepo, "status", "completed")
+    monkeypatch.setattr(_FakeSegmentRepo, "calls", [])
+    monkeypatch.setattr(_FakeTranscriptionRepo, "text", "hello world")
+
+
+def _request():
+    return Request({"type": "http", "method": "PATCH", "path": "/", "query_string": b"", "headers": []})
+
+
+async def _patch(**body):
+    return await transcriptions.patch_segments(
+        request=_request(), task_id="t1", patch=SegmentPatchRequest(**body),
+        current_user=CURRENT_USER, db=object(),
+    )
+
+
+def test_validate_splices_sequential_offsets():
+    # 第二個 splice 的 offset 以第一個套用後的文字為準
+    assert validate_splices([{"offset": 0, "delete": 5, "insert": "hi"},
+                             {"offset": 2, "delete": 0, "insert": "!"}], 11) == 9
+    with pytest.raises(ValueError):
+        validate_splices([{"offset": 10, "delete": 2, "insert": ""}], 11)
+
+
+def test_request_model_rejects_unknown_op():
+    with pytest.raises(ValidationError):
+        SegmentPatchRequest(base_version=0, ops=[{"op": "delete", "index": 0}])
+
+
+async def test_patch_applies_ops_and_splices():
+    result = await _patch(
+        base_version=3,
+        ops=[{"op": "split", "index": 2, "at": 1}, {"op": "edit", "index": 0, "text": "x"}],
+        text_splices=[{"offset": 6, "delete": 5, "insert": "there"}],
+    )
+    assert result == {"task_id": "t1", "version": 4, "segment_count": 11, "applied": 2, "text_length": 11}
+    assert _FakeTranscriptionRepo.text == "hello there"
+    # 沒帶的欄位不會變成 None 寫進 segment
+    assert _FakeSegmentRepo.calls[0][1] == {"op": "edit", "index": 0, "text": "x"}
+
+
+async def test_stale_version_conflicts_without_touching_text():
+    with pytest.raises(HTTPException) as exc:
+        await _patch(base_version=2, text_splices=[{"offset": 0, "delete": 5, "insert": "bye"}])
+    assert exc.value.status_code == 409
+    assert exc.value.detail["code"] == "TRANSCRIPTION_VERSION_CONFLICT"
+    assert exc.value.detail["params"]["current_version"] == 3
+    assert _FakeTranscriptionRepo.text == "hello world"
+
+
+async def test_invalid_ops_and_splices_are_422():
+    with pytest.raises(HTTPException) as exc:
+        await _patch(base_version=3, ops=[{"op": "merge", "index": 9}])
+    assert exc.value.status_code == 422
+    with pytest.raises(HTTPException) as exc:
+        await _patch(base_version=3, text_splices=[{"offset": 20, "delete": 0, "insert": "x"}])
+    assert exc.value.status_code == 422
+    assert _FakeSegmentRepo.calls == []
+
+
+async def test_concurrent_full_text_save_is_conflict(monkeypatch):
+    async def changed_length(self, task_id, splices, expected_length):
+        return False
+
+    monkeypatch.setattr(_FakeTranscriptionRepo, "apply_splices", changed_length)
+    with pytest.raises(HTTPException) as exc:
+        await _patch(
+            base_version=3,
+            ops=[{"op": "edit", "index": 0, "text": "x"}],
+            text_splices=[{"offset": 0, "delete": 0, "insert": "x"}],
+        )
+    assert exc.value.status_code == 409
+    # 全文 splice 在寫 segments 前：衝突時 segments 一筆都沒動
+    assert _FakeSegmentRepo.calls == []
+
+
+async def test_incomplete_task_rejected(monkeypatch):
+    monkeypatch.setattr(_FakeTaskRepo, "status", "processing")
+    with pytest.raises(HTTPException) as exc:
+        await _patch(base_version=3)
+    assert exc.value.status_code == 400
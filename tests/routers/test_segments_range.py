@@ -0,0 +1,137 @@
+"""/transcriptions/{id}/segments/range 分段讀取端點測試。
+
+monkeypatch TaskRepository / SegmentRepository（以 list 模擬分桶的索引查詢），
+不起真的 Mongo；repository 本身的時間定位在 tests/unit/test_segment_repo.py 覆蓋。
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.database.repositories import segment_repo  # noqa: E402
+from src.routers import transcriptions  # noqa: E402
+
+CURRENT_USER = {"_id": "507f1f77bcf86cd799439011"}
+SEGMENTS = [{"start": float(i), "end": i + 0.9, "text": f"s{i}"} for i in range(30)]
+
+
+class _FakeTaskRepo:
+    def __init__(self, db):
+        pass
+
+    async def get_by_id_and_user(self, task_id, user_id):
+        return {"_id": task_id, "status": "completed", "speaker_names": {"SPEAKER_00": "A"}}
+
+
+class _FakeSegmentRepo:
+    updated_at = 100
+
+    def __init__(self, db):
+        pass
+
+    async def get_header(self, task_id):
+        return {"_id": task_id, "storage": "buckets", "segment_count": len(SEGMENTS),
+                "updated_at": self.updated_at}
+
+    async def index_at_time(self, task_id, t, header):
+        return next((i for i, s in enumerate(SEGMENTS) if s["end"] > t), len(SEGMENTS))
+
+    async def index_starting_from(self, task_id, t, header):
+        return next((i for i, s in enumerate(SEGMENTS) if s["start"] >= t), len(SEGMENTS))
+
+    async def get_range(self, task_id, start, end):
+        return SEGMENTS[start:end]
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    monkeypatch.setattr(transcriptions, "TaskRepository", _FakeTaskRepo)
+    monkeypatch.setattr(segment_repo, "SegmentRepository", _FakeSegmentRepo)
+
+
+def _request(params, headers=None):
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": urlencode(params).encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+async def _get(headers=None, **params):
+    kwargs = dict(start_time=None, end_time=None, around=None, before=50, cursor=None, limit=200)
+    kwargs.update(params)
+    query = {k: v for k, v in params.items() if v is not None}
+    response = await transcriptions.get_segments_range(
+        request=_request(query, headers), task_id="t1",
+        current_user=CURRENT_USER, db=object(), **kwargs,
+    )
+    return response
+
+
+def _body(response):
+    return json.loads(response.body)
+
+
+async def test_cursor_pages_through_all_segments():
+    seen, cursor = [], None
+    while True:
+        body = _body(await _get(cursor=cursor, limit=12))
+        seen.extend(body["segments"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == SEGMENTS
+    assert body["prev_cursor"] is not None
+
+
+async def test_time_window_returns_overlapping_segments():
+    body = _body(await _get(start_time=5.5, end_time=9.0))
+    assert [s["text"] for s in body["segments"]] == ["s5", "s6", "s7", "s8"]
+    assert (body["start_index"], body["end_index"]) == (5, 9)
+
+
+async def test_around_centers_on_timestamp():
+    body = _body(await _get(around=20.2, before=3, limit=5))
+    assert (body["start_index"], body["end_index"]) == (17, 22)
+
+
+async def test_weak_etag_and_not_modified():
+    first = await _get(limit=5)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    again = await _get(headers={"If-None-Match": etag}, limit=5)
+    assert again.status_code == 304
+
+    _FakeSegmentRepo.updated_at = 101  # 內容被編輯過 → ETag 變
+    try:
+        assert (await _get(headers={"If-None-Match": etag}, limit=5)).status_code == 200
+    finally:
+        _FakeSegmentRepo.updated_at = 100
+
+
+@pytest.mark.parametrize("params", [
+    {"around": 1.0, "cursor": "x"},
+    {"start_time": 1.0},
+    {"start_time": 5.0, "end_time": 1.0},
+])
+async def test_invalid_mode_combinations_rejected(params):
+    with pytest.raises(HTTPException) as exc:
+        await _get(**params)
+    assert exc.value.status_code == 400
+
+
+async def test_garbage_cursor_rejected():
+    with pytest.raises(HTTPException) as exc:
+        await _get(cursor="not-a-cursor")
+    assert exc.value.status_code == 400
@@ -0,0 +1,112 @@
+"""任務列表（GET /tasks）批次合併進度的測試。
+
+直接呼叫 get_tasks，用假 TaskRepository 記錄查詢參數：
+- status=active 推進 Mongo 查詢（status_in），不再撈一頁再在記憶體過濾
+- 不再對每個任務呼叫 get_task（get_by_id 不應被呼叫）
+- ProgressStore 整頁只讀一次 get_many，且只查進行中的任務
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+
+from src.routers import tasks as tasks_router  # noqa: E402
+from src.services.progress_store import InMemoryProgressStore, Phase  # noqa: E402
+from src.services.task_service import TaskService  # noqa: E402
+
+
+class FakeTaskRepo:
+    def __init__(self, tasks):
+        self.db = object()
+        self._tasks = tasks
+        self.find_calls = []
+        self.count_calls = []
+
+    async def find_by_user(self, user_id, skip=0, limit=20, **query):
+        self.find_calls.append(query)
+        status_in = query.get("status_in")
+        rows = [t for t in self._tasks if not status_in or t["status"] in status_in]
+        return [dict(t) for t in rows[skip:skip + limit]]
+
+    async def count_by_user(self, user_id, **query):
+        self.count_calls.append(query)
+        status_in = query.get("status_in")
+        return len([t for t in self._tasks if not status_in or t["status"] in status_in])
+
+    async def get_by_id(self, task_id):
+        raise AssertionError("列表不應逐筆 get_by_id")
+
+
+class CountingStore(InMemoryProgressStore):
+    def __init__(self):
+        super().__init__()
+        self.get_many_calls = []
+
+    def get(self, task_id):
+        raise AssertionError("列表不應逐筆讀 progress")
+
+    def get_many(self, task_ids):
+        ids = list(task_ids)
+        self.get_many_calls.append(ids)
+        return super().get_many(ids)
+
+
+@pytest.fixture(autouse=True)
+def _retention(monkeypatch):
+    async def _days(db, user_id):
+        return 7
+    monkeypatch.setattr(tasks_router, "get_user_retention_days", _days)
+
+
+def _service(tasks):
+    store = CountingStore()
+    return TaskService(FakeTaskRepo(tasks), progress_store=store), store
+
+
+TASKS = [
+    {"_id": "done1", "status": "completed"},
+    {"_id": "run1", "status": "processing"},
+    {"_id": "wait1", "status": "pending"},
+    {"_id": "fail1", "status": "failed"},
+]
+
+
+async def test_list_merges_progress_with_one_batched_read():
+    svc, store = _service(TASKS)
+    store.set_phase("run1", Phase.TRANSCRIPTION, 0.5, message="轉錄中", details={"eta": 3})
+
+    resp = await tasks_router.get_tasks(task_service=svc, current_user={"_id": "u1"})
+
+    by_id = {t["task_id"]: t for t in resp["tasks"]}
+    assert by_id["run1"]["progress"] == "轉錄中"
+    assert by_id["run1"]["progress_percentage"] == pytest.approx(10 + 77 * 0.5)
+    assert by_id["wait1"]["progress"] == "等待處理中..."
+    assert by_id["done1"]["status"] == "completed"
+    assert store.get_many_calls == [["run1", "wait1"]]
+    assert resp["total"] == 4
+
+
+async def test_active_filter_pushed_into_query():
+    svc, store = _service(TASKS)
+
+    resp = await tasks_router.get_tasks(status="active", task_service=svc, current_user={"_id": "u1"})
+
+    assert [t["task_id"] for t in resp["tasks"]] == ["run1", "wait1"]
+    assert resp["total"] == 2
+    assert svc.task_repo.find_calls[0]["status_in"] == ["pending", "processing"]
+    assert svc.task_repo.find_calls[0]["status"] is None
+    assert svc.task_repo.count_calls[0]["status_in"] == ["pending", "processing"]
+
+
+async def test_no_in_flight_tasks_skips_progress_read():
+    svc, store = _service([{"_id": "done1", "status": "completed"}])
+    await tasks_router.get_tasks(task_service=svc, current_user={"_id": "u1"})
+    assert store.get_many_calls == []
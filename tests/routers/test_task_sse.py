@@ -3,7 +3,11 @@
 直接驅動 task_status_events 的 event_generator，用 scripted task 狀態序列
 (processing → completed)，斷言後端有送出含 completed 的匿名 data: frame
 (前端 EventSource.onmessage 只收匿名 data:，不收具名 event:)。
+
+狀態改由 process 共用的 TaskEventHub 觀察：另測多連線共用一次讀取、
+只送變動欄位、慢訂閱者只拿最新狀態、change stream 模式與降級。
 """
+import asyncio
 import json
 import os
 import sys
@@ -16,7 +20,11 @@ os.environ.setdefault(
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT))
 
+import pytest  # noqa: E402
+
 from src.routers.tasks import task_status_events  # noqa: E402
+from src.services import task_event_hub  # noqa: E402
+from src.services.task_event_hub import TaskEventHub, task_state_delta  # noqa: E402
 
 
 class FakeTaskService:
@@ -32,6 +40,19 @@ class FakeTaskService:
         return v
 
 
+@pytest.fixture(autouse=True)
+async def _fresh_hub():
+    await task_event_hub.close_task_event_hub()
+    yield
+    await task_event_hub.close_task_event_hub()
+
+
+def _fast_hub(svc):
+    hub = task_event_hub.get_task_event_hub(svc)
+    hub.poll_interval = 0.001
+    return hub
+
+
 async def _collect(resp):
     chunks = []
     async for chunk in resp.body_iterator:
@@ -41,15 +62,12 @@ async def _collect(resp):
 
 async def test_sse_emits_anonymous_completed_data_frame(monkeypatch):
     """轉錄完成時，SSE 必須送出『匿名 data: frame 且 status=completed』。"""
-    async def _no_sleep(*a, **k):
-        pass
-    monkeypatch.setattr("src.routers.tasks.asyncio.sleep", _no_sleep)
-
     proc = {"_id": "t1", "task_id": "t1", "status": "processing",
             "progress": "轉錄處理中", "progress_percentage": 85}
     done = {"_id": "t1", "task_id": "t1", "status": "completed"}
     # perm-check + iter1(proc) + iter2(completed)
     svc = FakeTaskService([proc, proc, done])
+    _fast_hub(svc)
 
     resp = await task_status_events("t1", task_service=svc, current_user={"_id": "u1"})
     chunks = await _collect(resp)
@@ -64,3 +82,154 @@ async def test_sse_emits_anonymous_completed_data_frame(monkeypatch):
         "SSE 沒送出含 completed 的匿名 data: frame —— 前端 onmessage 收不到完成。\n"
         f"chunks={chunks}"
     )
+
+
+def _frames(chunks):
+    return [json.loads(c[len("data: "):]) for c in chunks if c.startswith("data: ")]
+
+
+async def test_sse_sends_full_state_then_only_changed_fields():
+    proc = {"_id": "t1", "task_id": "t1", "status": "processing", "progress": "A",
+            "progress_percentage": 10, "filename": "x.mp3"}
+    step = {**proc, "progress": "B", "progress_percentage": 40}
+    done = {**step, "status": "completed"}
+    svc = FakeTaskService([proc, proc, step, done])
+    _fast_hub(svc)
+
+    frames = _frames(await _collect(await task_status_events("t1", task_service=svc, current_user={"_id": "u1"})))
+
+    assert frames[0]["filename"] == "x.mp3"
+    assert frames[1] == {"task_id": "t1", "status": "processing", "progress": "B", "progress_percentage": 40.0}
+    assert frames[-1] == {"task_id": "t1", "status": "completed"}
+
+
+async def test_many_connections_share_one_fetch_per_tick():
+    proc = {"_id": "t1", "task_id": "t1", "status": "processing", "progress": "A"}
+    done = {**proc, "status": "completed"}
+    fetches = []
+
+    class Svc:
+        async def get_task(self, task_id, user_id=None):
+            if user_id is None:
+                fetches.append(task_id)
+                # 前兩輪 hub 仍看到 processing，第三輪才完成
+                return done if len(fetches) >= 3 else proc
+            return proc
+
+    svc = Svc()
+    hub = _fast_hub(svc)
+    hub.poll_interval = 0.02
+    streams = [
+        await task_status_events("t1", task_service=svc, current_user={"_id": "u1"})
+        for _ in range(5)
+    ]
+    results = await asyncio.gather(*(_collect(r) for r in streams))
+
+    for chunks in results:
+        assert _frames(chunks)[-1]["status"] == "completed"
+    # 5 條連線，hub 只讀 3 次（而不是每條連線各自 polling）
+    assert len(fetches) == 3
+    assert hub.subscriber_count() == 0
+
+
+async def test_heartbeat_when_idle(monkeypatch):
+    monkeypatch.setattr("src.routers.tasks.SSE_HEARTBEAT_SECONDS", 0.01)
+    proc = {"_id": "t1", "task_id": "t1", "status": "processing"}
+    svc = FakeTaskService([proc])
+    hub = _fast_hub(svc)
+    hub.poll_interval = 3600
+
+    resp = await task_status_events("t1", task_service=svc, current_user={"_id": "u1"})
+    it = resp.body_iterator
+    first = await it.__anext__()
+    heartbeat = await it.__anext__()
+    await it.aclose()
+
+    assert first.startswith("data: ")
+    assert heartbeat == ": heartbeat\n\n"
+    assert hub.subscriber_count("t1") == 0
+
+
+async def test_deleted_task_emits_error():
+    proc = {"_id": "t1", "task_id": "t1", "status": "processing"}
+    svc = FakeTaskService([proc, None])
+    _fast_hub(svc)
+    chunks = await _collect(await task_status_events("t1", task_service=svc, current_user={"_id": "u1"}))
+    assert chunks[-1].startswith("event: error")
+
+
+def test_state_delta_marks_removed_fields():
+    assert task_state_delta(None, {"a": 1}) == {"a": 1}
+    assert task_state_delta({"status": "processing", "a": 1}, {"status": "processing", "a": 1}) == {}
+    assert task_state_delta({"status": "p", "a": 1, "b": 2}, {"status": "p", "a": 1}) == {"b": None, "status": "p"}
+
+
+async def test_slow_subscriber_only_gets_latest_state():
+    async def _fetch(task_id):
+        return None
+
+    hub = TaskEventHub(_fetch, poll_interval=3600)
+    slow = hub.subscribe("t1")
+    fast = hub.subscribe("t1")
+    for i in range(50):
+        hub.publish("t1", {"progress": i})
+        assert (await fast.next(timeout=1)) == {"progress": i}
+    # 慢訂閱者一直沒讀：不會堆積，只拿到最後一筆
+    assert (await slow.next(timeout=1)) == {"progress": 49}
+    assert slow.conflated == 49
+    assert await slow.next(timeout=0.01) is None
+    await hub.close()
+
+
+class _FakeStream:
+    def __init__(self, changes, fail=False):
+        self._changes = changes
+        self._fail = fail
+
+    async def __aenter__(self):
+        if self._fail:
+            raise RuntimeError("The $changeStream stage is only supported on replica sets")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for change in self._changes:
+            await asyncio.sleep(0)
+            yield change
+        await asyncio.Event().wait()  # stream 保持開著
+
+
+async def test_change_stream_refreshes_only_subscribed_tasks():
+    fetched = []
+
+    async def _fetch(task_id):
+        fetched.append(task_id)
+        return {"task_id": task_id, "n": len(fetched)}
+
+    changes = [{"documentKey": {"_id": "other"}}, {"documentKey": {"_id": "t1"}}]
+    hub = TaskEventHub(_fetch, poll_interval=3600, watch=lambda: _FakeStream(changes))
+    sub = hub.subscribe("t1", {"task_id": "t1", "n": 0})
+
+    state = await sub.next(timeout=1)
+    while state and state["n"] < 2:
+        state = await sub.next(timeout=1)
+
+    assert hub.mode == "change_stream"
+    assert fetched == ["t1", "t1"]  # 開 stream 後補讀一次 + t1 的變更一次；other 不讀
+    await hub.close()
+
+
+async def test_change_stream_unavailable_falls_back_to_poll():
+    async def _fetch(task_id):
+        return {"task_id": task_id, "status": "completed"}
+
+    hub = TaskEventHub(_fetch, poll_interval=0.001, watch=lambda: _FakeStream([], fail=True))
+    sub = hub.subscribe("t1", {"task_id": "t1", "status": "processing"})
+    assert (await sub.next(timeout=1))["status"] == "completed"
+    assert hub.mode == "poll"
+    await hub.close()
@@ -0,0 +1,111 @@
+"""/transcriptions/{id}/export/{fmt} 串流匯出端點測試。
+
+跟 test_download_audio_cookie.py 同樣手法：monkeypatch TaskRepository /
+SegmentRepository / audit logger，不起真的 Mongo。驗證串流內容、檔名 header、
+講者名稱套用與稽核紀錄。
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.database.repositories import segment_repo  # noqa: E402
+from src.routers import transcriptions  # noqa: E402
+from src.utils import audit_logger  # noqa: E402
+
+CURRENT_USER = {"_id": "507f1f77bcf86cd799439011"}
+TASK = {
+    "_id": "t1",
+    "status": "completed",
+    "custom_name": "會議.mp3",
+    "speaker_names": {"SPEAKER_00": "Alice"},
+}
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": "你好", "speaker": "SPEAKER_00"},
+    {"start": 5.0, "end": 6.25, "text": "再見", "speaker": "SPEAKER_01"},
+]
+
+
+class _FakeTaskRepo:
+    task = TASK
+
+    def __init__(self, db):
+        pass
+
+    async def get_by_id_and_user(self, task_id, user_id):
+        return self.task
+
+
+class _FakeSegmentRepo:
+    def __init__(self, db):
+        pass
+
+    async def get_header(self, task_id):
+        return {"_id": task_id, "storage": "buckets"}
+
+    async def iter_segments(self, task_id):
+        for s in SEGMENTS:
+            yield s
+
+
+class _FakeAudit:
+    calls = []
+
+    async def log_transcription_operation(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    _FakeAudit.calls = []
+    monkeypatch.setattr(transcriptions, "TaskRepository", _FakeTaskRepo)
+    monkeypatch.setattr(segment_repo, "SegmentRepository", _FakeSegmentRepo)
+    monkeypatch.setattr(audit_logger, "get_audit_logger", lambda: _FakeAudit())
+
+
+async def _export(fmt, **params):
+    defaults = dict(mode="subtitle", density=3.0, time_format="start", include_speaker=True)
+    defaults.update(params)
+    response = await transcriptions.export_transcript(
+        request=None, task_id="t1", fmt=fmt, current_user=CURRENT_USER, db=object(), **defaults
+    )
+    body = b"".join([chunk async for chunk in response.body_iterator]).decode("utf-8")
+    return response, body
+
+
+async def test_srt_streams_with_speaker_names_and_filename():
+    response, body = await _export("srt")
+    assert body == (
+        "1\n00:00:00,000 --> 00:00:01,500\n[Alice] 你好\n"
+        "\n2\n00:00:05,000 --> 00:00:06,250\n[SPEAKER_01] 再見\n"
+    )
+    assert response.media_type.startswith("application/x-subrip")
+    assert response.headers["content-disposition"].endswith("%E6%9C%83%E8%AD%B0.srt")
+    assert _FakeAudit.calls[0]["action"] == "export_srt"
+
+
+async def test_vtt_without_speaker():
+    _, body = await _export("vtt", include_speaker=False)
+    assert body.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n你好\n")
+    assert "[" not in body
+
+
+async def test_txt_subtitle_mode():
+    _, body = await _export("txt")
+    assert body == "0:00 [Alice] 你好\n0:05 [SPEAKER_01] 再見"
+
+
+async def test_incomplete_task_rejected(monkeypatch):
+    monkeypatch.setattr(_FakeTaskRepo, "task", {**TASK, "status": "processing"})
+    with pytest.raises(HTTPException) as exc:
+        await _export("srt")
+    assert exc.value.status_code == 400
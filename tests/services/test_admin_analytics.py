@@ -17,13 +17,20 @@ os.environ.setdefault(
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT))
 
+from src.services import admin_analytics  # noqa: E402
 from src.services.admin_analytics import (  # noqa: E402
+    AdminAnalytics,
+    _utc_month_start,
     derive_overview,
     format_named_counts,
     format_performance,
     format_recent_orders,
     merge_daily,
     merge_top_users,
+    rollup_cost_rows,
+    rollup_daily_rows,
+    rollup_duration,
+    rollup_revenue,
     summarize_subscriptions,
 )
 
@@ -166,3 +173,68 @@ class TestFormatRecentOrders:
                           "type": "subscription", "tier": "pro", "paid_at": 111}
         assert out[1]["user_email"] == ""     # u2 不在 email_map
         assert out[1]["order_no"] == "" and out[1]["amount"] == 0
+
+
+class TestRollupConverters:
+    """預聚合桶 → 原 aggregation 結果形狀（讓既有 merge / format 純函式沿用）。"""
+
+    def test_daily_rows_shape_matches_daily_group(self):
+        rows = [{"period": "2026-10-01", "key": None, "count": 3, "tokens": 120}, {"period": "2026-10-02"}]
+        assert rollup_daily_rows(rows, "tasks_count", "tokens") == [
+            {"_id": "2026-10-01", "tasks_count": 3, "tokens": 120},
+            {"_id": "2026-10-02", "tasks_count": 0, "tokens": 0},
+        ]
+
+    def test_cost_rows_default_unknown_model(self):
+        out = rollup_cost_rows([{"period": "2026-10", "key": None, "prompt": 6, "completion": 4, "total": 10, "count": 1}])
+        assert out[0]["_id"] == {"month": "2026-10", "model": "unknown"}
+        assert (out[0]["prompt"], out[0]["completion"], out[0]["total"], out[0]["count"]) == (6, 4, 10, 1)
+
+    def test_duration_avg_from_sum_and_empty(self):
+        assert rollup_duration({"count": 4, "duration_sum": 40, "duration_min": 2, "duration_max": 20}) == {
+            "avg_duration": 10, "min_duration": 2, "max_duration": 20,
+        }
+        assert rollup_duration(None) == {} and rollup_duration({"count": 0}) == {}
+
+    def test_revenue_totals_and_recent_months_desc(self):
+        total_rows = [{"key": "subscription", "amount": 300}, {"key": "extra_quota", "amount": 100}]
+        monthly_rows = [
+            {"period": "2026-09", "key": "subscription", "amount": 300, "count": 1},
+            {"period": "2026-10", "key": "extra_quota", "amount": 100, "count": 1},
+            {"period": "2026-10", "key": "subscription", "amount": 0, "count": 0},  # 對帳清空的桶不列
+        ]
+        total, extra, monthly = rollup_revenue(total_rows, monthly_rows, limit=1)
+        assert (total, extra) == (400, 100)
+        assert monthly == [{"month": "2026-10", "amount": 100}]
+
+
+class TestReconcileGuards:
+    def test_utc_month_start(self):
+        assert _utc_month_start("2026-10") == 1790812800  # 2026-10-01T00:00:00Z
+        assert _utc_month_start("2026-01") - _utc_month_start("2025-12") == 31 * 86400
+
+    async def test_first_reconcile_runs_once_under_concurrency(self, monkeypatch):
+        import asyncio
+
+        monkeypatch.setattr(admin_analytics, "_initial_reconcile_lock", asyncio.Lock())
+        state = {"reconciled_at": None, "runs": 0}
+
+        class _Rollups:
+            async def last_reconciled_at(self):
+                return state["reconciled_at"]
+
+        async def reconcile(self):
+            state["runs"] += 1
+            await asyncio.sleep(0.01)
+            state["reconciled_at"] = 1
+
+        monkeypatch.setattr(AdminAnalytics, "reconcile_rollups", reconcile)
+        class _DB:
+            def __getattr__(self, name):
+                return None
+
+        instances = [AdminAnalytics(_DB()) for _ in range(5)]
+        for a in instances:
+            a.rollups = _Rollups()
+        await asyncio.gather(*(a._ensure_rollups() for a in instances))
+        assert state["runs"] == 1
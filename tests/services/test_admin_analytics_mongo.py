@@ -172,3 +172,61 @@ async def test_revenue_against_real_mongo(seeded_revenue_db):
 
     # 流失：u3 cancel_at_period_end=True → pending_cancel 1
     assert rev["churn"]["pending_cancel"] == 1
+
+
+async def test_rollups_incremental_then_reconcile(seeded_db):
+    """首次報表觸發對帳；之後的事件靠增量進桶；對帳把漂移（直接改原始資料）修回來。"""
+    from src.database.repositories.analytics_rollup_repo import (
+        AnalyticsRollupRepository,
+        record_task_completed_sync,
+    )
+
+    analytics = AdminAnalytics(seeded_db)
+    await analytics.full_report()
+    assert await analytics.rollups.last_reconciled_at() is not None
+
+    # 新任務：建立 + 完成各寫一次增量（不碰原始 aggregation）
+    task = _task("D", "u2", "completed", total=30, duration=20)
+    await seeded_db.tasks.insert_one(task)
+    await AnalyticsRollupRepository(seeded_db).record_task_created(task)
+    sync = MongoClient(_MONGO_URL)
+    try:
+        assert record_task_completed_sync(sync[_TEST_DB], task) is True
+        assert record_task_completed_sync(sync[_TEST_DB], task) is False  # 重送不重複累加
+    finally:
+        sync.close()
+
+    report = await analytics.full_report()
+    top = {u["user_id"]: u for u in report["top_users"]}
+    assert top["u2"]["tasks_count"] == 2 and top["u2"]["total_tokens"] == 30
+    assert report["performance"]["avg_duration_seconds"] == 20.0  # (30+10+20)/3
+
+    # 漂移：原始資料被刪（帳號刪除），增量不知道 → 對帳後修正
+    await seeded_db.tasks.delete_one({"_id": "D"})
+    await analytics.reconcile_rollups()
+    report = await analytics.full_report()
+    top = {u["user_id"]: u for u in report["top_users"]}
+    assert top["u2"]["tasks_count"] == 1 and top["u2"]["total_tokens"] == 0
+
+
+async def test_reconcile_keeps_month_before_window(seeded_revenue_db, monkeypatch):
+    """對帳視窗前一個 UTC 月的營收桶不被邊界附近幾小時的訂單覆寫。"""
+    from src.database.repositories import analytics_rollup_repo as rollups
+    from src.services import admin_analytics
+
+    db = seeded_revenue_db
+    _, month_list = admin_analytics._month_window(1)
+    window_start = admin_analytics._utc_month_start(month_list[0])
+    # 前一個 UTC 月的最後幾小時（落在 UTC+8 月初之後）
+    await db.orders.insert_one({"merchant_order_no": "O4", "status": "paid", "amount_twd": 50,
+                                "type": "subscription", "paid_at": window_start - 3600})
+    prev_month = rollups.month_utc(window_start - 3600)
+    await db.analytics_rollups.insert_one({
+        "_id": rollups.rollup_id(rollups.REVENUE_MONTHLY, prev_month, "subscription"),
+        "metric": rollups.REVENUE_MONTHLY, "period": prev_month, "key": "subscription",
+        "amount": 5000, "count": 20,
+    })
+
+    await AdminAnalytics(db).reconcile_rollups(months=1)
+    rows = await AdminAnalytics(db).rollups.rows(rollups.REVENUE_MONTHLY, period=prev_month)
+    assert [(r["amount"], r["count"]) for r in rows] == [(5000, 20)]
@@ -122,6 +122,14 @@ class TestInMemoryProgressStore(unittest.TestCase):
             10.0 + 77.0 + 13.0 * 0.5,
         )
 
+    def test_get_many_returns_only_known_tasks(self):
+        self.store.set_phase("a", Phase.PREPARATION, 1.0)
+        self.store.set_phase("b", Phase.PUNCTUATION, 0.5)
+        snaps = self.store.get_many(["a", "b", "missing"])
+        self.assertEqual(set(snaps), {"a", "b"})
+        self.assertEqual(snaps["b"].phase, Phase.PUNCTUATION)
+        self.assertEqual(self.store.get_many([]), {})
+
     def test_thread_safety(self):
         # 多執行緒同時寫不同 task — 不該爆，最終所有 task 都拿得到 snapshot
         def worker(task_id: str):
@@ -152,6 +152,16 @@ class TestMongoProgressStore(unittest.TestCase):
         MongoProgressStore(self.collection)
         MongoProgressStore(self.collection)
 
+    def test_get_many_single_query(self):
+        other = f"{self.tid}-b"
+        self.store.set_phase(self.tid, Phase.PREPARATION, 0.5, message="a")
+        self.store.set_phase(other, Phase.TRANSCRIPTION, 0.2, details={"k": 1})
+        snaps = self.store.get_many([self.tid, other, other, "never_written"])
+        self.assertEqual(set(snaps), {self.tid, other})
+        self.assertEqual(snaps[self.tid].message, "a")
+        self.assertEqual(snaps[other].details, {"k": 1})
+        self.assertEqual(self.store.get_many([]), {})
+
     def test_updated_at_changes_on_each_set(self):
         self.store.set_phase(self.tid, Phase.PREPARATION, 0.1)
         first = self.store.get(self.tid).updated_at
@@ -0,0 +1,175 @@
+"""CoalescingProgressWriter 合併寫入測試 + Orchestrator 取消檢查 TTL。
+
+writer 包住 InMemoryProgressStore，時鐘以假 clock 注入；只驗證「何時真的寫入 store」
+與記憶體內的 no-regression 規則。
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.services.progress_store import (  # noqa: E402
+    CoalescingProgressWriter,
+    InMemoryProgressStore,
+    Phase,
+)
+
+
+class _CountingStore(InMemoryProgressStore):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def set_phase(self, *args, **kwargs):
+        self.writes += 1
+        super().set_phase(*args, **kwargs)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCoalescingProgressWriter(unittest.TestCase):
+    def setUp(self):
+        self.store = _CountingStore()
+        self.clock = _Clock()
+        self.writer = CoalescingProgressWriter(
+            self.store, "t1", min_interval_s=1.0, min_delta=0.1, clock=self.clock
+        )
+
+    def test_first_write_goes_through(self):
+        self.assertTrue(self.writer.write(Phase.TRANSCRIPTION, 0.0))
+        self.assertEqual(self.store.writes, 1)
+
+    def test_small_fast_updates_coalesced(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.0)
+        for i in range(1, 9):
+            self.writer.write(Phase.TRANSCRIPTION, i / 100, message=f"{i}")
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(self.store.get("t1").phase_progress, 0.0)
+
+    def test_delta_threshold_writes(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.0)
+        self.assertTrue(self.writer.write(Phase.TRANSCRIPTION, 0.1))
+        self.assertEqual(self.store.get("t1").phase_progress, 0.1)
+
+    def test_interval_threshold_writes(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.0)
+        self.assertFalse(self.writer.write(Phase.TRANSCRIPTION, 0.01))
+        self.clock.now = 1.0
+        self.assertTrue(self.writer.write(Phase.TRANSCRIPTION, 0.02))
+
+    def test_force_and_completion_write_immediately(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.0)
+        self.assertTrue(self.writer.write(Phase.TRANSCRIPTION, 0.01, force=True))
+        self.assertTrue(self.writer.write(Phase.TRANSCRIPTION, 1.0))
+        self.assertEqual(self.store.writes, 3)
+
+    def test_phase_transition_writes_immediately(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.5)
+        self.assertTrue(self.writer.write(Phase.PUNCTUATION, 0.0))
+        self.assertEqual(self.store.get("t1").phase, Phase.PUNCTUATION)
+
+    def test_flush_writes_pending(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.0)
+        self.writer.write(Phase.TRANSCRIPTION, 0.05, message="latest")
+        self.writer.flush()
+        snap = self.store.get("t1")
+        self.assertEqual((snap.phase_progress, snap.message), (0.05, "latest"))
+        self.writer.flush()  # 沒有 pending → no-op
+        self.assertEqual(self.store.writes, 2)
+
+    def test_progress_never_regresses_within_phase(self):
+        self.writer.write(Phase.TRANSCRIPTION, 0.6)
+        self.writer.write(Phase.TRANSCRIPTION, 0.2, force=True)
+        self.assertEqual(self.store.get("t1").phase_progress, 0.6)
+
+    def test_phase_cannot_go_backwards(self):
+        self.writer.write(Phase.PUNCTUATION, 0.0)
+        with self.assertRaises(ValueError):
+            self.writer.write(Phase.TRANSCRIPTION, 0.5)
+
+    def test_rejects_out_of_range(self):
+        with self.assertRaises(ValueError):
+            self.writer.write(Phase.TRANSCRIPTION, 1.5)
+
+
+class _FakeTasks:
+    def __init__(self):
+        self.status = "processing"
+        self.reads = 0
+
+    def find_one(self, query, projection=None):
+        self.reads += 1
+        return {"_id": query["_id"], "status": self.status}
+
+
+class _FakeDb:
+    def __init__(self):
+        self.tasks = _FakeTasks()
+
+
+class TestCancelCheckTtl(unittest.TestCase):
+    def setUp(self):
+        from src.transcription.orchestrator import TranscriptionOrchestrator
+
+        self.db = _FakeDb()
+        self.orc = TranscriptionOrchestrator(
+            db=self.db, progress_store=InMemoryProgressStore(), whisper=None, punctuation=None,
+        )
+
+    def test_default_reads_every_time(self):
+        self.orc.check_cancelled("t1")
+        self.orc.check_cancelled("t1")
+        self.assertEqual(self.db.tasks.reads, 2)
+
+    def test_max_age_reuses_recent_check(self):
+        self.orc.check_cancelled("t1", max_age=60)
+        self.orc.check_cancelled("t1", max_age=60)
+        self.orc.check_cancelled("t1", max_age=60)
+        self.assertEqual(self.db.tasks.reads, 1)
+
+    def test_cancel_seen_after_ttl(self):
+        from src.transcription.orchestrator import TranscriptionCancelled
+
+        self.orc.check_cancelled("t1", max_age=60)
+        self.db.tasks.status = "canceling"
+        self.orc.check_cancelled("t1", max_age=60)  # TTL 內沿用
+        with self.assertRaises(TranscriptionCancelled):
+            self.orc.check_cancelled("t1")  # 邊界檢查一律讀 DB
+
+
+
+class TestOrchestratorFlush(unittest.TestCase):
+    def setUp(self):
+        from src.transcription.orchestrator import TranscriptionOrchestrator
+
+        self.store = InMemoryProgressStore()
+        self.orc = TranscriptionOrchestrator(
+            db=_FakeDb(), progress_store=self.store, whisper=None, punctuation=None,
+        )
+
+    def test_flush_progress_writes_coalesced_update(self):
+        self.orc.report_progress("t1", Phase.TRANSCRIPTION, 0.10, coalesce=True)
+        self.orc.report_progress("t1", Phase.TRANSCRIPTION, 0.12, coalesce=True)  # 被合併
+        self.assertEqual(self.store.get("t1").phase_progress, 0.10)
+        self.orc.flush_progress("t1")
+        self.assertEqual(self.store.get("t1").phase_progress, 0.12)
+        self.orc.flush_progress("unknown")  # 沒有 writer → no-op
+
+
+if __name__ == "__main__":
+    unittest.main()
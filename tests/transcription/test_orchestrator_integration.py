@@ -36,6 +36,8 @@ except ImportError:  # pragma: no cover
     MongoClient = None
 
 from bson import ObjectId  # noqa: E402
+from src.database.repositories.punctuation_queue_repo import claim_sync  # noqa: E402
+from src.database.repositories.segment_repo import load_segments_sync  # noqa: E402
 from src.services.progress_store import Phase  # noqa: E402
 
 # orchestrator 還不存在時,collection 會在這裡 ImportError → 全檔紅(Phase B 預期)
@@ -82,7 +84,9 @@ class FakeWhisper:
         self._empty = empty
         self.model_name = model_name
 
-    def transcribe(self, mp3_path, language=None, progress_callback=None):
+    def transcribe(
+        self, mp3_path, language=None, progress_callback=None, media_probe=None, pcm=None
+    ):
         if self._fail:
             raise RuntimeError("whisper boom")
         if progress_callback is not None:
@@ -91,7 +95,9 @@ class FakeWhisper:
             return None, [], None
         return self._text, list(self._segments), self._language
 
-    def transcribe_in_chunks(self, mp3_path, language=None, progress_callback=None):
+    def transcribe_in_chunks(
+        self, mp3_path, language=None, progress_callback=None, media_probe=None, pcm=None
+    ):
         if progress_callback is not None:
             progress_callback(1.0, 1.0)
         return self.transcribe(mp3_path, language)
@@ -193,7 +199,8 @@ def mongo_client():
 @pytest.fixture
 def db(mongo_client):
     database = mongo_client[_TEST_DB]
-    for coll in ("tasks", "transcriptions", "segments", "reservations", "users"):
+    for coll in ("tasks", "transcriptions", "segments", "segment_buckets", "reservations", "users",
+                 "punctuation_jobs"):
         database[coll].delete_many({})
     return database
 
@@ -245,10 +252,12 @@ def _make_orchestrator(db, *, whisper=None, punctuation=None, diarization=None,
 
 def _run(orc, task_id, audio_source, *, language="en", use_chunking=False,
          use_punctuation=True, punctuation_provider="gemini",
-         use_diarization=False, max_speakers=None, ui_language=None):
+         use_diarization=False, max_speakers=None, ui_language=None,
+         defer_punctuation=False):
     orc.run(
         task_id, audio_source, language, use_chunking, use_punctuation,
         punctuation_provider, use_diarization, max_speakers, ui_language,
+        defer_punctuation=defer_punctuation,
     )
 
 
@@ -292,9 +301,9 @@ class TestHappyPath:
 
         _run(orc, task_id, FakeAudioSource(tiny_audio), use_diarization=True)
 
-        seg_doc = db.segments.find_one({"_id": task_id})
-        assert seg_doc is not None
-        assert all("speaker" in s for s in seg_doc["segments"])
+        stored = load_segments_sync(db, task_id)
+        assert stored
+        assert all("speaker" in s for s in stored)
         # 辨識成功 → 記錄 diarization 模型
         assert db.tasks.find_one({"_id": task_id})["models"]["diarization"] == "pyannote-fake"
 
@@ -309,9 +318,9 @@ class TestHappyPath:
 
         _run(orc, task_id, FakeAudioSource(tiny_audio))
 
-        seg_doc = db.segments.find_one({"_id": task_id})
-        assert seg_doc is not None
-        assert all("words" not in s for s in seg_doc["segments"])
+        stored = load_segments_sync(db, task_id)
+        assert stored
+        assert all("words" not in s for s in stored)
 
     def test_diarization_paragraph_mode_segments_never_carry_words_into_db(self, db, tiny_audio):
         """段落模式 diar 路徑不替換 segments，最容易漏剝 words——orchestrator 單點剝除。"""
@@ -326,9 +335,9 @@ class TestHappyPath:
 
         _run(orc, task_id, FakeAudioSource(tiny_audio), use_diarization=True)
 
-        seg_doc = db.segments.find_one({"_id": task_id})
-        assert seg_doc is not None
-        assert all("words" not in s for s in seg_doc["segments"])
+        stored = load_segments_sync(db, task_id)
+        assert stored
+        assert all("words" not in s for s in stored)
 
 
 class TestDiarization:
@@ -545,3 +554,82 @@ class TestQuota:
 
         assert db.tasks.find_one({"_id": task_id})["status"] == "failed"
         assert db.reservations.find_one({"task_id": task_id}) is None   # 預扣已釋放
+
+
+class TestDeferredPunctuation:
+    """GPU Worker 把 PUNCTUATION 移交標點佇列，CPU 消費端 run_punctuation 接手收尾。"""
+
+    def _defer(self, db, tiny_audio, ps=None, **task_kwargs):
+        task_id = _insert_task(db, **task_kwargs)
+        src = FakeAudioSource(tiny_audio)
+        gpu = _make_orchestrator(db, progress_store=ps, punctuation=FakePunctuation(fail=True))
+        _run(gpu, task_id, src, defer_punctuation=True)
+        return task_id, src
+
+    def test_gpu_stage_persists_raw_and_enqueues(self, db, tiny_audio):
+        ps = RecordingProgressStore()
+        task_id, src = self._defer(db, tiny_audio, ps)
+
+        task = db.tasks.find_one({"_id": task_id})
+        assert task["status"] == "processing"                     # 還沒完成
+        assert task["models"]["transcription"] == "whisper-fake"  # 消費端沒 whisper，先寫
+        assert db.transcriptions.find_one({"_id": task_id})["content"] == "hello world"
+        assert src.cleaned_with is True                           # Compact audio 已落地，可刪 handoff
+        assert db.punctuation_jobs.find_one({"_id": task_id})["status"] == "queued"
+        assert ps.events[-1] == (Phase.PUNCTUATION, 0.0)          # 進度停在 PUNCTUATION 起點
+        assert ps.cleared == []
+
+    def test_consumer_completes_with_same_result(self, db, tiny_audio):
+        task_id, _ = self._defer(db, tiny_audio)
+        ps = RecordingProgressStore()
+        cpu = TranscriptionOrchestrator(
+            db=db, progress_store=ps, whisper=None, punctuation=FakePunctuation(),
+        )
+
+        job = claim_sync(db, "test-consumer")
+        assert job["_id"] == task_id and job["attempts"] == 1
+        assert claim_sync(db, "other") is None                    # 已被認領
+        cpu.run_punctuation(job)
+
+        task = db.tasks.find_one({"_id": task_id})
+        assert task["status"] == "completed"
+        assert task["models"]["punctuation"] == "fake-model"
+        assert task["models"]["transcription"] == "whisper-fake"
+        assert "[punct]" in db.transcriptions.find_one({"_id": task_id})["content"]
+        assert db.punctuation_jobs.find_one({"_id": task_id}) is None
+        assert {p for p, _ in ps.events} == {Phase.PUNCTUATION}
+        assert ps.cleared == [task_id]
+
+    def test_expired_lease_is_reclaimed_and_gives_up_after_max_attempts(self, db, tiny_audio):
+        task_id, _ = self._defer(db, tiny_audio)
+        for _ in range(3):
+            assert claim_sync(db, "crashy", lease_seconds=-1)["_id"] == task_id
+        job = claim_sync(db, "crashy")
+        cpu = TranscriptionOrchestrator(
+            db=db, progress_store=RecordingProgressStore(), whisper=None,
+            punctuation=FakePunctuation(),
+        )
+        cpu.run_punctuation(job)
+
+        assert db.tasks.find_one({"_id": task_id})["status"] == "failed"
+        assert db.punctuation_jobs.find_one({"_id": task_id}) is None
+
+    def test_cancelled_while_queued(self, db, tiny_audio):
+        task_id, _ = self._defer(db, tiny_audio)
+        db.tasks.update_one({"_id": task_id}, {"$set": {"status": "cancelled"}})
+        cpu = TranscriptionOrchestrator(
+            db=db, progress_store=RecordingProgressStore(), whisper=None,
+            punctuation=FakePunctuation(),
+        )
+        cpu.run_punctuation(claim_sync(db, "c"))
+
+        assert db.tasks.find_one({"_id": task_id})["status"] == "cancelled"
+        assert db.punctuation_jobs.find_one({"_id": task_id}) is None
+
+    def test_no_punctuation_is_never_deferred(self, db, tiny_audio):
+        task_id = _insert_task(db)
+        orc = _make_orchestrator(db)
+        _run(orc, task_id, FakeAudioSource(tiny_audio), use_punctuation=False, defer_punctuation=True)
+
+        assert db.tasks.find_one({"_id": task_id})["status"] == "completed"
+        assert db.punctuation_jobs.find_one({"_id": task_id}) is None
@@ -0,0 +1,111 @@
+"""後台統計預聚合桶（analytics_rollups）的增量建構測試。
+
+事件 → 增量是純函式，一律執行；不碰 Mongo：
+- 分桶鍵與原 aggregation 一致（任務 / 摘要 UTC+8 分日分月，營收 UTC 分月）
+- 只有真的有 token 記錄才累計成本桶（無記錄 ≠ 0 token）
+- 模型名含 "." 時仍放在 key（不當欄位路徑）
+- upsert 的 $inc / $min / $max 形狀
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.database.repositories import analytics_rollup_repo as rollups  # noqa: E402
+from src.database.repositories.analytics_rollup_repo import (  # noqa: E402
+    _to_update,
+    day_utc8,
+    month_utc,
+    month_utc8,
+    payment_settled_increments,
+    rollup_id,
+    summary_logged_increments,
+    task_completed_increments,
+    task_created_increments,
+)
+
+# 2026-01-31 17:30 UTC = 2026-02-01 01:30 UTC+8：跨日也跨月
+EDGE_TS = int(datetime(2026, 1, 31, 17, 30, tzinfo=timezone.utc).timestamp())
+
+
+def _by_metric(items):
+    return {(i["metric"], i["key"]): i for i in items}
+
+
+def test_bucket_keys_follow_source_timezones():
+    assert day_utc8(EDGE_TS) == "2026-02-01"
+    assert month_utc8(EDGE_TS) == "2026-02"
+    assert month_utc(EDGE_TS) == "2026-01"  # 營收沿用原 $dateToString（無 timezone）
+
+
+def test_task_created_counts_day_user_and_provider():
+    task = {"user": {"user_id": "u1"}, "config": {"punct_provider": "gemini"},
+            "timestamps": {"created_at": EDGE_TS}}
+    items = _by_metric(task_created_increments(task))
+
+    assert items[(rollups.TASKS_DAILY, None)]["period"] == "2026-02-01"
+    assert items[(rollups.TASKS_DAILY, None)]["inc"] == {"count": 1}
+    assert items[(rollups.USER_TASKS, "u1")]["inc"] == {"count": 1}
+    assert items[(rollups.PUNCT_PROVIDER, "gemini")]["period"] == rollups.ALL_PERIOD
+
+
+def test_task_completed_tokens_models_and_duration():
+    task = {
+        "user": {"user_id": "u1"}, "status": "completed",
+        "timestamps": {"created_at": EDGE_TS},
+        "models": {"punctuation": "gemini-2.5-flash", "transcription": "whisper-medium"},
+        "stats": {"duration_seconds": 12.5,
+                  "token_usage": {"total": 100, "prompt": 60, "completion": 40, "model": "gemini-2.5-flash"}},
+    }
+    items = _by_metric(task_completed_increments(task))
+
+    assert items[(rollups.TASKS_DAILY, None)]["inc"] == {"tokens": 100}
+    assert items[(rollups.USER_TASKS, "u1")]["inc"] == {"tokens": 100}
+    cost = items[(rollups.PUNCT_COST_MONTHLY, "gemini-2.5-flash")]
+    assert cost["period"] == "2026-02"
+    assert cost["inc"] == {"prompt": 60, "completion": 40, "total": 100, "count": 1}
+    assert (rollups.model_metric("punctuation"), "gemini-2.5-flash") in items
+    assert (rollups.model_metric("diarization"), None) not in items  # 沒用到的模型不計
+    duration = items[(rollups.TASK_DURATION, None)]
+    assert duration["inc"] == {"count": 1, "duration_sum": 12.5}
+    assert duration["min"] == {"duration_min": 12.5} and duration["max"] == {"duration_max": 12.5}
+
+
+def test_task_failed_without_usage_adds_no_cost_or_duration():
+    task = {"user": {"user_id": "u1"}, "status": "failed",
+            "timestamps": {"created_at": EDGE_TS}, "stats": {"duration_seconds": 3}}
+    metrics = {i["metric"] for i in task_completed_increments(task)}
+    assert rollups.PUNCT_COST_MONTHLY not in metrics
+    assert rollups.TASK_DURATION not in metrics  # 同原口徑：只計 completed 的時長
+
+
+def test_summary_logged_counts_even_without_usage():
+    items = _by_metric(summary_logged_increments({"user_id": "u2", "created_at": EDGE_TS}))
+    assert items[(rollups.SUMMARIES_DAILY, None)]["inc"] == {"count": 1, "tokens": 0}
+    assert items[(rollups.USER_SUMMARIES, "u2")]["inc"] == {"count": 1, "tokens": 0}
+    assert not any(m == rollups.SUMMARY_COST_MONTHLY for m, _ in items)
+
+
+def test_payment_settled_splits_by_order_type():
+    items = _by_metric(payment_settled_increments({"amount_twd": 300, "type": "extra_quota"}, EDGE_TS))
+    assert items[(rollups.REVENUE_MONTHLY, "extra_quota")]["period"] == "2026-01"
+    assert items[(rollups.REVENUE_TOTAL, "extra_quota")]["inc"] == {"amount": 300, "count": 1}
+
+
+def test_to_update_is_upsert_with_inc_min_max():
+    item = task_completed_increments({
+        "status": "completed", "timestamps": {"created_at": EDGE_TS}, "stats": {"duration_seconds": 4},
+    })[0]
+    op = _to_update(item, now=123)
+    assert op._filter == {"_id": rollup_id(rollups.TASK_DURATION, rollups.ALL_PERIOD, None)}
+    assert op._upsert is True
+    assert op._doc["$inc"] == {"count": 1, "duration_sum": 4}
+    assert op._doc["$min"] == {"duration_min": 4} and op._doc["$max"] == {"duration_max": 4}
+    assert op._doc["$set"]["updated_at"] == 123
@@ -106,6 +106,15 @@ async def test_add_chunk_rejects_wrong_user(repo):
     assert doc["received"] == []
 
 
+async def test_add_chunk_records_per_chunk_hash(repo):
+    """各片 hash 記在 chunk_hashes.<index>；同 index 重傳覆寫成最後一次"""
+    uid = await _init(repo)
+    await asyncio.gather(repo.add_chunk(uid, "u1", 1, "bb"), repo.add_chunk(uid, "u1", 0, "aa"))
+    await repo.add_chunk(uid, "u1", 1, "cc")
+    doc = await repo.get(uid)
+    assert doc["chunk_hashes"] == {"0": "aa", "1": "cc"}
+
+
 async def test_add_chunk_on_deleted_doc_returns_none(repo):
     """doc 被刪後 add_chunk 回 None — uploads.upload_chunk 用這個訊號回 409"""
     uid = await _init(repo)
@@ -0,0 +1,124 @@
+"""ChunkWorkerPool 與 worker 端模型快取的單元測試(不載入實際模型)。
+
+涵蓋:
+- `_get_worker_model`:同 key 重用同一實例、LRU 上限淘汰最久未用者
+- `ChunkWorkerPool`:executor 跨 submit 重用、discard / discard_for 只丟目前的池、shutdown 後可重建
+實際 CPU 轉錄吞吐需在本機 / staging 實測。
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest  # noqa: E402
+
+from src.services.utils import whisper_processor as wp  # noqa: E402
+from src.services.utils.chunk_worker_pool import ChunkWorkerPool  # noqa: E402
+
+
+class _FakeWhisperModel:
+    loads = 0
+
+    def __init__(self, model_name, **kwargs):
+        type(self).loads += 1
+        self.model_name = model_name
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    _FakeWhisperModel.loads = 0
+    monkeypatch.setattr(wp, "WhisperModel", _FakeWhisperModel)
+    monkeypatch.setattr(wp, "_worker_models", wp.OrderedDict())
+    return _FakeWhisperModel
+
+
+class TestWorkerModelCache:
+    def test_same_key_reuses_instance(self, fake_model, monkeypatch):
+        monkeypatch.setattr(wp, "CHUNK_POOL_MAX_MODELS", 1)
+        m1 = wp._get_worker_model("turbo", "auto", "int8", 2, 1)
+        m2 = wp._get_worker_model("turbo", "auto", "int8", 2, 1)
+        assert m1 is m2
+        assert fake_model.loads == 1
+
+    def test_compute_type_is_part_of_key(self, fake_model, monkeypatch):
+        monkeypatch.setattr(wp, "CHUNK_POOL_MAX_MODELS", 2)
+        m1 = wp._get_worker_model("turbo", "auto", "int8", 2, 1)
+        m2 = wp._get_worker_model("turbo", "auto", "float32", 2, 1)
+        assert m1 is not m2
+        assert fake_model.loads == 2
+
+    def test_lru_bound_evicts_oldest(self, fake_model, monkeypatch):
+        monkeypatch.setattr(wp, "CHUNK_POOL_MAX_MODELS", 1)
+        wp._get_worker_model("turbo", "auto", "int8", 2, 1)
+        wp._get_worker_model("/opt/models/breeze", "auto", "int8", 2, 1)
+        assert len(wp._worker_models) == 1
+        assert next(iter(wp._worker_models))[0] == "/opt/models/breeze"
+        # 被淘汰的模型再次使用 → 重新載入
+        wp._get_worker_model("turbo", "auto", "int8", 2, 1)
+        assert fake_model.loads == 3
+
+    def test_lru_touch_keeps_recent(self, fake_model, monkeypatch):
+        monkeypatch.setattr(wp, "CHUNK_POOL_MAX_MODELS", 2)
+        wp._get_worker_model("a", "auto", "int8", 2, 1)
+        wp._get_worker_model("b", "auto", "int8", 2, 1)
+        wp._get_worker_model("a", "auto", "int8", 2, 1)  # a 變最近使用
+        wp._get_worker_model("c", "auto", "int8", 2, 1)  # 淘汰 b
+        assert [k[0] for k in wp._worker_models] == ["a", "c"]
+
+
+class TestChunkWorkerPool:
+    def test_executor_reused_across_submits(self):
+        pool = ChunkWorkerPool(max_workers=1)
+        try:
+            assert pool.submit(pow, 2, 10).result(timeout=60) == 1024
+            first = pool._executor
+            assert pool.submit(pow, 3, 2).result(timeout=60) == 9
+            assert pool._executor is first
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_then_submit_recreates(self):
+        pool = ChunkWorkerPool(max_workers=1)
+        try:
+            pool.submit(pow, 2, 1).result(timeout=60)
+            pool.shutdown()
+            assert pool._executor is None
+            assert pool.submit(pow, 2, 2).result(timeout=60) == 4
+        finally:
+            pool.shutdown()
+
+    def test_discard_ignores_stale_executor(self):
+        pool = ChunkWorkerPool(max_workers=1)
+        try:
+            pool.submit(pow, 2, 1).result(timeout=60)
+            current = pool._executor
+            pool.discard(object())  # 不是目前的池 → no-op
+            assert pool._executor is current
+            pool.discard(current)
+            assert pool._executor is None
+        finally:
+            pool.shutdown()
+
+    def test_discard_for_leaves_replacement_pool(self):
+        pool = ChunkWorkerPool(max_workers=1)
+        try:
+            old_future = pool.submit(pow, 2, 1)
+            old_future.result(timeout=60)
+            pool.discard(pool._executor)  # 別的呼叫端先換掉了池
+            pool.submit(pow, 2, 2).result(timeout=60)
+            replacement = pool._executor
+            pool.discard_for(old_future)  # 舊池的 future 回報損壞 → 不動新池
+            assert pool._executor is replacement
+            pool.discard_for(pool.submit(pow, 2, 3))
+            assert pool._executor is None
+        finally:
+            pool.shutdown()
+
+    def test_max_workers_floor(self):
+        assert ChunkWorkerPool(max_workers=0).max_workers == 1
@@ -0,0 +1,296 @@
+"""GeminiKeyPool 排程與 PunctuationProcessor 並行分段的測試（假 Gemini client，不連網）。
+
+涵蓋:
+- key 挑選：in-flight 最少者優先、quota 後 (key, model) 冷卻、全冷卻回 None
+- RPM 額度用滿時等待視窗釋出
+- 預設 generator：以公開的 GenerativeServiceClient 組 request、回應補上 `.text`
+- 長文本並行送出後依原順序合併、token 累加、備援模型鏈與膨脹守門不變
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest  # noqa: E402
+
+from src.services.utils.gemini_key_pool import (  # noqa: E402
+    GeminiKeyPool,
+    _GenerateResponse,
+    _KeyedGeminiModel,
+)
+from src.services.utils.punctuation_processor import PunctuationProcessor  # noqa: E402
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Usage:
+    total_token_count = 10
+    prompt_token_count = 7
+    candidates_token_count = 3
+
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = _Usage()
+
+
+def _blocked_raw(finish_reason="SAFETY"):
+    """被擋下的原始回應：有 candidate 但沒有 parts"""
+    return SimpleNamespace(
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=[]), finish_reason=finish_reason)],
+        prompt_feedback=None,
+        usage_metadata=_Usage(),
+    )
+
+
+class _FakeGemini:
+    """假 Gemini：回傳 prompt 最後一段（即原文）加句號；可指定 (key, model) 拋 429，
+    或指定模型回被擋下（blocked）/ 空白（empty）的回應。"""
+
+    def __init__(self, quota=(), reply=None, delay=0.0, blocked=(), empty=()):
+        self.quota = set(quota)
+        self.blocked = set(blocked)
+        self.empty = set(empty)
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def factory(self, api_key, model_name):
+        fake = self
+
+        class _Model:
+            def generate_content(self, contents, generation_config=None):
+                with fake._lock:
+                    fake.calls.append((api_key, model_name))
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if fake.delay:
+                        time.sleep(fake.delay)
+                    if (api_key, model_name) in fake.quota or api_key in fake.quota:
+                        raise RuntimeError("429 Quota exceeded")
+                    if model_name in fake.blocked:
+                        return _GenerateResponse(_blocked_raw())
+                    if model_name in fake.empty:
+                        return _Resp("  ")
+                    source = contents[0]["parts"][0].rsplit("\n\n", 1)[-1]
+                    return _Resp(fake.reply(source) if fake.reply else source + "。")
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+        return _Model()
+
+
+# ── GeminiKeyPool ──────────────────────────────────────────────
+
+def test_acquire_spreads_load_across_keys():
+    pool = GeminiKeyPool(["k1", "k2"], generator_factory=_FakeGemini().factory)
+    a = pool.acquire("m")
+    b = pool.acquire("m")
+    assert {a.api_key, b.api_key} == {"k1", "k2"}
+
+
+def test_quota_cools_key_for_that_model_only():
+    clock = _Clock()
+    pool = GeminiKeyPool(["k1", "k2"], cooldown_seconds=30, clock=clock)
+    lease = pool.acquire("m")
+    pool.release(lease, quota_exceeded=True)
+    for _ in range(3):
+        other = pool.acquire("m")
+        assert other.api_key != lease.api_key
+        pool.release(other)
+    # 其他模型不受影響
+    assert pool.acquire("other") is not None
+    clock.now += 30
+    keys = set()
+    for _ in range(2):
+        got = pool.acquire("m")
+        keys.add(got.api_key)
+    assert lease.api_key in keys
+
+
+def test_all_keys_cooling_returns_none():
+    pool = GeminiKeyPool(["k1"], clock=_Clock())
+    pool.release(pool.acquire("m"), quota_exceeded=True)
+    assert pool.acquire("m") is None
+
+
+def test_rpm_limit_waits_for_window():
+    pool = GeminiKeyPool(["k1"], rpm_limit=1, max_wait_seconds=0)
+    pool.release(pool.acquire("m"))
+    # 視窗內額度已用完，且不允許等待 → None
+    assert pool.acquire("m") is None
+
+
+def test_generator_reused_per_key_and_model():
+    created = []
+    pool = GeminiKeyPool(["k1"], generator_factory=lambda k, m: created.append((k, m)) or object())
+    lease = pool.acquire("m")
+    assert pool.generator(lease) is pool.generator(lease)
+    assert created == [("k1", "m")]
+
+
+def test_keyed_model_builds_request_and_exposes_text():
+    glm = pytest.importorskip("google.ai.generativelanguage")
+    requests = []
+
+    class _Client:
+        def generate_content(self, request):
+            requests.append(request)
+            return glm.GenerateContentResponse(
+                candidates=[glm.Candidate(
+                    content=glm.Content(parts=[glm.Part(text="he"), glm.Part(text="llo")]),
+                    finish_reason=glm.Candidate.FinishReason.STOP,
+                )],
+                usage_metadata={"total_token_count": 5, "prompt_token_count": 3, "candidates_token_count": 2},
+            )
+
+    resp = _KeyedGeminiModel(_Client(), "gemini-2.5-flash").generate_content(
+        [{"role": "user", "parts": ["hi"]}], generation_config={"temperature": 0.2, "max_output_tokens": 64},
+    )
+    assert resp.text == "hello" and resp.usage_metadata.total_token_count == 5
+    (request,) = requests
+    assert request.model == "models/gemini-2.5-flash"
+    assert request.contents[0].parts[0].text == "hi"
+    assert request.generation_config.max_output_tokens == 64
+
+
+def test_keyed_model_rejects_blocked_or_truncated_response():
+    glm = pytest.importorskip("google.ai.generativelanguage")
+    responses = [
+        glm.GenerateContentResponse(),  # 沒有 candidates
+        glm.GenerateContentResponse(candidates=[glm.Candidate(finish_reason=glm.Candidate.FinishReason.SAFETY)]),
+        glm.GenerateContentResponse(candidates=[glm.Candidate(
+            content=glm.Content(parts=[glm.Part(text="半")]),
+            finish_reason=glm.Candidate.FinishReason.MAX_TOKENS,
+        )]),
+    ]
+
+    class _Client:
+        def generate_content(self, request):
+            return responses.pop(0)
+
+    model = _KeyedGeminiModel(_Client(), "gemini-2.5-flash")
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            model.generate_content([{"role": "user", "parts": ["hi"]}])
+
+
+def test_generate_response_without_parts_raises():
+    with pytest.raises(ValueError):
+        _GenerateResponse(_blocked_raw(finish_reason="STOP"))
+
+
+def test_empty_keys_rejected():
+    with pytest.raises(ValueError):
+        GeminiKeyPool([])
+
+
+# ── PunctuationProcessor × key 池 ───────────────────────────────
+
+def _processor(fake, keys=("k1", "k2"), concurrency=4):
+    pool = GeminiKeyPool(list(keys), generator_factory=fake.factory)
+    return PunctuationProcessor(key_pool=pool, max_concurrency=concurrency)
+
+
+def test_chunks_sent_concurrently_and_reassembled_in_order():
+    fake = _FakeGemini(delay=0.05)
+    proc = _processor(fake)
+    text = "\n".join(f"第{i}行" + "字" * 40 for i in range(20))
+    progress = []
+
+    out, model, usage = proc.process(
+        text, language="zh", chunk_size=100,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    chunks = proc._split_text_into_chunks(text, 100)
+    assert out == "\n\n".join(c + "。" for c in chunks)
+    assert model == "gemini-2.5-flash-lite"
+    assert usage == {"total": 10 * len(chunks), "prompt": 7 * len(chunks), "completion": 3 * len(chunks)}
+    assert fake.max_in_flight > 1
+    assert progress[-1] == (len(chunks), len(chunks))
+
+
+def test_concurrency_one_is_serial():
+    fake = _FakeGemini(delay=0.01)
+    proc = _processor(fake, concurrency=1)
+    proc.process("a " * 200, language="en", chunk_size=100)
+    assert fake.max_in_flight == 1
+
+
+def test_quota_on_one_key_fails_over_to_other_key():
+    fake = _FakeGemini(quota={"k1"})
+    proc = _processor(fake)
+    out, model, _ = proc.process("你好", language="zh")
+    assert out == "你好。"
+    assert model == "gemini-2.5-flash-lite"
+
+
+def test_all_keys_quota_switches_to_fallback_model():
+    fake = _FakeGemini(quota={("k1", "gemini-2.5-flash-lite"), ("k2", "gemini-2.5-flash-lite")})
+    proc = _processor(fake)
+    _, model, _ = proc.process("你好", language="zh")
+    assert model == "gemini-2.5-flash"
+
+
+def test_blocked_response_falls_back_to_next_model():
+    fake = _FakeGemini(blocked={"gemini-2.5-flash-lite"})
+    proc = _processor(fake)
+    out, model, _ = proc.process("你好", language="zh")
+    assert out == "你好。"  # 原文沒有被吞掉
+    assert model == "gemini-2.5-flash"
+    assert [m for _, m in fake.calls].count("gemini-2.5-flash-lite") == 2  # 兩把 key 都試過
+
+
+def test_empty_response_is_retried_not_returned():
+    fake = _FakeGemini(empty={"gemini-2.5-flash-lite"})
+    proc = _processor(fake)
+    out, model, _ = proc.process("你好", language="zh")
+    assert (out, model) == ("你好。", "gemini-2.5-flash")
+
+
+def test_all_models_exhausted_raises():
+    fake = _FakeGemini(quota={"k1", "k2"})
+    proc = _processor(fake)
+    with pytest.raises(RuntimeError):
+        proc.process("你好", language="zh")
+
+
+def test_exploded_chunk_falls_back_to_source_text():
+    fake = _FakeGemini(reply=lambda source: source * 3)
+    proc = _processor(fake)
+    text = "甲" * 150
+    out, _, _ = proc.process(text, language="zh", chunk_size=100)
+    assert out == "\n\n".join(proc._split_text_into_chunks(text, 100))
+
+
+def test_progress_callback_error_stops_processing():
+    fake = _FakeGemini()
+    proc = _processor(fake, concurrency=1)
+
+    def _cancel(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        proc.process("a " * 500, language="en", chunk_size=100, progress_callback=_cancel)
+    assert len(fake.calls) < len(proc._split_text_into_chunks("a " * 500, 100))
@@ -0,0 +1,231 @@
+"""LLM 輸出快取（llm_cache_repo）與標點處理掛載測試（假 Gemini、記憶體快取，不連 Mongo）。
+
+涵蓋:
+- 快取鍵：只差空白 / 換行格式的輸入共用一鍵；kind / 模板 / 模型 / 語言任一不同即換鍵
+- 讀寫失敗 best-effort：當成未命中、不拋例外，本進程計數照記
+- get(accept=...)：過不了驗證的條目算未命中
+- PunctuationProcessor：重跑同一份文字（含分段）全部命中、不打 Gemini；模板改動即失效；
+  膨脹（疑似迴圈）的回應不寫入快取，既有壞條目也不會被重播
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.database.repositories import llm_cache_repo  # noqa: E402
+from src.database.repositories.llm_cache_repo import (  # noqa: E402
+    SyncLLMCache,
+    cache_key,
+    local_cache_stats,
+    normalize_input,
+    template_version,
+)
+from src.services.utils.gemini_key_pool import GeminiKeyPool  # noqa: E402
+from src.services.utils.punctuation_processor import PunctuationProcessor  # noqa: E402
+
+
+class _Usage:
+    total_token_count = 10
+    prompt_token_count = 7
+    candidates_token_count = 3
+
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = _Usage()
+
+
+class _FakeGemini:
+    """回傳 prompt 最後一段（也就是送進去的原文）加句號；loop=True 時重複十次（模擬迴圈）"""
+
+    def __init__(self, loop=False):
+        self.prompts = []
+        self.loop = loop
+
+    def factory(self, api_key, model_name):
+        fake = self
+
+        class _Model:
+            def generate_content(self, contents, generation_config=None):
+                prompt = contents[0]["parts"][0]
+                fake.prompts.append(prompt)
+                body = prompt.rsplit("\n\n", 1)[-1].strip() + "。"
+                return _Resp(body * 10 if fake.loop else body)
+
+        return _Model()
+
+
+class _MemorySyncCache:
+    """SyncLLMCache 的記憶體替身（同樣的 get / put 介面）"""
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = self.misses = 0
+
+    def get(self, key, kind, accept=None):
+        doc = self.entries.get(key)
+        if doc and accept is not None and not accept(doc["value"]):
+            doc = None
+        if doc:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return doc
+
+    def put(self, key, kind, value, model, language, template):
+        self.entries[key] = {"value": value, "model": model, "template": template}
+
+
+class _BrokenCollection:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise RuntimeError("mongo down")
+        return fail
+
+
+class _BrokenDB:
+    llm_cache = _BrokenCollection()
+    llm_cache_stats = _BrokenCollection()
+
+
+class _StoredCollection:
+    def __init__(self, doc):
+        self.doc = doc
+
+    def find_one(self, query):
+        return self.doc
+
+
+class _StoredDB:
+    def __init__(self, value):
+        self.llm_cache = _StoredCollection({"_id": "k", "value": value, "model": "m"})
+        self.llm_cache_stats = _BrokenCollection()
+
+
+def _processor(fake, cache):
+    pool = GeminiKeyPool(["k1", "k2"], generator_factory=fake.factory)
+    return PunctuationProcessor(key_pool=pool, max_concurrency=2, cache=cache)
+
+
+# ── 快取鍵 ───────────────────────────────────────────────────────
+
+def test_normalize_input_ignores_whitespace_formatting():
+    assert normalize_input("  你好  \r\n世界\t \r\n\n") == "你好\n世界"
+    # NFC：分解形式與組合形式視為同一輸入
+    assert normalize_input("cafe\u0301") == normalize_input("caf\u00e9")
+    assert normalize_input(None) == ""
+
+
+def test_cache_key_components():
+    base = cache_key("summary", "hello\n", "v1", "gemini-2.5-flash", "en")
+    assert base == cache_key("summary", "  hello", "v1", "gemini-2.5-flash", "en")
+    assert len({
+        base,
+        cache_key("summary_map", "hello", "v1", "gemini-2.5-flash", "en"),
+        cache_key("summary", "hello!", "v1", "gemini-2.5-flash", "en"),
+        cache_key("summary", "hello", "v2", "gemini-2.5-flash", "en"),
+        cache_key("summary", "hello", "v1", "gemini-2.5-pro", "en"),
+        cache_key("summary", "hello", "v1", "gemini-2.5-flash", "zh"),
+    }) == 6
+
+
+def test_template_version_tracks_prompt_text():
+    assert template_version("a {x}") == template_version("a {x}")
+    assert template_version("a {x}") != template_version("a {x}!")
+
+
+def test_sync_cache_failures_are_misses(monkeypatch):
+    monkeypatch.setattr(llm_cache_repo, "_counters", llm_cache_repo._Counters())
+    cache = SyncLLMCache(_BrokenDB())
+    assert cache.get("k", "punctuation") is None
+    cache.put("k", "punctuation", "v", "m", "zh", "t")  # 不拋例外
+    assert local_cache_stats() == {"punctuation": {"hits": 0, "misses": 1}}
+
+
+def test_sync_cache_rejected_entry_counts_as_miss(monkeypatch):
+    monkeypatch.setattr(llm_cache_repo, "_counters", llm_cache_repo._Counters())
+    assert SyncLLMCache(_StoredDB("ok")).get("k", "summary", accept=lambda v: v == "ok")["value"] == "ok"
+    assert SyncLLMCache(_StoredDB("bad")).get("k", "summary", accept=lambda v: v == "ok") is None
+    assert SyncLLMCache(_StoredDB("bad")).get("k", "summary", accept=lambda v: 1 / 0) is None
+    assert local_cache_stats() == {"summary": {"hits": 1, "misses": 2}}
+
+
+def test_sync_llm_cache_respects_switch(monkeypatch):
+    monkeypatch.setattr(llm_cache_repo, "LLM_CACHE_ENABLED", False)
+    assert llm_cache_repo.sync_llm_cache(_BrokenDB()) is None
+    monkeypatch.setattr(llm_cache_repo, "LLM_CACHE_ENABLED", True)
+    assert isinstance(llm_cache_repo.sync_llm_cache(_BrokenDB()), SyncLLMCache)
+
+
+# ── 標點處理 ──────────────────────────────────────────────────────
+
+def test_punctuation_rerun_hits_cache():
+    cache = _MemorySyncCache()
+    first = _FakeGemini()
+    text, model, usage = _processor(first, cache).process("今天天氣很好", language="zh")
+    assert len(first.prompts) == 1 and usage["total"] == 10
+
+    again = _FakeGemini()
+    cached_text, cached_model, cached_usage = _processor(again, cache).process("今天天氣很好 \n", language="zh")
+    assert again.prompts == []
+    assert (cached_text, cached_model) == (text, model)
+    assert cached_usage is None
+
+
+def test_punctuation_chunks_cached_individually():
+    cache = _MemorySyncCache()
+    text = "\n\n".join(f"第{i}段內容" * 3 for i in range(6))
+    first = _FakeGemini()
+    expected = _processor(first, cache).process(text, language="zh", chunk_size=40)
+    assert len(first.prompts) > 1
+    assert len(cache.entries) == len(first.prompts)
+
+    again = _FakeGemini()
+    assert _processor(again, cache).process(text, language="zh", chunk_size=40)[0] == expected[0]
+    assert again.prompts == []
+
+
+def test_punctuation_prompt_change_invalidates(monkeypatch):
+    cache = _MemorySyncCache()
+    _processor(_FakeGemini(), cache).process("今天天氣很好", language="zh")
+
+    original = PunctuationProcessor._get_punctuation_prompt
+
+    def reworded(self, language, text):
+        system_msg, user_msg = original(self, language, text)
+        return system_msg + "（v2）", user_msg
+
+    monkeypatch.setattr(PunctuationProcessor, "_get_punctuation_prompt", reworded)
+    fake = _FakeGemini()
+    _processor(fake, cache).process("今天天氣很好", language="zh")
+    assert len(fake.prompts) == 1 and len(cache.entries) == 2
+
+
+def test_punctuation_exploded_output_not_cached():
+    cache = _MemorySyncCache()
+    looping = _FakeGemini(loop=True)
+    text, _, _ = _processor(looping, cache).process("今天天氣很好", language="zh")
+    assert text == "今天天氣很好"  # 守門退回原文
+    assert cache.entries == {}
+
+    fixed = _FakeGemini()
+    assert _processor(fixed, cache).process("今天天氣很好", language="zh")[0] == "今天天氣很好。"
+    assert len(fixed.prompts) == 1 and len(cache.entries) == 1
+
+
+def test_punctuation_stale_exploded_entry_is_a_miss():
+    cache = _MemorySyncCache()
+    _processor(_FakeGemini(), cache).process("今天天氣很好", language="zh")
+    (entry,) = cache.entries.values()
+    entry["value"] = "今天天氣很好。" * 10  # 舊版寫入的壞條目
+
+    fake = _FakeGemini()
+    assert _processor(fake, cache).process("今天天氣很好", language="zh")[0] == "今天天氣很好。"
+    assert len(fake.prompts) == 1 and cache.misses == 2
+    assert entry is not next(iter(cache.entries.values()))  # 已被新回應覆寫
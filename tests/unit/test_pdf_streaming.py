@@ -0,0 +1,61 @@
+"""PDF 分批排版測試（逐字稿 Paragraph 排版途中才建，佇列最多 PDF_FLOWABLE_BATCH 個）。
+
+CJK 字型檔不進 repo（tools/build-fonts.sh 產生），這裡換成 ReportLab 內建 Helvetica，
+只測排版流程：分批與一次建好的頁數相同、佇列不超過 batch、換頁時不會誤補 _hanging。
+"""
+import re
+
+import pytest
+
+from src.utils.pdf import pdf_generator as pg
+
+
+@pytest.fixture
+def builtin_font(monkeypatch):
+    monkeypatch.setattr(pg, "preload_fonts", lambda: None)
+    monkeypatch.setattr(pg, "primary_font_for_lang", lambda lang: "Helvetica")
+    monkeypatch.setattr(pg, "wrap_text_with_font_tags", lambda text, lang: text)
+
+
+def _page_count(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\n", pdf))
+
+
+def _transcript(lines: int) -> str:
+    return "\n".join(f"[{i:04d}] line {i}" + ("\n" if i % 5 == 0 else "") for i in range(lines))
+
+
+@pytest.mark.parametrize("text", ["", "a", "a\n", "\nb\n\nc", "x\ny\nz"])
+def test_iter_lines_matches_split(text):
+    assert list(pg._iter_lines(text)) == text.split("\n")
+
+
+def test_batched_render_matches_eager(builtin_font, monkeypatch):
+    text = _transcript(1500)
+    monkeypatch.setattr(pg, "PDF_FLOWABLE_BATCH", 10**9)
+    eager = pg.generate_pdf(title="t", transcript_text=text)
+    monkeypatch.setattr(pg, "PDF_FLOWABLE_BATCH", 3)
+    batched = pg.generate_pdf(title="t", transcript_text=text,
+                              summary={"content": {"summary": "s"}}, include_summary=False)
+    assert _page_count(eager) > 10
+    assert _page_count(batched) == _page_count(eager)
+
+
+def test_queue_bounded_by_batch(builtin_font, monkeypatch):
+    monkeypatch.setattr(pg, "PDF_FLOWABLE_BATCH", 8)
+    seen = []
+    original = pg._StreamingDocTemplate._refill
+
+    def spy(self, flowables):
+        original(self, flowables)
+        seen.append(len(flowables))
+
+    monkeypatch.setattr(pg._StreamingDocTemplate, "_refill", spy)
+    pg.generate_pdf(title="t", transcript_text=_transcript(400))
+    assert seen and max(seen) <= 8
+
+
+def test_render_to_path(builtin_font, tmp_path):
+    out = tmp_path / "export.pdf"
+    pg.render_pdf(out, title="t", transcript_text="hello\n\nworld")
+    assert out.read_bytes().startswith(b"%PDF")
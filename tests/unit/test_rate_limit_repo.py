@@ -0,0 +1,140 @@
+"""RateLimitRepository 計數器版測試。
+
+本地 token bucket 是純記憶體，一律執行：
+- 沒追蹤過 / token 還夠 → 交給 Mongo
+- token 用完但 Mongo 沒確認超限（例如別的 replica 剛 clear）→ 仍交給 Mongo
+- token 用完且 Mongo 剛判定超限 → 本地拒絕；確認過期後再問 Mongo
+
+Mongo 部分需要連得到的 MongoDB（MONGODB_URL 或 localhost:27020），連不上 skip：
+- 同一 slot 的請求只 upsert 一份文件
+- 限額與舊版一致，舊格式（一請求一筆）文件一併計入
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27020/?directConnection=true")
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # pragma: no cover
+    MongoClient = None
+
+from src.database.repositories import rate_limit_repo  # noqa: E402
+from src.database.repositories.rate_limit_repo import (  # noqa: E402
+    RateLimitRepository,
+    _LocalBuckets,
+    slot_seconds,
+)
+from src.utils.time_utils import get_utc_timestamp  # noqa: E402
+
+_MONGO_URL = os.environ["MONGODB_URL"]
+
+
+def _mongo_available() -> bool:
+    if MongoClient is None:
+        return False
+    try:
+        c = MongoClient(_MONGO_URL, serverSelectionTimeoutMS=1000)
+        c.admin.command("ping")
+        c.close()
+        return True
+    except Exception:
+        return False
+
+
+requires_mongo = pytest.mark.skipif(
+    not _mongo_available(), reason=f"MongoDB unavailable at {_MONGO_URL}"
+)
+
+
+def test_slot_seconds_scales_with_window():
+    assert slot_seconds(60) == 1
+    assert slot_seconds(900) == 15
+    assert slot_seconds(3600) == 60
+    assert slot_seconds(10) == 1  # 至少 1 秒
+
+
+class TestLocalBuckets:
+    def test_untracked_key_defers_to_mongo(self):
+        assert _LocalBuckets(100, 5).allows("login_ip", "1.1.1.1", 5, 900) is True
+
+    def test_drained_bucket_needs_mongo_confirmation(self):
+        local = _LocalBuckets(100, 5)
+        for _ in range(5):
+            local.record("login_ip", "ip")
+        # token 用完，但 Mongo 還沒判定過超限 → 不可本地拒絕
+        assert local.allows("login_ip", "ip", 5, 900) is True
+        local.observe("login_ip", "ip", allowed=False)
+        assert local.allows("login_ip", "ip", 5, 900) is False
+
+    def test_confirmation_expires(self, monkeypatch):
+        local = _LocalBuckets(100, 5)
+        for _ in range(5):
+            local.record("t", "k")
+        local.allows("t", "k", 5, 900)
+        local.observe("t", "k", allowed=False)
+        monkeypatch.setattr(rate_limit_repo.time, "monotonic", lambda: 10**9)
+        # 確認過期（且時間長到 token 也補滿了）→ 回到 Mongo 判斷
+        assert local.allows("t", "k", 5, 900) is True
+
+    def test_clear_and_lru_eviction(self):
+        local = _LocalBuckets(2, 5)
+        for key in ("a", "b", "c"):
+            local.record("t", key)
+        assert ("t", "a") not in local._buckets  # 最久沒用的被淘汰
+        local.clear("t", "b")
+        assert ("t", "b") not in local._buckets
+
+
+@pytest.fixture
+async def repo():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(_MONGO_URL, serverSelectionTimeoutMS=2000)
+    db = client[f"rate_limit_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        yield RateLimitRepository(db, local_bucket=False)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+@requires_mongo
+async def test_requests_in_same_slot_share_one_document(repo):
+    for _ in range(3):
+        await repo.record_request("login_ip", "1.2.3.4", ttl_seconds=900)
+    assert await repo.collection.count_documents({}) <= 2  # 最多跨到相鄰 slot
+    assert await repo.get_request_count("login_ip", "1.2.3.4", 900) == 3
+
+
+@requires_mongo
+async def test_limit_enforced_and_cleared(repo):
+    for _ in range(5):
+        allowed, _ = await repo.check_rate_limit("login_email", "a@x.com", 5, 900)
+        assert allowed
+        await repo.record_request("login_email", "a@x.com", ttl_seconds=900)
+    assert await repo.check_rate_limit("login_email", "a@x.com", 5, 900) == (False, 0)
+
+    await repo.clear_records("login_email", "a@x.com")
+    assert await repo.check_rate_limit("login_email", "a@x.com", 5, 900) == (True, 5)
+
+
+@requires_mongo
+async def test_legacy_per_request_documents_still_count(repo):
+    now = get_utc_timestamp()
+    await repo.collection.insert_many([
+        {"type": "register_ip", "key": "ip", "created_at": now - 10, "expires_at": now + 3600},
+        {"type": "register_ip", "key": "ip", "created_at": now - 7200, "expires_at": now},  # 窗外
+    ])
+    await repo.record_request("register_ip", "ip", ttl_seconds=3600)
+    assert await repo.get_request_count("register_ip", "ip", 3600) == 2
@@ -0,0 +1,308 @@
+"""SegmentRepository 分桶儲存測試。
+
+分桶格式（build_segment_buckets / bucket 區間計算）為純函數，一律執行；
+repository 的讀寫需要連得到的 MongoDB（MONGODB_URL 或 localhost:27020），連不上則 skip。
+
+覆蓋重點：
+- 範圍讀取只回傳 [start, end)、跨 bucket 邊界正確
+- 部分更新只動所在 bucket，時間範圍查詢跟著更新後的時間戳
+- 舊的內嵌陣列格式可讀、部分更新前自動轉成分桶
+- 整批取代變短時清掉多餘的舊 bucket
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27020/?directConnection=true")
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # pragma: no cover
+    MongoClient = None
+
+from src.database.repositories import segment_repo  # noqa: E402
+from src.database.repositories.segment_repo import (  # noqa: E402
+    SegmentRepository,
+    SegmentVersionConflict,
+    _range_filter,
+    assemble_segments,
+    build_segment_buckets,
+    patch_window,
+    replay_patch_ops,
+    validate_patch_ops,
+)
+
+_MONGO_URL = os.environ["MONGODB_URL"]
+_TEST_DB = "transcriber_test"
+
+
+def _mongo_available() -> bool:
+    if MongoClient is None:
+        return False
+    try:
+        c = MongoClient(_MONGO_URL, serverSelectionTimeoutMS=1000)
+        c.admin.command("ping")
+        c.close()
+        return True
+    except Exception:
+        return False
+
+
+requires_mongo = pytest.mark.skipif(
+    not _mongo_available(), reason=f"MongoDB unavailable at {_MONGO_URL}"
+)
+
+
+def _segs(n, offset=0):
+    return [{"start": float(i + offset), "end": float(i + offset) + 0.9, "text": f"s{i + offset}"} for i in range(n)]
+
+
+# ── 分桶格式（純函數）──────────────────────────────────────────
+
+def test_build_buckets_fixed_size_and_header():
+    header, buckets = build_segment_buckets("t1", _segs(450), bucket_size=200)
+    assert header == {"storage": "buckets", "segment_count": 450, "bucket_size": 200, "bucket_count": 3}
+    assert [b["count"] for b in buckets] == [200, 200, 50]
+    assert [b["start_index"] for b in buckets] == [0, 200, 400]
+    assert buckets[1]["_id"] == "t1:000001"
+    assert (buckets[1]["start_time"], buckets[1]["end_time"]) == (200.0, 399.9)
+    assert assemble_segments(list(reversed(buckets))) == _segs(450)
+
+
+def test_build_buckets_empty():
+    header, buckets = build_segment_buckets("t1", [], bucket_size=200)
+    assert header["bucket_count"] == 0 and buckets == []
+
+
+def test_range_filter_uses_start_index_and_count():
+    f = _range_filter("t1", {"bucket_count": 3}, 99, 101)
+    assert f["task_id"] == "t1" and f["bucket"] == {"$lt": 3}
+    assert f["start_index"] == {"$lt": 101}
+    assert f["$expr"] == {"$gt": [{"$add": ["$start_index", "$count"]}, 99]}
+
+
+def test_validate_patch_ops_tracks_running_count():
+    # split 後 index 3 才存在；merge 後又回到 3 段
+    validate_patch_ops([
+        {"op": "split", "index": 2, "at": 1},
+        {"op": "edit", "index": 3, "text": "x"},
+        {"op": "merge", "index": 2},
+        {"op": "retime", "index": 2, "start": 1.0, "end": 2.0},
+    ], 3)
+    with pytest.raises(IndexError):
+        validate_patch_ops([{"op": "merge", "index": 2}], 3)
+    with pytest.raises(IndexError):
+        validate_patch_ops([{"op": "merge", "index": 0}, {"op": "edit", "index": 2}], 3)
+    with pytest.raises(ValueError):
+        validate_patch_ops([{"op": "retime", "index": 0, "start": 2.0, "end": 1.0}], 3)
+    with pytest.raises(ValueError):
+        validate_patch_ops([{"op": "split", "index": 0, "at": 0}], 3)
+
+
+def test_replay_patch_ops_checks_split_offsets_after_earlier_ops():
+    ops = [
+        {"op": "merge", "index": 1},                # s1 + s2 → "s1s2"
+        {"op": "split", "index": 1, "at": 3},       # 合併後才有第 3 個字元
+        {"op": "edit", "index": 3, "text": "abc"},  # 原 s3
+        {"op": "split", "index": 3, "at": 2},
+    ]
+    start, end = patch_window(ops)
+    assert (start, end) == (1, 6)
+    replay_patch_ops(ops, _segs(10)[start:end], start)
+    with pytest.raises(ValueError):
+        replay_patch_ops([{"op": "split", "index": 1, "at": 2}], _segs(3)[1:], 1)
+    with pytest.raises(ValueError):
+        replay_patch_ops([{"op": "split", "index": 0, "at": 1, "time": 5.0}], _segs(1), 0)
+
+
+# ── repository（需要 MongoDB）─────────────────────────────────
+
+@pytest.fixture
+async def repo(monkeypatch):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    monkeypatch.setattr(segment_repo, "SEGMENT_BUCKET_SIZE", 10)
+    client = AsyncIOMotorClient(_MONGO_URL, serverSelectionTimeoutMS=2000)
+    db = client[_TEST_DB]
+    await db.segments.delete_many({})
+    await db.segment_buckets.delete_many({})
+    r = SegmentRepository(db)
+    await r.create_indexes()
+    yield r
+    await db.segments.delete_many({})
+    await db.segment_buckets.delete_many({})
+    client.close()
+
+
+@requires_mongo
+async def test_replace_all_and_range_reads(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(35))
+
+    assert await repo.get_segments(task_id) == _segs(35)
+    assert await repo.get_range(task_id, 8, 13) == _segs(35)[8:13]
+    assert await repo.get_range(task_id, 30, 100) == _segs(35)[30:]
+    assert await repo.get_range(task_id, 40, 50) == []
+    assert [s["text"] for s in await repo.get_time_range(task_id, 12.5, 14.5)] == ["s12", "s13", "s14"]
+    assert (await repo.get_header(task_id))["segment_count"] == 35
+
+
+@requires_mongo
+async def test_replace_all_shrinks_buckets(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(450))
+    await repo.replace_all(task_id, _segs(5))
+    assert await repo.get_segments(task_id) == _segs(5)
+    assert await repo.buckets.count_documents({"task_id": task_id}) == 1
+
+
+@requires_mongo
+async def test_update_segments_touches_only_target_buckets(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(450))
+    edited = {"start": 500.0, "end": 501.0, "text": "edited"}
+
+    modified = await repo.update_segments(task_id, {3: edited, 4: {**edited, "text": "x"}})
+
+    assert modified == 1
+    segments = await repo.get_segments(task_id)
+    assert segments[3] == edited and segments[4]["text"] == "x"
+    assert segments[5] == _segs(450)[5]
+    # bucket 的時間界線跟著更新 → 時間範圍查詢找得到
+    assert [s["text"] for s in await repo.get_time_range(task_id, 500.2, 500.4)] == ["edited", "x"]
+
+
+@requires_mongo
+async def test_update_segments_rejects_out_of_range(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(3))
+    with pytest.raises(IndexError):
+        await repo.update_segments(task_id, {3: {"text": "x"}})
+    assert await repo.get_segments(task_id) == _segs(3)
+
+
+@requires_mongo
+async def test_legacy_embedded_document_readable_and_migrated_on_edit(repo):
+    task_id = str(uuid.uuid4())
+    await repo.collection.insert_one({"_id": task_id, "segments": _segs(25), "segment_count": 25})
+
+    assert await repo.get_range(task_id, 20, 22) == _segs(25)[20:22]
+    await repo.update_segments(task_id, {0: {"start": 0.0, "end": 0.5, "text": "new"}})
+
+    header = await repo.get_header(task_id)
+    assert header["storage"] == "buckets" and "segments" not in header
+    segments = await repo.get_segments(task_id)
+    assert segments[0]["text"] == "new" and segments[1:] == _segs(25)[1:]
+
+
+@requires_mongo
+async def test_iter_segments_streams_in_order(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(45))
+    assert [s async for s in repo.iter_segments(task_id)] == _segs(45)
+
+    legacy_id = str(uuid.uuid4())
+    await repo.collection.insert_one({"_id": legacy_id, "segments": _segs(3)})
+    assert [s async for s in repo.iter_segments(legacy_id)] == _segs(3)
+    assert [s async for s in repo.iter_segments("missing")] == []
+
+
+@requires_mongo
+async def test_index_lookup_by_time(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(45))  # segment i: [i, i + 0.9)
+    header = await repo.get_header(task_id)
+    assert await repo.index_at_time(task_id, 0.0, header) == 0
+    assert await repo.index_at_time(task_id, 12.95, header) == 13  # 落在 12 與 13 之間的空隙
+    assert await repo.index_at_time(task_id, 23.5, header) == 23
+    assert await repo.index_at_time(task_id, 999, header) == 45
+    assert await repo.index_starting_from(task_id, 23.5, header) == 24
+    assert await repo.index_starting_from(task_id, 20.0, header) == 20
+
+
+@requires_mongo
+async def test_apply_patch_split_merge_across_buckets(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(25))  # buckets: 0-9, 10-19, 20-24
+    version = (await repo.get_header(task_id))["version"]
+
+    header = await repo.apply_patch(task_id, version, [
+        {"op": "split", "index": 3, "at": 1},                  # "s3" → "s" + "3"
+        {"op": "merge", "index": 10},                          # 原 s9 + s10（跨 bucket 0 / 1）
+        {"op": "edit", "index": 0, "text": "first", "speaker": "SPEAKER_01"},
+        {"op": "retime", "index": 24, "start": 30.0, "end": 31.0},
+    ])
+
+    assert header["version"] == version + 1 and header["segment_count"] == 25
+    segments = await repo.get_segments(task_id)
+    assert [s["text"] for s in segments[3:5]] == ["s", "3"]
+    assert segments[3]["end"] == segments[4]["start"] == 3.45  # 依字數比例切時間
+    assert segments[10] == {"start": 9.0, "end": 10.9, "text": "s9s10"}
+    assert segments[11:24] == _segs(25)[11:24]
+    assert segments[0]["speaker"] == "SPEAKER_01"
+    assert await repo.get_range(task_id, 9, 12) == segments[9:12]
+    assert [s["text"] for s in await repo.get_time_range(task_id, 30.5, 30.6)] == ["s24"]
+
+
+@requires_mongo
+async def test_apply_patch_rejects_stale_version(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(5))
+    version = (await repo.get_header(task_id))["version"]
+    await repo.apply_patch(task_id, version, [{"op": "edit", "index": 0, "text": "a"}])
+
+    with pytest.raises(SegmentVersionConflict) as exc:
+        await repo.apply_patch(task_id, version, [{"op": "edit", "index": 0, "text": "b"}])
+    assert exc.value.current_version == version + 1
+    assert (await repo.get_segments(task_id))[0]["text"] == "a"
+
+
+@requires_mongo
+async def test_apply_patch_invalid_split_or_failed_before_write_changes_nothing(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(5))
+    version = (await repo.get_header(task_id))["version"]
+
+    with pytest.raises(ValueError):
+        await repo.apply_patch(task_id, version, [
+            {"op": "edit", "index": 0, "text": "x"},
+            {"op": "split", "index": 1, "at": 5},
+        ])
+
+    async def text_conflict():
+        raise RuntimeError("text changed")
+
+    with pytest.raises(RuntimeError):
+        await repo.apply_patch(task_id, version, [{"op": "edit", "index": 0, "text": "y"}], before_write=text_conflict)
+    assert (await repo.get_header(task_id))["version"] == version
+    assert await repo.get_segments(task_id) == _segs(5)
+
+
+@requires_mongo
+async def test_apply_patch_rebalances_oversized_bucket(repo, monkeypatch):
+    monkeypatch.setattr(segment_repo, "SEGMENT_BUCKET_REBALANCE_FACTOR", 1)
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(10))
+    header = await repo.apply_patch(task_id, 1, [{"op": "split", "index": 0, "at": 1}])
+    assert header["segment_count"] == 11 and header["bucket_count"] == 2
+    assert header["version"] == (await repo.get_header(task_id))["version"]
+    assert [s["text"] for s in await repo.get_segments(task_id)][:3] == ["s", "0", "s1"]
+
+
+@requires_mongo
+async def test_delete_removes_header_and_buckets(repo):
+    task_id = str(uuid.uuid4())
+    await repo.replace_all(task_id, _segs(450))
+    assert await repo.delete(task_id)
+    assert not await repo.exists(task_id)
+    assert await repo.buckets.count_documents({"task_id": task_id}) == 0
@@ -0,0 +1,91 @@
+"""CPU chunked 分段規劃的純函數單元測試(不跑 ffmpeg)。
+
+涵蓋 whisper_processor 的單趟靜音地圖解析(_parse_silencedetect)、
+視窗內最近靜音中點(_nearest_silence_cut)與切點規劃(_plan_cut_points,含短尾合併)。
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.utils.whisper_processor import (  # noqa: E402
+    _nearest_silence_cut,
+    _parse_silencedetect,
+    _plan_cut_points,
+)
+
+MIN = 60_000
+
+
+def _cut(silences, target, search=30_000):
+    return _nearest_silence_cut(silences, [s for s, _ in silences], target, search)
+
+
+class TestParseSilencedetect:
+    def test_pairs_parsed_in_ms(self):
+        stderr = (
+            "[silencedetect @ 0x1] silence_start: 12.5\n"
+            "[silencedetect @ 0x1] silence_end: 13.5 | silence_duration: 1\n"
+            "[silencedetect @ 0x1] silence_start: 100\n"
+            "[silencedetect @ 0x1] silence_end: 101.25 | silence_duration: 1.25\n"
+        )
+        assert _parse_silencedetect(stderr) == [(12500, 13500), (100000, 101250)]
+
+    def test_unterminated_tail_dropped(self):
+        stderr = "silence_start: 1\nsilence_end: 2\nsilence_start: 50\n"
+        assert _parse_silencedetect(stderr) == [(1000, 2000)]
+
+    def test_negative_start_clamped(self):
+        assert _parse_silencedetect("silence_start: -0.0001\nsilence_end: 0.8\n") == [(0, 800)]
+
+    def test_empty(self):
+        assert _parse_silencedetect("") == []
+
+
+class TestNearestSilenceCut:
+    def test_no_silence_keeps_target(self):
+        assert _cut([], 25 * MIN) == 25 * MIN
+
+    def test_picks_nearest_midpoint_in_window(self):
+        t = 25 * MIN
+        silences = [(t - 20_000, t - 18_000), (t + 4_000, t + 6_000), (t + 50_000, t + 52_000)]
+        assert _cut(silences, t) == t + 5_000
+
+    def test_outside_window_ignored(self):
+        t = 25 * MIN
+        assert _cut([(t + 40_000, t + 42_000)], t) == t
+
+    def test_straddling_silence_clipped_to_window(self):
+        t = 25 * MIN
+        # 靜音橫跨視窗右緣：只算視窗內那一截 [t+20s, t+30s] → 中點 t+25s
+        assert _cut([(t + 20_000, t + 90_000)], t) == t + 25_000
+
+
+class TestPlanCutPoints:
+    def test_short_audio_no_cuts(self):
+        assert _plan_cut_points([], 10 * MIN, 25 * MIN) == []
+
+    def test_uniform_without_silence(self):
+        assert _plan_cut_points([], 60 * MIN, 25 * MIN) == [25 * MIN, 50 * MIN]
+
+    def test_short_tail_merged(self):
+        # 52 分鐘：第二刀在 50 分 → 尾段 2 分 < 5 分（20%）→ 併回
+        assert _plan_cut_points([], 52 * MIN, 25 * MIN) == [25 * MIN]
+
+    def test_next_target_follows_adjusted_cut(self):
+        first = 25 * MIN - 10_000
+        silences = [(first - 500, first + 500)]
+        cuts = _plan_cut_points(silences, 60 * MIN, 25 * MIN)
+        assert cuts == [first, first + 25 * MIN]
+
+    def test_cuts_strictly_increasing(self):
+        silences = [(m * MIN, m * MIN + 800) for m in range(1, 300)]
+        cuts = _plan_cut_points(silences, 300 * MIN, 25 * MIN)
+        assert cuts == sorted(cuts)
+        assert len(set(cuts)) == len(cuts)
+        assert all(0 < c < 300 * MIN for c in cuts)
@@ -0,0 +1,288 @@
+"""SummaryService map-reduce 摘要測試（決定性的假 Gemini，不連網、不連 Mongo）。
+
+涵蓋:
+- 切塊：切在講者 / 換行邊界、每塊不超過上限、內容不遺漏
+- 短文本仍是一次 prompt；長文本 map 並行（受 max_concurrency 限制）後 reduce
+- 筆記依原順序進 reduce、token 累加、備援模型鏈、任一塊失敗整份失敗
+- llm_cache：重新產生時 map / reduce 全部命中、不打模型；prompt 模板改動即失效
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services import summary_service as ss  # noqa: E402
+from src.services.summary_service import SummaryService  # noqa: E402
+from src.services.utils.gemini_key_pool import GeminiKeyPool  # noqa: E402
+from src.services.utils.summary_chunker import split_transcript  # noqa: E402
+
+_SUMMARY_JSON = json.dumps({
+    "meta": {"type": "Meeting", "detected_topic": "t"},
+    "summary": "done",
+    "key_points": ["a"],
+    "segments": [],
+    "action_items": [],
+})
+
+
+class _Usage:
+    total_token_count = 10
+    prompt_token_count = 7
+    candidates_token_count = 3
+
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = _Usage()
+
+
+class _FakeGemini:
+    """map prompt → `note:<該塊第一行>`；摘要 prompt（含 JSON Schema）→ 固定 JSON。"""
+
+    def __init__(self, quota_models=(), fail_on=None, delay=0.0):
+        self.quota_models = set(quota_models)
+        self.fail_on = fail_on
+        self.delay = delay
+        self.prompts = []
+        self.models = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def factory(self, api_key, model_name):
+        fake = self
+
+        class _Model:
+            def generate_content(self, contents, generation_config=None):
+                prompt = contents[0]["parts"][0]
+                with fake._lock:
+                    fake.prompts.append(prompt)
+                    fake.models.append(model_name)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if fake.delay:
+                        time.sleep(fake.delay)
+                    if model_name in fake.quota_models:
+                        raise RuntimeError("429 Quota exceeded")
+                    if "JSON" in prompt:
+                        return _Resp(_SUMMARY_JSON)
+                    body = prompt.rsplit("\n\n", 1)[-1].split("\n", 1)[-1]
+                    first = body.strip().split("\n", 1)[0]
+                    if fake.fail_on and fake.fail_on in body:
+                        raise RuntimeError("500 internal")
+                    return _Resp(f"note:{first}")
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+        return _Model()
+
+
+class _DB:
+    def __getattr__(self, name):
+        return None
+
+
+class _MemoryCache:
+    """LLMCacheRepository 的記憶體替身（同樣的 get / put 介面）"""
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = self.misses = 0
+
+    async def get(self, key, kind, accept=None):
+        doc = self.entries.get(key)
+        if doc and accept is not None and not accept(doc["value"]):
+            doc = None
+        if doc:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return doc
+
+    async def put(self, key, kind, value, model, language, template):
+        self.entries[key] = {"value": value, "model": model, "template": template}
+
+
+def _service(fake, concurrency=2, cache=None):
+    pool = GeminiKeyPool(["k1", "k2"], generator_factory=fake.factory)
+    return SummaryService(_DB(), key_pool=pool, max_concurrency=concurrency,
+                          llm_cache=cache or _MemoryCache())
+
+
+def _transcript(turns=40, lines=5):
+    out = []
+    for t in range(turns):
+        out.append(f"[Speaker {t % 3}]")
+        out.extend(f"turn {t:03d} line {i} " + "x" * 60 for i in range(lines))
+    return "\n".join(out)
+
+
+# ── 切塊 ─────────────────────────────────────────────────────────
+
+def test_split_prefers_speaker_boundaries():
+    text = _transcript(turns=12, lines=3)
+    chunks = split_transcript(text, 1000)
+    assert len(chunks) > 1
+    assert all(len(c) <= 1000 for c in chunks)
+    assert all(c.startswith("[Speaker") for c in chunks)
+    assert "".join(c.replace("\n", "") for c in chunks) == text.replace("\n", "")
+
+
+def test_split_falls_back_to_sentences_and_hard_cut():
+    text = "一二三四五。" * 10 + "z" * 25
+    chunks = split_transcript(text, 12)
+    assert all(len(c) <= 12 for c in chunks)
+    assert chunks[0] == "一二三四五。一二三四五。"
+    assert "".join(chunks) == text
+    assert split_transcript("   \n\n ", 10) == []
+
+
+# ── 摘要流程 ──────────────────────────────────────────────────────
+
+async def test_short_transcript_single_prompt():
+    fake = _FakeGemini()
+    data, model, usage = await _service(fake)._generate_with_gemini("hello world", "en")
+    assert data["summary"] == "done" and model == "gemini-2.5-flash"
+    assert len(fake.prompts) == 1
+    assert usage == {"total": 10, "prompt": 7, "completion": 3}
+
+
+async def test_long_transcript_map_reduce(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 3000)
+    monkeypatch.setattr(ss, "SUMMARY_CHUNK_CHARS", 1500)
+    fake = _FakeGemini(delay=0.02)
+    text = _transcript()
+
+    data, model, usage = await _service(fake, concurrency=2)._generate_with_gemini(text, "en")
+
+    maps = [p for p in fake.prompts if "JSON" not in p]
+    assert data["summary"] == "done"
+    assert len(maps) == len(split_transcript(text, 1500)) > 2
+    assert fake.max_in_flight <= 2
+    assert usage["total"] == 10 * len(fake.prompts)
+    # reduce 收到的筆記依原順序
+    final = fake.prompts[-1]
+    assert final.index("note:[Speaker 0]") < final.index(f"[{len(maps)}/{len(maps)}]")
+
+
+async def test_fallback_model_used_when_default_quota_exhausted():
+    fake = _FakeGemini(quota_models={"gemini-2.5-flash"})
+    data, model, _ = await _service(fake)._generate_with_gemini("hello", "en")
+    assert data is not None and model == "gemini-2.5-flash-lite"
+
+
+async def test_failed_chunk_fails_whole_summary(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 3000)
+    monkeypatch.setattr(ss, "SUMMARY_CHUNK_CHARS", 1500)
+    fake = _FakeGemini(fail_on="turn 020")
+    assert await _service(fake)._generate_with_gemini(_transcript(), "en") == (None, "", None)
+    assert not any("JSON" in p for p in fake.prompts)
+
+
+def test_map_prompt_follows_language():
+    service = _service(_FakeGemini())
+    assert "繁體中文" in service._get_map_prompt("zh", "內容", 1, 3)
+    assert "part 2/3 of a long summary notes" in service._get_map_prompt("en", "x", 2, 3, condense=True)
+    assert "JSON" not in service._get_map_prompt("ja", "x", 1, 1)
+
+
+async def test_regenerate_hits_cache_for_map_and_reduce(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 3000)
+    monkeypatch.setattr(ss, "SUMMARY_CHUNK_CHARS", 1500)
+    cache = _MemoryCache()
+    text = _transcript()
+    first = _FakeGemini()
+    expected = await _service(first, cache=cache)._generate_with_gemini(text, "en")
+
+    again = _FakeGemini()
+    data, model, usage = await _service(again, cache=cache)._generate_with_gemini(text + "  \n", "en")
+
+    assert again.prompts == []  # 只差尾端空白：全部命中
+    assert data == expected[0] and model == expected[1]
+    assert usage is None  # 沒有實際呼叫就沒有 token 用量
+    assert cache.hits == len(first.prompts)
+
+
+async def test_prompt_template_change_invalidates_cache(monkeypatch):
+    cache = _MemoryCache()
+    await _service(_FakeGemini(), cache=cache)._generate_with_gemini("hello", "en")
+
+    original = SummaryService._get_summary_prompt
+    monkeypatch.setattr(SummaryService, "_get_summary_prompt",
+                        lambda self, lang, text: original(self, lang, text) + "\n(v2)")
+    fake = _FakeGemini()
+    await _service(fake, cache=cache)._generate_with_gemini("hello", "en")
+    assert len(fake.prompts) == 1 and len(cache.entries) == 2
+
+
+async def test_unparseable_cache_entry_is_refetched():
+    cache = _MemoryCache()
+    await _service(_FakeGemini(), cache=cache)._generate_with_gemini("hello", "en")
+    for entry in cache.entries.values():
+        entry["value"] = "not json"
+
+    fake = _FakeGemini()
+    data, _, usage = await _service(fake, cache=cache)._generate_with_gemini("hello", "en")
+    assert data["summary"] == "done" and len(fake.prompts) == 1
+    assert cache.hits == 0 and cache.misses == 2 and usage is not None
+
+
+async def test_unrelated_runtime_error_is_not_swallowed(monkeypatch):
+    async def broken(self, text, language, usage):
+        raise RuntimeError("bug in map-reduce")
+
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 10)
+    monkeypatch.setattr(SummaryService, "_map_reduce_notes", broken)
+    with pytest.raises(RuntimeError, match="bug in map-reduce"):
+        await _service(_FakeGemini())._generate_with_gemini("x" * 20, "en")
+
+
+async def test_summary_prompt_not_truncated_above_30000_threshold(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 50000)
+    text = "y" * 39000 + "END"
+    fake = _FakeGemini()
+    await _service(fake)._generate_with_gemini(text, "en")
+    assert len(fake.prompts) == 1 and text in fake.prompts[0]
+
+
+def _halving_call(map_sizes, ratio):
+    """_cached_call 替身：map 筆記長度 = 輸入 × ratio；摘要直接回固定結果"""
+    async def call(self, kind, source, language, prompt, template, usage, parse):
+        if kind == "summary_map":
+            map_sizes.append(len(source))
+            return "n" * int(len(source) * ratio), "m"
+        return {"summary": source}, "m"
+    return call
+
+
+async def test_reduce_continues_until_notes_fit(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 1000)
+    monkeypatch.setattr(ss, "SUMMARY_CHUNK_CHARS", 500)
+    sizes = []
+    monkeypatch.setattr(SummaryService, "_cached_call", _halving_call(sizes, 0.5))
+    data, _, _ = await _service(_FakeGemini())._generate_with_gemini("x" * 20000, "en")
+
+    # 每層只減半：舊版 3 層就停並截斷，現在濃縮到不超過門檻為止
+    assert len(data["summary"]) <= 1000
+    assert len(sizes) > 40 + 20 + 10
+
+
+async def test_non_converging_reduce_stops_without_truncating(monkeypatch):
+    monkeypatch.setattr(ss, "SUMMARY_MAP_THRESHOLD_CHARS", 1000)
+    monkeypatch.setattr(ss, "SUMMARY_CHUNK_CHARS", 500)
+    monkeypatch.setattr(SummaryService, "_cached_call", _halving_call([], 1.0))
+    data, _, _ = await _service(_FakeGemini())._generate_with_gemini("x" * 5000, "en")
+    assert data["summary"].count("n") >= 5000
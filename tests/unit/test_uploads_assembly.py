@@ -0,0 +1,298 @@
+"""分片上傳 pwrite 組裝 + 串流 handoff 測試。
+
+不需 MongoDB：用記憶體假 ChunkUploadRepository 取代 `_repo()`，temp 目錄指到 tmp_path；
+串流 handoff 用 moto 模擬 S3（未安裝 moto 則該部分 skip）。
+覆蓋：
+- init 預先配置整檔；各片亂序 pwrite 到 index * chunk_size，complete 只 rename
+- 整檔 content hash 由各片 hash 合成，與直接算一致的合成規則
+- 第 0 片 magic bytes 不符當下就拒絕並清掉 session
+- 片長不符（非最後一片不足 / 超過）回 400
+- 升級前的一片一檔 session 在 complete 時仍能組裝
+- AWS 模式每片即時送成 multipart part；complete 後 dispatch 以 server-side copy 產生
+  handoff 物件；串流中途失敗退回整檔上傳；中止時清掉 multipart
+"""
+import hashlib
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.routers import uploads  # noqa: E402
+
+USER = {"_id": "u1"}
+CHUNK = 64
+
+
+class FakeRepo:
+    def __init__(self):
+        self.docs = {}
+
+    async def take_incomplete_for_retry(self, user_id, filename, total_size):
+        return []
+
+    async def init_upload(self, upload_id, user_id, filename, total_size, total_chunks, temp_dir,
+                          chunk_size=None, handoff=None):
+        self.docs[upload_id] = {
+            "_id": upload_id, "user_id": user_id, "filename": filename, "total_size": total_size,
+            "total_chunks": total_chunks, "chunk_size": chunk_size, "received": [],
+            "chunk_hashes": {}, "temp_dir": str(temp_dir), "status": "uploading", "handoff": handoff,
+        }
+
+    async def get(self, upload_id):
+        return self.docs.get(upload_id)
+
+    async def add_chunk(self, upload_id, user_id, chunk_index, chunk_sha256=None, part_etag=None):
+        doc = self.docs.get(upload_id)
+        if doc is None:
+            return None
+        if chunk_index not in doc["received"]:
+            doc["received"].append(chunk_index)
+        if chunk_sha256 is not None:
+            doc["chunk_hashes"][str(chunk_index)] = chunk_sha256
+        if part_etag is not None:
+            doc["handoff"]["etags"][str(chunk_index)] = part_etag
+        return doc
+
+    async def mark_handoff_failed(self, upload_id):
+        self.docs[upload_id]["handoff"]["failed"] = True
+
+    async def mark_completed(self, upload_id, assembled_path, content_sha256=None):
+        self.docs[upload_id].update(
+            status="completed", assembled_path=str(assembled_path), content_sha256=content_sha256)
+
+    async def delete(self, upload_id):
+        self.docs.pop(upload_id, None)
+
+
+class FakeUploadFile:
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._buf.read(size)
+
+
+@pytest.fixture
+def repo(monkeypatch, tmp_path):
+    fake = FakeRepo()
+    counter = iter(range(1000))
+    monkeypatch.setattr(uploads, "_repo", lambda: fake)
+    monkeypatch.setattr(uploads, "CHUNK_SIZE", CHUNK)
+    monkeypatch.setattr(uploads, "temp_free_bytes", lambda: 1 << 40)
+
+    def _temp_dir(prefix=""):
+        d = tmp_path / f"{prefix}{next(counter)}"
+        d.mkdir()
+        return d
+    monkeypatch.setattr(uploads, "get_temp_dir", _temp_dir)
+    return fake
+
+
+def _audio(size: int) -> bytes:
+    body = bytes((i * 7) % 251 for i in range(size - 3))
+    return b"ID3" + body
+
+
+def _split(data: bytes):
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+async def _upload(data: bytes, order=None):
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    chunks = _split(data)
+    for i in order or range(len(chunks)):
+        await uploads.upload_chunk(init["upload_id"], i, file=FakeUploadFile(chunks[i]), current_user=USER)
+    return init["upload_id"]
+
+
+def test_chunk_span_last_chunk_is_remainder():
+    assert uploads._chunk_span(150, 64, 0) == (0, 64)
+    assert uploads._chunk_span(150, 64, 2) == (128, 22)
+
+
+async def test_out_of_order_chunks_assemble_in_place(repo):
+    data = _audio(CHUNK * 3 + 10)
+    upload_id = await _upload(data, order=[3, 1, 0, 2])
+    temp_dir = Path(repo.docs[upload_id]["temp_dir"])
+    # init 就預先配置好整檔大小
+    assert (temp_dir / uploads.PART_FILENAME).stat().st_size == len(data)
+
+    resp = await uploads.complete_upload(upload_id, current_user=USER)
+
+    assembled = temp_dir / "a.mp3"
+    assert assembled.read_bytes() == data
+    assert not (temp_dir / uploads.PART_FILENAME).exists()
+    assert list(temp_dir.iterdir()) == [assembled]  # 沒有殘留的 chunk 檔
+    expected = hashlib.sha256(b"".join(hashlib.sha256(c).digest() for c in _split(data))).hexdigest()
+    assert resp["content_sha256"] == expected == repo.docs[upload_id]["content_sha256"]
+    assert resp["size"] == len(data)
+
+    # 重送 complete：原樣回傳，不動檔案
+    assert await uploads.complete_upload(upload_id, current_user=USER) == resp
+    assert assembled.read_bytes() == data
+
+
+async def test_bad_magic_rejected_on_first_chunk(repo):
+    data = b"MZ" + bytes(CHUNK * 2)
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    temp_dir = Path(repo.docs[init["upload_id"]]["temp_dir"])
+
+    with pytest.raises(HTTPException) as exc:
+        await uploads.upload_chunk(init["upload_id"], 0, file=FakeUploadFile(data[:CHUNK]), current_user=USER)
+
+    assert exc.value.status_code == 400
+    assert init["upload_id"] not in repo.docs
+    assert not temp_dir.exists()
+
+
+@pytest.mark.parametrize("payload_len", [CHUNK - 1, CHUNK + 1])
+async def test_chunk_length_must_match_span(repo, payload_len):
+    data = _audio(CHUNK * 2)
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    with pytest.raises(HTTPException) as exc:
+        await uploads.upload_chunk(init["upload_id"], 1, file=FakeUploadFile(bytes(payload_len)), current_user=USER)
+    assert exc.value.detail["code"] == "UPLOAD_CHUNK_SIZE_MISMATCH"
+    assert repo.docs[init["upload_id"]]["received"] == []
+
+
+async def test_legacy_chunk_files_absorbed_on_complete(repo):
+    data = _audio(CHUNK + 20)
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    upload_id = init["upload_id"]
+    temp_dir = Path(repo.docs[upload_id]["temp_dir"])
+    chunks = _split(data)
+    # 第 0 片走新路徑；第 1 片是升級前留下的 chunk 檔
+    await uploads.upload_chunk(upload_id, 0, file=FakeUploadFile(chunks[0]), current_user=USER)
+    (temp_dir / "chunk_0001").write_bytes(chunks[1])
+    repo.docs[upload_id]["received"].append(1)
+
+    resp = await uploads.complete_upload(upload_id, current_user=USER)
+
+    assert (temp_dir / "a.mp3").read_bytes() == data
+    assert not (temp_dir / "chunk_0001").exists()
+    assert resp["content_sha256"] is not None
+
+
+def test_combine_chunk_hashes_missing_returns_none():
+    assert uploads.combine_chunk_hashes({"0": "00" * 32}, 2) is None
+
+
+# ── 串流 handoff（moto S3）──────────────────────────────────────
+
+BUCKET = "handoff-test"
+TASK_ID = "12345678-1234-1234-1234-123456789abc"
+S3_CHUNK = 5 * 1024 * 1024  # S3 multipart 非最後 part 的下限
+
+
+@pytest.fixture
+def s3(monkeypatch, repo):
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    from src.utils.storage import backend, handoff
+
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        monkeypatch.setattr(backend, "DEPLOY_ENV", "aws")
+        monkeypatch.setattr(handoff, "S3_BUCKET", BUCKET)
+        monkeypatch.setattr(handoff, "get_s3", lambda: client)
+        monkeypatch.setattr(uploads, "CHUNK_SIZE", S3_CHUNK)
+        yield client
+
+
+def _keys(client):
+    return sorted(o["Key"] for o in client.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+async def _upload_s3(data: bytes, order=None):
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    chunks = [data[i:i + S3_CHUNK] for i in range(0, len(data), S3_CHUNK)]
+    for i in order or range(len(chunks)):
+        await uploads.upload_chunk(init["upload_id"], i, file=FakeUploadFile(chunks[i]), current_user=USER)
+    return init["upload_id"]
+
+
+async def test_chunks_stream_to_s3_and_promote_on_dispatch(repo, s3):
+    from src.utils.storage.handoff import upload_to_handoff
+
+    data = _audio(S3_CHUNK * 2 + 1234)
+    upload_id = await _upload_s3(data, order=[2, 0, 1])
+    assert sorted(repo.docs[upload_id]["handoff"]["etags"]) == ["0", "1", "2"]
+
+    await uploads.complete_upload(upload_id, current_user=USER)
+    assert _keys(s3) == [f"handoff/staged/{upload_id}.mp3"]
+
+    assembled = Path(repo.docs[upload_id]["temp_dir"]) / "a.mp3"
+    uri = upload_to_handoff(TASK_ID, assembled, "mp3")
+
+    assert uri == f"s3://{BUCKET}/handoff/{TASK_ID}.mp3"
+    assert _keys(s3) == [f"handoff/{TASK_ID}.mp3"]  # staged 已刪
+    body = s3.get_object(Bucket=BUCKET, Key=f"handoff/{TASK_ID}.mp3")["Body"].read()
+    assert body == data
+    assert not assembled.exists()
+
+
+async def test_same_size_modified_file_not_promoted(repo, s3):
+    from src.utils.storage.handoff import upload_to_handoff
+
+    data = _audio(S3_CHUNK + 1234)
+    upload_id = await _upload_s3(data)
+    await uploads.complete_upload(upload_id, current_user=USER)
+
+    assembled = Path(repo.docs[upload_id]["temp_dir"]) / "a.mp3"
+    modified = bytearray(data)
+    modified[-1] ^= 0xFF  # 同大小、內容不同
+    assembled.write_bytes(bytes(modified))
+
+    upload_to_handoff(TASK_ID, assembled, "mp3")
+    body = s3.get_object(Bucket=BUCKET, Key=f"handoff/{TASK_ID}.mp3")["Body"].read()
+    assert body == bytes(modified)  # 退回整檔上傳，不是 staged 的舊內容
+
+
+async def test_part_failure_falls_back_to_full_upload(repo, s3, monkeypatch):
+    from src.utils.storage.handoff import upload_to_handoff
+
+    def _boom(*args, **kwargs):
+        raise RuntimeError("s3 down")
+
+    data = _audio(S3_CHUNK + 10)
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    upload_id = init["upload_id"]
+    await uploads.upload_chunk(upload_id, 0, file=FakeUploadFile(data[:S3_CHUNK]), current_user=USER)
+    monkeypatch.setattr(uploads, "upload_staged_part", _boom)
+    await uploads.upload_chunk(upload_id, 1, file=FakeUploadFile(data[S3_CHUNK:]), current_user=USER)
+    assert repo.docs[upload_id]["handoff"]["failed"] is True
+
+    await uploads.complete_upload(upload_id, current_user=USER)
+    assert _keys(s3) == []
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads") is None  # 已 abort
+
+    assembled = Path(repo.docs[upload_id]["temp_dir"]) / "a.mp3"
+    upload_to_handoff(TASK_ID, assembled, "mp3")
+    assert s3.get_object(Bucket=BUCKET, Key=f"handoff/{TASK_ID}.mp3")["Body"].read() == data
+
+
+async def test_abort_discards_multipart(repo, s3, monkeypatch):
+    data = _audio(S3_CHUNK + 10)
+    init = await uploads.init_upload(filename="a.mp3", total_size=len(data), current_user=USER)
+    await uploads.upload_chunk(init["upload_id"], 0, file=FakeUploadFile(data[:S3_CHUNK]), current_user=USER)
+    assert len(s3.list_multipart_uploads(Bucket=BUCKET)["Uploads"]) == 1
+
+    async def _abort(upload_id, user_id):
+        return repo.docs.pop(upload_id)
+    monkeypatch.setattr(repo, "abort", _abort, raising=False)
+
+    await uploads.abort_upload(init["upload_id"], current_user=USER)
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads") is None
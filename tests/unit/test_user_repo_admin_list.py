@@ -0,0 +1,118 @@
+"""UserRepository.admin_list_with_task_counts 測試（管理後台用戶列表）。
+
+需要連得到的 MongoDB（MONGODB_URL 或 localhost:27020），連不上整組 skip。
+覆蓋：
+- 任務統計口徑同 count_by_user（排除已刪除）/ count_active_by_user
+- 一般排序走「先分頁再 $lookup」，依 task_count 排序 / 篩選走「整批 $lookup + $facet」
+- total 反映任務統計篩選後的筆數
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27020/?directConnection=true")
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # pragma: no cover
+    MongoClient = None
+
+from bson import ObjectId  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from src.database.repositories.user_repo import UserRepository  # noqa: E402
+
+_MONGO_URL = os.environ["MONGODB_URL"]
+_TEST_DB = f"user_admin_list_test_{uuid.uuid4().hex[:8]}"
+
+
+def _mongo_available() -> bool:
+    if MongoClient is None:
+        return False
+    try:
+        c = MongoClient(_MONGO_URL, serverSelectionTimeoutMS=1000)
+        c.admin.command("ping")
+        c.close()
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(
+    not _mongo_available(), reason=f"MongoDB unavailable at {_MONGO_URL}"
+)
+
+
+def _task(user_id, status="completed", deleted=False):
+    task_id = str(uuid.uuid4())
+    return {"_id": task_id, "user": {"user_id": user_id}, "status": status, "deleted": deleted}
+
+
+@pytest.fixture
+async def seeded():
+    client = AsyncIOMotorClient(_MONGO_URL, serverSelectionTimeoutMS=2000)
+    db = client[_TEST_DB]
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    await db.users.insert_many([
+        {"_id": a, "email": "a@x.com", "created_at": 3},
+        {"_id": b, "email": "b@x.com", "created_at": 2},
+        {"_id": c, "email": "c@x.com", "created_at": 1},
+    ])
+    await db.tasks.insert_many([
+        _task(str(a)),
+        _task(str(b)), _task(str(b), "processing"), _task(str(b), "pending"),
+        _task(str(b), deleted=True),  # 已刪除不計
+        _task(str(c), "processing", deleted=True),
+    ])
+    try:
+        yield UserRepository(db), {"a": str(a), "b": str(b), "c": str(c)}
+    finally:
+        await client.drop_database(_TEST_DB)
+        client.close()
+
+
+def _counts(users):
+    return [(u["email"], u["task_count"], u["active_task_count"]) for u in users]
+
+
+async def test_page_then_lookup_attaches_counts(seeded):
+    repo, _ = seeded
+    users, total = await repo.admin_list_with_task_counts({}, sort=[("created_at", -1)], skip=0, limit=2)
+    assert total == 3
+    assert _counts(users) == [("a@x.com", 1, 0), ("b@x.com", 3, 2)]
+    assert "_task_stats" not in users[0] and "_uid" not in users[0]
+
+
+async def test_sort_by_task_count(seeded):
+    repo, _ = seeded
+    users, total = await repo.admin_list_with_task_counts({}, sort=[("task_count", -1)], skip=0, limit=10)
+    assert total == 3
+    assert _counts(users) == [("b@x.com", 3, 2), ("a@x.com", 1, 0), ("c@x.com", 0, 0)]
+
+
+async def test_task_filters_apply_to_total_and_page(seeded):
+    repo, _ = seeded
+    users, total = await repo.admin_list_with_task_counts(
+        {}, sort=[("created_at", -1)], skip=0, limit=10,
+        task_filters={"task_count": {"$gte": 1}, "active_task_count": 0},
+    )
+    assert total == 1
+    assert _counts(users) == [("a@x.com", 1, 0)]
+
+
+async def test_user_filters_still_apply(seeded):
+    repo, _ = seeded
+    users, total = await repo.admin_list_with_task_counts(
+        {"email": {"$regex": "^c"}}, sort=[("task_count", -1)], skip=0, limit=10,
+    )
+    assert total == 1 and _counts(users) == [("c@x.com", 0, 0)]
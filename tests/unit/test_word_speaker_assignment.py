@@ -643,3 +643,78 @@ def test_indexed_and_brute_force_agree_on_symmetric_tie_regardless_of_turn_order
     brute = _brute_force_pick_speaker(*span, turns)
 
     assert indexed == brute == "A"
+
+
+# ── 向量化路徑（emission 矩陣 + 矩陣版 Viterbi）與逐字參考實作逐項一致 ──────────
+
+def _random_case(rng, n_turns, n_segments, n_speakers):
+    speakers = [f"SPEAKER_{i:02d}" for i in range(n_speakers)]
+    turns = []
+    t = 0.0
+    for _ in range(n_turns):
+        # 允許重疊 / 巢狀 / 間隙 / 零長度 turn
+        start = max(0.0, t + rng.choice([-1.0, -0.3, 0.0, 0.2, 1.5]) * rng.random())
+        end = start + rng.choice([0.0, 0.4, 2.0, 6.0]) * rng.random()
+        turns.append(_turn(round(start, 3), round(end, 3), rng.choice(speakers)))
+        t = max(t, end)
+    segments = []
+    t = 0.0
+    for _ in range(n_segments):
+        words = []
+        for _ in range(rng.randint(0, 8)):
+            start = t + rng.choice([0.0, 0.05, 0.5]) * rng.random()
+            end = start + rng.choice([0.0, 0.2, 1.5]) * rng.random()
+            token = rng.choice(["甲", "乙", "hel", "lo", " world", "，"])
+            words.append(_w(round(start, 3), round(end, 3), token))
+            t = end
+        seg_end = t if words else t + rng.random() * 3
+        segments.append({"start": round(t - 2, 3) if words else round(t, 3), "end": round(seg_end, 3),
+                         "text": "".join(w["word"] for w in words) or "無字", "words": words})
+        t = seg_end + rng.choice([0.0, 0.4])
+    return segments, turns
+
+
+def test_vectorized_path_matches_python_reference(monkeypatch):
+    import copy
+    import random
+
+    import pytest
+
+    pytest.importorskip("numpy")
+    from src.services.utils import whisper_processor as wp
+
+    rng = random.Random(20240817)
+    cases = [_random_case(rng, rng.randint(1, 40), rng.randint(1, 12), rng.randint(1, 5))
+             for _ in range(300)]
+    vectorized = [wp.assign_speakers_word_level(copy.deepcopy(s), t) for s, t in cases]
+    monkeypatch.setattr(wp, "np", None)
+    reference = [wp.assign_speakers_word_level(copy.deepcopy(s), t) for s, t in cases]
+    assert vectorized == reference
+
+
+def test_matrix_viterbi_matches_reference_under_exact_ties():
+    # 分數只取 {0, 0.3, 0.6}、gap 讓換手成本在 0.3 / 0.09 間切換 → 大量精確平分，
+    # 驗證 stay/switch 與前驅選擇的平分規則（sorted 順序第一個）與逐字版一致
+    import random
+
+    import pytest
+
+    np = pytest.importorskip("numpy")
+    from src.services.utils.whisper_processor import _viterbi_matrix, _viterbi_word_speakers
+
+    rng = random.Random(7)
+    for _ in range(200):
+        speakers = ["A", "B", "C", "D"][: rng.randint(2, 4)]
+        n = rng.randint(1, 30)
+        items, t = [], 0.0
+        for _ in range(n):
+            t += rng.choice([0.0, 0.5])
+            items.append({"start": t, "end": t + 0.2})
+            t += 0.2
+        cands = [
+            {spk: rng.choice([0.3, 0.6]) for spk in speakers if rng.random() < 0.6} or {speakers[0]: 0.3}
+            for _ in range(n)
+        ]
+        used = sorted({spk for c in cands for spk in c})
+        matrix = np.array([[c.get(spk, 0.0) for spk in used] for c in cands])
+        assert _viterbi_matrix(items, used, matrix) == _viterbi_word_speakers(items, cands)
@@ -0,0 +1,170 @@
+"""worker_core.sqs_consumer 預取管線測試。
+
+用 in-memory 假 SQS，不碰 AWS / DB：
+- 預取的輪詢順序沿用 priority.py 的 streak 規則
+- 簽章無效的訊息在預取階段就丟棄，繼續收下一則
+- 持有期間延長 visibility，finish 後交出並清掉 state.prefetched_*
+- 釋放：visibility 歸 0、刪掉預取音檔
+- PrefetchedSource 直接交出已轉好的 MP3，cleanup 連同預取目錄一起清
+"""
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import src.worker_core.sqs_consumer as consumer  # noqa: E402
+import src.worker_core.state as state  # noqa: E402
+from src.transcription.audio_source import PrefetchedSource  # noqa: E402
+from src.worker_core.prefetch import PrefetchedAudio, prefetch_audio  # noqa: E402
+from src.worker_core.priority import NORMAL, PRIORITY  # noqa: E402
+
+QUEUES = {NORMAL: "url-normal", PRIORITY: "url-priority"}
+
+
+class FakeSQS:
+    def __init__(self, messages=None):
+        self.messages = {url: list(msgs) for url, msgs in (messages or {}).items()}
+        self.received = []
+        self.deleted = []
+        self.visibility = []
+
+    def receive_message(self, QueueUrl, WaitTimeSeconds, **kwargs):
+        self.received.append(QueueUrl)
+        pending = self.messages.get(QueueUrl) or []
+        if pending:
+            return {"Messages": [pending.pop(0)]}
+        if WaitTimeSeconds:
+            time.sleep(0.01)  # 模擬 long-poll，避免空轉
+        return {}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.deleted.append((QueueUrl, ReceiptHandle))
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+        self.visibility.append((QueueUrl, ReceiptHandle, VisibilityTimeout))
+
+
+def _msg(task_id, secret=None, tamper=False):
+    body = {"task_id": task_id, "handoff_ext": "mp3"}
+    if secret:
+        payload = json.dumps(body, sort_keys=True, separators=(",", ":"))
+        body["_signature"] = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if tamper:
+            body["task_id"] = "evil"
+    return {"Body": json.dumps(body), "ReceiptHandle": f"rh-{task_id}"}
+
+
+@pytest.fixture(autouse=True)
+def _isolate(monkeypatch):
+    monkeypatch.setattr(consumer, "WORKER_SECRET", "")
+    monkeypatch.setattr(consumer, "PRIORITY_RATIO", 3)
+    monkeypatch.setattr(consumer, "SQS_LONG_POLL_SECONDS", 1)
+    monkeypatch.setattr(consumer, "prefetch_audio", lambda *a, **k: None)
+    monkeypatch.setattr(state, "shutdown", False)
+    yield
+    state.prefetched_task_id = state.prefetched_receipt_handle = state.prefetched_queue_url = None
+
+
+def _run(sqs, streak):
+    prefetcher = consumer._Prefetcher(sqs, QUEUES, streak)
+    prefetcher.start()
+    deadline = time.monotonic() + 2
+    while prefetcher._job is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return prefetcher
+
+
+def test_prefetch_prefers_priority_below_ratio():
+    sqs = FakeSQS({"url-normal": [_msg("n1")], "url-priority": [_msg("p1")]})
+    job = _run(sqs, streak=0).finish()
+    assert (job.task_id, job.source, job.reset_after, job.held) == ("p1", PRIORITY, False, True)
+
+
+def test_prefetch_yields_to_normal_on_reset_slot():
+    sqs = FakeSQS({"url-normal": [_msg("n1")], "url-priority": [_msg("p1")]})
+    job = _run(sqs, streak=3).finish()
+    assert (job.task_id, job.source, job.reset_after) == ("n1", NORMAL, True)
+
+
+def test_invalid_signature_dropped_then_next_message_taken(monkeypatch):
+    monkeypatch.setattr(consumer, "WORKER_SECRET", "s3cret")
+    sqs = FakeSQS({"url-priority": [_msg("bad", "s3cret", tamper=True), _msg("p2", "s3cret")]})
+    job = _run(sqs, streak=0).finish()
+    assert job.task_id == "p2"
+    assert sqs.deleted == [("url-priority", "rh-bad")]
+
+
+def test_held_message_visibility_extended_and_state_cleared(monkeypatch):
+    monkeypatch.setattr(consumer, "PREFETCH_VISIBILITY_EXTEND_SECONDS", 0.01)
+    sqs = FakeSQS({"url-normal": [_msg("n1")]})
+    prefetcher = _run(sqs, streak=0)
+    time.sleep(0.05)
+    assert state.prefetched_receipt_handle == "rh-n1"
+    assert state.prefetched_queue_url == "url-normal"
+
+    job = prefetcher.finish()
+    assert job.task_id == "n1"
+    assert ("url-normal", "rh-n1", consumer.SQS_VISIBILITY_TIMEOUT_SECONDS) in sqs.visibility
+    assert state.prefetched_receipt_handle is None and state.prefetched_queue_url is None
+
+
+def test_finish_without_message_returns_none():
+    sqs = FakeSQS()
+    prefetcher = consumer._Prefetcher(sqs, QUEUES, 0)
+    prefetcher.start()
+    time.sleep(0.02)
+    assert prefetcher.finish() is None
+    assert sqs.received  # 真的有在輪詢
+
+
+def test_release_job_resets_visibility_and_discards_audio(tmp_path):
+    scratch = tmp_path / "prefetch_x"
+    scratch.mkdir()
+    (scratch / "t1.mp3").write_bytes(b"x")
+    job = consumer._Job({"task_id": "t1"}, NORMAL, "url-normal", "rh-t1", False, held=True)
+    job.audio = PrefetchedAudio("t1", "mp3", scratch, scratch / "t1.mp3", None)
+    sqs = FakeSQS()
+
+    consumer._release_job(sqs, job)
+
+    assert sqs.visibility == [("url-normal", "rh-t1", 0)]
+    assert not scratch.exists()
+
+
+def test_prefetch_audio_skips_legacy_messages_without_handoff_ext():
+    assert prefetch_audio("t1", None) is None
+
+
+class _Inner:
+    def __init__(self):
+        self.cleaned = []
+
+    def cleanup(self, succeeded):
+        self.cleaned.append(succeeded)
+
+
+def test_prefetched_source_hands_over_prepared_mp3(tmp_path):
+    scratch = tmp_path / "prefetch_y"
+    scratch.mkdir()
+    mp3 = scratch / "t1.mp3"
+    mp3.write_bytes(b"x")
+    inner = _Inner()
+    source = PrefetchedSource(inner, mp3, None, scratch)
+
+    assert source.acquire(tmp_path / "run") == mp3
+    assert source.prepared == (mp3, None)
+    source.cleanup(True)
+    assert inner.cleaned == [True]
+    assert not scratch.exists()
@@ -63,3 +63,71 @@ def test_segments_get_punctuation_not_raw():
     out = align_segments_to_punctuated_text(segs, "我來介紹一下，這個產品。")
     joined = "".join(s["text"] for s in out)
     assert "，" in joined and "。" in joined
+
+
+# ── 錨點對齊：強制走錨點路徑，與整份 difflib 的切段結果一致 ─────────────────
+
+def _long_case(seed, nseg):
+    import random
+
+    rng = random.Random(seed)
+    vocab = [chr(c) for c in range(0x4E00, 0x4E00 + 150)]
+    segs, out = [], []
+    for k in range(nseg):
+        text = "".join(rng.choice(vocab) for _ in range(rng.randint(5, 30)))
+        segs.append({"start": k, "end": k + 1, "text": text})
+        if k % 7 == 0:
+            out.append(f"[SPEAKER_0{k % 3}] ")
+        for ch in text:
+            r = rng.random()
+            if r < 0.01:
+                continue  # Gemini 刪字
+            if r < 0.02:
+                out.append(rng.choice(vocab))  # Gemini 改字
+                continue
+            out.append(ch)
+            if r > 0.97:
+                out.append("，")
+        out.append("。")
+    return segs, "".join(out)
+
+
+def _align_both_ways(monkeypatch, segs, punctuated):
+    from src.utils import text_utils
+
+    monkeypatch.setattr(text_utils, "_DIRECT_ALIGN_MAX_CELLS", 0)
+    anchored = align_segments_to_punctuated_text(segs, punctuated)
+    monkeypatch.setattr(text_utils, "_DIRECT_ALIGN_MAX_CELLS", float("inf"))
+    direct = align_segments_to_punctuated_text(segs, punctuated)
+    return anchored, direct
+
+
+def test_anchored_alignment_matches_difflib_on_short_cases(monkeypatch):
+    cases = [
+        (_segs("今天天氣", "很好嗎"), "今天天氣，很好嗎？"),
+        (_segs("今天天氣", "很好嗎"), "[SPEAKER_00] 今天天氣，很好喔？"),
+        (_segs("我們今天來討論產品規劃", "第一點是時程"), "我們今天來討論一下產品規劃。第一點是時程。"),
+    ]
+    for segs, punctuated in cases:
+        anchored, direct = _align_both_ways(monkeypatch, segs, punctuated)
+        assert anchored == direct
+
+
+def test_anchored_alignment_matches_difflib_on_long_transcript(monkeypatch):
+    segs, punctuated = _long_case(seed=3, nseg=400)
+    anchored, direct = _align_both_ways(monkeypatch, segs, punctuated)
+    assert anchored == direct
+    assert all(s["text"] for s in anchored)
+
+
+def test_anchor_chain_is_monotonic_and_unique():
+    from src.utils.text_utils import _anchor_chain
+
+    a = "甲乙丙丁戊己庚辛壬癸甲乙丙丁"
+    b = "戊己庚辛，甲乙丙丁戊己。壬癸"
+    chain = _anchor_chain(a, b, 2)
+    assert chain
+    assert all(i1 < i2 and j1 < j2 for (i1, j1), (i2, j2) in zip(chain, chain[1:], strict=False))
+    # 「甲乙」「乙丙」「丙丁」在 a 出現兩次 → 不能當錨點
+    assert all(a[i:i + 2] not in ("甲乙", "乙丙", "丙丁") for i, _ in chain)
+    assert all(a[i:i + 2] == b[j:j + 2] for i, j in chain)
@@ -29,10 +29,10 @@ from src.utils.audio_converter import (  # noqa: E402
     VALID_MP3_SAMPLE_RATES,
     _adaptive_target,
     _is_compact,
-    _probe,
     convert_to_mp3,
     convert_to_wav,
 )
+from src.utils.media_probe import probe_media  # noqa: E402
 
 
 pytestmark = pytest.mark.skipif(
@@ -105,7 +105,7 @@ def test_reencode_when_stereo(make_audio):
     path = make_audio("input.mp3", channels=2)
     out, transcoded = convert_to_mp3(path)
     assert transcoded is True
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     assert probe["streams"][0]["channels"] == 1
 
 
@@ -114,7 +114,7 @@ def test_reencode_when_high_bitrate(make_audio):
     path = make_audio("input.mp3", bit_rate=192_000)
     out, transcoded = convert_to_mp3(path)
     assert transcoded is True
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     assert int(probe["streams"][0]["bit_rate"]) <= BITRATE_VBR_SLACK
 
 
@@ -135,7 +135,7 @@ def test_reencode_when_wrong_container(make_audio):
     out, transcoded = convert_to_mp3(path)
     assert transcoded is True
     assert out.suffix == ".mp3"
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     assert "mp3" in probe["format"]["format_name"].split(",")
 
 
@@ -147,7 +147,7 @@ def test_reencode_when_wav_disguised_as_mp3(make_audio, tmp_path):
 
     out, transcoded = convert_to_mp3(fake_mp3)
     assert transcoded is True, "Predicate 被副檔名騙了（歷史 bug 回歸）"
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     assert probe["streams"][0]["codec_name"] == "mp3"
 
 
@@ -159,7 +159,7 @@ def test_adaptive_caps_sample_rate_down(make_audio):
     path = make_audio("input.mp3", sample_rate=22050, channels=2, bit_rate=64_000)
     out, transcoded = convert_to_mp3(path)
     assert transcoded is True
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     sr = int(probe["streams"][0]["sample_rate"])
     br = int(probe["streams"][0]["bit_rate"])
     assert sr == SAMPLE_RATE_CAP, "sample_rate 沒 cap 到 16kHz"
@@ -176,7 +176,7 @@ def test_adaptive_no_upsample_no_grow(make_audio):
     path = make_audio("input.mp3", sample_rate=8000, channels=2, bit_rate=32_000)
     out, transcoded = convert_to_mp3(path)
     assert transcoded is True
-    probe = _probe(out)
+    probe = probe_media(out).ffprobe
     sr = int(probe["streams"][0]["sample_rate"])
     br = int(probe["streams"][0]["bit_rate"])
     assert sr == 8000, "sample_rate 被誤 upsample（變大檔案）"
@@ -246,7 +246,7 @@ def test_convert_to_wav_basic(make_audio, tmp_path):
     wav = tmp_path / "out.wav"
     out = convert_to_wav(mp3, wav)
     assert out == wav
-    probe = _probe(wav)
+    probe = probe_media(wav).ffprobe
     assert int(probe["streams"][0]["sample_rate"]) == 16000
     assert probe["streams"][0]["channels"] == 1
 
@@ -0,0 +1,147 @@
+"""MediaProbe 共用探測結果 + 快取測試。
+
+對應 src/utils/media_probe.py。ffprobe subprocess 以 monkeypatch 取代
+（`_run_ffprobe`），只驗證快取 key、rebind、序列化與 Compact probe 推導；
+真實 ffprobe 行為由 test_audio_converter.py 覆蓋。
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+
+from src.utils import media_probe as mp  # noqa: E402
+from src.utils.audio_converter import compact_probe  # noqa: E402
+from src.utils.media_probe import MediaProbe, probe_media, resolve_probe  # noqa: E402
+
+
+_RAW = {
+    "format": {"format_name": "mov,mp4,m4a", "duration": "12.5", "bit_rate": "96000",
+               "tags": {"title": "private"}},
+    "streams": [{"codec_type": "audio", "codec_name": "aac", "channels": 2,
+                 "sample_rate": "44100", "bit_rate": "96000", "tags": {"handler": "x"}}],
+}
+
+
+@pytest.fixture
+def fake_ffprobe(monkeypatch):
+    calls = []
+
+    def _run(path):
+        calls.append(str(path))
+        return _RAW
+
+    monkeypatch.setattr(mp, "_run_ffprobe", _run)
+    monkeypatch.setattr(mp, "_cache", mp.OrderedDict())
+    return calls
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    p = tmp_path / "in.m4a"
+    p.write_bytes(b"\0" * 1024)
+    return p
+
+
+def test_probe_fields(fake_ffprobe, audio_file):
+    probe = probe_media(audio_file)
+    assert probe.duration_seconds == 12.5
+    assert probe.duration_ms == 12500
+    assert probe.codec == "aac"
+    assert probe.channels == 2
+    assert probe.sample_rate == 44100
+    assert probe.bit_rate == 96000
+    # tags 不保留（不外流到 SQS body）
+    assert "tags" not in probe.format
+    assert "tags" not in probe.streams[0]
+
+
+def test_same_file_probed_once(fake_ffprobe, audio_file):
+    assert probe_media(audio_file) is probe_media(audio_file)
+    assert len(fake_ffprobe) == 1
+
+
+def test_modified_file_reprobed(fake_ffprobe, audio_file):
+    probe_media(audio_file)
+    audio_file.write_bytes(b"\0" * 2048)
+    probe_media(audio_file)
+    assert len(fake_ffprobe) == 2
+
+
+def test_missing_file_returns_none(fake_ffprobe, tmp_path):
+    assert probe_media(tmp_path / "nope.mp3") is None
+    assert fake_ffprobe == []
+
+
+def test_ffprobe_failure_returns_none(monkeypatch, audio_file):
+    monkeypatch.setattr(mp, "_run_ffprobe", lambda path: None)
+    monkeypatch.setattr(mp, "_cache", mp.OrderedDict())
+    assert probe_media(audio_file) is None
+
+
+def test_cache_bounded(fake_ffprobe, tmp_path, monkeypatch):
+    monkeypatch.setattr(mp, "_CACHE_MAX_ENTRIES", 2)
+    for i in range(3):
+        f = tmp_path / f"{i}.mp3"
+        f.write_bytes(b"x")
+        probe_media(f)
+    assert len(mp._cache) == 2
+
+
+def test_dict_roundtrip(fake_ffprobe, audio_file):
+    probe = probe_media(audio_file)
+    restored = MediaProbe.from_dict(probe.to_dict())
+    assert restored.size == probe.size
+    assert restored.ffprobe == probe.ffprobe
+
+
+def test_resolve_carried_probe_skips_ffprobe(fake_ffprobe, audio_file, tmp_path):
+    carried = probe_media(audio_file).to_dict()
+    copy = tmp_path / "downloaded.m4a"
+    copy.write_bytes(audio_file.read_bytes())
+    resolved = resolve_probe(copy, carried)
+    assert resolved.path == str(copy)
+    assert resolved.codec == "aac"
+    assert len(fake_ffprobe) == 1  # 只有 intake 那一次
+
+
+def test_resolve_size_mismatch_reprobes(fake_ffprobe, audio_file, tmp_path):
+    carried = probe_media(audio_file).to_dict()
+    other = tmp_path / "other.m4a"
+    other.write_bytes(b"\1" * 10)
+    resolve_probe(other, carried)
+    assert fake_ffprobe == [str(audio_file), str(other)]
+
+
+def test_compact_probe_after_reencode(fake_ffprobe, audio_file, tmp_path):
+    source = probe_media(audio_file)
+    out = tmp_path / "in.mp3"
+    out.write_bytes(b"\0" * 100)
+    probe = compact_probe(source, out, transcoded=True)
+    assert probe.codec == "mp3"
+    assert probe.channels == 1
+    assert probe.sample_rate == 16000
+    assert probe.bit_rate == 96000
+    assert probe.duration_seconds == 12.5
+    assert len(fake_ffprobe) == 1
+
+
+def test_compact_probe_after_rename(fake_ffprobe, audio_file, tmp_path):
+    source = probe_media(audio_file)
+    out = audio_file.with_suffix(".mp3")
+    audio_file.rename(out)
+    probe = compact_probe(source, out, transcoded=False)
+    assert probe.path == str(out)
+    assert probe.ffprobe == source.ffprobe
+
+
+def test_compact_probe_without_source():
+    assert compact_probe(None, Path("/tmp/x.mp3"), transcoded=True) is None
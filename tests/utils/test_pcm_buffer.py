@@ -0,0 +1,88 @@
+"""PcmBuffer 共享 PCM 測試（不跑 ffmpeg、不載入模型）。
+
+對應 src/utils/pcm_buffer.py 與 whisper_processor 的 `_plan_pcm_chunks`：
+- detect_silences 與 silencedetect 同語意（振幅門檻 + 最短長度）
+- 純記憶體 buffer 寫出共享檔後，worker 端 memmap 取到同一段樣本
+- PCM 分段的樣本區間首尾相接、覆蓋整段
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+
+np = pytest.importorskip("numpy")
+
+from src.utils.pcm_buffer import PcmBuffer, load_pcm_slice  # noqa: E402
+
+SR = 16000
+
+
+def _tone(seconds):
+    t = np.arange(int(seconds * SR), dtype=np.float32)
+    return (0.5 * np.sin(2 * np.pi * 440 * t / SR)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def test_detect_silences_min_length():
+    samples = np.concatenate([_tone(1), _silence(2), _tone(1), _silence(0.2), _tone(1)])
+    buf = PcmBuffer(samples)
+    # 0.2s 的短靜音（< 0.5s）不算；正弦過零點的單一樣本也不算
+    assert buf.detect_silences(-30, 0.5) == [(1000, 3000)]
+
+
+def test_detect_silences_trailing_and_leading():
+    samples = np.concatenate([_silence(1), _tone(1), _silence(1)])
+    assert PcmBuffer(samples).detect_silences(-30, 0.5) == [(0, 1000), (2000, 3000)]
+
+
+def test_detect_silences_none():
+    assert PcmBuffer(_tone(2)).detect_silences(-30, 0.5) == []
+
+
+def test_duration_and_sample_index():
+    buf = PcmBuffer(_silence(2.5))
+    assert buf.duration_ms == 2500
+    assert buf.sample_index(1000) == SR
+    assert buf.sample_index(10_000) == buf.num_samples
+
+
+def test_shared_path_roundtrip(tmp_path):
+    samples = _tone(1)
+    buf = PcmBuffer(samples)
+    path = buf.shared_path(tmp_path)
+    assert buf.shared_path(tmp_path) == path  # 只寫一次
+    chunk = load_pcm_slice(str(path), 100, 200)
+    assert np.array_equal(chunk, samples[100:200])
+
+
+def test_plan_pcm_chunks_covers_whole_buffer(tmp_path):
+    from src.services.utils.whisper_processor import (
+        WhisperProcessor,
+        transcribe_pcm_chunk_worker,
+    )
+
+    samples = np.concatenate([_tone(4), _silence(1), _tone(4), _silence(1), _tone(3)])
+    buf = PcmBuffer(samples)
+    jobs = WhisperProcessor(model=None, model_name="turbo")._plan_pcm_chunks(
+        buf, tmp_path, chunk_duration_ms=4500, language="zh",
+    )
+    assert all(fn is transcribe_pcm_chunk_worker for fn, _, _ in jobs)
+    ranges = [(args[1], args[2]) for _, args, _ in jobs]
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == buf.num_samples
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:], strict=False))
+    # 切點落在靜音中點（4.5s 附近的靜音是 4–5s）
+    assert jobs[1][2] == 4.5
+    assert [args[3] for _, args, _ in jobs] == list(range(1, len(jobs) + 1))
@@ -55,6 +55,15 @@ class TestDetectContentType:
         assert backend.detect_content_type(self._write(tmp_path, "a.flac", b"xxxxxxxxxxxx")) == "audio/flac"
 
 
+class TestAudioContentType:
+    @pytest.mark.parametrize("ext", ["flac", ".flac", "FLAC"])
+    def test_known_ext(self, ext):
+        assert backend.audio_content_type(ext) == "audio/flac"
+
+    def test_unknown_falls_back_to_mpeg(self):
+        assert backend.audio_content_type("xyz") == "audio/mpeg"
+
+
 class TestValidateAwsConfig:
     def test_local_mode_is_noop(self, monkeypatch):
         monkeypatch.setattr(backend, "DEPLOY_ENV", "local")
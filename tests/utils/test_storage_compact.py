@@ -94,3 +94,82 @@ class TestLocalModeRoundTrip:
         monkeypatch.chdir(tmp_path)
         compact.delete_audio(VALID_ID)                   # 不存在也不報錯
         compact.delete_audio_by_path("")                 # 空路徑直接 return
+
+
+class TestAudioUrlCache:
+    """resolve_audio_url_async：命中快取不打 S3，save / move / delete 會清快取。"""
+
+    PATH = f"s3://bucket/uploads/free/{VALID_ID}.mp3"
+
+    class _CountingS3:
+        def __init__(self):
+            self.heads = 0
+            self.signs = 0
+            self.missing = set()
+
+        def head_object(self, Bucket, Key):
+            self.heads += 1
+            if Key in self.missing:
+                raise RuntimeError("404")
+            return {}
+
+        def generate_presigned_url(self, operation, Params, ExpiresIn):
+            self.signs += 1
+            return f"https://bucket.s3.amazonaws.com/{Params['Key']}?sig={self.signs}"
+
+        def delete_object(self, Bucket, Key):
+            self.missing.add(Key)
+
+        def copy_object(self, Bucket, CopySource, Key):
+            self.missing.discard(Key)
+
+    @pytest.fixture
+    def s3(self, monkeypatch):
+        monkeypatch.setattr(compact, "is_aws", lambda: True)
+        monkeypatch.setattr(compact, "S3_BUCKET", "bucket")
+        fake = self._CountingS3()
+        monkeypatch.setattr(compact, "get_s3", lambda: fake)
+        compact._audio_url_cache.clear()
+        yield fake
+        compact._audio_url_cache.clear()
+
+    async def test_hit_skips_s3(self, s3):
+        first = await compact.resolve_audio_url_async(self.PATH)
+        second = await compact.resolve_audio_url_async(self.PATH)
+        assert first == second
+        assert (s3.heads, s3.signs) == (1, 1)
+
+    async def test_entry_expires(self, s3, monkeypatch):
+        await compact.resolve_audio_url_async(self.PATH)
+        real = compact.time.monotonic
+        monkeypatch.setattr(compact.time, "monotonic", lambda: real() + compact.MAX_PRESIGNED_URL_TTL)
+        await compact.resolve_audio_url_async(self.PATH)
+        assert s3.heads == 2
+
+    async def test_missing_not_cached(self, s3):
+        s3.missing.add(f"uploads/free/{VALID_ID}.mp3")
+        assert await compact.resolve_audio_url_async(self.PATH) is None
+        s3.missing.clear()  # Worker 隨後上傳完成
+        assert await compact.resolve_audio_url_async(self.PATH) is not None
+
+    async def test_delete_invalidates(self, s3):
+        await compact.resolve_audio_url_async(self.PATH)
+        compact.delete_audio_by_path(self.PATH)
+        assert await compact.resolve_audio_url_async(self.PATH) is None
+
+    async def test_move_invalidates_source(self, s3):
+        await compact.resolve_audio_url_async(self.PATH)
+        new_path = compact.move_audio(VALID_ID, "free", "kept")
+        assert await compact.resolve_audio_url_async(self.PATH) is None
+        assert "uploads/kept/" in await compact.resolve_audio_url_async(new_path)
+
+    async def test_invalidate_during_lookup_is_not_written_back(self, s3):
+        url, generation = compact._audio_url_cache.get(self.PATH)
+        assert url is None
+        compact._invalidate_audio_url(self.PATH)
+        compact._audio_url_cache.put(self.PATH, "https://stale", generation)
+        assert compact._audio_url_cache.get(self.PATH)[0] is None
+
+    async def test_non_s3_path_returns_none(self, s3):
+        assert await compact.resolve_audio_url_async("/local/uploads/x.mp3") is None
+        assert s3.heads == 0
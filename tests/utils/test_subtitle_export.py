@@ -0,0 +1,107 @@
+"""subtitle_export 單元測試：串流輸出需與前端 useSubtitleMode.js 逐字相同。"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault(
+    "JWT_SECRET_KEY",
+    "a3f2c1b8e4d6a9f5c2b8e1d4a6f9c3b2e5d8a1f4c7b6e3d2a5f8c1b4e7d6a9f2",
+)
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.utils.subtitle_export import (  # noqa: E402
+    MAX_DENSITY_SECONDS,
+    format_time_srt,
+    format_time_vtt,
+    format_timestamp,
+    group_segments,
+    iter_srt,
+    iter_txt,
+    iter_vtt,
+)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": " 你好 ", "speaker": "SPEAKER_00"},
+    {"start": 1.6, "end": 2.75, "text": "世界", "speaker": "SPEAKER_00"},
+    {"start": 3.2, "end": 4.25, "text": "早安", "speaker": "SPEAKER_01"},
+    {"start": 3725.5, "end": 3727.0, "text": "再見", "speaker": "SPEAKER_01"},
+]
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _render(writer, segments, density=3.0, *args):
+    return "".join([piece async for piece in writer(group_segments(_aiter(segments), density), *args)])
+
+
+async def _groups(segments, density):
+    return [g async for g in group_segments(_aiter(segments), density)]
+
+
+class TestGrouping:
+    async def test_merges_same_speaker_within_threshold(self):
+        groups = await _groups(SEGMENTS, 3.0)
+        assert [(g.start, g.end, g.speaker, g.text) for g in groups] == [
+            (0.0, 2.75, "SPEAKER_00", "你好 世界"),
+            (3.2, 4.25, "SPEAKER_01", "早安"),
+            (3725.5, 3727.0, "SPEAKER_01", "再見"),
+        ]
+
+    async def test_zero_threshold_one_row_per_segment(self):
+        assert len(await _groups(SEGMENTS, 0)) == 4
+
+    async def test_max_threshold_merges_all_same_speaker(self):
+        groups = await _groups(SEGMENTS, MAX_DENSITY_SECONDS)
+        assert [g.text for g in groups] == ["你好 世界", "早安 再見"]
+
+    async def test_no_speaker_segments_merge_by_time(self):
+        plain = [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in SEGMENTS]
+        assert [g.text for g in await _groups(plain, 3.0)] == ["你好 世界", "早安", "再見"]
+
+
+class TestTimeFormat:
+    @pytest.mark.parametrize("seconds,srt,vtt", [
+        (0, "00:00:00,000", "00:00:00.000"),
+        (4.25, "00:00:04,250", "00:00:04.250"),
+        (3725.5, "01:02:05,500", "01:02:05.500"),
+    ])
+    def test_srt_vtt(self, seconds, srt, vtt):
+        assert format_time_srt(seconds) == srt
+        assert format_time_vtt(seconds) == vtt
+
+    def test_txt_timestamp(self):
+        assert format_timestamp(65, "start", 0) == "1:05"
+        assert format_timestamp(3725.5, "range", 3727) == "1:02:05 - 1:02:07"
+
+
+class TestWriters:
+    async def test_srt(self):
+        names = {"SPEAKER_00": "Alice"}
+        assert await _render(iter_srt, SEGMENTS, 3.0, names) == (
+            "1\n00:00:00,000 --> 00:00:02,750\n[Alice] 你好 世界\n"
+            "\n2\n00:00:03,200 --> 00:00:04,250\n[SPEAKER_01] 早安\n"
+            "\n3\n01:02:05,500 --> 01:02:07,000\n[SPEAKER_01] 再見\n"
+        )
+
+    async def test_vtt_without_speaker(self):
+        assert await _render(iter_vtt, SEGMENTS[:1], 3.0, None) == (
+            "WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n你好\n"
+        )
+
+    async def test_empty_outputs_match_frontend(self):
+        assert await _render(iter_vtt, [], 3.0, {}) == "WEBVTT\n\n"
+        assert await _render(iter_srt, [], 3.0, {}) == ""
+        assert await _render(iter_txt, [], 3.0, {}) == ""
+
+    async def test_txt_range(self):
+        assert await _render(iter_txt, SEGMENTS, 3.0, {}, "range") == (
+            "0:00 - 0:02 [SPEAKER_00] 你好 世界\n"
+            "0:03 - 0:04 [SPEAKER_01] 早安\n"
+            "1:02:05 - 1:02:07 [SPEAKER_01] 再見"
+        )